@@ -5,25 +5,32 @@ This module serves as the entry point for the Launcher application. It handles
 initialization and decides whether to show the welcome wizard or the main application
 based on user preferences.
 """
-import sys
+import time
 
-import gi
+# Time zero of --profile-startup, read before anything is imported
+_START = time.perf_counter()
 
-gi.require_version("Gtk", "4.0")
+import sys
+from typing import Optional
 
-from cloud.ivanbotty.Launcher.config.config import (should_show_onboarding,
-                                                    mark_onboarding_complete)
-from cloud.ivanbotty.Launcher.app import App
+from cloud.ivanbotty.Launcher.config.config import should_show_onboarding
 from cloud.ivanbotty.utils import configure_cli, initialize_app, setup_logging
-from cloud.ivanbotty.Wizard.app import WelcomeWizard
+from cloud.ivanbotty.utils.startup_profile import PROFILER
+
+_IMPORTED = time.perf_counter()
 
 LAUNCHER_APP_ID = "cloud.ivanbotty.Launcher"
 WIZARD_APP_ID = "cloud.ivanbotty.Launcher.Wizard"
 
 
-def main() -> int:
+def main(started: Optional[float] = None) -> int:
     """Initialize and run the application.
 
+    Args:
+        started: time.perf_counter() value at which the launch was requested,
+            when a zygote forked this process with the entry point imported
+            (default: the start of this module)
+
     Returns:
         Exit code (0 for success, 1 for failure)
     """
@@ -35,6 +42,18 @@ def main() -> int:
         print(f"Error parsing command-line arguments: {e}", file=sys.stderr)
         return 1
 
+    if args.profile_startup:
+        if started is None:
+            PROFILER.enable(args.profile_startup, origin=_START)
+            PROFILER.record("import entry point", _START, _IMPORTED)
+        else:
+            PROFILER.enable(args.profile_startup, origin=started)
+
+    if args.trace_allocations:
+        from cloud.ivanbotty.utils.heap import TRACER
+
+        TRACER.enable()
+
     # Initialize application resources and database
     if not initialize_app("Launcher"):
         return 1
@@ -43,10 +62,15 @@ def main() -> int:
     try:
         logger.info("Starting Launcher Application")
         logger.debug(f"show_welcome_wizard preference: {should_show_onboarding()}")
+        # Only the application about to run is imported, with GTK and its widgets
         if should_show_onboarding():
+            with PROFILER.span("import wizard"):
+                from cloud.ivanbotty.Wizard.app import WelcomeWizard
             app = WelcomeWizard(app=WIZARD_APP_ID)
             logger.info("Launching Welcome Wizard")
         else:
+            with PROFILER.span("import launcher"):
+                from cloud.ivanbotty.Launcher.app import App
             app = App(app=LAUNCHER_APP_ID)
             logger.info("Launching Main Application")
 
@@ -5,30 +5,42 @@ handling UI setup, extension management, and search functionality.
 """
 
 import logging
-import os
 from typing import Optional
 
 import gi
-import yaml
 
 gi.require_version("Gtk", "4.0")
 gi.require_version("Adw", "1")
 
 from gi.repository import Adw, GLib, Gtk
 
-from cloud.ivanbotty.Launcher.config.config import PREFERENCES, UI_CONFS
+from cloud.ivanbotty.Launcher.config.config import LAYOUT
 from cloud.ivanbotty.Launcher.controller.event_key_controller import EventKeyController
 from cloud.ivanbotty.Launcher.controller.event_search_controller import (
     EventSearchController,
 )
+from cloud.ivanbotty.Launcher.helper.extension_registry import (
+    LazyHandler,
+    add_handler,
+    load_registry,
+)
+from cloud.ivanbotty.Launcher.helper.latency import LATENCY
 from cloud.ivanbotty.Launcher.helper.load_class_instance import load_class_instance
+from cloud.ivanbotty.Launcher.helper.progress import STAGE_LABELS, ProgressReporter
+from cloud.ivanbotty.Launcher.helper.session_profile import (
+    SESSION,
+    SessionPreloader,
+    preload_module,
+)
 from cloud.ivanbotty.Launcher.helper.thread_manager import ThreadManager
 from cloud.ivanbotty.Launcher.services.extensions_service import ExtensionService
 from cloud.ivanbotty.Launcher.widget.footer import Footer
+from cloud.ivanbotty.Launcher.widget import row as row_widget
 from cloud.ivanbotty.Launcher.widget.progress_bar import ProgressBar
 from cloud.ivanbotty.Launcher.widget.search_entry import SearchEntry
 from cloud.ivanbotty.Launcher.widget.window import Window
-from cloud.ivanbotty.common import find_extensions_yaml
+from cloud.ivanbotty.utils.heap import freeze_heap
+from cloud.ivanbotty.utils.startup_profile import PROFILER
 
 try:
     from cloud.ivanbotty.Launcher.services.daemon_client import LauncherDaemonClient
@@ -66,59 +78,85 @@ class App(Adw.Application):
         self.win: Optional[Window] = None
         self.daemon_client: Optional[LauncherDaemonClient] = None
 
-        # Initialize progress bar with configuration
+        # Layout listeners run on the main thread, whichever process changed it
+        LAYOUT.dispatch = GLib.idle_add
+
+        # Initialize progress bar
         self.progress_bar = ProgressBar("Loading...")
         self.progress_bar.set_visible(False)
-        self.progress_bar.set_margin_top(UI_CONFS[PREFERENCES].get("progress_margin_top", 6))
-        self.progress_bar.set_margin_bottom(UI_CONFS[PREFERENCES].get("progress_margin_bottom", 6))
-        self.progress_bar.set_margin_start(UI_CONFS[PREFERENCES]["margin_start"])
-        self.progress_bar.set_margin_end(UI_CONFS[PREFERENCES]["margin_end"])
         self.progress_bar.set_hexpand(True)
 
         # Create widgets
         self.view = Gtk.ListBox()
         self.view.set_selection_mode(Gtk.SelectionMode.SINGLE)
         self.view.add_css_class("boxed-list-separate")
-        self.view.set_margin_start(UI_CONFS[PREFERENCES]["margin_start"])
-        self.view.set_margin_end(UI_CONFS[PREFERENCES]["margin_end"])
         self.view.set_vexpand(True)
         self.view.set_hexpand(True)
 
         self.entry = SearchEntry(
             placeholder="Type to search...",
-            width=UI_CONFS[PREFERENCES]["entry_width"],
-            height=UI_CONFS[PREFERENCES]["entry_height"],
+            width=LAYOUT["entry_width"],
+            height=LAYOUT["entry_height"],
         )
 
-        # Initialize services
-        self.extensions_service = ExtensionService()
-        try:
-            yaml_path = find_extensions_yaml("extensions.yaml")
-            if yaml_path is None:
-                logger.error("extensions.yaml file not found")
-                return
-            with open(yaml_path) as f:
-                config = yaml.safe_load(f)
-        except Exception as e:
-            logger.error(f"Error loading extensions: {e}")
-            return
-
-        # Validate config structure
-        if not isinstance(config, dict):
-            logger.error("Invalid extensions config format")
-            return
+        # Apply the layout configuration, and again whenever it changes
+        self._apply_layout(LAYOUT.conf)
+        LAYOUT.connect(self._apply_layout)
 
-        # Load extensions into the service
-        self.extensions_service.load_from_config(config)
+        # Extensions are loaded in the background once the window is shown
+        self.extensions_service = ExtensionService()
+        self.services_ready = False
+        self.catalogue_ready = False
+        self._extensions_loading = False
+        self._dispatch = {}
+        self._preloader = None
 
         # Try to connect to daemon
         self._init_daemon_client()
     
+    def _load_extensions_config(self) -> bool:
+        """Load the compiled extension registry into the extension service.
+
+        Returns:
+            True if the extensions were loaded, False otherwise
+        """
+        registry = load_registry()
+        if registry is None:
+            return False
+
+        # Load extensions into the service
+        self.extensions_service.load_from_config(registry)
+        self._dispatch = {ext["name"]: ext.get("dispatch") for ext in registry["extensions"]}
+        return True
+
+    def _apply_layout(self, conf: dict) -> None:
+        """Apply a UI configuration to the widgets owned by the application.
+
+        Args:
+            conf: UI configuration, a value of UI_CONFS
+        """
+        self.progress_bar.set_margin_top(conf.get("progress_margin_top", 6))
+        self.progress_bar.set_margin_bottom(conf.get("progress_margin_bottom", 6))
+        self.progress_bar.set_margin_start(conf["margin_start"])
+        self.progress_bar.set_margin_end(conf["margin_end"])
+        self.view.set_margin_start(conf["margin_start"])
+        self.view.set_margin_end(conf["margin_end"])
+        self.entry.set_size_request(conf["entry_width"], conf["entry_height"])
+
+        # Rows on display are restyled in place, new rows read the layout
+        row = self.view.get_first_child()
+        while row is not None:
+            if hasattr(row, "apply_layout"):
+                row.apply_layout(conf)
+            row = row.get_next_sibling()
+
     def _init_daemon_client(self) -> None:
         """Initialize connection to the daemon if available.
         
-        This is done asynchronously to avoid blocking UI startup.
-        The daemon integration is optional and shouldn't delay the app.
+        The client follows the daemon from the main loop without blocking,
+        reconnecting whenever it (re)appears on the bus, so the daemon
+        integration never delays the app. Opening the launcher also starts
+        a daemon that exited when idle.
         """
         if not DAEMON_CLIENT_AVAILABLE:
             logger.info("Daemon client not available, running without daemon integration")
@@ -126,45 +164,52 @@ class App(Adw.Application):
         
         try:
             self.daemon_client = LauncherDaemonClient()
-            # Connect asynchronously to avoid blocking UI startup
-            # The daemon may take time to start via D-Bus activation
-            self.daemon_client.connect_async(self._on_daemon_connected)
+            # Subscriptions follow the daemon's bus name across restarts
+            self.daemon_client.subscribe_to_indexing_progress(
+                self._on_daemon_indexing_progress
+            )
+            self.daemon_client.subscribe_to_cache_updated(
+                self._on_daemon_cache_updated
+            )
+            self.daemon_client.subscribe_to_applications_changed(
+                self._on_daemon_applications_changed
+            )
+            # Its first scan reaches us as a delta
+            self.daemon_client.watch(self._on_daemon_availability_changed, activate=True)
         except Exception as e:
             logger.warning(f"Could not initialize daemon client: {e}")
             self.daemon_client = None
     
-    def _on_daemon_connected(self, success: bool) -> None:
-        """Callback when daemon connection attempt completes.
+    def _on_daemon_availability_changed(self, available: bool) -> None:
+        """Callback when the daemon appears on or leaves the bus.
         
         Args:
-            success: True if connected successfully
+            available: True if the daemon is reachable
         """
-        if success:
+        if available:
             logger.info("Connected to Launcher daemon")
-            
-            # Subscribe to daemon signals
-            self.daemon_client.subscribe_to_indexing_progress(
-                self._on_daemon_indexing_progress
-            )
-            self.daemon_client.subscribe_to_cache_updated(
-                self._on_daemon_cache_updated
-            )
+            self._on_window_visibility_changed()
         else:
-            logger.info("Daemon not available, running standalone")
-            self.daemon_client = None
+            logger.info("Daemon not available, running standalone until it returns")
     
-    def _on_daemon_indexing_progress(self, progress: float, apps_count: int) -> None:
+    def _on_window_visibility_changed(self, *args) -> None:
+        """Tell the daemon whether the window is shown."""
+        if self.daemon_client is not None and self.win is not None:
+            self.daemon_client.set_ui_visible(self.win.get_visible())
+
+    def _on_daemon_indexing_progress(self, progress: float, apps_count: int, stage: str) -> None:
         """Handle indexing progress updates from daemon.
         
         Args:
             progress: Progress from 0.0 to 1.0
-            apps_count: Number of applications indexed
+            apps_count: Number of items of the current stage done so far
+            stage: Current indexing stage
         """
         def update_ui():
             if self.progress_bar.get_visible():
                 self.progress_bar.update_progress(
-                    progress, 
-                    f"Indexing applications... {apps_count}"
+                    progress,
+                    f"{STAGE_LABELS.get(stage, 'Indexing applications...')} {apps_count}"
                 )
             return False
         
@@ -186,78 +231,86 @@ class App(Adw.Application):
         
         GLib.idle_add(hide_progress)
 
+    def _on_daemon_applications_changed(self, added: list, removed: list, changed: list) -> None:
+        """Patch the application store with a delta from the daemon.
+
+        Signals are dispatched in the main loop, so the store is patched
+        directly. The current query is then run again to show the new state.
+
+        Args:
+            added: Records of new applications
+            removed: Desktop IDs of removed applications
+            changed: Records of changed applications
+        """
+        apps_service = self.search_controller.services.get("application")
+        if apps_service is None or not apps_service.apply_changes(added, removed, changed):
+            return
+        self._rerun_query()
+
     def run_with_progress(
         self,
         target_func: callable,
-        steps: int = 100,
-        delay: float = 0.02,
         text: str = "Processing...",
+        on_done: Optional[callable] = None,
     ) -> None:
-        """Execute a function while displaying the progress bar.
+        """Execute a function while displaying its progress.
+
+        The function runs in a background thread and receives a rate-limited
+        ProgressReporter as its progress keyword argument.
 
         Args:
-            target_func: Function to execute
-            steps: Number of progress steps
-            delay: Delay between steps in seconds
-            text: Text to display on progress bar
+            target_func: Function to execute, accepting a progress argument
+            text: Text to display on progress bar until the first update
+            on_done: Called in the main loop once the function returned
         """
         self.progress_bar.set_text(text)
         self.progress_bar.set_fraction(0.0)
         self.progress_bar.set_visible(True)
 
+        progress = ProgressReporter(
+            lambda fraction, stage, done: self.progress_bar.update_progress(
+                fraction, STAGE_LABELS.get(stage, text)
+            )
+        )
+
         def wrapper():
-            self.progress_bar.start_long_task(steps=steps, delay=delay)
-            target_func()
-            GLib.idle_add(self.progress_bar.set_visible, False)
+            try:
+                target_func(progress=progress)
+            finally:
+                GLib.idle_add(self.progress_bar.set_visible, False)
+                if on_done is not None:
+                    GLib.idle_add(on_done)
 
         ThreadManager().run_in_thread(wrapper)
 
     def do_startup(self) -> None:
-        """Perform startup routine for the application."""
+        """Perform startup routine for the application.
+
+        Only the window is built here. Extensions and the catalogue are
+        loaded after the first frame, see _load_extensions().
+        """
         Gtk.Application.do_startup(self)
         logger.info("Application startup")
 
-        # Prepare services dictionary
-        services = {
-            ext.name.lower(): load_class_instance(ext.service)
-            for ext in self.extensions_service.list_extensions()
-            if ext.enabled
-        }
-
-        # Prepare handlers set and check for None handlers
-        handlers = {
-            h for ext in self.extensions_service.list_extensions()
-            if ext.enabled
-            if (h := load_class_instance(ext.handler)) is not None
-        }
-
-        # Initialize the search controller
+        # Queries typed before the providers are loaded find no results
+        # and run again as each provider becomes available
         self.search_controller = EventSearchController(
-            app=self, entry_widget=self.entry, view=self.view, services=services, handlers=handlers
+            app=self, entry_widget=self.entry, view=self.view, services={}, handlers=[]
         )
 
-        # Load applications - try cache first, then fallback to scanning
-        apps_service = services.get("application")
-        if apps_service:
-            # Try loading from cache file (fast - no D-Bus calls needed)
-            cache_path = os.path.expanduser("~/.cache/cloud.ivanbotty.Launcher/applications_cache.json")
-            cache_loaded = apps_service.load_applications_from_cache(cache_path)
-            
-            if cache_loaded:
-                # Cache loaded successfully - instant startup!
-                logger.info("Applications loaded from cache")
-            else:
-                # No cache or cache outdated - scan directories with progress bar
-                logger.info("Loading applications from directories...")
-                self.run_with_progress(apps_service.load_applications, text="Loading applications...")
-
+        with PROFILER.span("build window"):
+            self._build_window()
 
+    def _build_window(self) -> None:
+        """Create the main window and its widgets."""
         # Adwaita setup
         Adw.init()
         Adw.StyleManager.get_default().set_color_scheme(Adw.ColorScheme.DEFAULT)
 
         # Create main window
         self.win = Window(self)
+        # Background scans of the daemon pause while the window is shown
+        self.win.connect("notify::visible", self._on_window_visibility_changed)
 
         # Keyboard controller setup
         self.keyboard_controller = EventKeyController(self)
@@ -282,8 +335,279 @@ class App(Adw.Application):
 
         self.win.set_content(box)
 
+    def _load_extensions(self):
+        """Load the extensions one by one, each in its own main loop iteration.
+
+        Started after the first frame and driven by a low-priority idle
+        source, so input is handled between two extensions. Each provider is
+        usable, and the current query runs again, as soon as it is loaded.
+
+        Yields:
+            None after each step
+        """
+        with PROFILER.span("load extension registry"):
+            loaded = self._load_extensions_config()
+        yield
+
+        if loaded:
+            for ext in self.extensions_service.list_extensions():
+                if not ext.enabled:
+                    continue
+                name = ext.name.lower()
+                with PROFILER.span(f"load extension {ext.name}"):
+                    service = load_class_instance(ext.service)
+                    # Imported by the first query routed to it
+                    handler = None
+                    if ext.handler:
+                        handler = LazyHandler(ext.handler, self._dispatch.get(ext.name), name)
+
+                # Replaced rather than mutated, searches run in other threads
+                self.search_controller.services = {
+                    **self.search_controller.services, name: service
+                }
+                if handler is not None:
+                    self.search_controller.handlers = add_handler(
+                        self.search_controller.handlers, handler
+                    )
+
+                if name == "application" and service:
+                    self._load_catalogue(service)
+                self._rerun_query()
+                yield
+
+        if not self.search_controller.services.get("application"):
+            self.catalogue_ready = True
+        self.services_ready = True
+        logger.info("Extensions loaded")
+        self._check_index_ready()
+        self._warm_up_services()
+        self._start_preloading()
+        PROFILER.write()
+
+    def _start_loading_extensions(self) -> None:
+        """Load the extensions in the background, once."""
+        if self._extensions_loading:
+            return
+        self._extensions_loading = True
+        steps = self._load_extensions()
+        # Low priority idle sources run after pending redraws and input;
+        # the source is removed once the generator is exhausted
+        GLib.idle_add(
+            lambda: next(steps, StopIteration) is not StopIteration,
+            priority=GLib.PRIORITY_LOW,
+        )
+
+    def _load_catalogue(self, apps_service) -> None:
+        """Load the applications: cache first, then the daemon, then scan.
+
+        Args:
+            apps_service: ApplicationsService to fill
+        """
+        # The cache file is trusted while its directory fingerprints match
+        with PROFILER.span("load cache"):
+            cached = apps_service.load_applications_from_cache()
+        if cached:
+            # Cache loaded successfully - instant startup!
+            logger.info("Applications loaded from cache")
+            self.catalogue_ready = True
+        elif self.daemon_client is not None:
+            # Ask a running daemon for its index, handed over as a sealed
+            # memfd, without blocking startup
+            self.daemon_client.fetch_index_async(
+                lambda apps: self._on_daemon_index(apps_service, apps)
+            )
+        else:
+            self._scan_applications(apps_service)
+
+    def _on_catalogue_loaded(self) -> bool:
+        """Show the complete catalogue once loaded in the background.
+
+        Returns:
+            False, to be usable as a one-shot idle callback
+        """
+        self.catalogue_ready = True
+        self._rerun_query()
+        self._check_index_ready()
+        return False
+
+    def _check_index_ready(self) -> None:
+        """Tell the search controller once extensions and catalogue are loaded.
+
+        An Enter pressed during startup then launches its top result.
+        """
+        if self.services_ready and self.catalogue_ready:
+            self.search_controller.index_ready()
+            # The catalogue now lives until the next load, keep it out of
+            # the collections run while typing
+            GLib.idle_add(
+                lambda: freeze_heap("loading the catalogue") and False,
+                priority=GLib.PRIORITY_LOW,
+            )
+
+    def _rerun_query(self) -> bool:
+        """Run the current query again, to show newly available results.
+
+        Returns:
+            False, to be usable as a one-shot idle callback
+        """
+        text = self.entry.get_text().strip()
+        if text:
+            self.search_controller.on_text_changed(self.entry, text)
+        return False
+
+    def _on_daemon_index(self, apps_service, apps: Optional[list]) -> None:
+        """Load the daemon's index, or scan if the daemon is not running.
+
+        Args:
+            apps_service: ApplicationsService to fill
+            apps: Application dictionaries from the daemon, None if unavailable
+        """
+        if apps is None:
+            self._scan_applications(apps_service)
+            return
+        apps_service.load_applications_from_entries(apps)
+        logger.info(f"Applications loaded from daemon index: {len(apps)}")
+        self._on_catalogue_loaded()
+
+    def _scan_applications(self, apps_service) -> None:
+        """Scan the application directories with the progress bar.
+
+        Args:
+            apps_service: ApplicationsService to fill
+        """
+        # No cache or application directories changed - scan directories
+        logger.info("Loading applications from directories...")
+        self.run_with_progress(
+            apps_service.load_applications,
+            text="Loading applications...",
+            on_done=self._on_catalogue_loaded,
+        )
+
     def do_activate(self) -> None:
         """Activate the application and show the window."""
         logger.info("Application activated")
         if self.win is not None:
+            PROFILER.begin("first frame")
             self.win.present()
+            self.entry.grab_focus()
+            if self.services_ready:
+                self._warm_up_services()
+            else:
+                self._after_first_frame(self._start_loading_extensions)
+
+    def _after_first_frame(self, callback: callable) -> None:
+        """Call callback once the window has been painted.
+
+        Also closes the first-frame span and writes the startup trace.
+
+        Args:
+            callback: Function called without arguments
+        """
+        def on_first_frame():
+            PROFILER.end("first frame")
+            PROFILER.write()
+            callback()
+
+        frame_clock = self.win.get_frame_clock()
+        if frame_clock is None:
+            on_first_frame()
+            return
+
+        def on_after_paint(clock):
+            clock.disconnect(handler_id)
+            on_first_frame()
+
+        handler_id = frame_clock.connect("after-paint", on_after_paint)
+
+    def _warm_up_services(self) -> None:
+        """Let enabled services prepare expensive resources in the background.
+
+        The AI service, whenever its extension is enabled, uses this to open
+        its HTTPS connection while the user is still typing, so the first
+        question skips the handshakes. The other providers the user
+        regularly uses are warmed up as well.
+        """
+        for name in dict.fromkeys(["ai", *SESSION.frequent("provider")]):
+            self._warm_up_service(name)
+
+    def _warm_up_service(self, name: str) -> None:
+        """Let a service prepare expensive resources in the background."""
+        service = self.search_controller.services.get(name)
+        if service is not None and hasattr(service, "warm_up"):
+            try:
+                service.warm_up()
+            except Exception as e:
+                logger.debug(f"{name} service warm-up failed: {e}")
+
+    def _start_preloading(self) -> None:
+        """Preload what past sessions used, in the background, once."""
+        if self._preloader is not None:
+            return
+        self._preloader = SessionPreloader(
+            SESSION,
+            {
+                "module": preload_module,
+                "provider": self._preload_provider,
+                "icon": self._preload_icon,
+            },
+        )
+        steps = self._preloader.steps()
+        GLib.idle_add(
+            lambda: next(steps, StopIteration) is not StopIteration,
+            priority=GLib.PRIORITY_LOW,
+        )
+
+    def _preload_provider(self, name: str):
+        """Import the handler of a provider and warm its service up.
+
+        Returns:
+            The handler, None if it was already imported
+        """
+        handler = next(
+            (h for h in self.search_controller.handlers if getattr(h, "name", None) == name), None
+        )
+        if handler is None:
+            raise LookupError(f"No enabled provider {name}")
+        self._warm_up_service(name)
+        if getattr(handler, "loaded", True):
+            return None
+        if handler.load() is None:
+            raise ImportError(f"Cannot import the handler of {name}")
+        return handler
+
+    def _preload_icon(self, icon_name: str):
+        """Load an icon at the size of the result rows.
+
+        The icon theme caches the icon while the returned paintable is alive.
+
+        Returns:
+            The icon paintable
+        """
+        size = LAYOUT.get("icon_size", 32)
+        theme = Gtk.IconTheme.get_for_display(self.win.get_display())
+        paintable = theme.lookup_by_gicon(
+            row_widget.icon_gicon(icon_name),
+            size,
+            self.win.get_scale_factor(),
+            Gtk.TextDirection.NONE,
+            Gtk.IconLookupFlags(0),
+        )
+        # Snapshotting loads the texture, which lookups defer to the first draw
+        paintable.snapshot(Gtk.Snapshot(), size, size)
+        return paintable
+
+    def do_shutdown(self) -> None:
+        """Save the session profile and latency statistics, and report preloading and requests."""
+        stats = SESSION.save()
+        logger.info(
+            f"Preloading: {stats['hits']} hits, {stats['misses']} misses, "
+            f"{stats['unused']} unused, {stats['bytes'] / 1048576:.1f} MiB"
+        )
+        searches = LATENCY.save()
+        logger.debug(f"Saved the latency of {searches} searches")
+        requests = self.search_controller.request_stats()
+        logger.info(
+            f"AI requests: {requests['started']} sent, {requests['avoided']} avoided, "
+            f"{requests['superseded']} superseded"
+        )
+        Adw.Application.do_shutdown(self)
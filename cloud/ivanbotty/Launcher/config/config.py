@@ -1,5 +1,6 @@
 import cloud.ivanbotty.database.sqlite3 as db
 from pathlib import Path
+from typing import Any, Callable, Dict, Optional
 import logging
 import time
 
@@ -86,29 +87,159 @@ CATEGORY_TAG_STYLES = {
     "file": "accent",  # Default accent
 }
 
-# Retrieve the user's preferred UI style from the database.
-# If the preference is not set or invalid, fall back to the default style.
-try:
-    pref = db.get_pref("layout", "default")
-    PREFERENCES = pref if pref in UI_CONFS else "default"
-except Exception:
-    # On error (e.g., database unavailable), use the default style and log the issue.
-    PREFERENCES = "default"
-    logger.warning("Failed to get preferences, using default")
+
+class LayoutSettings:
+    """The user's preferred UI style, read from the database on first use.
+
+    Importing the configuration therefore costs no disk I/O. Listeners added
+    with connect() receive the new UI configuration whenever the "layout"
+    preference changes, in this process or another one.
+
+    Attributes:
+        key: Preference holding the style name
+        dispatch: Runs the notification of listeners; the UI replaces it
+            with GLib.idle_add so listeners always run on the main thread
+    """
+
+    def __init__(self, key: str = "layout", default: str = DEFAULT_STYLE) -> None:
+        """Initialize unresolved settings.
+
+        Args:
+            key: Preference holding the style name
+            default: Style used when the preference is unset or invalid
+        """
+        self.key = key
+        self.dispatch: Callable[[Callable], Any] = lambda fn: fn()
+        self._default = default
+        self._style: Optional[str] = None
+        self._listeners: Dict[int, Callable[[Dict], Any]] = {}
+        self._next_listener_id = 1
+        self._watching = False
+
+    def _read(self) -> str:
+        """Read the style from the database, falling back to the default."""
+        try:
+            pref = db.get_pref(self.key, self._default)
+        except Exception:
+            # On error (e.g., database unavailable), use the default style and log the issue.
+            logger.warning("Failed to get preferences, using default")
+            return self._default
+        return pref if pref in UI_CONFS else self._default
+
+    @property
+    def style(self) -> str:
+        """Name of the current style, a key of UI_CONFS."""
+        if self._style is None:
+            self._style = self._read()
+            self._watch()
+        return self._style
+
+    @property
+    def conf(self) -> Dict:
+        """UI configuration of the current style."""
+        return UI_CONFS[self.style]
+
+    def __getitem__(self, name: str) -> Any:
+        """Return a value of the current UI configuration."""
+        return self.conf[name]
+
+    def get(self, name: str, default: Any = None) -> Any:
+        """Return a value of the current UI configuration, or default."""
+        return self.conf.get(name, default)
+
+    def connect(self, callback: Callable[[Dict], Any]) -> int:
+        """Call callback(conf) whenever the style changes.
+
+        Args:
+            callback: Receives the UI configuration of the new style
+
+        Returns:
+            Handler ID for disconnect()
+        """
+        handler_id = self._next_listener_id
+        self._next_listener_id += 1
+        self._listeners[handler_id] = callback
+        return handler_id
+
+    def disconnect(self, handler_id: int) -> None:
+        """Remove a listener added with connect()."""
+        self._listeners.pop(handler_id, None)
+
+    def _watch(self) -> None:
+        """Follow the preference once it has been resolved."""
+        if self._watching:
+            return
+        try:
+            db.connect_settings_changed(self._on_setting_changed)
+            self._watching = True
+        except Exception as e:
+            logger.warning(f"Cannot follow layout changes: {e}")
+
+    def _on_setting_changed(self, table: str, key: str) -> None:
+        """Re-resolve the style when its preference changed."""
+        if table != "preferences" or key != self.key:
+            return
+        style = self._read()
+        if style != self._style:
+            self._style = style
+            self.dispatch(self._notify)
+
+    def _notify(self) -> None:
+        """Hand the new configuration to every listener."""
+        conf = self.conf
+        for callback in list(self._listeners.values()):
+            try:
+                callback(conf)
+            except Exception as e:
+                logger.error(f"Layout listener failed: {e}")
+
+
+# Layout of the UI, resolved lazily
+LAYOUT = LayoutSettings()
+
+
+def __getattr__(name: str) -> Any:
+    """Resolve PREFERENCES, the current style name, only when it is used."""
+    if name == "PREFERENCES":
+        return LAYOUT.style
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 SYSTEM_PROMPT = (
     "You are a helpful assistant focused on concise, accurate answers. "
     "Respond only to the user's question, avoiding unnecessary details. "
     'Always reply in JSON format: {"response": "your answer"}. '
-    "Example questions: What is the capital of France? How do I create a virtual environment in Python? "
+    "Example questions: What is the capital of France? "
+    "How do I create a virtual environment in Python? "
     'Example response: {"response": "Paris is the capital of France."} '
     "Keep responses brief and relevant."
 )
 
+# AI provider settings
+AI_MODEL = "gemini-2.5-flash"
+AI_ENDPOINT = "https://generativelanguage.googleapis.com"
+AI_CONNECTION_IDLE_TIMEOUT = 120  # Seconds a warmed-up connection is kept open
+AI_CACHE_TTL = 7 * 24 * 3600  # Seconds before a cached answer expires
+AI_CACHE_MAX_ENTRIES = 500  # Entries kept in the database
+AI_CACHE_MEMORY_ENTRIES = 64  # Entries kept in the in-memory LRU
+
+# Activation policy for expensive providers (handlers with expensive = True)
+# "activation" is "enter" (only on Enter) or "idle" (also after a typing pause)
+EXPENSIVE_PROVIDER_POLICY = {
+    "activation": "idle",
+    "idle_delay_ms": 800,  # Typing pause before an idle query is sent
+    "min_query_length": 8,  # Shorter queries are only sent on Enter
+}
+
+# Command provider settings
+USER_COMMANDS_PATH = Path.home() / ".config/cloud.ivanbotty.Launcher/commands.yaml"
+COMMAND_SEARCH_LIMIT = 50  # Executables listed per query
+
+
 # Onboarding configuration helpers
 def should_show_onboarding() -> bool:
     """Check if the onboarding wizard should be shown.
-    
+
     Returns:
         bool: True if onboarding should be shown, False otherwise
     """
@@ -121,6 +252,7 @@ def should_show_onboarding() -> bool:
         logger.warning("Failed to check onboarding preference, defaulting to True")
         return True
 
+
 def mark_onboarding_complete() -> None:
     """Mark the onboarding wizard as complete."""
     try:
@@ -130,6 +262,7 @@ def mark_onboarding_complete() -> None:
     except Exception as e:
         logger.error(f"Failed to mark onboarding complete: {e}")
 
+
 def reset_onboarding() -> None:
     """Reset the onboarding state to show it again on next launch."""
     try:
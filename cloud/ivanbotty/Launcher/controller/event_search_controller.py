@@ -1,11 +1,29 @@
+from cloud.ivanbotty.Launcher.config.config import EXPENSIVE_PROVIDER_POLICY
 from cloud.ivanbotty.Launcher.controller.event_base_controller import EventBaseController
 from cloud.ivanbotty.Launcher.controller.event_click_controller import EventClickController
+from cloud.ivanbotty.Launcher.helper.debounce import Debouncer
+from cloud.ivanbotty.Launcher.helper.https_pool import CancelScope
+from cloud.ivanbotty.Launcher.helper.input_buffer import StartupInputBuffer
+from cloud.ivanbotty.Launcher.helper.latency import LATENCY
+from cloud.ivanbotty.Launcher.helper.request_gate import RequestGate
+from cloud.ivanbotty.Launcher.helper.session_profile import SESSION
 from cloud.ivanbotty.Launcher.widget import row as row_widget
+from cloud.ivanbotty.utils.heap import TRACER
+from gi.repository import GLib
 import threading
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
+# Delay between the last keystroke and the search update
+DEBOUNCE_DELAY = 0.15
+
+
+def provider_name(handler):
+    """Return the name a handler is recorded under in the session profile."""
+    return getattr(handler, "name", type(handler).__name__)
+
 
 class EventSearchController(EventBaseController):
     """Handles search and results, including mouse activations."""
@@ -21,37 +39,176 @@ class EventSearchController(EventBaseController):
         self.entry.connect("activated", self.on_activated)
         self.view.connect("row-activated", self.on_row_activated)
 
-        self._debounce_timer = None
+        # One thread debounces all keystrokes, rather than a Timer each
+        self._debouncer = Debouncer(DEBOUNCE_DELAY)
+        self.request_gate = RequestGate(**EXPENSIVE_PROVIDER_POLICY)
+        # Expensive queries wait for the rest of the typing pause on another
+        # debouncer, so a new search keeps the keystroke debouncer free
+        self._idle_debouncer = Debouncer(
+            max(0.0, self.request_gate.idle_delay_ms / 1000 - DEBOUNCE_DELAY)
+        )
+        # Holds back Enter until the index is complete, see index_ready()
+        self.input_buffer = StartupInputBuffer()
 
     def on_row_activated(self, listbox, row):
         """GTK callback: double click or Enter on a row."""
         self.activate_row(row)
 
     def on_text_changed(self, widget, text):
-        if self._debounce_timer:
-            self._debounce_timer.cancel()
-        self._debounce_timer = threading.Timer(0.15, lambda: self.update_view(text))
-        self._debounce_timer.start()
+        self.input_buffer.text_changed(text)
+        self._debouncer.call(self.update_view, text, time.perf_counter())
 
     def on_activated(self, widget, text):
         """GTK callback: Enter in the search entry."""
+        if not self.input_buffer.activate(text):
+            return
         for handler in self.handlers:
             if handler.can_handle(text):
-                handler.handle(text, self.services, self.view)
+                SESSION.use("provider", provider_name(handler))
+                if handler.expensive:
+                    self._cancel_idle_query(interrupted=False)
+                    self._request(handler, text, explicit=True)
+                elif handler.acts_on_activation:
+                    handler.handle(text, self.services, self.view)
+                else:
+                    self._activate_top_result(handler, text)
                 return
         logger.warning(f"No handler found for text: {text}")
 
-    def update_view(self, text):
-        """Update the ListBox based on the results returned by handlers."""
-        for handler in self.handlers:
-            if handler.can_handle(text):
-                if list_model := handler.handle(text, self.services):
-                    self.view.bind_model(
-                        list_model,
-                        lambda row_item: (
-                            row := row_widget.Row(row_item),
-                            setattr(row, "item_model", row_item),
-                            EventClickController(self.app, row),
-                            row,
-                        ),
-                    )
+    def index_ready(self):
+        """Called once extensions and catalogue are loaded.
+
+        Runs an Enter pressed during startup on the complete index.
+        """
+        text = self.input_buffer.set_ready()
+        if text is not None:
+            self.on_activated(self.entry, text)
+
+    def _activate_top_result(self, handler, text):
+        """Launch the selected result, or the top one, for text."""
+        if self._debouncer.cancel():
+            # The view still shows an older query, search text right away
+            if list_model := handler.handle(text, self.services):
+                self._bind_results(list_model)
+        row = self.view.get_selected_row() or self.view.get_row_at_index(0)
+        self.activate_row(row)
+
+    def update_view(self, text, typed_at=None):
+        """Update the ListBox based on the results returned by handlers.
+
+        Args:
+            text: Text of the search entry
+            typed_at: time.perf_counter() value of the keystroke, for the
+                latency statistics
+        """
+        self._cancel_idle_query(interrupted=True)
+        # Expensive queries wait for a typing pause by design, they are not timed
+        latency = LATENCY.begin(text, typed_at)
+        with TRACER.measure(text):
+            for handler in self.handlers:
+                if handler.can_handle(text):
+                    SESSION.use("provider", provider_name(handler))
+                    if handler.expensive:
+                        self._defer(handler, text)
+                        return
+                    self.request_gate.cancel()
+                    if list_model := handler.handle(text, self.services):
+                        self._bind_results(list_model, latency)
+        latency.end_search()
+        GLib.idle_add(self._await_frame, latency)
+
+    def request_stats(self):
+        """Return how many expensive requests were sent and avoided."""
+        return self.request_gate.stats()
+
+    def _bind_results(self, list_model, latency=None):
+        """Bind a results model to the ListBox.
+
+        Args:
+            list_model: Results to show
+            latency: Timings of the search, given the model and row times
+        """
+        if latency is None:
+            self.view.bind_model(list_model, self._create_row)
+            return
+        bind = latency.stages.get("bind", 0.0)
+        start = time.perf_counter()
+        # The ListBox creates every row before bind_model() returns
+        self.view.bind_model(list_model, latency.timed("bind", self._create_row))
+        elapsed = (time.perf_counter() - start) * 1000
+        latency.add("model", elapsed - (latency.stages.get("bind", 0.0) - bind))
+
+    def _create_row(self, row_item):
+        """Create the row of a result."""
+        row = row_widget.Row(row_item)
+        row.item_model = row_item
+        EventClickController(self.app, row)
+        return row
+
+    def _await_frame(self, latency):
+        """Idle callback: record the search once its results are painted."""
+        clock = self.view.get_frame_clock()
+        if clock is None:
+            # Not mapped, nothing will be painted
+            latency.finish()
+            return False
+
+        def on_after_paint(clock):
+            clock.disconnect(handler_id)
+            latency.finish(painted=True)
+
+        handler_id = clock.connect("after-paint", on_after_paint)
+        self.view.queue_draw()
+        return False
+
+    def _defer(self, handler, text):
+        """Wait for a typing pause before sending an expensive query."""
+        self.request_gate.cancel(keep=text)
+        placeholder = handler.pending(text, idle=self.request_gate.sends_when_idle(text))
+        if placeholder:
+            GLib.idle_add(lambda: self._bind_results(placeholder) or False)
+
+        self._idle_debouncer.call(self._on_idle, handler, text)
+
+    def _on_idle(self, handler, text):
+        """Debounced callback: the user stopped typing an expensive query."""
+        self._request(handler, text, explicit=False)
+
+    def _cancel_idle_query(self, interrupted):
+        """Cancel a pending idle query, counting it as avoided if requested."""
+        if self._idle_debouncer.cancel() and interrupted:
+            self.request_gate.note_interrupted()
+
+    def _request(self, handler, text, explicit):
+        """Send an expensive query if the policy allows it, at most once at a time."""
+        if not self.request_gate.allows(text, explicit):
+            logger.debug(f"Expensive request avoided: {self.request_gate.stats()}")
+            return
+
+        # A newer query aborts the HTTP request of this one
+        scope = CancelScope()
+        token = self.request_gate.begin(text, abort=scope.cancel)
+        if token is None:
+            logger.debug(f"Expensive request deduplicated: {self.request_gate.stats()}")
+            return
+
+        def worker():
+            list_model = None
+
+            def publish():
+                # Drop results of requests superseded by a newer query
+                if self.request_gate.finish(token) and list_model:
+                    self._bind_results(list_model)
+                return False
+
+            try:
+                with scope:
+                    list_model = handler.handle(text, self.services)
+            except Exception as e:
+                logger.error(f"Expensive request failed: {e}")
+            finally:
+                # Always finish, or later identical queries would be deduplicated
+                GLib.idle_add(publish)
+
+        threading.Thread(target=worker, daemon=True).start()
+        logger.debug(f"Expensive request started: {self.request_gate.stats()}")
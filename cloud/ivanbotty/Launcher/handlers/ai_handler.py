@@ -5,9 +5,28 @@ import cloud.ivanbotty.Launcher.handlers.base_input_handler as bih
 
 
 class AIHandler(bih.BaseInputHandler):
+    expensive = True
+
     def can_handle(self, text):
         return text.startswith("ask")
 
+    def pending(self, text, idle=False):
+        if idle:
+            description = "The question is sent when you stop typing"
+        else:
+            description = "Press Enter to send the question"
+        list_model = Gio.ListStore(item_type=ApplicationModel)
+        list_model.append(
+            ApplicationModel(
+                type="ai",
+                name="Ask AI",
+                description=description,
+                exec_cmd=None,
+                icon="dialog-question",
+            )
+        )
+        return list_model
+
     def handle(self, text, services):
         list_model = Gio.ListStore(item_type=ApplicationModel)
         ai_service = services.get("ai")
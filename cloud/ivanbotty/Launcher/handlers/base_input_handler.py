@@ -12,8 +12,19 @@ class BaseInputHandler:
 
     All input handlers should inherit from this class and implement
     the can_handle and handle methods.
+
+    Attributes:
+        expensive: True if handling a query costs a paid or slow round trip.
+            Such handlers are only invoked according to the activation policy
+            instead of on every debounced keystroke.
+        acts_on_activation: True if handle() performs the action itself on
+            Enter, when given the result list as third argument. Otherwise
+            Enter launches the top result.
     """
 
+    expensive = False
+    acts_on_activation = False
+
     def can_handle(self, text: str) -> bool:
         """Determine if this handler can process the given input text.
 
@@ -42,3 +53,16 @@ class BaseInputHandler:
             NotImplementedError: If not implemented in subclass
         """
         raise NotImplementedError("Subclasses must implement handle()")
+
+    def pending(self, text: str, idle: bool = False):
+        """Return placeholder results shown while an expensive query waits.
+
+        Args:
+            text: The input text waiting to be handled
+            idle: True if the query is sent once typing pauses, False if it
+                waits for Enter
+
+        Returns:
+            A Gio.ListStore with placeholder results, or None to keep the view
+        """
+        return None
@@ -1,18 +1,23 @@
-from gi.repository import Gtk
 import cloud.ivanbotty.Launcher.handlers.base_input_handler as bih
 
 
 class CommandHandler(bih.BaseInputHandler):
+    acts_on_activation = True
+
     def can_handle(self, text):
         return text.startswith(">")
 
-    def handle(self, text, services, listbox):
+    def handle(self, text, services, listbox=None):
+        """Return the matching commands, running the first one on Enter.
+
+        The controller passes the result list as listbox only when the user
+        pressed Enter, so typing never runs a command.
+        """
         command_name = text[1:].strip()
         commands_service = services.get("command")
-        listbox.remove_all()
-        if commands_service:
-            commands = commands_service.filter_commands(command_name)
-            for cmd in commands:
-                listbox.insert(Gtk.Label(label=cmd.name), 0)
-            if commands:
-                commands[0].run()
+        if not commands_service:
+            return None
+        commands = commands_service.filter_commands(command_name)
+        if listbox is not None and commands.get_n_items() > 0:
+            commands.get_item(0).run()
+        return commands
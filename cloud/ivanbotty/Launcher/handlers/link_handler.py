@@ -4,6 +4,8 @@ import cloud.ivanbotty.Launcher.handlers.base_input_handler as bih
 
 
 class LinkHandler(bih.BaseInputHandler):
+    acts_on_activation = True
+
     def can_handle(self, text):
         return re.match(r"^https?://", text.strip())
 
@@ -0,0 +1,258 @@
+"""Self-validating applications cache file.
+
+The cache carries a header with a fingerprint of every application directory
+and a generation. A fingerprint is the directory's (mtime_ns, inode), or None
+while it does not exist. Adding, removing or renaming a .desktop file bumps
+its directory's mtime and replacing the directory changes its inode, so a
+reader validates the cache with one stat() per directory: the cache is
+trusted exactly when no fingerprint changed, however old it is. In-place
+edits of an existing file are not detected; the daemon's scans catch those.
+
+The generation increases each time the cached catalogue changes, letting
+clients tell whether two copies of the index hold the same catalogue.
+
+Directories under the home directory are keyed as "~/...", so a cache stays
+valid for another user. Image builders pre-seed caches with
+"launcherd --build-index": seeded fingerprints record no inode, since
+deploying an image preserves mtimes but not inodes. Seeds are installed
+under $XDG_DATA_DIRS/cloud.ivanbotty.Launcher/index, or copied to the user
+cache directory through /etc/skel.
+"""
+
+import json
+import logging
+import os
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CACHE_PATH = os.path.expanduser("~/.cache/cloud.ivanbotty.Launcher/applications_cache.json")
+CACHE_FILENAME = os.path.basename(CACHE_PATH)
+
+# Directory of pre-seeded index files, relative to each $XDG_DATA_DIRS entry
+SEED_SUBDIR = os.path.join("cloud.ivanbotty.Launcher", "index")
+
+# Version of the cache layout; caches of any other version are rescanned
+CACHE_FORMAT_VERSION = 2
+
+Fingerprint = Optional[List[Optional[int]]]
+
+
+def portable_path(path) -> str:
+    """Return path as a cache key, with the home directory written as "~"."""
+    path = str(path)
+    home = os.path.expanduser("~")
+    if path == home or path.startswith(home + os.sep):
+        return "~" + path[len(home):]
+    return path
+
+
+def directory_fingerprints(dirs: Iterable, root: Optional[str] = None) -> Dict[str, Fingerprint]:
+    """Fingerprint application directories with one stat() each.
+
+    Args:
+        dirs: Directories to fingerprint
+        root: Fingerprint the directories as found under this filesystem
+            root instead, as an image builder does. Inodes are not recorded
+            and directories of the home directory are recorded as missing.
+
+    Returns:
+        Mapping of portable directory path to [mtime_ns, inode], None if missing
+    """
+    fingerprints: Dict[str, Fingerprint] = {}
+    for directory in dirs:
+        key = portable_path(directory)
+        if root is not None and key.startswith("~"):
+            fingerprints[key] = None
+            continue
+        try:
+            if root is None:
+                st = os.stat(directory)
+                fingerprints[key] = [st.st_mtime_ns, st.st_ino]
+            else:
+                st = os.stat(os.path.join(root, str(directory).lstrip(os.sep)))
+                fingerprints[key] = [st.st_mtime_ns, None]
+        except OSError:
+            fingerprints[key] = None
+    return fingerprints
+
+
+def build_cache(
+    apps: List[Dict], fingerprints: Dict[str, Fingerprint], generation: int
+) -> Dict:
+    """Build the content of a cache file.
+
+    Args:
+        apps: Application dictionaries
+        fingerprints: Directory fingerprints taken before the scan started
+        generation: Generation of the catalogue
+
+    Returns:
+        Dictionary to serialize as the cache file
+    """
+    return {
+        "version": CACHE_FORMAT_VERSION,
+        "generation": generation,
+        "created": int(time.time()),
+        "directories": fingerprints,
+        "applications": apps,
+    }
+
+
+def encode_cache(cache: Dict) -> bytes:
+    """Serialize a cache built by build_cache() to UTF-8 JSON."""
+    return json.dumps(cache, indent=2, ensure_ascii=False).encode("utf-8")
+
+
+def parse_cache(data) -> Tuple[Optional[Dict], List[Dict]]:
+    """Split decoded cache content into its header and applications.
+
+    Args:
+        data: Decoded JSON of a cache file
+
+    Returns:
+        Tuple of (header, applications). The header is None for legacy
+        caches holding a bare list and for unknown versions, whose
+        applications may still be used for diffing but never trusted.
+    """
+    if isinstance(data, list):
+        return None, data
+    if not isinstance(data, dict):
+        return None, []
+    apps = data.get("applications")
+    apps = apps if isinstance(apps, list) else []
+    if data.get("version") != CACHE_FORMAT_VERSION:
+        return None, apps
+    header = {key: value for key, value in data.items() if key != "applications"}
+    return header, apps
+
+
+# Cache files parsed ahead of time by preload_cache_file(), with the
+# (mtime_ns, size, inode) they were read at
+_preloaded: Dict[str, Tuple[Tuple[int, int, int], Tuple[Optional[Dict], List[Dict]]]] = {}
+
+
+def _file_key(path: str) -> Optional[Tuple[int, int, int]]:
+    """Return the (mtime_ns, size, inode) of a file, None if it is missing."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+
+def read_cache_file(path: str) -> Tuple[Optional[Dict], List[Dict]]:
+    """Read and split a cache file.
+
+    A copy parsed by preload_cache_file() is returned while the file is
+    unchanged, which costs one stat().
+
+    Args:
+        path: Path of the cache file
+
+    Returns:
+        Tuple of (header, applications), (None, []) if unreadable
+    """
+    preloaded = _preloaded.get(path)
+    if preloaded is not None and preloaded[0] == _file_key(path):
+        return preloaded[1]
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return parse_cache(json.load(f))
+    except (OSError, ValueError) as e:
+        logger.debug(f"Cannot read cache file {path}: {e}")
+        return None, []
+
+
+def preload_cache_file(path: str) -> bool:
+    """Parse a cache file ahead of time for read_cache_file().
+
+    Used by processes forking clients, which then find the index already
+    parsed. The file is parsed again only if it changed since the last call.
+
+    Args:
+        path: Path of the cache file
+
+    Returns:
+        True if a parsed copy of the file is held
+    """
+    key = _file_key(path)
+    if key is None:
+        _preloaded.pop(path, None)
+        return False
+    preloaded = _preloaded.get(path)
+    if preloaded is None or preloaded[0] != key:
+        _preloaded.pop(path, None)
+        result = read_cache_file(path)
+        # Rewritten while being read: parse it again next time
+        if result[0] is None or _file_key(path) != key:
+            return False
+        _preloaded[path] = (key, result)
+    return True
+
+
+def is_cache_current(header: Optional[Dict], dirs: Iterable) -> bool:
+    """Check whether a cache still matches the application directories.
+
+    Args:
+        header: Header returned by parse_cache()
+        dirs: Directories that are scanned for applications
+
+    Returns:
+        True if every directory has the fingerprint recorded in the header,
+        ignoring inodes that were not recorded
+    """
+    recorded = header.get("directories") if header else None
+    if not isinstance(recorded, dict):
+        return False
+    current = directory_fingerprints(dirs)
+    if recorded.keys() != current.keys():
+        return False
+    for key, fingerprint in current.items():
+        seen = recorded[key]
+        if fingerprint is None or seen is None:
+            if fingerprint is not seen:
+                return False
+        elif seen[0] != fingerprint[0] or (seen[1] is not None and seen[1] != fingerprint[1]):
+            return False
+    return True
+
+
+def seed_dirs() -> List[str]:
+    """Return the directories that may hold a pre-seeded index, by priority."""
+    data_dirs = os.environ.get("XDG_DATA_DIRS") or "/usr/local/share:/usr/share"
+    return [os.path.join(d, SEED_SUBDIR) for d in data_dirs.split(":") if d]
+
+
+def find_index_file(user_path: str) -> Optional[str]:
+    """Locate an index file, preferring the user's copy over pre-seeded ones.
+
+    Args:
+        user_path: Path of the file in the user cache directory
+
+    Returns:
+        Path of the first existing copy, None if there is none
+    """
+    if os.path.exists(user_path):
+        return user_path
+    filename = os.path.basename(user_path)
+    for directory in seed_dirs():
+        path = os.path.join(directory, filename)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def next_generation(header: Optional[Dict], changed: bool) -> int:
+    """Return the generation of a catalogue written over a previous cache.
+
+    Args:
+        header: Header of the previous cache, None if there was none
+        changed: Whether the catalogue differs from the previous cache
+
+    Returns:
+        The previous generation, incremented if the catalogue changed
+    """
+    generation = header.get("generation", 0) if header else 0
+    return generation + 1 if changed or not header else generation
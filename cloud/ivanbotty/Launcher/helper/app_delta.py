@@ -0,0 +1,77 @@
+"""Compact application records and catalogue deltas.
+
+The daemon announces catalogue changes with the ApplicationsChanged D-Bus
+signal instead of making clients reload the whole cache. Applications travel
+as flat string tuples matching the D-Bus signature "(ssssss)", identified by
+their desktop ID.
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Field order of a record, matching the "(ssssss)" D-Bus signature
+RECORD_FIELDS = ("desktop_id", "type", "name", "exec_cmd", "icon", "description")
+
+Record = Tuple[str, str, str, str, str, str]
+
+
+def to_record(app: Dict) -> Record:
+    """Convert an application dictionary to a record.
+
+    Args:
+        app: Application dictionary, as produced by ApplicationModel.to_dict()
+
+    Returns:
+        Record tuple, with missing values as empty strings
+    """
+    return tuple(str(app.get(field) or "") for field in RECORD_FIELDS)
+
+
+def record_to_dict(record: Record) -> Dict[str, Optional[str]]:
+    """Convert a record back to an application dictionary.
+
+    Args:
+        record: Record tuple
+
+    Returns:
+        Application dictionary, with empty strings as None
+    """
+    return {field: value or None for field, value in zip(RECORD_FIELDS, record)}
+
+
+def record_key(record: Record) -> str:
+    """Return the identity of a record: its desktop ID, or its name."""
+    return record[0] or record[2]
+
+
+def _index(apps: Iterable[Dict]) -> Dict[str, Record]:
+    """Map keys to records, keeping the first application per key."""
+    index: Dict[str, Record] = {}
+    for app in apps:
+        record = to_record(app)
+        index.setdefault(record_key(record), record)
+    return index
+
+
+def diff_applications(
+    old: Iterable[Dict], new: Iterable[Dict]
+) -> Tuple[List[Record], List[str], List[Record]]:
+    """Compute the delta between two application lists.
+
+    Args:
+        old: Previous application dictionaries
+        new: Current application dictionaries
+
+    Returns:
+        Tuple of (added records, removed keys, changed records), in the
+        order of the lists they come from
+    """
+    old_index = _index(old)
+    new_index = _index(new)
+    added = [record for key, record in new_index.items() if key not in old_index]
+    removed = [key for key in old_index if key not in new_index]
+    changed = [
+        record
+        for key, record in new_index.items()
+        if key in old_index and old_index[key] != record
+    ]
+    return added, removed, changed
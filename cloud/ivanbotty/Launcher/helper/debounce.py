@@ -0,0 +1,79 @@
+"""Debouncing of keystrokes on one long-lived thread.
+
+A threading.Timer per keystroke creates, starts and tears down a thread each
+time a character is typed. The Debouncer keeps a single waiting thread for
+the life of the search controller; scheduling a call only replaces the
+pending call and its deadline.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class Debouncer:
+    """Runs the last scheduled call once no other was scheduled for a delay.
+
+    Calls run on the debouncer's thread, one at a time.
+    """
+
+    def __init__(self, delay: float) -> None:
+        """Initialize the debouncer; its thread starts on the first call.
+
+        Args:
+            delay: Seconds without a new call before the pending one runs
+        """
+        self.delay = delay
+        self._condition = threading.Condition()
+        self._pending: Optional[Tuple[Callable, Tuple[Any, ...]]] = None
+        self._deadline = 0.0
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def pending(self) -> bool:
+        """True while a call waits for its deadline."""
+        return self._pending is not None
+
+    def call(self, fn: Callable, *args: Any) -> None:
+        """Schedule fn(*args), replacing the pending call.
+
+        Args:
+            fn: Function to call
+            *args: Its arguments
+        """
+        with self._condition:
+            self._pending = (fn, args)
+            self._deadline = time.monotonic() + self.delay
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="debounce", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def cancel(self) -> bool:
+        """Drop the pending call.
+
+        Returns:
+            True if a call was pending
+        """
+        with self._condition:
+            pending, self._pending = self._pending, None
+        return pending is not None
+
+    def _run(self) -> None:
+        """Wait for deadlines and run the calls due."""
+        while True:
+            with self._condition:
+                while self._pending is None:
+                    self._condition.wait()
+                remaining = self._deadline - time.monotonic()
+                if remaining > 0:
+                    self._condition.wait(remaining)
+                    continue
+                (fn, args), self._pending = self._pending, None
+            try:
+                fn(*args)
+            except Exception as e:
+                logger.error(f"Debounced call failed: {e}")
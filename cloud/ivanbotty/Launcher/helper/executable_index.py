@@ -0,0 +1,306 @@
+"""Index of executables found on $PATH.
+
+This module scans the directories listed in $PATH once, keeps a sorted index
+of executable names for fast prefix search and caches it on disk. The cache
+is revalidated with one stat per directory, so it is only rebuilt when a
+directory changed. Loading and revalidation run on a background thread
+started by load_in_background() and refresh_in_background(), and a rebuilt
+index replaces the old one as a whole, so searches never wait for I/O. Inside
+Flatpak, the host's $PATH is listed through ``flatpak-spawn --host``, since
+the sandbox cannot see the host binaries.
+"""
+
+import bisect
+import json
+import logging
+import os
+import shutil
+import subprocess
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CACHE_PATH = os.path.expanduser("~/.cache/cloud.ivanbotty.Launcher/executables_cache.json")
+
+# Seconds between two freshness checks of the PATH directories
+REVALIDATE_INTERVAL = 30
+
+# Lists every executable of the host $PATH, prefixing each directory with a
+# "<dir>\t<mtime>" header line. Names cannot contain "/", headers always do.
+_HOST_LISTING_SCRIPT = """
+IFS=:
+for d in $PATH; do
+    case "$d" in /*) ;; *) continue ;; esac
+    [ -d "$d" ] || continue
+    printf '%s\\t%s\\n' "$d" "$(stat -c %Y "$d")"
+    [ "$1" = "--headers" ] && continue
+    for f in "$d"/*; do
+        [ -f "$f" ] && [ -x "$f" ] && printf '%s\\n' "${f##*/}"
+    done
+done
+"""
+
+
+def parse_host_listing(output: str) -> Tuple[Dict[str, int], List[str]]:
+    """Parse the output of the host listing script.
+
+    Args:
+        output: Standard output of _HOST_LISTING_SCRIPT
+
+    Returns:
+        Tuple of (directory mtimes, executable names)
+    """
+    dir_mtimes: Dict[str, int] = {}
+    names: List[str] = []
+    for line in output.splitlines():
+        if not line:
+            continue
+        if line.startswith("/"):
+            directory, _, mtime = line.partition("\t")
+            dir_mtimes[directory] = int(mtime) if mtime.isdigit() else 0
+        else:
+            names.append(line)
+    return dir_mtimes, names
+
+
+class ExecutableIndex:
+    """Sorted, cached index of the executables on $PATH.
+
+    Attributes:
+        host: True if the host's $PATH is indexed through flatpak-spawn
+        cache_path: Path of the on-disk cache
+    """
+
+    def __init__(
+        self,
+        cache_path: str = CACHE_PATH,
+        path_dirs: Optional[List[str]] = None,
+        host: Optional[bool] = None,
+    ) -> None:
+        """Initialize an empty index.
+
+        Args:
+            cache_path: Path of the on-disk cache
+            path_dirs: Directories to index, defaults to $PATH
+            host: Index the host's $PATH, defaults to True inside Flatpak
+        """
+        if host is None:
+            host = os.path.exists("/.flatpak-info") and shutil.which("flatpak-spawn") is not None
+        self.host = host
+        self.cache_path = cache_path
+        self._path_dirs = path_dirs
+        self._dir_mtimes: Dict[str, int] = {}
+        # Lowercase names, sorted, and the names in the same order; replaced
+        # together so searches on other threads see a consistent index
+        self._entries: Tuple[List[str], List[str]] = ([], [])
+        self._last_check = 0.0
+        self._refresh_thread: Optional[threading.Thread] = None
+        self._refresh_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries[1])
+
+    def load(self) -> None:
+        """Load the index from the cache, rescanning if it is stale.
+
+        Listing the host directories spawns a process, so a cached host index
+        is used as is and revalidated by the first refresh() instead.
+        """
+        if self._load_cache() and (self.host or self._current_mtimes() == self._dir_mtimes):
+            logger.debug(f"Executable index loaded from cache: {len(self)} entries")
+            self._last_check = 0.0 if self.host else time.monotonic()
+        else:
+            self.rescan()
+            self._last_check = time.monotonic()
+
+    def refresh(self) -> bool:
+        """Rescan if a PATH directory changed since the last check.
+
+        Checks run at most every REVALIDATE_INTERVAL seconds.
+
+        Returns:
+            True if the index was rebuilt
+        """
+        now = time.monotonic()
+        if now - self._last_check < REVALIDATE_INTERVAL:
+            return False
+        self._last_check = now
+        if self._current_mtimes() == self._dir_mtimes:
+            return False
+        self.rescan()
+        return True
+
+    def load_in_background(self) -> Optional[threading.Thread]:
+        """Run load() on a background thread, then revalidate a cached host index.
+
+        The index is empty until the thread has loaded it, so without a cache
+        the PATH scan does not hold up the caller.
+
+        Returns:
+            The thread loading the index, None if a load or check is running
+        """
+        return self._start_thread(self._load_and_refresh)
+
+    def refresh_in_background(self) -> Optional[threading.Thread]:
+        """Run refresh() on a background thread, if a check is due.
+
+        Costs a clock read when no check is due; the index stays searchable
+        during the check and is replaced once a rescan finishes.
+
+        Returns:
+            The thread running the check, None if no check was due or one
+            is already running
+        """
+        if time.monotonic() - self._last_check < REVALIDATE_INTERVAL:
+            return None
+        return self._start_thread(self.refresh)
+
+    def rescan(self) -> None:
+        """Scan the PATH directories and save the result to the cache."""
+        start = time.monotonic()
+        if self.host:
+            dir_mtimes, names = self._scan_host()
+        else:
+            dir_mtimes, names = self._scan_local()
+        self._set_names(dir_mtimes, names)
+        self._save_cache()
+        logger.info(
+            f"Indexed {len(self)} executables in {(time.monotonic() - start) * 1000:.1f} ms"
+        )
+
+    def contains(self, name: str) -> bool:
+        """Check whether an executable is on PATH.
+
+        Args:
+            name: Executable name
+
+        Returns:
+            True if the executable was indexed
+        """
+        keys, names = self._entries
+        i = bisect.bisect_left(keys, name.lower())
+        while i < len(keys) and keys[i] == name.lower():
+            if names[i] == name:
+                return True
+            i += 1
+        return False
+
+    def search(self, prefix: str, limit: int = 50) -> List[str]:
+        """Return the executables starting with a prefix (case-insensitive).
+
+        Args:
+            prefix: Prefix to search for
+            limit: Maximum number of results
+
+        Returns:
+            Matching executable names in alphabetical order
+        """
+        key = prefix.lower()
+        keys, names = self._entries
+        start = bisect.bisect_left(keys, key)
+        results = []
+        for i in range(start, len(keys)):
+            if len(results) >= limit or not keys[i].startswith(key):
+                break
+            results.append(names[i])
+        return results
+
+    def _load_and_refresh(self) -> None:
+        """Load the index, then check a host index that came from the cache."""
+        self.load()
+        self.refresh()
+
+    def _start_thread(self, target: Callable[[], object]) -> Optional[threading.Thread]:
+        """Start target on the index thread, unless that thread is running."""
+        with self._refresh_lock:
+            if self._refresh_thread is not None and self._refresh_thread.is_alive():
+                return None
+            self._refresh_thread = threading.Thread(
+                target=target, name="executable-index", daemon=True
+            )
+            self._refresh_thread.start()
+            return self._refresh_thread
+
+    def _set_names(self, dir_mtimes: Dict[str, int], names: List[str]) -> None:
+        """Replace the index content with deduplicated, sorted names."""
+        entries = sorted({(name.lower(), name) for name in names})
+        self._entries = ([key for key, _ in entries], [name for _, name in entries])
+        self._dir_mtimes = dir_mtimes
+
+    def _dirs(self) -> List[str]:
+        """Return the absolute, existing PATH directories without duplicates."""
+        dirs = self._path_dirs
+        if dirs is None:
+            dirs = os.environ.get("PATH", "").split(os.pathsep)
+        return [d for d in dict.fromkeys(dirs) if os.path.isabs(d) and os.path.isdir(d)]
+
+    def _current_mtimes(self) -> Dict[str, int]:
+        """Stat every PATH directory once."""
+        if self.host:
+            return self._run_host_listing(headers_only=True)[0]
+        mtimes = {}
+        for directory in self._dirs():
+            try:
+                mtimes[directory] = os.stat(directory).st_mtime_ns
+            except OSError:
+                continue
+        return mtimes
+
+    def _scan_local(self) -> Tuple[Dict[str, int], List[str]]:
+        """List the executables of the local PATH directories."""
+        dir_mtimes = self._current_mtimes()
+        names = []
+        for directory in dir_mtimes:
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_file() and os.access(entry.path, os.X_OK):
+                                names.append(entry.name)
+                        except OSError:
+                            continue
+            except OSError as e:
+                logger.debug(f"Cannot list {directory}: {e}")
+        return dir_mtimes, names
+
+    def _scan_host(self) -> Tuple[Dict[str, int], List[str]]:
+        """List the executables of the host PATH directories."""
+        return self._run_host_listing(headers_only=False)
+
+    def _run_host_listing(self, headers_only: bool) -> Tuple[Dict[str, int], List[str]]:
+        """Run the listing script on the host through flatpak-spawn."""
+        cmd = ["flatpak-spawn", "--host", "sh", "-c", _HOST_LISTING_SCRIPT, "sh"]
+        if headers_only:
+            cmd.append("--headers")
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
+            return parse_host_listing(result.stdout)
+        except (OSError, subprocess.SubprocessError) as e:
+            logger.warning(f"Cannot list host executables: {e}")
+            return {}, []
+
+    def _load_cache(self) -> bool:
+        """Load the index from the cache file."""
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("host") != self.host:
+                return False
+            self._set_names(data["dirs"], data["executables"])
+            return True
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+
+    def _save_cache(self) -> None:
+        """Save the index to the cache file, atomically."""
+        data = {"host": self.host, "dirs": self._dir_mtimes, "executables": self._entries[1]}
+        tmp_path = f"{self.cache_path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            logger.warning(f"Error saving executable index: {e}")
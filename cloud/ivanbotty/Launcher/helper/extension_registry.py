@@ -0,0 +1,332 @@
+"""Compiled registry of the launcher extensions.
+
+extensions.yaml is compiled into a JSON registry at install time, or on the
+first run, so a launch loads the extension list with a single read instead
+of locating the YAML file, importing PyYAML and parsing it. The registry
+records the size, mtime and hash of the YAML it was compiled from and is
+compiled again whenever the YAML changes.
+
+Each extension carries dispatch metadata (query prefixes, a pattern, or
+fallback) which routes queries to its handler without importing it:
+LazyHandler imports a handler the first time a query may be meant for it.
+
+Compile a registry with:
+    python -m cloud.ivanbotty.Launcher.helper.extension_registry SOURCE OUTPUT
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+from typing import Any, Dict, List, Optional
+
+from cloud.ivanbotty.common import find_extensions_yaml
+from cloud.ivanbotty.Launcher.helper.load_class_instance import load_class_instance
+from cloud.ivanbotty.Launcher.helper.session_profile import SESSION
+
+logger = logging.getLogger(__name__)
+
+EXTENSIONS_YAML = "extensions.yaml"
+REGISTRY_FILENAME = "extensions.registry.json"
+REGISTRY_CACHE_PATH = os.path.expanduser(
+    os.path.join("~/.cache/cloud.ivanbotty.Launcher", REGISTRY_FILENAME)
+)
+
+# Version of the registry layout; registries of any other version are recompiled
+REGISTRY_VERSION = 1
+
+
+def _source_fingerprint(path: str) -> Dict[str, Any]:
+    """Return the size, mtime and content hash of a source file."""
+    path = os.path.abspath(path)
+    st = os.stat(path)
+    with open(path, "rb") as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    return {"path": path, "size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": digest}
+
+
+def compile_registry(yaml_path: str) -> Dict[str, Any]:
+    """Compile extensions.yaml into a registry.
+
+    Args:
+        yaml_path: Path of extensions.yaml
+
+    Returns:
+        The registry, with the extensions in their YAML order
+
+    Raises:
+        OSError: If the YAML cannot be read
+        ValueError: If the YAML is not a valid extension list
+    """
+    # PyYAML is only needed when compiling
+    import yaml
+
+    source = _source_fingerprint(yaml_path)
+    with open(yaml_path, encoding="utf-8") as f:
+        try:
+            config = yaml.safe_load(f)
+        except yaml.YAMLError as e:
+            raise ValueError(f"Invalid {yaml_path}: {e}") from e
+    if not isinstance(config, dict) or not isinstance(config.get("extensions", []), list):
+        raise ValueError(f"Invalid extensions config format in {yaml_path}")
+
+    extensions = []
+    for ext in config.get("extensions", []):
+        dispatch = ext.get("dispatch") or {}
+        pattern = dispatch.get("pattern")
+        if pattern is not None:
+            # Fail at compile time rather than on the first query
+            re.compile(pattern)
+        extensions.append(
+            {
+                "name": ext["name"],
+                "description": ext.get("description", ""),
+                "enabled": ext.get("enabled", True),
+                "cant_disable": ext.get("cant_disable", False),
+                "service": ext.get("service"),
+                "handler": ext.get("handler"),
+                "version": ext.get("version"),
+                "author": ext.get("author"),
+                "dispatch": {
+                    "prefixes": list(dispatch.get("prefixes", [])),
+                    "pattern": pattern,
+                    "fallback": bool(dispatch.get("fallback", False)),
+                },
+            }
+        )
+    return {"version": REGISTRY_VERSION, "source": source, "extensions": extensions}
+
+
+def write_registry(registry: Dict[str, Any], path: str) -> bool:
+    """Atomically write a registry.
+
+    Args:
+        registry: Registry returned by compile_registry()
+        path: Destination of the registry
+
+    Returns:
+        True if the registry was written, False otherwise
+    """
+    tmp_path = f"{path}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(registry, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        return True
+    except OSError as e:
+        logger.warning(f"Could not write extension registry {path}: {e}")
+        return False
+
+
+def read_registry(path: str) -> Optional[Dict[str, Any]]:
+    """Read a registry, None if it is missing, unreadable or of another version."""
+    try:
+        with open(path, "rb") as f:
+            registry = json.loads(f.read())
+    except (OSError, ValueError):
+        return None
+    if not isinstance(registry, dict) or registry.get("version") != REGISTRY_VERSION:
+        return None
+    return registry
+
+
+def is_registry_current(registry: Dict[str, Any], yaml_path: Optional[str] = None) -> bool:
+    """Check whether a registry matches its YAML.
+
+    A changed mtime alone does not invalidate the registry when the content
+    hash still matches, as installing files does not preserve mtimes. The
+    recorded fingerprint is then updated to the current mtime.
+
+    Args:
+        registry: Registry to check
+        yaml_path: Path of the YAML (default: the one the registry was compiled from)
+
+    Returns:
+        True if the YAML is unchanged
+    """
+    source = registry.get("source") or {}
+    yaml_path = os.path.abspath(yaml_path) if yaml_path else source.get("path")
+    if not yaml_path:
+        return False
+    try:
+        st = os.stat(yaml_path)
+    except OSError:
+        return False
+    if st.st_size != source.get("size"):
+        return False
+    if st.st_mtime_ns == source.get("mtime_ns") and yaml_path == source.get("path"):
+        return True
+    try:
+        current = _source_fingerprint(yaml_path)
+    except OSError:
+        return False
+    if current["sha256"] != source.get("sha256"):
+        return False
+    registry["source"] = current
+    return True
+
+
+def load_registry(cache_path: str = REGISTRY_CACHE_PATH) -> Optional[Dict[str, Any]]:
+    """Load the extension registry, compiling it when needed.
+
+    The user's copy is tried first, which costs one read and one stat. Then
+    the registry installed next to extensions.yaml, and finally the YAML is
+    compiled. Either is saved as the user's copy for the next launch.
+
+    Args:
+        cache_path: Path of the user's copy of the registry
+
+    Returns:
+        The registry, None if extensions.yaml cannot be found or compiled
+    """
+    registry = read_registry(cache_path)
+    if registry is not None and is_registry_current(registry):
+        return registry
+
+    yaml_path = find_extensions_yaml(EXTENSIONS_YAML)
+    if yaml_path is None:
+        logger.error(f"{EXTENSIONS_YAML} file not found")
+        return None
+
+    installed = read_registry(os.path.join(os.path.dirname(yaml_path), REGISTRY_FILENAME))
+    if installed is not None and is_registry_current(installed, yaml_path):
+        registry = installed
+    else:
+        try:
+            registry = compile_registry(yaml_path)
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"Error compiling extensions: {e}")
+            return None
+        logger.info(f"Compiled extension registry from {yaml_path}")
+    write_registry(registry, cache_path)
+    return registry
+
+
+class LazyHandler:
+    """Input handler imported the first time a query may be meant for it.
+
+    Queries are matched against the dispatch metadata of the registry
+    first; only matching queries import the handler, whose own can_handle()
+    then has the last word.
+
+    Attributes:
+        path: Full class path of the handler
+        name: Name of the provider, the extension name in lower case
+        fallback: True if the handler takes any query, it is then tried last
+    """
+
+    def __init__(
+        self, path: str, dispatch: Optional[Dict[str, Any]] = None, name: Optional[str] = None
+    ) -> None:
+        """Initialize the handler without importing it.
+
+        Args:
+            path: Full class path of the handler
+            dispatch: Dispatch metadata of the registry; without any, every
+                query is a candidate
+            name: Name of the provider (default: the class name)
+        """
+        dispatch = dispatch or {}
+        self.path = path
+        self.name = name or path.rsplit(".", 1)[-1]
+        self.fallback = bool(dispatch.get("fallback", False))
+        self._prefixes = tuple(dispatch.get("prefixes") or ())
+        pattern = dispatch.get("pattern")
+        self._pattern = re.compile(pattern) if pattern else None
+        self._routed = self.fallback or bool(self._prefixes) or self._pattern is not None
+        self._handler = None
+        self._failed = False
+
+    @property
+    def loaded(self) -> bool:
+        """True once the handler has been imported."""
+        return self._handler is not None
+
+    def load(self):
+        """Import the handler now, None if it cannot be loaded.
+
+        The module of the handler is recorded in the session profile, so the
+        next sessions can import it, and what it imports, ahead of time.
+        """
+        if self._handler is None and not self._failed:
+            self._handler = load_class_instance(self.path)
+            self._failed = self._handler is None
+            if not self._failed:
+                SESSION.use("module", self.path.rsplit(".", 1)[0])
+        return self._handler
+
+    def matches(self, text: str) -> bool:
+        """Check the dispatch metadata only, without importing the handler."""
+        if self.fallback or not self._routed:
+            return True
+        if self._prefixes and text.startswith(self._prefixes):
+            return True
+        return self._pattern is not None and self._pattern.match(text.strip()) is not None
+
+    def can_handle(self, text: str) -> bool:
+        """Check whether the handler processes text, importing it on a match."""
+        if not self.matches(text):
+            return False
+        handler = self.load()
+        return handler is not None and bool(handler.can_handle(text))
+
+    def handle(self, *args):
+        """Forward to the handler."""
+        return self.load().handle(*args)
+
+    def pending(self, text: str, idle: bool = False):
+        """Forward to the handler."""
+        return self.load().pending(text, idle)
+
+    @property
+    def expensive(self) -> bool:
+        """Forward to the handler, consulted after can_handle() matched."""
+        handler = self.load()
+        return bool(handler is not None and handler.expensive)
+
+    @property
+    def acts_on_activation(self) -> bool:
+        """Forward to the handler, consulted after can_handle() matched."""
+        handler = self.load()
+        return bool(handler is not None and handler.acts_on_activation)
+
+
+def add_handler(handlers: List, handler) -> List:
+    """Return handlers with handler added, fallback handlers staying last.
+
+    Args:
+        handlers: Handlers in dispatch order
+        handler: Handler to add
+
+    Returns:
+        A new list, so searches iterating the old one are not disturbed
+    """
+    return sorted([*handlers, handler], key=lambda h: getattr(h, "fallback", False))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Compile a registry, for the build system.
+
+    Args:
+        argv: SOURCE and OUTPUT paths (default: sys.argv[1:])
+
+    Returns:
+        Exit code (0 for success, 1 for failure)
+    """
+    args = sys.argv[1:] if argv is None else argv
+    if len(args) != 2:
+        print(f"Usage: {__name__} SOURCE OUTPUT", file=sys.stderr)
+        return 1
+    try:
+        registry = compile_registry(args[0])
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Error compiling extensions: {e}", file=sys.stderr)
+        return 1
+    return 0 if write_registry(registry, args[1]) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
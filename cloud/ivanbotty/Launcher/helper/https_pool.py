@@ -0,0 +1,348 @@
+"""Keep-alive HTTPS connection pool with warm-up support.
+
+This module provides a small connection pool for a single HTTPS endpoint.
+Connections can be established ahead of time so the first request skips the
+TCP and TLS handshakes, and are kept alive until an idle timeout expires.
+Idle connections the server has closed are dropped before they are used, and
+a failed request is only sent again when none of its bytes were written, so a
+POST is never sent twice.
+
+Requests made inside a CancelScope can be aborted from another thread, which
+closes their connection so the caller stops waiting for the response.
+"""
+
+import http.client
+import logging
+import select
+import socket
+import ssl
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+# Errors raised when a kept-alive connection was closed by the server
+_STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.CannotSendRequest,
+    BrokenPipeError,
+    ConnectionResetError,
+)
+
+
+class _PooledConnection(http.client.HTTPSConnection):
+    """HTTPS connection recording whether the current request was written.
+
+    Attributes:
+        written: True once a byte of the current request was handed to the socket
+    """
+
+    written = False
+
+    def send(self, data) -> None:
+        self.written = True
+        super().send(data)
+
+
+def _is_stale(conn: http.client.HTTPSConnection) -> bool:
+    """Check whether the server closed an idle connection.
+
+    An idle connection has no response pending. Its socket can still be
+    readable with TLS records such as session tickets, so a readable socket
+    is read without blocking: the connection is only alive if that yields
+    no data.
+    """
+    if conn.sock is None:
+        return True
+    try:
+        readable, _, _ = select.select([conn.sock], [], [], 0)
+        if not readable:
+            return False
+        conn.sock.setblocking(False)
+        try:
+            conn.sock.recv(1)
+        finally:
+            conn.sock.settimeout(conn.timeout)
+    except (ssl.SSLWantReadError, BlockingIOError):
+        return False
+    except (OSError, ValueError):
+        return True
+    # Either the end of the stream or data no request asked for
+    return True
+
+
+class RequestCancelled(Exception):
+    """Raised by a request aborted through its CancelScope."""
+
+
+class CancelScope:
+    """Scope whose requests can be aborted from another thread.
+
+    Requests sent by a thread while it is inside the scope (``with scope:``)
+    register their connection with it; cancel() shuts that connection down,
+    which makes the blocked request raise RequestCancelled. Requests started
+    after cancel() fail right away.
+
+    Attributes:
+        cancelled: True once cancel() was called
+    """
+
+    _current = threading.local()
+
+    def __init__(self) -> None:
+        """Initialize a scope that is not cancelled."""
+        self.cancelled = False
+        self._conn: Optional[http.client.HTTPSConnection] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def current(cls) -> Optional["CancelScope"]:
+        """Return the scope the calling thread is in, None outside any."""
+        return getattr(cls._current, "scope", None)
+
+    def __enter__(self) -> "CancelScope":
+        self._previous = CancelScope.current()
+        CancelScope._current.scope = self
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        CancelScope._current.scope = self._previous
+
+    def cancel(self) -> None:
+        """Abort the request in progress, and any later one."""
+        with self._lock:
+            self.cancelled = True
+            conn = self._conn
+        if conn is not None and conn.sock is not None:
+            try:
+                conn.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def _attach(self, conn: Optional[http.client.HTTPSConnection]) -> None:
+        """Register the connection of the request in progress.
+
+        Raises:
+            RequestCancelled: If the scope was cancelled already
+        """
+        with self._lock:
+            if self.cancelled:
+                raise RequestCancelled("Request cancelled")
+            self._conn = conn
+
+    def _detach(self) -> None:
+        """Forget the connection of the finished request."""
+        with self._lock:
+            self._conn = None
+
+
+class KeepAliveHTTPSPool:
+    """Pool of persistent HTTPS connections to one endpoint.
+
+    Attributes:
+        host: Host name of the endpoint
+        port: TCP port of the endpoint
+        idle_timeout: Seconds an unused connection is kept open
+        max_idle: Maximum number of idle connections kept in the pool
+        handshakes: Number of connections established so far
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        idle_timeout: float = 120.0,
+        max_idle: int = 2,
+        timeout: float = 30.0,
+        ssl_context: Optional[ssl.SSLContext] = None,
+    ) -> None:
+        """Initialize the pool without opening any connection.
+
+        Args:
+            endpoint: Base URL of the endpoint, e.g. "https://example.com"
+            idle_timeout: Seconds an unused connection is kept open
+            max_idle: Maximum number of idle connections kept in the pool
+            timeout: Socket timeout for requests in seconds
+            ssl_context: TLS context, defaults to the system trust store
+        """
+        url = urlsplit(endpoint)
+        if url.scheme != "https" or not url.hostname:
+            raise ValueError(f"Invalid HTTPS endpoint: {endpoint}")
+
+        self.host = url.hostname
+        self.port = url.port or 443
+        self.idle_timeout = idle_timeout
+        self.max_idle = max_idle
+        self.timeout = timeout
+        self.handshakes = 0
+        self._ssl_context = ssl_context
+        self._idle: List[Tuple[_PooledConnection, float]] = []
+        self._lock = threading.Lock()
+        self._reaper: Optional[threading.Timer] = None
+
+    def warm(self) -> threading.Thread:
+        """Establish a connection in the background and keep it in the pool.
+
+        Does nothing if an idle connection is already available.
+
+        Returns:
+            The thread performing the warm-up
+        """
+
+        def do_warm():
+            with self._lock:
+                self._drop_expired()
+                if self._idle:
+                    return
+            try:
+                start = time.monotonic()
+                conn = self._new_connection()
+                logger.debug(
+                    f"Warmed connection to {self.host}:{self.port} "
+                    f"in {(time.monotonic() - start) * 1000:.1f} ms"
+                )
+                self._release(conn)
+            except Exception as e:
+                logger.debug(f"Connection warm-up failed: {e}")
+
+        thread = threading.Thread(target=do_warm, daemon=True)
+        thread.start()
+        return thread
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        body: Optional[bytes] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Tuple[int, bytes]:
+        """Send a request over a pooled connection.
+
+        A request over a reused connection that fails before any of its
+        bytes were written is retried once on a fresh connection; once
+        written, it may have reached the server and is not sent again.
+        Inside a CancelScope, the request can be aborted, see CancelScope.
+
+        Args:
+            method: HTTP method
+            path: Request path including the query string
+            body: Optional request body
+            headers: Optional request headers
+
+        Returns:
+            Tuple of (status code, response body)
+
+        Raises:
+            RequestCancelled: If the request was aborted through its scope
+        """
+        scope = CancelScope.current()
+        if scope is not None:
+            scope._attach(None)
+        conn, reused = self._acquire()
+        try:
+            return self._send(conn, method, path, body, headers, scope)
+        except _STALE_CONNECTION_ERRORS:
+            if not reused or conn.written or (scope is not None and scope.cancelled):
+                raise
+            logger.debug("Request failed before it was written, reconnecting")
+            return self._send(self._new_connection(), method, path, body, headers, scope)
+
+    def idle_connections(self) -> int:
+        """Return the number of idle connections ready for reuse."""
+        with self._lock:
+            self._drop_expired()
+            return len(self._idle)
+
+    def close(self) -> None:
+        """Close every idle connection."""
+        with self._lock:
+            for conn, _ in self._idle:
+                conn.close()
+            self._idle.clear()
+            if self._reaper:
+                self._reaper.cancel()
+                self._reaper = None
+
+    def _send(self, conn, method, path, body, headers, scope=None) -> Tuple[int, bytes]:
+        """Send a request and return the connection to the pool if possible."""
+        conn.written = False
+        try:
+            if scope is not None:
+                scope._attach(conn)
+            conn.request(method, path, body=body, headers=headers or {})
+            response = conn.getresponse()
+            data = response.read()
+        except Exception as e:
+            conn.close()
+            if scope is not None and scope.cancelled:
+                logger.debug(f"Request to {self.host} cancelled")
+                raise RequestCancelled("Request cancelled") from e
+            raise
+        finally:
+            if scope is not None:
+                scope._detach()
+
+        if response.will_close:
+            conn.close()
+        else:
+            self._release(conn)
+        return response.status, data
+
+    def _new_connection(self) -> _PooledConnection:
+        """Open a new connection, performing the TCP and TLS handshakes."""
+        context = self._ssl_context or ssl.create_default_context()
+        conn = _PooledConnection(
+            self.host, self.port, timeout=self.timeout, context=context
+        )
+        conn.connect()
+        with self._lock:
+            self.handshakes += 1
+        return conn
+
+    def _acquire(self) -> Tuple[_PooledConnection, bool]:
+        """Take an idle connection still open, or open a new one.
+
+        Returns:
+            Tuple of (connection, True if the connection was reused)
+        """
+        with self._lock:
+            self._drop_expired()
+            while self._idle:
+                conn, _ = self._idle.pop()
+                if not _is_stale(conn):
+                    return conn, True
+                logger.debug("Pooled connection was closed by the server, dropping it")
+                conn.close()
+        return self._new_connection(), False
+
+    def _release(self, conn: _PooledConnection) -> None:
+        """Return a connection to the pool."""
+        with self._lock:
+            if len(self._idle) >= self.max_idle:
+                conn.close()
+                return
+            self._idle.append((conn, time.monotonic()))
+            self._schedule_reaper()
+
+    def _drop_expired(self) -> None:
+        """Close idle connections past the idle timeout. Caller holds the lock."""
+        deadline = time.monotonic() - self.idle_timeout
+        for conn, last_used in self._idle:
+            if last_used < deadline:
+                conn.close()
+        self._idle = [(conn, last_used) for conn, last_used in self._idle if last_used >= deadline]
+
+    def _schedule_reaper(self) -> None:
+        """Close idle connections once the idle timeout elapses. Caller holds the lock."""
+        if self._reaper:
+            self._reaper.cancel()
+
+        def reap():
+            with self._lock:
+                self._drop_expired()
+                self._reaper = None
+
+        self._reaper = threading.Timer(self.idle_timeout + 0.1, reap)
+        self._reaper.daemon = True
+        self._reaper.start()
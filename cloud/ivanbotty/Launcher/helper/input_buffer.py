@@ -0,0 +1,84 @@
+"""Capture of the input typed while the launcher is still starting.
+
+Launchers are opened with a hotkey and users type right away, often a whole
+query and Enter before the extensions and the catalogue are loaded. Typed
+text stays in the search entry and is searched against whatever is loaded;
+this buffer keeps the Enter pressed meanwhile, so it launches the top result
+once the index is complete instead of being lost.
+"""
+
+import logging
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class StartupInputBuffer:
+    """Holds back an early Enter until the index is complete.
+
+    Attributes:
+        ready: True once extensions and catalogue are loaded
+        keystrokes: Text changes seen before the index was ready
+    """
+
+    def __init__(self) -> None:
+        """Initialize a buffer waiting for the index."""
+        self.ready = False
+        self.keystrokes = 0
+        self._pending: Optional[str] = None
+        self._pending_since = 0.0
+
+    @property
+    def pending(self) -> Optional[str]:
+        """Query whose activation waits for the index, None if there is none."""
+        return self._pending
+
+    def text_changed(self, text: str) -> None:
+        """Record a change of the query.
+
+        An Enter held back for another query is dropped, as the user kept
+        typing after pressing it.
+
+        Args:
+            text: The new query
+        """
+        if self.ready:
+            return
+        self.keystrokes += 1
+        if self._pending is not None and text != self._pending:
+            logger.debug(f"Early activation of {self._pending!r} dropped, query changed")
+            self._pending = None
+
+    def activate(self, text: str) -> bool:
+        """Handle Enter.
+
+        Args:
+            text: The query Enter was pressed on
+
+        Returns:
+            True if the query can be activated now, False if the activation
+            was held back until set_ready()
+        """
+        if self.ready:
+            return True
+        self._pending = text
+        self._pending_since = time.monotonic()
+        logger.debug(f"Activation of {text!r} held back until the index is ready")
+        return False
+
+    def set_ready(self) -> Optional[str]:
+        """Mark the index as complete.
+
+        Returns:
+            The query whose held back activation must run now, None if none
+        """
+        if self.ready:
+            return None
+        self.ready = True
+        pending, self._pending = self._pending, None
+        if pending is not None:
+            waited = (time.monotonic() - self._pending_since) * 1000
+            logger.info(f"Replaying Enter on {pending!r}, held back {waited:.0f} ms")
+        logger.debug(f"Index ready after {self.keystrokes} early keystrokes")
+        return pending
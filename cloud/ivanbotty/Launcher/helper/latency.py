@@ -0,0 +1,309 @@
+"""Keystroke-to-results latency of the search.
+
+Each search is split into stages, timed with time.perf_counter():
+
+- debounce: from the last keystroke until the search starts
+- provider: handlers matching and answering the query
+- model: the results list swapping in the new model, rows excluded
+- bind: creating and binding the result rows
+- frame: from the rows being bound until the next frame is painted
+- total: from the last keystroke until that frame
+
+Durations go into histograms with fixed buckets, so recording a search
+costs a bisection per stage and the histograms of many sessions add up.
+Percentiles are interpolated within their bucket. The histograms and the
+slowest queries are saved to the settings database when the launcher
+quits, and added to those of the previous sessions.
+"""
+
+import bisect
+import collections
+import json
+import logging
+import threading
+import time
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+import cloud.ivanbotty.database.sqlite3 as db
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("debounce", "provider", "model", "bind", "frame", "total")
+
+# Upper bounds of the buckets in milliseconds; a last bucket takes the rest
+BUCKET_BOUNDS = (1, 2, 4, 8, 12, 16, 24, 33, 50, 75, 100, 150, 200, 300, 500, 750, 1000, 2000, 5000)
+
+PERCENTILES = (50, 95, 99)
+
+# Queries of the session whose timings are kept
+RECENT_QUERIES = 200
+# Slowest queries reported and saved per session
+SLOWEST_QUERIES = 10
+# Slow queries kept in the database, most recent first
+SAVED_QUERIES = 100
+
+
+class LatencyHistogram:
+    """Counts of durations in fixed buckets.
+
+    Attributes:
+        bounds: Upper bounds of the buckets in milliseconds
+        counts: Durations per bucket, with one more bucket for longer ones
+    """
+
+    def __init__(
+        self, bounds: Tuple[float, ...] = BUCKET_BOUNDS, counts: Optional[List[int]] = None
+    ) -> None:
+        """Initialize a histogram.
+
+        Args:
+            bounds: Upper bounds of the buckets in milliseconds
+            counts: Initial counts (default: empty)
+        """
+        self.bounds = tuple(bounds)
+        self.counts = list(counts) if counts is not None else [0] * (len(self.bounds) + 1)
+
+    @property
+    def count(self) -> int:
+        """Number of recorded durations."""
+        return sum(self.counts)
+
+    def add(self, ms: float) -> None:
+        """Record a duration in milliseconds."""
+        self.counts[bisect.bisect_left(self.bounds, ms)] += 1
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        """Add the counts of a histogram with the same buckets."""
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Return the p-th percentile in milliseconds, None if empty.
+
+        The percentile is interpolated linearly within its bucket. In the
+        last bucket, which has no upper bound, its lower bound is returned.
+        """
+        total = self.count
+        if not total:
+            return None
+        rank = total * p / 100
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.bounds[index - 1] if index else 0.0
+                if index == len(self.bounds):
+                    return float(lower)
+                return lower + (self.bounds[index] - lower) * (rank - seen) / count
+            seen += count
+        return float(self.bounds[-1])
+
+
+class QueryLatency:
+    """Timings of one search, from its last keystroke to its frame.
+
+    Attributes:
+        query: Text of the search
+        stages: Milliseconds spent per stage
+    """
+
+    def __init__(
+        self, recorder: "LatencyRecorder", query: str, typed_at: Optional[float] = None
+    ) -> None:
+        """Start timing a search.
+
+        Args:
+            recorder: Recorder the timings are added to
+            query: Text of the search
+            typed_at: time.perf_counter() value of the last keystroke
+                (default: now, without debounce wait)
+        """
+        self.recorder = recorder
+        self.query = query
+        self.started = time.perf_counter()
+        self.typed_at = self.started if typed_at is None else typed_at
+        self.searched = None
+        self.stages: Dict[str, float] = {"debounce": (self.started - self.typed_at) * 1000}
+        self._finished = False
+
+    def add(self, stage: str, ms: float) -> None:
+        """Add milliseconds to a stage."""
+        self.stages[stage] = self.stages.get(stage, 0.0) + ms
+
+    def timed(self, stage: str, fn: Callable) -> Callable:
+        """Wrap fn so its calls are added to a stage."""
+
+        def wrapper(*args):
+            start = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                self.add(stage, (time.perf_counter() - start) * 1000)
+
+        return wrapper
+
+    def end_search(self) -> None:
+        """Mark the end of the search.
+
+        The provider stage is the time of the search not spent on the model
+        and the rows.
+        """
+        self.searched = time.perf_counter()
+        elapsed = (self.searched - self.started) * 1000
+        rendering = self.stages.get("model", 0.0) + self.stages.get("bind", 0.0)
+        self.stages["provider"] = max(0.0, elapsed - rendering)
+
+    def finish(self, painted: bool = False) -> None:
+        """Record the search, once.
+
+        Args:
+            painted: True when called after the frame showing the results
+        """
+        if self._finished:
+            return
+        self._finished = True
+        now = time.perf_counter()
+        if self.searched is None:
+            self.end_search()
+        if painted:
+            self.stages["frame"] = (now - self.searched) * 1000
+        self.stages["total"] = (now - self.typed_at) * 1000
+        self.recorder.add(self)
+
+
+class LatencyRecorder:
+    """Histograms of the search stages, across sessions.
+
+    Searches are recorded from the debounce thread and the main thread.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty recorder; saved histograms are read on first use."""
+        self._histograms = {stage: LatencyHistogram() for stage in STAGES}
+        self._recent: Deque[Dict[str, Any]] = collections.deque(maxlen=RECENT_QUERIES)
+        self._saved: Optional[Dict[str, LatencyHistogram]] = None
+        self._lock = threading.Lock()
+
+    def begin(self, query: str, typed_at: Optional[float] = None) -> QueryLatency:
+        """Start timing a search, see QueryLatency."""
+        return QueryLatency(self, query, typed_at)
+
+    def add(self, latency: QueryLatency) -> None:
+        """Record the timings of a finished search."""
+        stages = {stage: round(ms, 2) for stage, ms in latency.stages.items()}
+        with self._lock:
+            for stage, ms in latency.stages.items():
+                self._histograms[stage].add(ms)
+            self._recent.append(
+                {
+                    "query": latency.query,
+                    "total_ms": stages["total"],
+                    "stages": stages,
+                    "recorded_at": int(time.time()),
+                }
+            )
+
+    def _load(self) -> Dict[str, LatencyHistogram]:
+        """Return the histograms of past sessions, read once."""
+        if self._saved is None:
+            saved = {}
+            try:
+                rows = db.get_latency_histograms()
+            except Exception as e:
+                logger.warning(f"Could not read latency histograms: {e}")
+                rows = {}
+            for stage, (bounds, counts) in rows.items():
+                # Histograms with other buckets cannot be added up
+                if (
+                    stage in STAGES
+                    and tuple(bounds) == BUCKET_BOUNDS
+                    and len(counts) == len(bounds) + 1
+                ):
+                    saved[stage] = LatencyHistogram(BUCKET_BOUNDS, counts)
+            self._saved = saved
+        return self._saved
+
+    def histograms(self) -> Dict[str, LatencyHistogram]:
+        """Return the histograms of past sessions and this one, added up."""
+        saved = self._load()
+        with self._lock:
+            merged = {
+                stage: LatencyHistogram(BUCKET_BOUNDS, hist.counts)
+                for stage, hist in self._histograms.items()
+            }
+        for stage, hist in saved.items():
+            merged[stage].merge(hist)
+        return merged
+
+    def slowest(self, limit: int = SLOWEST_QUERIES) -> List[Dict[str, Any]]:
+        """Return the slowest recent queries of this session, slowest first."""
+        with self._lock:
+            recent = list(self._recent)
+        return sorted(recent, key=lambda query: query["total_ms"], reverse=True)[:limit]
+
+    def report(self) -> Dict[str, Any]:
+        """Return the percentiles per stage and the slowest recent queries.
+
+        Queries saved by past sessions are included among the slowest.
+        """
+        stages = {}
+        for stage, hist in self.histograms().items():
+            stages[stage] = {"count": hist.count}
+            stages[stage].update({f"p{p}": hist.percentile(p) for p in PERCENTILES})
+        try:
+            saved = db.get_slow_queries(SLOWEST_QUERIES)
+        except Exception as e:
+            logger.warning(f"Could not read slow queries: {e}")
+            saved = []
+        slowest = sorted(self.slowest() + saved, key=lambda query: query["total_ms"], reverse=True)
+        return {"stages": stages, "slowest": slowest[:SLOWEST_QUERIES]}
+
+    def export(self, path: str) -> None:
+        """Write the report and the histogram buckets as JSON.
+
+        Raises:
+            OSError: If the file cannot be written
+        """
+        data = self.report()
+        data["bucket_bounds_ms"] = list(BUCKET_BOUNDS)
+        data["histograms"] = {stage: hist.counts for stage, hist in self.histograms().items()}
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+    def save(self) -> int:
+        """Add this session to the saved histograms and slowest queries.
+
+        Returns:
+            Number of searches recorded in this session
+        """
+        histograms = self.histograms()
+        slowest = self.slowest()
+        with self._lock:
+            searches = self._histograms["total"].count
+        if not searches:
+            return 0
+        try:
+            db.save_latency(
+                {stage: (list(BUCKET_BOUNDS), hist.counts) for stage, hist in histograms.items()},
+                slowest,
+                SAVED_QUERIES,
+            )
+        except Exception as e:
+            logger.warning(f"Could not save latency histograms: {e}")
+            return 0
+        with self._lock:
+            self._saved = histograms
+            self._histograms = {stage: LatencyHistogram() for stage in STAGES}
+            self._recent.clear()
+        return searches
+
+    def reset(self) -> None:
+        """Forget the histograms and queries of every session."""
+        db.clear_latency()
+        with self._lock:
+            self._saved = {}
+            self._histograms = {stage: LatencyHistogram() for stage in STAGES}
+            self._recent.clear()
+
+
+# Latency of the searches of the running launcher
+LATENCY = LatencyRecorder()
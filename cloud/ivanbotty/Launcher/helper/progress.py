@@ -0,0 +1,112 @@
+"""Staged, rate-limited progress reporting for application indexing.
+
+Indexing runs through a fixed sequence of stages. Each stage reports how many
+of its items are done, and this module turns that into an overall fraction,
+forwarding at most one update per interval so large scans do not flood the
+UI or the session bus. Stage changes and completion are always forwarded.
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Tuple
+
+# Indexing stages and their share of the overall progress
+STAGE_DISCOVER = "discover"  # Listing application directories
+STAGE_PARSE = "parse"  # Parsing .desktop files
+STAGE_ICONS = "icons"  # Resolving icon paths
+STAGE_PUBLISH = "publish"  # Writing the cache
+STAGES: Tuple[Tuple[str, float], ...] = (
+    (STAGE_DISCOVER, 0.05),
+    (STAGE_PARSE, 0.60),
+    (STAGE_ICONS, 0.30),
+    (STAGE_PUBLISH, 0.05),
+)
+
+# Labels shown in the progress bar for each stage
+STAGE_LABELS: Dict[str, str] = {
+    STAGE_DISCOVER: "Discovering applications...",
+    STAGE_PARSE: "Reading applications...",
+    STAGE_ICONS: "Resolving icons...",
+    STAGE_PUBLISH: "Saving cache...",
+}
+
+# Default minimum interval between two forwarded updates
+DEFAULT_INTERVAL_MS = 100
+
+
+class ProgressReporter:
+    """Convert per-stage progress into rate-limited overall updates.
+
+    Instances are callable as progress(stage, done, total), which is the
+    callback signature ApplicationsService.load_applications() expects.
+
+    Attributes:
+        interval_ms: Minimum interval between two forwarded updates
+        counters: Number of updates forwarded and dropped
+    """
+
+    def __init__(
+        self,
+        emit: Callable[[float, str, int], None],
+        interval_ms: int = DEFAULT_INTERVAL_MS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize the reporter.
+
+        Args:
+            emit: Called with (fraction, stage, done) for forwarded updates
+            interval_ms: Minimum interval between two forwarded updates
+            clock: Monotonic clock in seconds, replaceable for tests
+        """
+        self.emit = emit
+        self.interval_ms = interval_ms
+        self.counters: Dict[str, int] = {"emitted": 0, "dropped": 0}
+        self._clock = clock
+        self._offsets: Dict[str, Tuple[float, float]] = {}
+        offset = 0.0
+        for stage, weight in STAGES:
+            self._offsets[stage] = (offset, weight)
+            offset += weight
+        self._last_emit = None
+        self._last_stage = None
+        self._lock = threading.Lock()
+
+    def fraction(self, stage: str, done: int, total: int) -> float:
+        """Return the overall fraction for a stage's progress.
+
+        Args:
+            stage: One of the STAGE_* names
+            done: Items of the stage done so far
+            total: Items of the stage in total, 0 if unknown
+
+        Returns:
+            Overall progress from 0.0 to 1.0
+        """
+        offset, weight = self._offsets[stage]
+        stage_fraction = min(1.0, done / total) if total > 0 else 0.0
+        return min(1.0, offset + weight * stage_fraction)
+
+    def __call__(self, stage: str, done: int, total: int) -> None:
+        """Report progress, forwarding it if the interval has elapsed.
+
+        Args:
+            stage: One of the STAGE_* names
+            done: Items of the stage done so far
+            total: Items of the stage in total, 0 if unknown
+        """
+        fraction = self.fraction(stage, done, total)
+        now = self._clock()
+        with self._lock:
+            due = (
+                self._last_emit is None
+                or stage != self._last_stage
+                or fraction >= 1.0
+                or (now - self._last_emit) * 1000 >= self.interval_ms
+            )
+            if not due:
+                self.counters["dropped"] += 1
+                return
+            self._last_emit = now
+            self._last_stage = stage
+            self.counters["emitted"] += 1
+        self.emit(fraction, stage, done)
@@ -0,0 +1,200 @@
+"""Activation policy and single-flight bookkeeping for expensive providers.
+
+Providers such as the AI handler perform a paid network round trip for every
+query. This module decides when such a query is allowed to fire, makes sure
+only one request per query is in flight, and lets newer queries supersede
+older ones: the superseded request is aborted, and its answer discarded if it
+arrives anyway, instead of racing into the view.
+"""
+
+import logging
+import threading
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Activation modes
+ACTIVATION_ENTER = "enter"  # Only fire on explicit Enter
+ACTIVATION_IDLE = "idle"  # Also fire once the user stops typing
+
+
+class RequestGate:
+    """Gate deciding whether, and which, expensive requests are sent.
+
+    Attributes:
+        activation: Activation mode, ACTIVATION_ENTER or ACTIVATION_IDLE
+        idle_delay_ms: Typing pause after which an idle query fires
+        min_query_length: Minimum query length for idle activation
+        counters: Number of requests started and avoided, by reason
+    """
+
+    def __init__(
+        self,
+        activation: str = ACTIVATION_IDLE,
+        idle_delay_ms: int = 800,
+        min_query_length: int = 8,
+    ) -> None:
+        """Initialize the gate.
+
+        Args:
+            activation: Activation mode, ACTIVATION_ENTER or ACTIVATION_IDLE
+            idle_delay_ms: Typing pause after which an idle query fires
+            min_query_length: Minimum query length for idle activation
+        """
+        self.activation = activation
+        self.idle_delay_ms = idle_delay_ms
+        self.min_query_length = min_query_length
+        self.counters: Dict[str, int] = {
+            "started": 0,
+            "interrupted": 0,  # Typing resumed before the idle delay elapsed
+            "too_short": 0,  # Idle query shorter than min_query_length
+            "enter_only": 0,  # Idle query while activation requires Enter
+            "deduplicated": 0,  # Same query already in flight
+            "superseded": 0,  # In-flight request replaced by a newer query
+        }
+        self._generation = 0
+        self._in_flight: Optional[str] = None
+        self._abort: Optional[Callable[[], None]] = None
+        self._lock = threading.Lock()
+
+    @property
+    def avoided(self) -> int:
+        """Number of requests that were never sent."""
+        return (
+            self.counters["interrupted"]
+            + self.counters["too_short"]
+            + self.counters["enter_only"]
+            + self.counters["deduplicated"]
+        )
+
+    def note_interrupted(self) -> None:
+        """Record a pending idle query cancelled because typing resumed."""
+        with self._lock:
+            self.counters["interrupted"] += 1
+
+    def sends_when_idle(self, query: str) -> bool:
+        """Check whether a query is sent after a typing pause, without Enter.
+
+        Unlike allows(), nothing is counted.
+        """
+        return self.activation == ACTIVATION_IDLE and len(query.strip()) >= self.min_query_length
+
+    def allows(self, query: str, explicit: bool) -> bool:
+        """Check the activation policy for a query.
+
+        Args:
+            query: The query about to be sent
+            explicit: True if the user explicitly asked for it (Enter)
+
+        Returns:
+            True if the query may be sent
+        """
+        if explicit:
+            return True
+        with self._lock:
+            if self.activation != ACTIVATION_IDLE:
+                self.counters["enter_only"] += 1
+                return False
+            if len(query.strip()) < self.min_query_length:
+                self.counters["too_short"] += 1
+                return False
+        return True
+
+    def begin(self, query: str, abort: Optional[Callable[[], None]] = None) -> Optional[int]:
+        """Register a request for a query.
+
+        Args:
+            query: The query about to be sent
+            abort: Called, from the superseding thread, to abort the request
+                once a newer query supersedes it
+
+        Returns:
+            A token identifying the request, or None if the same query is
+            already in flight and no new request should be sent
+        """
+        with self._lock:
+            if self._in_flight == query:
+                self.counters["deduplicated"] += 1
+                return None
+            superseded = self._supersede()
+            self._generation += 1
+            self._in_flight = query
+            self._abort = abort
+            self.counters["started"] += 1
+            token = self._generation
+        self._run_abort(superseded)
+        return token
+
+    def _supersede(self) -> Optional[Callable[[], None]]:
+        """Drop the in-flight request. Caller holds the lock.
+
+        Returns:
+            The abort callback of the dropped request, to call without the lock
+        """
+        if self._in_flight is None:
+            return None
+        self.counters["superseded"] += 1
+        abort, self._abort = self._abort, None
+        self._in_flight = None
+        return abort
+
+    def _run_abort(self, abort: Optional[Callable[[], None]]) -> None:
+        """Call the abort callback of a superseded request, if any."""
+        if abort is None:
+            return
+        try:
+            abort()
+        except Exception as e:
+            logger.warning(f"Could not abort superseded request: {e}")
+
+    def is_current(self, token: int) -> bool:
+        """Check whether a request has not been superseded.
+
+        Args:
+            token: Token returned by begin()
+
+        Returns:
+            True if the request's result should still be shown
+        """
+        with self._lock:
+            return token == self._generation and self._in_flight is not None
+
+    def finish(self, token: int) -> bool:
+        """Mark a request as completed.
+
+        Args:
+            token: Token returned by begin()
+
+        Returns:
+            True if the request was still current and its result should be shown
+        """
+        with self._lock:
+            if token != self._generation or self._in_flight is None:
+                return False
+            self._in_flight = None
+            self._abort = None
+            return True
+
+    def cancel(self, keep: Optional[str] = None) -> None:
+        """Supersede the in-flight request, if any, without starting a new one.
+
+        Args:
+            keep: Query whose in-flight request should not be cancelled
+        """
+        with self._lock:
+            if self._in_flight is not None and self._in_flight == keep:
+                return
+            superseded = self._supersede()
+            self._generation += 1
+        self._run_abort(superseded)
+
+    def stats(self) -> Dict[str, int]:
+        """Return a snapshot of the counters including the avoided total.
+
+        Returns:
+            Dictionary of counter names to values
+        """
+        with self._lock:
+            snapshot = dict(self.counters)
+        snapshot["avoided"] = self.avoided
+        return snapshot
@@ -0,0 +1,175 @@
+"""Persistent cache for AI responses.
+
+This module provides a two-level cache for answers returned by the AI
+service: an in-memory LRU in front of the ``ai_responses`` table of the
+settings database. Entries are keyed by model, normalized question and a
+hash of the system prompt, so changing either invalidates old answers.
+"""
+
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import cloud.ivanbotty.database.sqlite3 as db
+from cloud.ivanbotty.Launcher.config.config import (
+    AI_CACHE_MAX_ENTRIES,
+    AI_CACHE_MEMORY_ENTRIES,
+    AI_CACHE_TTL,
+)
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+# Shared cache instance, see get_response_cache()
+_shared_cache = None
+
+
+def normalize_question(question: str) -> str:
+    """Normalize a question so trivially different inputs share an entry.
+
+    Args:
+        question: The raw question typed by the user
+
+    Returns:
+        The question case-folded, with collapsed whitespace and without
+        trailing punctuation
+    """
+    text = _WHITESPACE_PATTERN.sub(" ", question).strip().casefold()
+    return text.rstrip("?!. ")
+
+
+def make_key(model: str, question: str, system_prompt: str) -> str:
+    """Build the cache key for a question.
+
+    Args:
+        model: Name of the model answering the question
+        question: The raw question typed by the user
+        system_prompt: The system prompt prepended to the question
+
+    Returns:
+        Hex digest identifying the (model, question, system prompt) triple
+    """
+    prompt_hash = hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()
+    material = "\0".join((model, normalize_question(question), prompt_hash))
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class AIResponseCache:
+    """In-memory LRU backed by the settings database.
+
+    Attributes:
+        ttl: Maximum age of an entry in seconds
+        max_entries: Maximum number of entries kept in the database
+        memory_entries: Maximum number of entries kept in memory
+    """
+
+    def __init__(
+        self,
+        ttl: int = AI_CACHE_TTL,
+        max_entries: int = AI_CACHE_MAX_ENTRIES,
+        memory_entries: int = AI_CACHE_MEMORY_ENTRIES,
+    ) -> None:
+        """Initialize an empty cache.
+
+        Args:
+            ttl: Maximum age of an entry in seconds
+            max_entries: Maximum number of entries kept in the database
+            memory_entries: Maximum number of entries kept in memory
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        # Key -> (creation time, answer)
+        self._memory: "OrderedDict[str, Tuple[int, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, model: str, question: str, system_prompt: str) -> Optional[str]:
+        """Look up a cached answer.
+
+        Args:
+            model: Name of the model answering the question
+            question: The raw question typed by the user
+            system_prompt: The system prompt prepended to the question
+
+        Returns:
+            The cached answer, or None on a miss
+        """
+        key = make_key(model, question, system_prompt)
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created_at, response = entry
+                if created_at >= time.time() - self.ttl:
+                    self._memory.move_to_end(key)
+                    logger.debug("AI cache hit (memory)")
+                    return response
+                # Expired, as in the database
+                del self._memory[key]
+
+        try:
+            row = db.get_ai_response(key, self.ttl)
+        except Exception as e:
+            logger.warning(f"Failed to read AI cache: {e}")
+            return None
+
+        if row is None:
+            return None
+        response, created_at = row
+        logger.debug("AI cache hit (database)")
+        self._remember(key, response, created_at)
+        return response
+
+    def put(self, model: str, question: str, system_prompt: str, response: str) -> None:
+        """Store an answer in both cache levels.
+
+        Args:
+            model: Name of the model that answered the question
+            question: The raw question typed by the user
+            system_prompt: The system prompt prepended to the question
+            response: The answer to cache
+        """
+        key = make_key(model, question, system_prompt)
+        self._remember(key, response, int(time.time()))
+        try:
+            db.set_ai_response(key, model, response)
+            db.prune_ai_responses(self.ttl, self.max_entries)
+        except Exception as e:
+            logger.warning(f"Failed to write AI cache: {e}")
+
+    def clear(self) -> None:
+        """Remove every cached answer from memory and from the database."""
+        with self._lock:
+            self._memory.clear()
+        db.clear_ai_responses()
+        logger.info("AI response cache cleared")
+
+    def _remember(self, key: str, response: str, created_at: int) -> None:
+        """Insert an entry in the in-memory LRU, evicting the oldest one.
+
+        Args:
+            key: The cache key of the answer
+            response: The answer
+            created_at: When the answer was stored, expiring it with the ttl
+        """
+        with self._lock:
+            self._memory[key] = (created_at, response)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+
+def get_response_cache() -> AIResponseCache:
+    """Return the cache shared by the AI service and the preferences dialog.
+
+    Returns:
+        The shared AIResponseCache instance
+    """
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = AIResponseCache()
+    return _shared_cache
@@ -0,0 +1,275 @@
+"""Profile-guided preloading of what launcher sessions use.
+
+Some work is needed in nearly every session: the icons of the applications
+the user usually opens, the providers of the queries they usually type and
+the modules those import on first use. The session profile records which
+modules, providers and icons each session used, and scores them with an
+exponential moving average over past sessions. Modules are recorded when
+LazyHandler imports a handler, under the name of the handler's module, and
+when a window opens Preferences. Items used in about half of
+the recent sessions or more are preloaded in the background once the
+launcher is up, until a memory budget is spent.
+
+Preloading is judged per session: a hit is a preloaded item the session
+used, a miss an item used without having been preloaded, and an unused
+item one preloaded for nothing. Items used before preloading started, or
+already loaded by then, are not counted.
+"""
+
+import importlib
+import json
+import logging
+import os
+import sys
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+PROFILE_PATH = os.path.expanduser("~/.cache/cloud.ivanbotty.Launcher/session_profile.json")
+
+# Version of the profile layout; profiles of any other version start over
+PROFILE_VERSION = 1
+
+KINDS = ("module", "provider", "icon")
+
+# Weight of the last session in the scores
+SMOOTHING = 0.3
+# Score from which an item is preloaded, reached by items used in the last
+# two sessions or in about half of the recent ones
+PRELOAD_THRESHOLD = 0.5
+# Score under which an item is forgotten
+FORGET_THRESHOLD = 0.01
+# Items preloaded at most per kind, by decreasing score
+PRELOAD_LIMITS = {"module": 20, "provider": 10, "icon": 40}
+# Resident memory preloading may add
+PRELOAD_BUDGET = 32 * 1024 * 1024
+
+Item = Tuple[str, str]
+
+
+def resident_memory() -> int:
+    """Return the resident set size of the process in bytes, 0 if unknown."""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+class SessionProfile:
+    """Usage of the current session and scores of the past ones.
+
+    Attributes:
+        path: File the profile is saved to
+        preload_bytes: Resident memory added by preloading
+    """
+
+    def __init__(self, path: str = PROFILE_PATH) -> None:
+        """Initialize a profile, read from path on first use.
+
+        Args:
+            path: File the profile is saved to
+        """
+        self.path = path
+        self.preload_bytes = 0
+        self._scores: Optional[Dict[str, Dict[str, float]]] = None
+        self._totals = {"sessions": 0, "hits": 0, "misses": 0, "unused": 0}
+        self._used: Set[Item] = set()
+        self._early: Set[Item] = set()
+        self._preloaded: Set[Item] = set()
+        self._present: Set[Item] = set()
+        self._preload_started = False
+        # use() is called from search threads too
+        self._lock = threading.Lock()
+
+    def use(self, kind: str, key: str) -> None:
+        """Record that the session used an item.
+
+        Args:
+            kind: "module", "provider" or "icon"
+            key: Module name, provider name or icon name
+        """
+        item = (kind, key)
+        if item in self._used:
+            return
+        with self._lock:
+            self._used.add(item)
+            if not self._preload_started:
+                self._early.add(item)
+
+    def _load(self) -> Dict[str, Dict[str, float]]:
+        """Return the scores, reading the profile file once."""
+        if self._scores is None:
+            self._scores = {kind: {} for kind in KINDS}
+            try:
+                with open(self.path, "rb") as f:
+                    data = json.loads(f.read())
+            except (OSError, ValueError):
+                data = None
+            if isinstance(data, dict) and data.get("version") == PROFILE_VERSION:
+                for kind in KINDS:
+                    scores = data.get("scores", {}).get(kind)
+                    if isinstance(scores, dict):
+                        self._scores[kind].update(scores)
+                totals = data.get("totals")
+                if isinstance(totals, dict):
+                    self._totals.update(totals)
+        return self._scores
+
+    def frequent(self, kind: str) -> List[str]:
+        """Return the items of a kind worth preloading, most used first.
+
+        Args:
+            kind: "module", "provider" or "icon"
+        """
+        scores = self._load()[kind]
+        keys = sorted(
+            (key for key, score in scores.items() if score >= PRELOAD_THRESHOLD),
+            key=lambda key: scores[key],
+            reverse=True,
+        )
+        return keys[: PRELOAD_LIMITS.get(kind)]
+
+    def candidates(self) -> List[Item]:
+        """Return the items to preload, most used first across kinds."""
+        scores = self._load()
+        items = [(kind, key) for kind in KINDS for key in self.frequent(kind)]
+        return sorted(items, key=lambda item: scores[item[0]][item[1]], reverse=True)
+
+    def begin_preload(self) -> None:
+        """Mark the start of preloading; earlier uses are not counted."""
+        with self._lock:
+            self._preload_started = True
+
+    def preloaded(self, kind: str, key: str, size: int) -> None:
+        """Record an item loaded by the preloader.
+
+        Args:
+            kind: Kind of the item
+            key: Name of the item
+            size: Resident memory the item added
+        """
+        with self._lock:
+            self._preloaded.add((kind, key))
+            self.preload_bytes += size
+
+    def present(self, kind: str, key: str) -> None:
+        """Record an item the preloader found already loaded."""
+        with self._lock:
+            self._present.add((kind, key))
+
+    def stats(self) -> Dict[str, int]:
+        """Return the hits, misses and unused preloads of this session."""
+        with self._lock:
+            used = self._used - self._early - self._present
+            return {
+                "hits": len(self._preloaded & used),
+                "misses": len(used - self._preloaded),
+                "unused": len(self._preloaded - self._used),
+                "preloaded": len(self._preloaded),
+                "bytes": self.preload_bytes,
+            }
+
+    def save(self) -> Dict[str, int]:
+        """Fold this session into the scores and write the profile.
+
+        Returns:
+            The statistics of this session, see stats()
+        """
+        scores = self._load()
+        stats = self.stats()
+        with self._lock:
+            used = set(self._used)
+        for kind in KINDS:
+            kind_scores = scores[kind]
+            for key in set(kind_scores) | {key for k, key in used if k == kind}:
+                score = (1 - SMOOTHING) * kind_scores.get(key, 0.0)
+                score += SMOOTHING if (kind, key) in used else 0.0
+                if score >= FORGET_THRESHOLD:
+                    kind_scores[key] = round(score, 4)
+                else:
+                    kind_scores.pop(key, None)
+        self._totals["sessions"] += 1
+        for name in ("hits", "misses", "unused"):
+            self._totals[name] += stats[name]
+
+        tmp_path = f"{self.path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(
+                    {"version": PROFILE_VERSION, "scores": scores, "totals": self._totals},
+                    f,
+                    ensure_ascii=False,
+                )
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not save session profile {self.path}: {e}")
+        return stats
+
+
+def preload_module(name: str) -> Any:
+    """Import a module for the preloader, None if it is already imported."""
+    if name in sys.modules:
+        return None
+    return importlib.import_module(name)
+
+
+class SessionPreloader:
+    """Loads the frequent items of a profile, one per step.
+
+    Loaders take the name of an item and return an object to keep alive
+    until the session ends, or None if the item was already loaded; they
+    raise if it cannot be loaded.
+
+    Attributes:
+        held: Objects returned by the loaders
+    """
+
+    def __init__(
+        self,
+        profile: SessionProfile,
+        loaders: Dict[str, Callable[[str], Any]],
+        budget: int = PRELOAD_BUDGET,
+        memory: Callable[[], int] = resident_memory,
+    ) -> None:
+        """Initialize the preloader.
+
+        Args:
+            profile: Profile whose frequent items are loaded
+            loaders: Loader per kind of item; kinds without one are skipped
+            budget: Resident memory preloading may add, in bytes
+            memory: Function returning the resident memory of the process
+        """
+        self.profile = profile
+        self.loaders = loaders
+        self.budget = budget
+        self.memory = memory
+        self.held: List[Any] = []
+
+    def steps(self) -> Iterator[None]:
+        """Preload the items, yielding after each one."""
+        self.profile.begin_preload()
+        items = [item for item in self.profile.candidates() if item[0] in self.loaders]
+        for index, (kind, key) in enumerate(items):
+            if self.profile.preload_bytes >= self.budget:
+                logger.info(f"Preload budget spent, {len(items) - index} items skipped")
+                return
+            before = self.memory()
+            try:
+                loaded = self.loaders[kind](key)
+            except Exception as e:
+                logger.debug(f"Cannot preload {kind} {key}: {e}")
+                continue
+            if loaded is None:
+                self.profile.present(kind, key)
+            else:
+                self.held.append(loaded)
+                self.profile.preloaded(kind, key, max(0, self.memory() - before))
+            yield
+        logger.debug(f"Preloaded {len(self.held)} items")
+
+
+# Profile of the running session
+SESSION = SessionProfile()
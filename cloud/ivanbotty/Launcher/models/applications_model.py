@@ -9,6 +9,17 @@ logger = logging.getLogger(__name__)
 
 from cloud.ivanbotty.Launcher.helper.portal_launcher import PortalLauncher
 
+# Shared PortalLauncher, created on the first launch
+_portal_launcher = None
+
+
+def get_portal_launcher():
+    """Return the shared PortalLauncher, connecting to the portal on first use."""
+    global _portal_launcher
+    if _portal_launcher is None:
+        _portal_launcher = PortalLauncher()
+    return _portal_launcher
+
 
 class ApplicationModel(GObject.GObject):
     """
@@ -36,7 +47,6 @@ class ApplicationModel(GObject.GObject):
             icon (str, optional): Path to the application's icon.
         """
         super().__init__()
-        self.portal_launcher = PortalLauncher()
         self.type = type
         self.name = name
         self.description = description
@@ -54,7 +64,7 @@ class ApplicationModel(GObject.GObject):
         # Attempt to launch the application using PortalLauncher if available and desktop_id is set.
         # If PortalLauncher is unavailable or fails, fall back to executing the command directly.
         try:
-            self.portal_launcher.open_desktop_app(self.desktop_id)
+            get_portal_launcher().open_desktop_app(self.desktop_id)
             return True
         except Exception as e:
             logger.error(f"Failed to launch via PortalLauncher (desktop_id={self.desktop_id}): {e}")
@@ -1,5 +1,12 @@
-from google import genai
-from cloud.ivanbotty.Launcher.config.config import SYSTEM_PROMPT
+import json
+from cloud.ivanbotty.Launcher.config.config import (
+    AI_CONNECTION_IDLE_TIMEOUT,
+    AI_ENDPOINT,
+    AI_MODEL,
+    SYSTEM_PROMPT,
+)
+from cloud.ivanbotty.Launcher.helper.https_pool import KeepAliveHTTPSPool
+from cloud.ivanbotty.Launcher.helper.response_cache import get_response_cache
 import cloud.ivanbotty.database.sqlite3 as db
 import logging
 
@@ -9,47 +16,92 @@ logger = logging.getLogger(__name__)
 class AIService:
     """
     Service for handling user prompts and questions.
+
+    Requests are sent to the Gemini REST API over a keep-alive connection
+    pool, which can be warmed up before the first question is asked.
     """
 
-    def __init__(self):
+    def __init__(self, endpoint: str = AI_ENDPOINT, ssl_context=None):
         logger.info("Initializing AIService")
+        self.model = AI_MODEL
+        self.cache = get_response_cache()
         try:
-            api_key = db.get_api_key("gemini")
-            logger.debug(f"API key retrieved: {'***' if api_key else 'None'}")
-            if not api_key:
+            self.api_key = db.get_api_key("gemini")
+            logger.debug(f"API key retrieved: {'***' if self.api_key else 'None'}")
+            if not self.api_key:
                 raise ValueError("Gemini API key not found in database.")
-            self.client = genai.Client(api_key=api_key)
-            logger.info("genai.Client successfully initialized")
+            self.pool = KeepAliveHTTPSPool(
+                endpoint, idle_timeout=AI_CONNECTION_IDLE_TIMEOUT, ssl_context=ssl_context
+            )
+            logger.info("AI connection pool successfully initialized")
         except Exception as e:
             logger.error(f"AIService initialization error: {e}")
             raise
 
+    def warm_up(self) -> None:
+        """
+        Establish a connection to the endpoint in the background.
+
+        The connection is kept alive for AI_CONNECTION_IDLE_TIMEOUT seconds,
+        so a question asked meanwhile skips the TCP and TLS handshakes.
+        """
+        self.pool.warm()
+
     def ask(self, question: str) -> dict:
         """
         Ask a question to the AI model.
 
+        Answers are served from the response cache when available, so
+        repeated questions return immediately without a network round trip.
+
         Args:
             question (str): The question to ask.
 
         Returns:
             dict: The AI's response.
         """
+        cached = self.cache.get(self.model, question, SYSTEM_PROMPT)
+        if cached is not None:
+            return cached
+
         prompt = f"{SYSTEM_PROMPT}{question}"
         logger.debug(f"Sending prompt to model: prompt={prompt!r}")
-        response = self.client.models.generate_content(model="gemini-2.5-flash", contents=prompt)
-        logger.debug(f"Received raw response: response={response!r}")
-        return self._format_response(response)
+        status, body = self.pool.request(
+            "POST",
+            f"/v1beta/models/{self.model}:generateContent",
+            body=json.dumps({"contents": [{"parts": [{"text": prompt}]}]}).encode("utf-8"),
+            headers={"Content-Type": "application/json", "x-goog-api-key": self.api_key},
+        )
+        logger.debug(f"Received raw response: status={status} body={body!r}")
+        if status != 200:
+            # Proxies and gateways answer errors with HTML, not the API's JSON
+            try:
+                message = json.loads(body)["error"]["message"]
+            except (ValueError, KeyError, TypeError):
+                message = f"HTTP {status}"
+            raise RuntimeError(f"AI request failed: {message}")
+
+        response = json.loads(body)
+        answer = self._format_response(response)
+        self.cache.put(self.model, question, SYSTEM_PROMPT, answer)
+        return answer
+
+    def clear_cache(self) -> None:
+        """Remove every cached answer."""
+        self.cache.clear()
 
     def _format_response(self, response) -> dict:
         """
         Format the AI model's response.
 
         Args:
-            response: The raw response from the AI model.
+            response: The decoded JSON response from the AI model.
 
         Returns:
             dict: The structured response.
         """
-        text = getattr(response, "text", str(response))
+        candidates = response.get("candidates") or [{}]
+        parts = candidates[0].get("content", {}).get("parts", [])
+        text = "".join(part.get("text", "") for part in parts)
         logger.debug(f"Formatted response: text={text!r}")
         return text
@@ -1,6 +1,8 @@
 import logging
 import os
-import json
+import time
+from operator import itemgetter
+from typing import Optional
 
 import gi
 
@@ -9,79 +11,219 @@ gi.require_version("Gtk", "4.0")
 from gi.repository import Gio
 
 from cloud.ivanbotty.Launcher.config.config import ALL_APP_DIRS, ICON_DIRS
+from cloud.ivanbotty.Launcher.helper.app_cache import (
+    CACHE_PATH,
+    build_cache,
+    directory_fingerprints,
+    encode_cache,
+    find_index_file,
+    is_cache_current,
+    next_generation,
+    read_cache_file,
+)
+from cloud.ivanbotty.Launcher.helper.app_delta import record_key, record_to_dict
 from cloud.ivanbotty.Launcher.helper.parser import Parser
+from cloud.ivanbotty.Launcher.helper.progress import (
+    STAGE_DISCOVER,
+    STAGE_ICONS,
+    STAGE_PARSE,
+    STAGE_PUBLISH,
+)
 from cloud.ivanbotty.Launcher.models.applications_model import ApplicationModel
 
 logger = logging.getLogger(__name__)
 
 
+# Counters of the last load_applications() call
+LOAD_STAT_NAMES = (
+    "files_found",  # .desktop files discovered
+    "files_parsed",  # Files that produced an application
+    "files_skipped",  # Hidden, invalid or unreadable files
+    "duplicates",  # Applications dropped because their name was already loaded
+    "parse_cache_hits",
+    "parse_cache_misses",
+    "icon_cache_hits",
+    "icon_cache_misses",
+)
+
+# Seconds after which an icon that could not be found is looked up again
+ICON_MISS_TTL = 24 * 3600
+
+
 class ApplicationsService:
-    """Service for loading and filtering application entries."""
+    """Service for loading and filtering application entries.
+
+    Attributes:
+        load_stats: Counters of the last load_applications() call, see LOAD_STAT_NAMES
+        fingerprints: Application directory fingerprints taken when the last
+            scan started, see helper.app_cache
+        cache_generation: Generation of the cached catalogue last loaded or saved
+        checkpoint: Optional callable invoked between items of work while
+            scanning, letting the daemon pace its scans
+    """
 
-    def __init__(self):
-        """Initialize the ApplicationsService with a parser and an empty store."""
+    def __init__(self, app_dirs=None, icon_dirs=None):
+        """Initialize the ApplicationsService with a parser and an empty store.
+
+        Args:
+            app_dirs: Directories scanned for .desktop files (default: ALL_APP_DIRS)
+            icon_dirs: Directories searched for icons (default: ICON_DIRS)
+        """
+        self.app_dirs = ALL_APP_DIRS if app_dirs is None else app_dirs
+        self.icon_dirs = ICON_DIRS if icon_dirs is None else icon_dirs
         self.parser = Parser()
         self.store = Gio.ListStore(item_type=ApplicationModel)
         self._icon_cache = {}  # Cache for icon paths
-        self._desktop_cache = {}  # Cache for parsed desktop entries
+        self._icon_misses = {}  # Time at which uncached icons were not found
+        self._desktop_cache = {}  # Parsed desktop entries with their (mtime_ns, size)
+        self.load_stats = dict.fromkeys(LOAD_STAT_NAMES, 0)
+        self.fingerprints = {}
+        self.cache_generation = 0
+        self.checkpoint = None
+        # Lower-cased names and applications sorted by name, and the last
+        # search on them, rebuilt when the store changes; see filter_applications()
+        self._search_index = None
+        self._last_search = (None, None, None)
+        self.store.connect("items-changed", self._on_store_changed)
 
-    def load_applications(self, save_cache: bool = True):
+    def load_applications(self, save_cache: bool = True, progress=None):
         """
-        Load application entries from directories specified in ALL_APP_DIRS.
+        Load application entries from the application directories.
 
         Parses '.desktop' files into ApplicationModel instances and appends them to the store.
-        Ensures each application is loaded only once by name.
+        Ensures each application is loaded only once by name. Loading runs through the
+        stages of helper.progress, reporting each item to the progress callback.
         
         Args:
             save_cache: If True, save loaded applications to cache file (default: True)
+            progress: Optional callable receiving (stage, done, total), e.g. a
+                ProgressReporter
 
         Returns:
             Gio.ListStore: Store containing loaded ApplicationModel instances.
         """
+        checkpoint = self.checkpoint
+        if checkpoint is None:
+            report = progress or (lambda stage, done, total: None)
+        else:
+            def report(stage, done, total):
+                checkpoint()
+                if progress:
+                    progress(stage, done, total)
+        self.load_stats = dict.fromkeys(LOAD_STAT_NAMES, 0)
+        # Fingerprint first, so changes made during the scan invalidate its cache
+        self.fingerprints = directory_fingerprints(self.app_dirs)
+
+        # Discover: list the .desktop files of every directory
+        file_paths = []
+        for i, app_dir in enumerate(self.app_dirs):
+            file_paths.extend(self._list_desktop_files(app_dir))
+            report(STAGE_DISCOVER, i + 1, len(self.app_dirs))
+        self.load_stats["files_found"] = len(file_paths)
+
+        # Parse: read the entries, keeping the first application per name
+        entries = []
         loaded_names = set()
-        self.store.remove_all()
-        for app_dir in ALL_APP_DIRS:
-            self._load_applications_from_dir(app_dir, loaded_names)
-        
+        for i, file_path in enumerate(file_paths):
+            entry_data = self._parse_desktop_file(file_path)
+            if not entry_data:
+                self.load_stats["files_skipped"] += 1
+            elif entry_data["name"] in loaded_names:
+                self.load_stats["duplicates"] += 1
+            else:
+                logger.debug(f"Loaded application: app_name={entry_data['name']}")
+                loaded_names.add(entry_data["name"])
+                entries.append((file_path, entry_data))
+            report(STAGE_PARSE, i + 1, len(file_paths))
+        self.load_stats["files_parsed"] = len(entries) + self.load_stats["duplicates"]
+
+        # Forget entries of files that are gone, so the parse cache does not grow forever
+        listed = set(file_paths)
+        for file_path in [path for path in self._desktop_cache if path not in listed]:
+            del self._desktop_cache[file_path]
+
+        # Icons: resolve icon names to paths
+        apps = []
+        for i, (file_path, entry_data) in enumerate(entries):
+            apps.append(
+                ApplicationModel(
+                    type=entry_data["type"],
+                    name=entry_data["name"],
+                    description=None,
+                    exec_cmd=entry_data["exec_cmd"],
+                    desktop_id=os.path.basename(file_path),
+                    icon=self.find_icon(entry_data["icon"]) if entry_data["icon"] else None,
+                )
+            )
+            report(STAGE_ICONS, i + 1, len(entries))
+
+        self.store.splice(0, self.store.get_n_items(), apps)
+
         # Save to cache for next launch
         if save_cache:
+            report(STAGE_PUBLISH, 0, 1)
             self.save_applications_to_cache()
+            report(STAGE_PUBLISH, 1, 1)
         
         return self.store
     
-    def load_applications_from_cache(self, cache_path: str) -> bool:
+    def load_applications_from_cache(self, cache_path: Optional[str] = None) -> bool:
         """
         Load applications from a cache file created by the daemon.
-        
+
+        The cache is trusted exactly when the fingerprints in its header still
+        match the application directories, see helper.app_cache. Legacy caches
+        without a header are never trusted.
+
         Args:
-            cache_path: Path to the cache JSON file
-            
+            cache_path: Path to the cache JSON file (default: the user cache,
+                or a pre-seeded index if the user has none yet)
+
         Returns:
             True if successfully loaded from cache, False otherwise
         """
-        
+        cache_path = cache_path or find_index_file(CACHE_PATH)
+        if cache_path is None:
+            logger.debug("No applications cache found")
+            return False
+        header, cache_data = read_cache_file(cache_path)
+        if header is None:
+            logger.debug(f"No valid cache header in {cache_path}")
+            return False
+        if not is_cache_current(header, self.app_dirs):
+            logger.debug(
+                f"Application directories changed since the cache was written: {cache_path}"
+            )
+            return False
+
         try:
-            if not os.path.exists(cache_path):
-                logger.debug(f"Cache file not found: {cache_path}")
-                return False
-            
-            # Check if cache is recent (less than 1 hour old)
-            cache_age = os.path.getmtime(cache_path)
-            import time
-            if time.time() - cache_age > 3600:
-                logger.debug(f"Cache file too old: {cache_path}")
-                return False
-            
-            with open(cache_path, 'r') as f:
-                cache_data = json.load(f)
-            
             logger.info(f"Loading {len(cache_data)} applications from cache")
-            self.store.remove_all()
-            
-            for entry_data in cache_data:
-                try:
-                    # Create ApplicationModel from cached data
-                    app = ApplicationModel(
+            self.load_applications_from_entries(cache_data)
+            self.cache_generation = header.get("generation", 0)
+
+            logger.info(f"Successfully loaded {self.store.get_n_items()} applications from cache")
+            return True
+
+        except Exception as e:
+            logger.warning(f"Error loading from cache: {e}")
+            return False
+
+    def load_applications_from_entries(self, entries) -> int:
+        """
+        Replace the store content with applications from cache entries.
+
+        Args:
+            entries: List of application dictionaries, as in the cache file
+
+        Returns:
+            Number of applications loaded
+        """
+        apps = []
+        for entry_data in entries:
+            try:
+                # Create ApplicationModel from cached data
+                apps.append(
+                    ApplicationModel(
                         type=entry_data.get('type', 'Application'),
                         name=entry_data.get('name', ''),
                         description=entry_data.get('description', None),
@@ -89,102 +231,188 @@ class ApplicationsService:
                         desktop_id=entry_data.get('desktop_id', ''),
                         icon=entry_data.get('icon', None),
                     )
-                    self.store.append(app)
-                except Exception as e:
-                    logger.debug(f"Error loading cached app: {e}")
-                    continue
-            
-            logger.info(f"Successfully loaded {self.store.get_n_items()} applications from cache")
-            return True
-            
-        except Exception as e:
-            logger.warning(f"Error loading from cache: {e}")
-            return False
-    
-    def save_applications_to_cache(self, cache_path: str = None) -> bool:
+                )
+            except Exception as e:
+                logger.debug(f"Error loading cached app: {e}")
+                continue
+        self.store.splice(0, self.store.get_n_items(), apps)
+        return len(apps)
+
+    def save_applications_to_cache(self, cache_path: str = CACHE_PATH) -> bool:
         """
         Save currently loaded applications to a cache file.
-        
+
+        The header records the fingerprints of the last scan, and the
+        generation is bumped if the catalogue differs from the previous cache.
+
         Args:
             cache_path: Path to the cache JSON file (default: standard cache location)
-            
+
         Returns:
             True if successfully saved, False otherwise
         """
-        if cache_path is None:
-            cache_path = os.path.expanduser("~/.cache/cloud.ivanbotty.Launcher/applications_cache.json")
-        
         try:
             # Ensure cache directory exists
             cache_dir = os.path.dirname(cache_path)
             os.makedirs(cache_dir, exist_ok=True)
-            
-            # Convert applications to cache data
-            cache_data = []
-            for i in range(self.store.get_n_items()):
-                app = self.store.get_item(i)
-                cache_data.append({
-                    'type': app.type if hasattr(app, 'type') else 'Application',
-                    'name': app.name,
-                    'description': app.description,
-                    'exec_cmd': app.exec_cmd,
-                    'desktop_id': app.desktop_id,
-                    'icon': app.icon,
-                })
-            
-            # Write cache file
-            import json
-            with open(cache_path, 'w') as f:
-                json.dump(cache_data, f, indent=2)
-            
+
+            cache_data = [self.store.get_item(i).to_dict() for i in range(self.store.get_n_items())]
+            previous_header, previous_data = read_cache_file(cache_path)
+            generation = next_generation(previous_header, cache_data != previous_data)
+
+            # Write atomically, so readers never see a partially written cache
+            tmp_path = f"{cache_path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(encode_cache(build_cache(cache_data, self.fingerprints, generation)))
+            os.replace(tmp_path, cache_path)
+            self.cache_generation = generation
+
             logger.info(f"Saved {len(cache_data)} applications to cache: {cache_path}")
             return True
-            
+
         except Exception as e:
             logger.warning(f"Error saving cache: {e}")
             return False
 
-    def _load_applications_from_dir(self, app_dir, loaded_names):
-        """Helper to load applications from a single directory."""
+    def apply_changes(self, added, removed, changed) -> bool:
+        """
+        Patch the store with a delta announced by the daemon.
+
+        Removed applications are dropped and changed ones replaced in place,
+        then all new applications are appended in one splice, so views bound
+        to the store only update the affected rows.
+
+        Args:
+            added: Records of new applications, see helper.app_delta
+            removed: Desktop IDs of removed applications
+            changed: Records of applications whose fields changed
+
+        Returns:
+            True if the store was modified, False otherwise
+        """
+        positions = {}
+        for i in range(self.store.get_n_items()):
+            app = self.store.get_item(i)
+            positions.setdefault(app.desktop_id or app.name, i)
+
+        modified = False
+        for record in changed:
+            position = positions.get(record_key(record))
+            if position is not None:
+                app = ApplicationModel.from_dict(record_to_dict(record))
+                self.store.splice(position, 1, [app])
+                modified = True
+
+        removed_positions = {positions[key] for key in removed if key in positions}
+        for position in sorted(removed_positions, reverse=True):
+            self.store.remove(position)
+            modified = True
+
+        new_apps = [
+            ApplicationModel.from_dict(record_to_dict(record))
+            for record in added
+            if record_key(record) not in positions
+        ]
+        if new_apps:
+            self.store.splice(self.store.get_n_items(), 0, new_apps)
+            modified = True
+
+        logger.info(
+            f"Applied catalogue delta: {len(added)} added, {len(removed)} removed, "
+            f"{len(changed)} changed"
+        )
+        return modified
+
+    def _list_desktop_files(self, app_dir):
+        """Helper to list the .desktop files of a single directory."""
         if not (app_dir.exists() and app_dir.is_dir()):
-            return
-        for file in os.listdir(app_dir):
-            if not file.endswith(".desktop"):
-                continue
-            file_path = os.path.join(app_dir, file)
-            self._try_load_application(file_path, loaded_names)
+            return []
+        return [
+            os.path.join(app_dir, file)
+            for file in os.listdir(app_dir)
+            if file.endswith(".desktop")
+        ]
 
-    def _try_load_application(self, file_path, loaded_names):
-        """Helper to parse and append a single application if not already loaded."""
-        # Check cache first
-        if file_path in self._desktop_cache:
-            entry_data = self._desktop_cache[file_path]
-        else:
+    def _parse_desktop_file(self, file_path):
+        """Helper to parse a single .desktop file, using the parse cache.
+
+        Cached entries are reused only while the file keeps its mtime and size.
+        """
+        try:
+            st = os.stat(file_path)
+        except OSError as e:
+            logger.debug(f"Skipping unreadable desktop entry {file_path}: {e}")
+            return None
+        cached = self._desktop_cache.get(file_path)
+        if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+            self.load_stats["parse_cache_hits"] += 1
+            return cached[2]
+        self.load_stats["parse_cache_misses"] += 1
+        try:
             entry_data = self.parser.parse_desktop_entry(file_path)
-            if entry_data:
-                self._desktop_cache[file_path] = entry_data
-
-        if not entry_data:
-            return
-        app_name = entry_data["name"]
-        if app_name in loaded_names:
-            return
-        logger.debug(f"Loaded application: app_name={app_name}")
-        self.store.append(
-            ApplicationModel(
-                type=entry_data["type"],
-                name=app_name,
-                description=None,
-                exec_cmd=entry_data["exec_cmd"],
-                desktop_id=os.path.basename(file_path),
-                icon=self.find_icon(entry_data["icon"]) if entry_data["icon"] else None,
-            )
-        )
-        loaded_names.add(app_name)
+        except (OSError, UnicodeDecodeError) as e:
+            logger.debug(f"Skipping unreadable desktop entry {file_path}: {e}")
+            return None
+        # Hidden entries are cached too, they would be skipped again anyway
+        self._desktop_cache[file_path] = (st.st_mtime_ns, st.st_size, entry_data)
+        return entry_data
+
+    def export_caches(self) -> dict:
+        """
+        Export the parse cache and the icon index, for persistence across restarts.
+
+        Returns:
+            JSON serializable dictionary, accepted by import_caches()
+        """
+        return {
+            "desktop_entries": {
+                path: [mtime_ns, size, entry]
+                for path, (mtime_ns, size, entry) in self._desktop_cache.items()
+            },
+            "icons": {name: path for name, path in self._icon_cache.items() if path},
+            "missing_icons": {
+                name: self._icon_misses.get(name, time.time())
+                for name, path in self._icon_cache.items()
+                if path is None
+            },
+        }
+
+    def import_caches(self, state: dict) -> int:
+        """
+        Restore the parse cache and the icon index exported by export_caches().
+
+        Desktop entries are revalidated against their file when they are next
+        looked up. Icons whose file is gone are dropped, and icons that could
+        not be found are looked up again once ICON_MISS_TTL has passed.
+
+        Args:
+            state: Dictionary returned by export_caches()
+
+        Returns:
+            Number of cache entries restored
+        """
+        try:
+            for path, (mtime_ns, size, entry) in state.get("desktop_entries", {}).items():
+                self._desktop_cache[path] = (mtime_ns, size, entry)
+            for name, path in state.get("icons", {}).items():
+                if os.path.exists(path):
+                    self._icon_cache[name] = path
+            now = time.time()
+            for name, missed_at in state.get("missing_icons", {}).items():
+                if now - missed_at < ICON_MISS_TTL:
+                    self._icon_cache[name] = None
+                    self._icon_misses[name] = missed_at
+        except (AttributeError, TypeError, ValueError) as e:
+            logger.warning(f"Ignoring malformed cache state: {e}")
+            self._desktop_cache.clear()
+            self._icon_cache.clear()
+            self._icon_misses.clear()
+            return 0
+        return len(self._desktop_cache) + len(self._icon_cache)
 
     def find_icon(self, icon_name):
         """
-        Search for an icon file by name in ICON_DIRS recursively.
+        Search for an icon file by name in the icon directories recursively.
 
         Args:
             icon_name (str): Name of the icon to search for (without extension).
@@ -194,12 +422,16 @@ class ApplicationsService:
         """
         # Check cache first
         if icon_name in self._icon_cache:
+            self.load_stats["icon_cache_hits"] += 1
             return self._icon_cache[icon_name]
+        self.load_stats["icon_cache_misses"] += 1
 
         possible_extensions = [".png", ".svg", ".xpm"]
 
         logger.debug(f"Searching for icon: icon_name={icon_name}")
-        for icon_dir in ICON_DIRS:
+        for icon_dir in self.icon_dirs:
+            if self.checkpoint:
+                self.checkpoint()
             if icon_dir.exists() and icon_dir.is_dir():
                 found_icon = self._search_icon_in_dir(icon_dir, icon_name, possible_extensions)
                 if found_icon:
@@ -208,6 +440,7 @@ class ApplicationsService:
 
         # Cache negative results too to avoid repeated searches
         self._icon_cache[icon_name] = None
+        self._icon_misses[icon_name] = time.time()
         return None
 
     def _search_icon_in_dir(self, icon_dir, icon_name, extensions):
@@ -221,33 +454,53 @@ class ApplicationsService:
                     return str(path)
         return None
 
+    def _on_store_changed(self, *args):
+        """Drop the search index, rebuilt by the next search."""
+        self._search_index = None
+
+    def _get_search_index(self):
+        """Return the search index, building it after a change of the store.
+
+        Returns:
+            Tuple of (entries, apps): (lower-cased name, application) pairs
+            and the applications, both sorted by name
+        """
+        index = self._search_index
+        if index is None:
+            apps = [self.store.get_item(i) for i in range(self.store.get_n_items())]
+            # Reading a GObject property allocates a new string: read each name once
+            entries = sorted(((app.name.lower(), app) for app in apps), key=itemgetter(0))
+            index = (entries, [app for _, app in entries])
+            self._search_index = index
+        return index
+
     def filter_applications(self, search_text=""):
         """
         Filter applications by name using the provided search text.
 
+        Names are lower-cased and sorted once per change of the store. While
+        the user types, each query extends the previous one, so only the
+        previous matches are searched again.
+
         Args:
             search_text (str): Text to search for in application names.
 
         Returns:
             Gio.ListStore: Store containing filtered ApplicationModel instances.
         """
-        filtered_store = Gio.ListStore(item_type=ApplicationModel)
+        query = search_text.lower() if search_text else ""
+        index = self._get_search_index()
+        entries, apps = index
 
-        search_text_lower = search_text.lower() if search_text else ""
-
-        # Collect matching apps in a list for sorting
-        filtered_apps = []
-        for i in range(self.store.get_n_items()):
-            app = self.store.get_item(i)
-            # Check if the application's name contains the search text (case-insensitive)
-            if not search_text_lower or search_text_lower in app.name.lower():
-                filtered_apps.append(app)
-
-        # Sort once before adding to store
-        filtered_apps.sort(key=lambda a: a.name.lower())
-
-        # Add sorted apps to the filtered store
-        for app in filtered_apps:
-            filtered_store.append(app)
+        if query:
+            last_query, last_matches, last_index = self._last_search
+            if last_index is index and last_query and query.startswith(last_query):
+                entries = last_matches
+            entries = [entry for entry in entries if query in entry[0]]
+            apps = [app for _, app in entries]
+        # Replaced as a whole, searches run in the debounce thread
+        self._last_search = (query, entries, index)
 
+        filtered_store = Gio.ListStore(item_type=ApplicationModel)
+        filtered_store.splice(0, 0, apps)
         return filtered_store
@@ -1,52 +1,151 @@
 """Command service for quick system commands.
 
 This module provides a service for managing and executing quick system commands
-like opening terminals, file managers, etc.
+like opening terminals, file managers, etc. Besides a few curated commands and
+the user-defined commands from USER_COMMANDS_PATH, every executable on $PATH
+can be launched, looked up through an ExecutableIndex.
 """
 
+import logging
+import shlex
+from pathlib import Path
+from typing import List, Optional
+
 import gi
 
+from cloud.ivanbotty.Launcher.config.config import COMMAND_SEARCH_LIMIT, USER_COMMANDS_PATH
+from cloud.ivanbotty.Launcher.helper.executable_index import ExecutableIndex
 from cloud.ivanbotty.Launcher.models.applications_model import ApplicationModel
 
 gi.require_version("Gtk", "4.0")
 
 from gi.repository import Gio
 
+logger = logging.getLogger(__name__)
+
+# Curated commands, only offered once the index has found their executable
+DEFAULT_COMMANDS = [
+    ("Terminal", "gnome-terminal", "Open the terminal"),
+    ("File Manager", "nautilus", "Open the file manager"),
+    ("Browser", "xdg-open https://www.google.com", "Open the browser"),
+    ("Shutdown", "systemctl poweroff", "Shut down the system"),
+]
+
 
 class CommandService:
     """Quick command management service.
 
     Attributes:
-        store: ListStore containing available commands
+        store: ListStore containing the curated and user-defined commands
+        index: Index of the executables on $PATH
     """
 
-    def __init__(self) -> None:
-        """Initialize the CommandService and register default commands."""
+    def __init__(
+        self,
+        index: Optional[ExecutableIndex] = None,
+        user_commands_path: Path = USER_COMMANDS_PATH,
+    ) -> None:
+        """Initialize the CommandService and register default commands.
+
+        Args:
+            index: Executable index, a cached $PATH index by default
+            user_commands_path: YAML file with user-defined commands
+        """
         # We use a ListStore so the controller can bind directly to Gtk.ListBox
         self.store = Gio.ListStore(item_type=ApplicationModel)
+        # Lowercase "name description" of every stored command, in store order
+        self._search_keys: List[str] = []
+        # Executable each stored command needs on PATH, None for user commands
+        self._requires: List[Optional[str]] = []
+
+        # Loaded off the main thread: without a cache this scans PATH, which
+        # may spawn flatpak-spawn; searches see an empty index until then
+        self.index = index or ExecutableIndex()
+        self.index.load_in_background()
 
         # Register default commands
         self.register_default_commands()
+        self.load_user_commands(user_commands_path)
 
     def register_default_commands(self) -> None:
-        """Add basic system commands to the store."""
-        self.add_command(ApplicationModel("Terminal", "gnome-terminal", "Open the terminal"))
-        self.add_command(ApplicationModel("File Manager", "nautilus", "Open the file manager"))
-        self.add_command(
-            ApplicationModel("Browser", "xdg-open https://www.google.com", "Open the browser")
-        )
-        self.add_command(ApplicationModel("Shutdown", "systemctl poweroff", "Shut down the system"))
-
-    def add_command(self, command: ApplicationModel) -> None:
+        """Add the basic system commands.
+
+        They are only matched while their executable is in the index.
+        """
+        for name, exec_cmd, description in DEFAULT_COMMANDS:
+            self.add_command(
+                ApplicationModel(
+                    type="command",
+                    name=name,
+                    description=description,
+                    exec_cmd=self._command_line(exec_cmd),
+                    icon="utilities-terminal",
+                ),
+                requires=exec_cmd.split()[0],
+            )
+
+    def load_user_commands(self, path: Path) -> int:
+        """Add the user-defined commands from a YAML file.
+
+        The file holds a list of commands, optionally under a "commands" key:
+
+            commands:
+              - name: Update
+                exec: gnome-terminal -- sudo dnf upgrade
+                description: Upgrade the system
+                icon: system-software-update
+
+        Args:
+            path: Path of the YAML file
+
+        Returns:
+            Number of commands added
+        """
+        path = Path(path)
+        if not path.is_file():
+            return 0
+
+        import yaml
+
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = yaml.safe_load(f) or []
+        except (OSError, yaml.YAMLError) as e:
+            logger.error(f"Error loading user commands from {path}: {e}")
+            return 0
+
+        entries = data.get("commands", []) if isinstance(data, dict) else data
+        added = 0
+        for entry in entries if isinstance(entries, list) else []:
+            if not isinstance(entry, dict) or not entry.get("name") or not entry.get("exec"):
+                logger.warning(f"Skipping invalid user command in {path}: {entry!r}")
+                continue
+            self.add_command(
+                ApplicationModel(
+                    type="command",
+                    name=str(entry["name"]),
+                    description=str(entry.get("description", entry["exec"])),
+                    exec_cmd=self._command_line(str(entry["exec"])),
+                    icon=entry.get("icon", "utilities-terminal"),
+                )
+            )
+            added += 1
+        logger.info(f"Loaded {added} user commands from {path}")
+        return added
+
+    def add_command(self, command: ApplicationModel, requires: Optional[str] = None) -> None:
         """Add a new command to the store.
 
         Args:
             command: ApplicationModel representing the command
+            requires: Executable that must be on PATH for the command to match
         """
         self.store.append(command)
+        self._search_keys.append(f"{command.name} {command.description or ''}".lower())
+        self._requires.append(requires)
 
     def filter_commands(self, search_text: str) -> Gio.ListStore:
-        """Filter commands by name or description.
+        """Filter commands by name or description, then executables by prefix.
 
         Args:
             search_text: Text to search for in command names and descriptions
@@ -54,12 +153,29 @@ class CommandService:
         Returns:
             ListStore containing matching commands
         """
-        search_text = search_text.lower()
+        search_text = search_text.strip().lower()
         filtered = Gio.ListStore(item_type=ApplicationModel)
-        for i in range(self.store.get_n_items()):
-            cmd = self.store.get_item(i)
-            if search_text in cmd.name.lower() or search_text in cmd.description.lower():
-                filtered.append(cmd)
+        for i, key in enumerate(self._search_keys):
+            requires = self._requires[i]
+            if search_text in key and (requires is None or self.index.contains(requires)):
+                filtered.append(self.store.get_item(i))
+
+        if not search_text:
+            return filtered
+
+        # Never waits: a due check runs in the background and a rebuilt index
+        # shows up in later searches
+        self.index.refresh_in_background()
+        for name in self.index.search(search_text, COMMAND_SEARCH_LIMIT):
+            filtered.append(
+                ApplicationModel(
+                    type="command",
+                    name=name,
+                    description=f"Run {name}",
+                    exec_cmd=self._command_line(shlex.quote(name)),
+                    icon="utilities-terminal",
+                )
+            )
         return filtered
 
     def get_command(self, search_text: str) -> ApplicationModel:
@@ -75,3 +191,9 @@ class CommandService:
         if matches.get_n_items() > 0:
             return matches.get_item(0)
         return None
+
+    def _command_line(self, exec_cmd: str) -> str:
+        """Return the shell command running exec_cmd where the index found it."""
+        if self.index.host:
+            return f"flatpak-spawn --host sh -c {shlex.quote(exec_cmd)}"
+        return exec_cmd
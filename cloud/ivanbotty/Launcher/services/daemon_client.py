@@ -2,10 +2,21 @@
 
 This module provides a client interface for the Launcher UI to query
 cache status, indexing progress, and receive updates from the daemon.
+
+The UI drives the client from its main loop without ever blocking on the
+bus: the connection and proxy are created asynchronously, the daemon's bus
+name is watched so the client reconnects whenever the daemon (re)starts, and
+status queries are answered from a local copy kept current by signals and
+by batched asynchronous refreshes. The synchronous connect(), force_update(),
+get_stats() and fetch_index() remain for command-line tools.
 """
 
+from __future__ import annotations
+
+import json
 import logging
-from typing import Optional, Tuple, Callable
+import os
+from typing import Any, Callable, List, Optional, Tuple
 
 try:
     from gi.repository import GLib, Gio
@@ -15,6 +26,9 @@ except ImportError:
     GLib = None
     Gio = None
 
+from cloud.ivanbotty.Launcher.helper.app_cache import parse_cache
+from cloud.ivanbotty.utils.shared_index import read_index
+
 logger = logging.getLogger(__name__)
 
 
@@ -23,6 +37,10 @@ class LauncherDaemonClient:
 
     Provides methods to query cache status, indexing progress, and
     subscribe to daemon signals.
+
+    Attributes:
+        proxy: Proxy of the daemon while its bus name has an owner
+        connection: Session bus connection, once obtained
     """
 
     BUS_NAME = "cloud.ivanbotty.Launcherd"
@@ -37,12 +55,21 @@ class LauncherDaemonClient:
         self.proxy: Optional[Gio.DBusProxy] = None
         self.connection: Optional[Gio.DBusConnection] = None
         self._signal_subscriptions = []
+        # Signal handlers registered before the bus connection was obtained
+        self._pending_signals: List[Tuple[str, Callable]] = []
+        self._watch_id: Optional[int] = None
+        self._on_availability_changed: Optional[Callable[[bool], None]] = None
+        self._activate = False
+        # Last known daemon status, see get_cache_status() and get_indexing_status()
+        self._cache_status: Optional[Tuple[bool, str, int]] = None
+        self._indexing_status: Optional[Tuple[bool, float, int]] = None
+        self._status_requests_pending = 0
 
     def connect(self, timeout_ms: int = 1000) -> bool:
         """Connect to the daemon D-Bus service synchronously.
-        
-        Note: This method blocks and should not be used during UI startup.
-        Use connect_async() instead for non-blocking connection.
+
+        Note: This method blocks and must not be used by the UI, which
+        uses watch() instead. It is meant for command-line tools.
 
         Args:
             timeout_ms: Connection timeout in milliseconds
@@ -75,68 +102,134 @@ class LauncherDaemonClient:
             self.proxy = None
             self.connection = None
             return False
-    
-    def connect_async(self, callback: Callable[[bool], None]) -> None:
-        """Connect to the daemon D-Bus service asynchronously.
-        
-        This method doesn't block and is suitable for use during UI startup.
-        The connection happens in the background, and the callback is invoked
-        when the connection attempt completes.
-        
+
+    def watch(
+        self, on_availability_changed: Callable[[bool], None], activate: bool = False
+    ) -> None:
+        """Follow the daemon from the main loop, without blocking.
+
+        The session bus is obtained asynchronously, then the daemon's bus name
+        is watched: a proxy is built asynchronously whenever the name appears
+        and dropped when it vanishes, so the client heals across daemon
+        restarts and idle exits. Signal subscriptions survive both.
+
         Args:
-            callback: Function to call with the connection result (True/False)
+            on_availability_changed: Called in the main loop with True once the
+                daemon is reachable and with False when it goes away
+            activate: Ask the bus to start the daemon once connected
         """
-        def do_connect():
-            """Thread function to attempt connection."""
+        self._on_availability_changed = on_availability_changed
+        self._activate = activate
+        Gio.bus_get(Gio.BusType.SESSION, None, self._on_bus_ready)
+
+    def _on_bus_ready(self, source, result) -> None:
+        """Finish obtaining the bus, then subscribe and watch the daemon's name."""
+        try:
+            self.connection = Gio.bus_get_finish(result)
+        except Exception as e:
+            logger.debug(f"Session bus unavailable: {e}")
+            self._notify_availability(False)
+            return
+
+        for signal_name, handler in self._pending_signals:
+            self._subscribe(signal_name, handler)
+        self._pending_signals.clear()
+
+        self._watch_id = Gio.bus_watch_name_on_connection(
+            self.connection,
+            self.BUS_NAME,
+            Gio.BusNameWatcherFlags.NONE,
+            self._on_name_appeared,
+            self._on_name_vanished,
+        )
+        if self._activate:
+            self.activate_async()
+
+    def _on_name_appeared(self, connection, name: str, owner: str) -> None:
+        """Build the proxy asynchronously once the daemon owns its name."""
+        logger.debug(f"Daemon appeared on the bus as {owner}")
+        Gio.DBusProxy.new(
+            connection,
+            Gio.DBusProxyFlags.DO_NOT_AUTO_START,
+            None,
+            self.BUS_NAME,
+            self.OBJECT_PATH,
+            self.INTERFACE_NAME,
+            None,
+            self._on_proxy_ready,
+        )
+
+    def _on_proxy_ready(self, source, result) -> None:
+        """Finish building the proxy and refresh the cached status."""
+        try:
+            self.proxy = Gio.DBusProxy.new_finish(result)
+        except Exception as e:
+            logger.debug(f"Could not create daemon proxy: {e}")
+            return
+        logger.info("Connected to Launcher daemon")
+        self.refresh_status()
+        self._notify_availability(True)
+
+    def _on_name_vanished(self, connection, name: str) -> None:
+        """Drop the proxy when the daemon leaves the bus."""
+        was_connected = self.proxy is not None
+        self.proxy = None
+        self._indexing_status = None
+        if was_connected:
+            logger.info("Launcher daemon left the bus")
+            self._notify_availability(False)
+
+    def _notify_availability(self, available: bool) -> None:
+        """Tell the watcher whether the daemon is reachable."""
+        if self._on_availability_changed:
             try:
-                self.connection = Gio.bus_get_sync(Gio.BusType.SESSION, None)
-                
-                # Try to create proxy with DO_NOT_AUTO_START flag first
-                # to check if daemon is already running
-                try:
-                    test_proxy = Gio.DBusProxy.new_sync(
-                        self.connection,
-                        Gio.DBusProxyFlags.DO_NOT_AUTO_START,
-                        None,
-                        self.BUS_NAME,
-                        self.OBJECT_PATH,
-                        self.INTERFACE_NAME,
-                        None
-                    )
-                    # Daemon is already running, use it
-                    self.proxy = test_proxy
-                    logger.debug("Daemon already running")
-                except Exception:
-                    # Daemon not running, don't wait for auto-start
-                    # Just log and return False
-                    logger.debug("Daemon not running and won't auto-start for async connect")
-                    GLib.idle_add(lambda: callback(False) or False)
-                    return
-                
-                # Test that we can actually communicate
-                self.proxy.get_cached_property("Version")
-                
-                logger.debug("Async connection to daemon successful")
-                GLib.idle_add(lambda: callback(True) or False)
-                
+                self._on_availability_changed(available)
+            except Exception as e:
+                logger.error(f"Error in daemon availability callback: {e}")
+
+    def activate_async(self) -> None:
+        """Ask the bus to start the daemon if it is not running, without waiting.
+
+        The daemon exits when idle, so the UI activates it when it opens; the
+        call returns immediately and the outcome is only logged.
+        """
+        if not self.connection:
+            logger.debug("Not connected to the session bus")
+            return
+
+        def on_started(connection, result):
+            try:
+                (status,) = connection.call_finish(result).unpack()
+                # 1: started, 2: already running
+                logger.debug(f"Daemon activation status: {status}")
             except Exception as e:
-                logger.debug(f"Async connection to daemon failed: {e}")
-                self.proxy = None
-                self.connection = None
-                GLib.idle_add(lambda: callback(False) or False)
-        
-        # Run connection attempt in a background thread
-        import threading
-        thread = threading.Thread(target=do_connect, daemon=True)
-        thread.start()
+                logger.debug(f"Could not activate daemon: {e}")
+
+        self.connection.call(
+            "org.freedesktop.DBus",
+            "/org/freedesktop/DBus",
+            "org.freedesktop.DBus",
+            "StartServiceByName",
+            GLib.Variant("(su)", (self.BUS_NAME, 0)),
+            GLib.VariantType.new("(u)"),
+            Gio.DBusCallFlags.NONE,
+            -1,
+            None,
+            on_started,
+        )
 
     def disconnect(self) -> None:
         """Disconnect from the daemon."""
+        if self._watch_id is not None:
+            Gio.bus_unwatch_name(self._watch_id)
+            self._watch_id = None
+
         # Unsubscribe from all signals
         for subscription_id in self._signal_subscriptions:
             if self.connection:
                 self.connection.signal_unsubscribe(subscription_id)
         self._signal_subscriptions.clear()
+        self._pending_signals.clear()
 
         self.proxy = None
         self.connection = None
@@ -150,59 +243,98 @@ class LauncherDaemonClient:
         """
         return self.proxy is not None
 
-    def get_cache_status(self) -> Optional[Tuple[bool, str, int]]:
-        """Get the current cache status from the daemon.
+    def refresh_status(self, callback: Optional[Callable[[], None]] = None) -> bool:
+        """Refresh the cached status with one batch of asynchronous calls.
+
+        GetCacheStatus and GetIndexingStatus are sent back to back without
+        waiting for each other. A refresh requested while one is in flight is
+        merged into it.
+
+        Args:
+            callback: Called in the main loop once both replies arrived
 
         Returns:
-            Tuple of (available, cache_path, last_updated) or None if unavailable
+            True if a batch was sent, False if merged or not connected
         """
         if not self.proxy:
             logger.debug("Not connected to daemon")
-            return None
+            return False
+        if self._status_requests_pending:
+            return False
 
-        try:
-            result = self.proxy.call_sync(
-                "GetCacheStatus",
+        def on_reply(proxy, result, method_name):
+            try:
+                values = proxy.call_finish(result).unpack()
+                if method_name == "GetCacheStatus":
+                    self._cache_status = tuple(values)
+                else:
+                    self._indexing_status = tuple(values)
+            except Exception as e:
+                logger.debug(f"Error getting {method_name}: {e}")
+            self._status_requests_pending -= 1
+            if self._status_requests_pending == 0 and callback:
+                callback()
+
+        for method_name in ("GetCacheStatus", "GetIndexingStatus"):
+            self._status_requests_pending += 1
+            self.proxy.call(
+                method_name,
                 None,
-                Gio.DBusCallFlags.NONE,
-                30000,  # 30 second timeout (daemon may need time to start via D-Bus activation)
-                None
+                Gio.DBusCallFlags.NO_AUTO_START,
+                -1,
+                None,
+                on_reply,
+                method_name,
             )
+        return True
 
-            # Unpack the result: (bool, string, int64)
-            available, cache_path, last_updated = result.unpack()
-            return (available, cache_path, last_updated)
+    def get_cache_status(self) -> Optional[Tuple[bool, str, int]]:
+        """Get the last known cache status of the daemon, without any D-Bus call.
 
-        except Exception as e:
-            logger.debug(f"Error getting cache status: {e}")
-            return None
+        Returns:
+            Tuple of (available, cache_path, last_updated) or None if unknown
+        """
+        return self._cache_status
 
     def get_indexing_status(self) -> Optional[Tuple[bool, float, int]]:
-        """Get the current indexing status from the daemon.
+        """Get the last known indexing status of the daemon, without any D-Bus call.
 
         Returns:
-            Tuple of (is_indexing, progress, apps_count) or None if unavailable
+            Tuple of (is_indexing, progress, apps_count) or None if unknown
         """
         if not self.proxy:
-            logger.debug("Not connected to daemon")
             return None
+        return self._indexing_status
 
-        try:
-            result = self.proxy.call_sync(
-                "GetIndexingStatus",
-                None,
-                Gio.DBusCallFlags.NONE,
-                30000,  # 30 second timeout (daemon may need time to start via D-Bus activation)
-                None
-            )
+    def set_ui_visible(self, visible: bool) -> bool:
+        """Tell the daemon whether the launcher UI is visible, without waiting.
 
-            # Unpack the result: (bool, double, int32)
-            is_indexing, progress, apps_count = result.unpack()
-            return (is_indexing, progress, apps_count)
+        The daemon pauses background scans while the UI is visible.
 
-        except Exception as e:
-            logger.debug(f"Error getting indexing status: {e}")
-            return None
+        Args:
+            visible: True if the launcher window is shown
+
+        Returns:
+            True if the call was sent, False if not connected
+        """
+        if not self.proxy:
+            return False
+
+        def on_reply(proxy, result):
+            try:
+                proxy.call_finish(result)
+            except Exception as e:
+                logger.debug(f"Error setting UI visibility: {e}")
+
+        self.proxy.call(
+            "SetUiVisible",
+            GLib.Variant("(b)", (visible,)),
+            Gio.DBusCallFlags.NO_AUTO_START,
+            -1,
+            None,
+            on_reply,
+        )
+        return True
 
     def force_update(self) -> bool:
         """Request the daemon to force an immediate cache update.
@@ -229,67 +361,133 @@ class LauncherDaemonClient:
             logger.error(f"Error requesting force update: {e}")
             return False
 
-    def subscribe_to_cache_updated(self, callback: Callable[[int, int], None]) -> bool:
-        """Subscribe to CacheUpdated signals from the daemon.
-
-        Args:
-            callback: Function to call when cache is updated.
-                     Receives (apps_count, timestamp) as arguments.
+    def get_stats(self) -> Optional[dict]:
+        """Get the performance statistics of the daemon.
 
         Returns:
-            True if subscribed successfully, False otherwise
+            Dictionary of statistics, see Launcherd.stats, or None if unavailable
         """
-        if not self.connection:
+        if not self.proxy:
             logger.debug("Not connected to daemon")
-            return False
+            return None
 
         try:
-            def signal_handler(
-                connection: Gio.DBusConnection,
-                sender_name: str,
-                object_path: str,
-                interface_name: str,
-                signal_name: str,
-                parameters: GLib.Variant
-            ):
-                if signal_name == "CacheUpdated":
-                    apps_count, timestamp = parameters.unpack()
-                    try:
-                        callback(apps_count, timestamp)
-                    except Exception as e:
-                        logger.error(f"Error in CacheUpdated callback: {e}")
+            result = self.proxy.call_sync(
+                "GetStats",
+                None,
+                Gio.DBusCallFlags.NONE,
+                30000,  # 30 second timeout (daemon may need time to start via D-Bus activation)
+                None
+            )
+            (stats_json,) = result.unpack()
+            return json.loads(stats_json)
 
-            subscription_id = self.connection.signal_subscribe(
+        except Exception as e:
+            logger.debug(f"Error getting stats: {e}")
+            return None
+
+    def fetch_index(self, timeout_ms: int = 250) -> Optional[list]:
+        """Fetch the daemon's application index through a sealed memfd.
+
+        The daemon is not started if it is not running. This blocks; the UI
+        uses fetch_index_async() instead.
+
+        Args:
+            timeout_ms: Call timeout in milliseconds
+
+        Returns:
+            List of application dictionaries, or None if unavailable
+        """
+        try:
+            connection = self.connection or Gio.bus_get_sync(Gio.BusType.SESSION, None)
+            result, fd_list = connection.call_with_unix_fd_list_sync(
                 self.BUS_NAME,
+                self.OBJECT_PATH,
                 self.INTERFACE_NAME,
-                "CacheUpdated",
+                "GetIndexFd",
+                None,
+                GLib.VariantType.new("(hx)"),
+                Gio.DBusCallFlags.NO_AUTO_START,
+                timeout_ms,
+                None,
+                None
+            )
+            return self._read_index_reply(result, fd_list)
+
+        except Exception as e:
+            logger.debug(f"Could not fetch index from daemon: {e}")
+            return None
+
+    def fetch_index_async(
+        self, callback: Callable[[Optional[list]], None], timeout_ms: int = 250
+    ) -> None:
+        """Fetch the daemon's application index without blocking.
+
+        Args:
+            callback: Called in the main loop with the list of application
+                dictionaries, or None if the daemon is not running
+            timeout_ms: Call timeout in milliseconds
+        """
+        def on_reply(connection, result):
+            try:
+                reply, fd_list = connection.call_with_unix_fd_list_finish(result)
+                apps = self._read_index_reply(reply, fd_list)
+            except Exception as e:
+                logger.debug(f"Could not fetch index from daemon: {e}")
+                apps = None
+            callback(apps)
+
+        def on_bus(source, result):
+            try:
+                connection = Gio.bus_get_finish(result)
+            except Exception as e:
+                logger.debug(f"Session bus unavailable: {e}")
+                callback(None)
+                return
+            connection.call_with_unix_fd_list(
+                self.BUS_NAME,
                 self.OBJECT_PATH,
-                None,  # arg0
-                Gio.DBusSignalFlags.NONE,
-                signal_handler
+                self.INTERFACE_NAME,
+                "GetIndexFd",
+                None,
+                GLib.VariantType.new("(hx)"),
+                Gio.DBusCallFlags.NO_AUTO_START,
+                timeout_ms,
+                None,
+                None,
+                on_reply,
             )
 
-            self._signal_subscriptions.append(subscription_id)
-            logger.debug("Subscribed to CacheUpdated signal")
-            return True
+        Gio.bus_get(Gio.BusType.SESSION, None, on_bus)
 
-        except Exception as e:
-            logger.error(f"Error subscribing to CacheUpdated: {e}")
-            return False
+    def _read_index_reply(self, result: GLib.Variant, fd_list: Gio.UnixFDList) -> list:
+        """Decode a GetIndexFd reply, closing the received file descriptor."""
+        handle, last_updated = result.unpack()
+        fd = fd_list.get(handle)
+        try:
+            # The running daemon's index is current whatever its header says
+            _, apps = parse_cache(read_index(fd))
+        finally:
+            os.close(fd)
+        logger.debug(f"Fetched {len(apps)} applications from daemon index ({last_updated})")
+        return apps
 
-    def subscribe_to_indexing_progress(self, callback: Callable[[float, int], None]) -> bool:
-        """Subscribe to IndexingProgress signals from the daemon.
+    def _subscribe(self, signal_name: str, handler: Callable[[Any], None]) -> bool:
+        """Subscribe handler to a daemon signal, deferring until the bus is ready.
+
+        The subscription matches the daemon's well-known name, so it keeps
+        working when the daemon restarts under a new unique name.
 
         Args:
-            callback: Function to call when indexing progress updates.
-                     Receives (progress, apps_count) as arguments.
+            signal_name: Name of the signal
+            handler: Called with the unpacked signal parameters
 
         Returns:
-            True if subscribed successfully, False otherwise
+            True if subscribed or deferred, False otherwise
         """
         if not self.connection:
-            logger.debug("Not connected to daemon")
-            return False
+            self._pending_signals.append((signal_name, handler))
+            return True
 
         try:
             def signal_handler(
@@ -300,17 +498,15 @@ class LauncherDaemonClient:
                 signal_name: str,
                 parameters: GLib.Variant
             ):
-                if signal_name == "IndexingProgress":
-                    progress, apps_count = parameters.unpack()
-                    try:
-                        callback(progress, apps_count)
-                    except Exception as e:
-                        logger.error(f"Error in IndexingProgress callback: {e}")
+                try:
+                    handler(*parameters.unpack())
+                except Exception as e:
+                    logger.error(f"Error in {signal_name} callback: {e}")
 
             subscription_id = self.connection.signal_subscribe(
                 self.BUS_NAME,
                 self.INTERFACE_NAME,
-                "IndexingProgress",
+                signal_name,
                 self.OBJECT_PATH,
                 None,  # arg0
                 Gio.DBusSignalFlags.NONE,
@@ -318,37 +514,58 @@ class LauncherDaemonClient:
             )
 
             self._signal_subscriptions.append(subscription_id)
-            logger.debug("Subscribed to IndexingProgress signal")
+            logger.debug(f"Subscribed to {signal_name} signal")
             return True
 
         except Exception as e:
-            logger.error(f"Error subscribing to IndexingProgress: {e}")
+            logger.error(f"Error subscribing to {signal_name}: {e}")
             return False
 
-    def is_daemon_available(self) -> bool:
-        """Check if the daemon is available without maintaining a connection.
+    def subscribe_to_cache_updated(self, callback: Callable[[int, int], None]) -> bool:
+        """Subscribe to CacheUpdated signals from the daemon.
+
+        Args:
+            callback: Function to call when cache is updated.
+                     Receives (apps_count, timestamp) as arguments.
 
         Returns:
-            True if daemon is running, False otherwise
+            True if subscribed successfully, False otherwise
         """
-        try:
-            connection = Gio.bus_get_sync(Gio.BusType.SESSION, None)
+        def handler(apps_count: int, timestamp: int) -> None:
+            cache_path = self._cache_status[1] if self._cache_status else ""
+            self._cache_status = (True, cache_path, timestamp)
+            self._indexing_status = (False, 1.0, apps_count)
+            callback(apps_count, timestamp)
 
-            # Use DO_NOT_AUTO_START to avoid starting the daemon
-            proxy = Gio.DBusProxy.new_sync(
-                connection,
-                Gio.DBusProxyFlags.DO_NOT_AUTO_START,
-                None,
-                self.BUS_NAME,
-                self.OBJECT_PATH,
-                self.INTERFACE_NAME,
-                None
-            )
+        return self._subscribe("CacheUpdated", handler)
 
-            # Try to get a property to verify the service is responsive
-            version = proxy.get_cached_property("Version")
-            return version is not None
+    def subscribe_to_indexing_progress(self, callback: Callable[[float, int, str], None]) -> bool:
+        """Subscribe to IndexingProgress signals from the daemon.
 
-        except Exception as e:
-            logger.debug(f"Daemon not available: {e}")
-            return False
+        Args:
+            callback: Function to call when indexing progress updates.
+                     Receives (progress, apps_count, stage) as arguments.
+
+        Returns:
+            True if subscribed successfully, False otherwise
+        """
+        def handler(progress: float, apps_count: int, stage: str) -> None:
+            self._indexing_status = (progress < 1.0, progress, apps_count)
+            callback(progress, apps_count, stage)
+
+        return self._subscribe("IndexingProgress", handler)
+
+    def subscribe_to_applications_changed(
+        self, callback: Callable[[list, list, list], None]
+    ) -> bool:
+        """Subscribe to ApplicationsChanged signals from the daemon.
+
+        Args:
+            callback: Function to call when applications change.
+                     Receives (added, removed, changed) as arguments: lists of
+                     records, see helper.app_delta, and of desktop IDs.
+
+        Returns:
+            True if subscribed successfully, False otherwise
+        """
+        return self._subscribe("ApplicationsChanged", callback)
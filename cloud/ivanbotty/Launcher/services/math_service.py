@@ -1,12 +1,19 @@
 """Mathematical expression evaluation service.
 
-This module provides safe evaluation of mathematical expressions
-using a restricted set of functions from the math module.
+This module provides safe evaluation of mathematical expressions. Expressions
+are parsed into an AST, checked against a whitelist of node types and compiled
+into closures; evaluation enforces limits on exponents, result size and time,
+so no input can stall the caller. Compiled expressions are kept in an LRU,
+since typing an expression re-evaluates all of its prefixes.
 """
 
+import ast
 import math
 import logging
-from typing import Tuple, Optional
+import operator
+import time
+from functools import lru_cache
+from typing import Any, Callable, Tuple, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -14,6 +21,143 @@ logger = logging.getLogger(__name__)
 _SAFE_DICT = {k: getattr(math, k) for k in dir(math) if not k.startswith("__")}
 _SAFE_DICT.update({"abs": abs, "round": round, "min": min, "max": max})
 
+# Evaluation limits
+MAX_EXPRESSION_LENGTH = 512  # Characters
+MAX_RESULT_BITS = 4096  # Size of integer results and intermediates
+MAX_COMBINATORIC_ARG = 1000  # Largest argument of factorial, comb and perm
+TIME_BUDGET = 0.05  # Seconds allowed for a single evaluation
+COMPILED_CACHE_SIZE = 256  # Compiled expressions kept in the LRU
+
+_BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+}
+
+_UNARY_OPERATORS = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+
+_COMBINATORIC_FUNCTIONS = {"factorial", "comb", "perm"}
+
+
+class MathLimitError(ArithmeticError):
+    """Raised when an expression exceeds an evaluation limit."""
+
+
+def _bits(value: Any) -> int:
+    """Return the size in bits of an integer operand, 0 for floats."""
+    return abs(value).bit_length() if isinstance(value, int) else 0
+
+
+def _check_binary(op: type, left: Any, right: Any, deadline: float) -> None:
+    """Reject operations whose result would exceed the limits."""
+    if time.monotonic() > deadline:
+        raise MathLimitError("time budget exceeded")
+
+    if op is ast.Pow and isinstance(left, int) and isinstance(right, int):
+        if right > 0 and abs(left) > 1 and _bits(left) * right > MAX_RESULT_BITS:
+            raise MathLimitError("exponent too large")
+    elif op is ast.Mult and _bits(left) + _bits(right) > MAX_RESULT_BITS:
+        raise MathLimitError("result too large")
+
+
+def _check_result(value: Any) -> Any:
+    """Reject results that are not plain numbers or exceed the size limit."""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise TypeError(f"unsupported result type {type(value).__name__}")
+    if _bits(value) > MAX_RESULT_BITS:
+        raise MathLimitError("result too large")
+    return value
+
+
+def _compile_node(node: ast.AST) -> Callable[[float], Any]:
+    """Compile a whitelisted AST node into a closure taking a deadline.
+
+    Raises:
+        ValueError: If the node is not allowed
+    """
+    if isinstance(node, ast.Expression):
+        return _compile_node(node.body)
+
+    if isinstance(node, ast.Constant):
+        if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+            raise ValueError(f"unsupported constant {node.value!r}")
+        value = node.value
+        return lambda deadline: value
+
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPERATORS:
+        op_type = type(node.op)
+        func = _BINARY_OPERATORS[op_type]
+        left = _compile_node(node.left)
+        right = _compile_node(node.right)
+
+        def binary(deadline):
+            lhs, rhs = left(deadline), right(deadline)
+            _check_binary(op_type, lhs, rhs, deadline)
+            return _check_result(func(lhs, rhs))
+
+        return binary
+
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPERATORS:
+        func = _UNARY_OPERATORS[type(node.op)]
+        operand = _compile_node(node.operand)
+        return lambda deadline: func(operand(deadline))
+
+    if isinstance(node, ast.Name):
+        value = _SAFE_DICT.get(node.id)
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"unknown name {node.id!r}")
+        return lambda deadline: value
+
+    if (
+        isinstance(node, ast.Call)
+        and isinstance(node.func, ast.Name)
+        and callable(_SAFE_DICT.get(node.func.id))
+        and not node.keywords
+    ):
+        name = node.func.id
+        func = _SAFE_DICT[name]
+        args = [_compile_node(arg) for arg in node.args]
+
+        def call(deadline):
+            values = [arg(deadline) for arg in args]
+            if time.monotonic() > deadline:
+                raise MathLimitError("time budget exceeded")
+            if name in _COMBINATORIC_FUNCTIONS and any(
+                abs(v) > MAX_COMBINATORIC_ARG for v in values
+            ):
+                raise MathLimitError(f"argument of {name} too large")
+            return _check_result(func(*values))
+
+        return call
+
+    raise ValueError(f"unsupported syntax {type(node).__name__}")
+
+
+@lru_cache(maxsize=COMPILED_CACHE_SIZE)
+def compile_expression(expression: str) -> Callable[[float], Any]:
+    """Parse and compile an expression, caching the result.
+
+    Args:
+        expression: The math expression to compile
+
+    Returns:
+        Closure evaluating the expression, taking a monotonic deadline
+
+    Raises:
+        ValueError: If the expression is too long or uses unsupported syntax
+        SyntaxError: If the expression cannot be parsed
+    """
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        raise ValueError("expression too long")
+    return _compile_node(ast.parse(expression.strip(), mode="eval"))
+
 
 class MathService:
     """Service to safely evaluate mathematical expressions.
@@ -38,10 +182,13 @@ class MathService:
             (result, None). If evaluation fails, returns (None, error_message).
         """
         try:
-            # Evaluate the expression using only the allowed functions in self.safe_dict
-            result = eval(expression, {"__builtins__": {}}, self.safe_dict)
+            evaluate = compile_expression(expression)
+            result = evaluate(time.monotonic() + TIME_BUDGET)
             return (str(result), None)
+        except MathLimitError as e:
+            logger.debug(f"Math evaluation limit for expression='{expression}': {e}")
+            return (None, f"Error: '{expression}' is too large to evaluate.")
         except Exception as e:
             # Log the error for debugging and return a user-friendly error message
-            logger.error(f"Math evaluation error for expression='{expression}': {e}")
+            logger.debug(f"Math evaluation error for expression='{expression}': {e}")
             return (None, f"Error: Could not evaluate '{expression}'. Please check your input.")
@@ -3,8 +3,8 @@ import gi
 gi.require_version("Gtk", "4.0")
 gi.require_version("Adw", "1")
 from gi.repository import Gtk, Adw
-from cloud.ivanbotty.Launcher.config.config import UI_CONFS, PREFERENCES
-from cloud.ivanbotty.Launcher.widget.preferences import Preferences
+from cloud.ivanbotty.Launcher.config.config import LAYOUT
+from cloud.ivanbotty.Launcher.helper.session_profile import SESSION
 
 
 class Footer(Adw.Bin):
@@ -16,8 +16,8 @@ class Footer(Adw.Bin):
 
         # Create the main horizontal container for the footer
         main_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=12)
-        self.set_margin_start(UI_CONFS[PREFERENCES]["margin_start"])
-        self.set_margin_end(UI_CONFS[PREFERENCES]["margin_end"])
+        self._apply_layout(LAYOUT.conf)
+        LAYOUT.connect(self._apply_layout)
         self.set_margin_top(8)
         self.set_margin_bottom(8)
 
@@ -56,6 +56,15 @@ class Footer(Adw.Bin):
             label.set_valign(Gtk.Align.CENTER)
             main_box.append(label)
 
+    def _apply_layout(self, conf):
+        """Apply the margins of a UI configuration."""
+        self.set_margin_start(conf["margin_start"])
+        self.set_margin_end(conf["margin_end"])
+
     def open_preferences(self):
         """Open the preferences dialog."""
+        # Imported on first use, the dialog is not needed for the first frame
+        from cloud.ivanbotty.Launcher.widget.preferences import Preferences
+
+        SESSION.use("module", Preferences.__module__)
         Preferences(self.app).present()
@@ -2,10 +2,34 @@ import gi
 
 gi.require_version("Adw", "1")
 gi.require_version("Gtk", "4.0")
-from gi.repository import Adw, Gtk
+from gi.repository import Adw, GLib, Gtk
 
 from cloud.ivanbotty.database import sqlite3 as db
-from cloud.ivanbotty.Launcher.config.config import reset_onboarding
+from cloud.ivanbotty.Launcher.config.config import (
+    COMPACT_STYLE,
+    DEFAULT_STYLE,
+    LAYOUT,
+    reset_onboarding,
+)
+from cloud.ivanbotty.Launcher.helper.latency import LATENCY, PERCENTILES
+from cloud.ivanbotty.Launcher.helper.response_cache import get_response_cache
+
+# Title and subtitle of the rows of the latency stages
+STAGE_ROWS = {
+    "total": ("Keystroke to Results", "From the last keystroke to the results on screen"),
+    "debounce": ("Typing Pause", "Wait for typing to pause before searching"),
+    "provider": ("Providers", "Extensions finding the results"),
+    "model": ("Results List", "Replacing the previous results"),
+    "bind": ("Rows", "Creating the result rows"),
+    "frame": ("Frame", "Drawing the results on screen"),
+}
+
+
+def format_ms(value):
+    """Format a duration in milliseconds, a dash if unknown."""
+    if value is None:
+        return "–"
+    return f"{value:.1f} ms" if value < 10 else f"{value:.0f} ms"
 
 
 class Preferences(Adw.PreferencesDialog):
@@ -27,6 +51,7 @@ class Preferences(Adw.PreferencesDialog):
         self._create_appearance_page()
         self._create_extensions_page()
         self._create_api_page()
+        self._create_diagnostics_page()
 
     def _create_general_page(self):
         """Create the general settings page."""
@@ -108,14 +133,16 @@ class Preferences(Adw.PreferencesDialog):
 
         # Switch row for enabling/disabling compact layout
         self.layout_switch = Adw.SwitchRow(
-            active=(db.get_pref("layout", "default") == "compact"),
+            active=(LAYOUT.style == COMPACT_STYLE),
             title="Compact Layout",
             subtitle="Use a smaller, more condensed interface",
         )
         # Save layout preference when toggled
         self.layout_switch.connect(
             "notify::active",
-            lambda sw, _: db.set_pref("layout", "compact" if sw.get_active() else "default"),
+            lambda sw, _: db.set_pref(
+                LAYOUT.key, COMPACT_STYLE if sw.get_active() else DEFAULT_STYLE
+            ),
         )
         layout_group.add(self.layout_switch)
 
@@ -234,10 +261,170 @@ class Preferences(Adw.PreferencesDialog):
         gemini_model_row.set_selected(0)
         model_group.add(gemini_model_row)
 
+        # Response cache group
+        cache_group = Adw.PreferencesGroup(
+            title="Response Cache",
+            description="Answers are cached so repeated questions show up instantly"
+        )
+
+        # Action row to clear cached answers
+        clear_cache_row = Adw.ActionRow(
+            title="Clear Cached Answers",
+            subtitle="Ask the AI again the next time a question is repeated"
+        )
+        clear_cache_row.set_activatable(True)
+        clear_cache_row.add_suffix(Gtk.Image.new_from_icon_name("user-trash-symbolic"))
+
+        def on_clear_cache(row):
+            try:
+                get_response_cache().clear()
+                toast = Adw.Toast(title="Cached answers cleared")
+                toast.set_timeout(3)
+                if hasattr(self, 'add_toast'):
+                    self.add_toast(toast)
+            except Exception:
+                # Clearing failed, the cache will still expire on its own
+                pass
+
+        clear_cache_row.connect("activated", on_clear_cache)
+        cache_group.add(clear_cache_row)
+
         page_api.add(api_group)
         page_api.add(model_group)
+        page_api.add(cache_group)
         self.add(page_api)
 
+    def _create_diagnostics_page(self):
+        """Create the diagnostics page, with the latency of searches."""
+        page_diagnostics = Adw.PreferencesPage()
+        page_diagnostics.set_title("Diagnostics")
+        page_diagnostics.set_icon_name("utilities-system-monitor-symbolic")
+
+        report = LATENCY.report()
+        stages = report["stages"]
+
+        # Latency percentiles group
+        latency_group = Adw.PreferencesGroup(
+            title="Search Latency",
+            description=f"Percentiles over {stages['total']['count']} searches"
+        )
+        for stage, (title, subtitle) in STAGE_ROWS.items():
+            stage_row = Adw.ActionRow(title=title, subtitle=subtitle)
+            percentiles = "   ".join(
+                f"p{p} {format_ms(stages[stage][f'p{p}'])}" for p in PERCENTILES
+            )
+            value_label = Gtk.Label(label=percentiles)
+            value_label.add_css_class("dim-label")
+            value_label.add_css_class("numeric")
+            stage_row.add_suffix(value_label)
+            latency_group.add(stage_row)
+
+        # Slowest queries group
+        slowest_group = Adw.PreferencesGroup(
+            title="Slowest Recent Queries",
+            description="Where the time of the slowest searches went"
+        )
+        if not report["slowest"]:
+            slowest_group.add(Adw.ActionRow(title="No searches recorded yet"))
+        for query in report["slowest"]:
+            query_row = Adw.ActionRow(
+                title=query["query"] or "(empty)",
+                subtitle=", ".join(
+                    f"{STAGE_ROWS[stage][0]} {format_ms(ms)}"
+                    for stage, ms in query["stages"].items()
+                    if stage != "total" and stage in STAGE_ROWS
+                ),
+                use_markup=False,
+            )
+            total_label = Gtk.Label(label=format_ms(query["total_ms"]))
+            total_label.add_css_class("numeric")
+            query_row.add_suffix(total_label)
+            slowest_group.add(query_row)
+
+        # Expensive requests group
+        requests_group = Adw.PreferencesGroup(
+            title="AI Requests",
+            description="Questions sent to the AI in this session, and those avoided"
+        )
+        controller = getattr(self.app, "search_controller", None)
+        requests = controller.request_stats() if controller else {}
+        request_rows = (
+            ("Sent", "Requests sent to the AI service", requests.get("started", 0)),
+            (
+                "Avoided",
+                f"Typing resumed: {requests.get('interrupted', 0)}, "
+                f"too short: {requests.get('too_short', 0)}, "
+                f"waiting for Enter: {requests.get('enter_only', 0)}, "
+                f"already sent: {requests.get('deduplicated', 0)}",
+                requests.get("avoided", 0),
+            ),
+            ("Aborted", "Requests superseded by a newer question", requests.get("superseded", 0)),
+        )
+        for title, subtitle, count in request_rows:
+            request_row = Adw.ActionRow(title=title, subtitle=subtitle)
+            count_label = Gtk.Label(label=str(count))
+            count_label.add_css_class("numeric")
+            request_row.add_suffix(count_label)
+            requests_group.add(request_row)
+
+        # Export and reset group
+        data_group = Adw.PreferencesGroup(title="Statistics")
+
+        export_row = Adw.ActionRow(
+            title="Export Statistics",
+            subtitle="Save the histograms and slowest queries as JSON"
+        )
+        export_row.set_activatable(True)
+        export_row.add_suffix(Gtk.Image.new_from_icon_name("document-save-symbolic"))
+
+        def on_export_chosen(dialog, result):
+            try:
+                path = dialog.save_finish(result).get_path()
+                LATENCY.export(path)
+                toast = Adw.Toast(title="Statistics exported")
+            except GLib.Error:
+                # Cancelled
+                return
+            except OSError as e:
+                toast = Adw.Toast(title=f"Could not export statistics: {e.strerror}")
+            toast.set_timeout(3)
+            if hasattr(self, 'add_toast'):
+                self.add_toast(toast)
+
+        def on_export(row):
+            dialog = Gtk.FileDialog(title="Export Statistics", initial_name="launcher-latency.json")
+            dialog.save(self.get_root(), None, on_export_chosen)
+
+        export_row.connect("activated", on_export)
+        data_group.add(export_row)
+
+        reset_row = Adw.ActionRow(
+            title="Reset Statistics",
+            subtitle="Forget the latency of past searches"
+        )
+        reset_row.set_activatable(True)
+        reset_row.add_suffix(Gtk.Image.new_from_icon_name("user-trash-symbolic"))
+
+        def on_reset(row):
+            try:
+                LATENCY.reset()
+                toast = Adw.Toast(title="Statistics reset")
+                toast.set_timeout(3)
+                if hasattr(self, 'add_toast'):
+                    self.add_toast(toast)
+            except Exception:
+                # Resetting failed, the statistics are kept
+                pass
+
+        reset_row.connect("activated", on_reset)
+        data_group.add(reset_row)
+
+        page_diagnostics.add(latency_group)
+        page_diagnostics.add(slowest_group)
+        page_diagnostics.add(requests_group)
+        page_diagnostics.add(data_group)
+        self.add(page_diagnostics)
+
     def on_api_key_apply(self, row, service):
         """Save the API key when applied."""
         text = row.get_text().strip()
@@ -1,5 +1,3 @@
-import threading
-import time
 from gi.repository import Gtk, GLib
 
 
@@ -32,16 +30,3 @@ class ProgressBar(Gtk.ProgressBar):
         self.set_fraction(fraction)
         self.set_text(display_text)
         return False  # Remove the idle handler after execution
-
-    def start_long_task(self, steps=100, delay=0.05, text="Loading..."):
-        """
-        Simulate a long-running task by updating the progress bar in a separate thread.
-        'steps' defines the number of increments, 'delay' is the time between updates.
-        """
-
-        def task():
-            for i in range(steps + 1):
-                self.update_progress(i / steps, text)
-                time.sleep(delay)
-
-        threading.Thread(target=task, daemon=True).start()
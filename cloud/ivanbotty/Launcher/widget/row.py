@@ -6,13 +6,22 @@ gi.require_version("Gtk", "4.0")
 gi.require_version("Adw", "1")
 
 from gi.repository import Gtk, Gio, Adw
-from cloud.ivanbotty.Launcher.config.config import UI_CONFS, PREFERENCES, CATEGORY_TAG_STYLES
+from cloud.ivanbotty.Launcher.config.config import LAYOUT, CATEGORY_TAG_STYLES
+from cloud.ivanbotty.Launcher.helper.session_profile import SESSION
 
 # Pre-compile regex patterns for better performance
 _CODE_BLOCK_PATTERN = re.compile(r"(^```(?:json)?$|^```$)", re.MULTILINE)
 _CODE_KEYWORDS_PATTERN = re.compile(r"\b(const|def|class|function)\b")
 
 
+def icon_gicon(icon_name):
+    """Return the GIcon of an icon name, or of an absolute icon path."""
+    # Use FileIcon for absolute paths, otherwise ThemedIcon
+    if icon_name.startswith("/"):
+        return Gio.FileIcon.new(Gio.File.new_for_path(icon_name))
+    return Gio.ThemedIcon.new(icon_name)
+
+
 class Row(Gtk.ListBoxRow):
     """Enhanced row widget using native Adwaita styling.
     
@@ -28,7 +37,8 @@ class Row(Gtk.ListBoxRow):
 
         # Main row container
         row_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=12)
-        self._apply_margins(row_box)
+        self._row_box = row_box
+        self._apply_margins(row_box, LAYOUT.conf)
         row_box.set_valign(Gtk.Align.CENTER)
 
         # Icon
@@ -55,26 +65,27 @@ class Row(Gtk.ListBoxRow):
         # Adwaita style (automatic theme)
         Adw.StyleManager.get_default().set_color_scheme(Adw.ColorScheme.DEFAULT)
 
-    def _apply_margins(self, widget):
+    def _apply_margins(self, widget, conf):
         """Apply consistent margins from configuration."""
-        widget.set_margin_top(UI_CONFS[PREFERENCES]["margin_top"])
-        widget.set_margin_bottom(UI_CONFS[PREFERENCES]["margin_bottom"])
-        widget.set_margin_start(UI_CONFS[PREFERENCES]["margin_start"])
-        widget.set_margin_end(UI_CONFS[PREFERENCES]["margin_end"])
+        widget.set_margin_top(conf["margin_top"])
+        widget.set_margin_bottom(conf["margin_bottom"])
+        widget.set_margin_start(conf["margin_start"])
+        widget.set_margin_end(conf["margin_end"])
+
+    def apply_layout(self, conf):
+        """Restyle the row for a new UI configuration."""
+        self._apply_margins(self._row_box, conf)
+        icon_size = conf.get("icon_size", 32)
+        self._icon_image.set_pixel_size(icon_size)
+        self._icon_bin.set_size_request(icon_size + 8, icon_size + 8)
 
     def _create_icon_widget(self, icon_name):
         """Create icon widget with configurable size from settings."""
         icon_name = icon_name or "application-x-addon-symbolic"
-        icon_size = UI_CONFS[PREFERENCES].get("icon_size", 32)
-        
-        # Use FileIcon for absolute paths, otherwise ThemedIcon
-        gicon = (
-            Gio.FileIcon.new(Gio.File.new_for_path(icon_name))
-            if icon_name.startswith("/")
-            else Gio.ThemedIcon.new(icon_name)
-        )
-        
-        image = Gtk.Image.new_from_gicon(gicon)
+        icon_size = LAYOUT.get("icon_size", 32)
+        SESSION.use("icon", icon_name)
+
+        image = Gtk.Image.new_from_gicon(icon_gicon(icon_name))
         image.set_pixel_size(icon_size)
 
         # Container for icon with proper spacing
@@ -87,6 +98,8 @@ class Row(Gtk.ListBoxRow):
         box_icon_bin.set_halign(Gtk.Align.START)
         box_icon_bin.set_size_request(icon_size + 8, icon_size + 8)
         box_icon_bin.append(image)
+        self._icon_image = image
+        self._icon_bin = box_icon_bin
         
         return box_icon_bin
 
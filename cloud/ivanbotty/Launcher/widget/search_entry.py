@@ -3,7 +3,7 @@ import gi
 gi.require_version("Gtk", "4.0")
 
 from gi.repository import Gtk, GObject
-from cloud.ivanbotty.Launcher.config.config import UI_CONFS, PREFERENCES
+from cloud.ivanbotty.Launcher.config.config import LAYOUT
 
 
 class SearchEntry(Gtk.Entry):
@@ -36,10 +36,9 @@ class SearchEntry(Gtk.Entry):
         # Clear icon only shows when there's text
         self._update_clear_icon()
         
-        # Set margins and expansion
-        self.set_margin_start(UI_CONFS[PREFERENCES]["margin_start"])
-        self.set_margin_end(UI_CONFS[PREFERENCES]["margin_end"])
-        self.set_margin_top(UI_CONFS[PREFERENCES].get("margin_top", 16))
+        # Set margins and expansion, following layout changes
+        self._apply_layout(LAYOUT.conf)
+        LAYOUT.connect(self._apply_layout)
         self.set_hexpand(True)
 
         # Connect internal signals
@@ -47,6 +46,12 @@ class SearchEntry(Gtk.Entry):
         self.connect("activate", self.on_activate)
         self.connect("icon-press", self.on_icon_press)
 
+    def _apply_layout(self, conf):
+        """Apply the margins of a UI configuration."""
+        self.set_margin_start(conf["margin_start"])
+        self.set_margin_end(conf["margin_end"])
+        self.set_margin_top(conf.get("margin_top", 16))
+
     def _update_clear_icon(self):
         """Show or hide clear icon based on whether there's text."""
         text = self.get_text()
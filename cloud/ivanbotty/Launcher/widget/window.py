@@ -3,7 +3,8 @@ import gi
 gi.require_version("Adw", "1")
 gi.require_version("Gtk", "4.0")
 from gi.repository import Adw, Gtk
-from cloud.ivanbotty.Launcher.config.config import UI_CONFS, PREFERENCES
+from cloud.ivanbotty.Launcher.config.config import LAYOUT
+from cloud.ivanbotty.Launcher.helper.session_profile import SESSION
 
 
 class Window(Adw.ApplicationWindow):
@@ -18,10 +19,9 @@ class Window(Adw.ApplicationWindow):
     def __init__(self, application):
         super().__init__(application=application)
         
-        # Window configuration
-        width = UI_CONFS[PREFERENCES]["width"]
-        height = UI_CONFS[PREFERENCES]["height"]
-        self.set_default_size(width, height)
+        # Window configuration, following layout changes
+        self._apply_layout(LAYOUT.conf)
+        LAYOUT.connect(self._apply_layout)
         
         # Allow resizing with minimum constraints
         self.set_resizable(True)
@@ -30,6 +30,10 @@ class Window(Adw.ApplicationWindow):
         # Set up keyboard shortcuts
         self._setup_shortcuts()
     
+    def _apply_layout(self, conf):
+        """Size the window for a UI configuration."""
+        self.set_default_size(conf["width"], conf["height"])
+
     def _setup_shortcuts(self):
         """Set up keyboard shortcuts and shortcuts overlay."""
         # Create shortcuts controller
@@ -122,5 +126,7 @@ class Window(Adw.ApplicationWindow):
     def _show_preferences(self, *args):
         """Show preferences dialog."""
         from cloud.ivanbotty.Launcher.widget.preferences import Preferences
+
+        SESSION.use("module", Preferences.__module__)
         Preferences(self.get_application()).present()
         return True
@@ -4,4 +4,4 @@ This package provides the background daemon service for the Launcher application
 handling application indexing and caching.
 """
 
-__all__ = ['dbus_service']
+__all__ = ['dbus_service', 'index_builder', 'scheduler', 'state', 'stats', 'throttle', 'zygote']
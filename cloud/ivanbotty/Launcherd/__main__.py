@@ -4,15 +4,22 @@
 This daemon runs in the background, periodically scanning for applications
 and maintaining a cache for instant UI startup. It provides a D-Bus interface
 for the UI to query cache status and receive progress updates.
+
+With --idle-timeout the daemon exits once no client has called it for a
+while, so it can be started on demand by D-Bus or systemd activation instead
+of staying resident for the whole session.
 """
 
 import sys
-import time
 import os
+import gc
 import json
 import logging
 import argparse
 import signal
+import threading
+import time
+from typing import Optional
 
 try:
     from gi.repository import GLib
@@ -21,11 +28,31 @@ except ImportError:
     GLIB_AVAILABLE = False
     GLib = None
 
+from cloud.ivanbotty.Launcher.helper.app_cache import (
+    CACHE_PATH,
+    build_cache,
+    encode_cache,
+    find_index_file,
+    next_generation,
+    read_cache_file,
+)
+from cloud.ivanbotty.Launcher.helper.app_delta import diff_applications
+from cloud.ivanbotty.Launcher.helper.progress import STAGE_PUBLISH, ProgressReporter
 from cloud.ivanbotty.Launcher.services.applications_service import ApplicationsService
 from cloud.ivanbotty.Launcherd.dbus_service import LauncherdDBusService
+from cloud.ivanbotty.Launcherd.scheduler import IdleMonitor, ScanScheduler
+from cloud.ivanbotty.Launcherd.state import load_state, save_state
+from cloud.ivanbotty.Launcherd.stats import DaemonStats
+from cloud.ivanbotty.Launcherd.throttle import (
+    DEFAULT_CPU_BUDGET,
+    DEFAULT_LOAD_THRESHOLD,
+    ScanThrottle,
+)
+from cloud.ivanbotty.utils.heap import freeze_heap
 
-CACHE_PATH = os.path.expanduser("~/.cache/cloud.ivanbotty.Launcher/applications_cache.json")
 SCAN_INTERVAL = 60
+PROGRESS_INTERVAL_MS = 100  # Minimum interval between IndexingProgress signals
+IDLE_CHECK_INTERVAL = 5  # Seconds between two checks of the idle timeout
 
 logger = logging.getLogger(__name__)
 
@@ -55,53 +82,125 @@ def ensure_cache_dir_exists(path: str) -> None:
         logger.debug("Created cache directory: %s", cache_dir)
 
 
-def update_cache(service: ApplicationsService, dbus_service=None) -> int:
+def update_cache(
+    service: ApplicationsService,
+    dbus_service=None,
+    stats: Optional[DaemonStats] = None,
+    metrics_file: Optional[str] = None,
+) -> int:
     """Update the cache file with the list of applications.
 
+    Clients are told what changed with ApplicationsChanged, computed against
+    the previous cache file, which is what they loaded at startup. The cache
+    header records the directory fingerprints taken when the scan started,
+    and its generation is bumped only when the catalogue changed.
+
     Args:
         service: ApplicationsService instance
         dbus_service: Optional D-Bus service for progress updates
+        stats: Optional statistics recording the scan
+        metrics_file: Optional path of a metrics file rewritten after the scan
 
     Returns:
         Number of applications cached
     """
+    start = time.monotonic()
     try:
         if dbus_service:
             dbus_service.set_indexing_state(True)
-            dbus_service.update_indexing_progress(0.0, 0)
-
-        store = service.load_applications()
+            progress = ProgressReporter(
+                lambda fraction, stage, done: dbus_service.update_indexing_progress(
+                    fraction, done, stage
+                ),
+                interval_ms=PROGRESS_INTERVAL_MS,
+            )
+        else:
+            progress = None
+
+        previous_header, previous_apps = read_cache_file(CACHE_PATH)
+        store = service.load_applications(save_cache=False, progress=progress)
         apps = [model.to_dict() for model in store]
         apps_count = len(apps)
+        added, removed, changed = diff_applications(previous_apps, apps)
+        generation = next_generation(previous_header, bool(added or removed or changed))
 
-        if dbus_service:
-            dbus_service.update_indexing_progress(0.5, apps_count)
+        if progress:
+            progress(STAGE_PUBLISH, 0, 1)
 
+        # Write atomically, so clients never read a partially written cache
+        write_start = time.monotonic()
+        payload = encode_cache(build_cache(apps, service.fingerprints, generation))
         ensure_cache_dir_exists(CACHE_PATH)
-        with open(CACHE_PATH, "w", encoding="utf-8") as f:
-            json.dump(apps, f, indent=2, ensure_ascii=False)
+        tmp_path = f"{CACHE_PATH}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(payload)
+        os.replace(tmp_path, CACHE_PATH)
+        if stats:
+            stats.record_cache_write(
+                os.path.getsize(CACHE_PATH), (time.monotonic() - write_start) * 1000
+            )
 
         if dbus_service:
-            dbus_service.update_indexing_progress(1.0, apps_count)
+            dbus_service.publish_index(payload)
+            progress(STAGE_PUBLISH, 1, 1)
             dbus_service.set_indexing_state(False)
+            if added or removed or changed:
+                dbus_service.emit_applications_changed(added, removed, changed)
             dbus_service.emit_cache_updated(apps_count)
 
-        logger.info("Cache updated with %d applications.", apps_count)
+        if stats:
+            stats.record_scan((time.monotonic() - start) * 1000, apps_count, service.load_stats)
+        if added or removed or changed or not gc.get_freeze_count():
+            # The models and parse caches live until the next change; those of
+            # the replaced index are unfrozen, or their cycles would leak
+            freeze_heap("the scan", refreeze=True)
+        logger.info("Cache updated with %d applications (generation %d).", apps_count, generation)
         return apps_count
 
     except Exception as e:
         logger.exception("Error updating the cache: %s", e)
+        if stats:
+            stats.record_error(e)
         if dbus_service:
             dbus_service.set_indexing_state(False)
         return 0
 
-
-def run_daemon(debug: bool = False, daemonize: bool = False) -> int:
+    finally:
+        if stats and metrics_file:
+            try:
+                stats.write_metrics_file(metrics_file)
+            except OSError as e:
+                logger.warning(f"Could not write metrics file {metrics_file}: {e}")
+
+
+def run_daemon(
+    debug: bool = False,
+    daemonize: bool = False,
+    metrics_file: Optional[str] = None,
+    idle_timeout: int = 0,
+    cpu_budget: float = DEFAULT_CPU_BUDGET,
+    load_threshold: float = DEFAULT_LOAD_THRESHOLD,
+) -> int:
     """Run the daemon service.
 
+    The daemon is driven by a GLib main loop, so D-Bus calls are dispatched
+    at any time. Scans run on the scheduler's worker thread, started by a
+    periodic timeout source, at startup and on ForceUpdate. The previous
+    index and warm caches are restored before the bus name is taken, so the
+    first call is answered without waiting for a scan.
+
+    Background scans are paced by a ScanThrottle: they run at idle priority
+    within a CPU budget, pause while the UI is visible and are postponed
+    while the system is busy. ForceUpdate scans are urgent and not paced.
+
     Args:
         debug: Enable debug logging
         daemonize: Run as a background daemon
+        metrics_file: Optional path of a metrics file rewritten after each scan
+        idle_timeout: Exit after this many seconds without D-Bus method calls,
+            0 to stay resident
+        cpu_budget: Share of one CPU a background scan may use
+        load_threshold: Load average per CPU above which periodic scans are postponed
 
     Returns:
         Exit code
@@ -122,54 +221,180 @@ def run_daemon(debug: bool = False, daemonize: bool = False) -> int:
 
     # Initialize services
     service = ApplicationsService()
-
-    # Start D-Bus service if available
+    load_state(service)
+    stats = DaemonStats()
     dbus_service = None
-    if GLIB_AVAILABLE:
-        try:
-            dbus_service = LauncherdDBusService(CACHE_PATH)
-            if dbus_service.start():
-                logger.info("D-Bus service started successfully")
-            else:
-                logger.warning("D-Bus service failed to start, continuing without it")
-                dbus_service = None
-        except Exception as e:
-            logger.warning(f"Could not start D-Bus service: {e}")
-            dbus_service = None
-    else:
+    idle = IdleMonitor(idle_timeout)
+    throttle = ScanThrottle(cpu_budget=cpu_budget, load_threshold=load_threshold)
+    service.checkpoint = throttle.checkpoint
+
+    def scan():
+        throttle.begin(urgent=scheduler.current_urgent)
+        update_cache(service, dbus_service, stats, metrics_file)
+        save_state(service)
+
+    scheduler = ScanScheduler(scan)
+
+    def force_update():
+        scheduler.request("ForceUpdate", urgent=True)
+        # A paced scan already running must not keep the client waiting
+        throttle.hurry()
+
+    if not GLIB_AVAILABLE:
         logger.warning("GLib not available, D-Bus service disabled")
+        return run_without_main_loop(scheduler)
+
+    # Start D-Bus service
+    have_index = False
+    try:
+        dbus_service = LauncherdDBusService(
+            CACHE_PATH,
+            on_force_update=force_update,
+            stats=stats,
+            on_activity=idle.touch,
+            on_ui_visible=throttle.set_ui_visible,
+        )
+        if dbus_service.start():
+            logger.info("D-Bus service started successfully")
+            # Serve the previous index until the first scan completes
+            cache_path = find_index_file(CACHE_PATH)
+            try:
+                if cache_path:
+                    with open(cache_path, "rb") as f:
+                        dbus_service.publish_index(f.read())
+                    have_index = True
+            except OSError:
+                pass
+        else:
+            logger.warning("D-Bus service failed to start, continuing without it")
+            dbus_service = None
+    except Exception as e:
+        logger.warning(f"Could not start D-Bus service: {e}")
+        dbus_service = None
+
+    loop = GLib.MainLoop()
+
+    def on_shutdown_signal():
+        logger.info("Received termination signal, shutting down...")
+        loop.quit()
+        return GLib.SOURCE_REMOVE
+
+    def on_scan_interval():
+        if not throttle.should_postpone():
+            scheduler.request("interval")
+        return GLib.SOURCE_CONTINUE
+
+    def on_startup():
+        # Without a previous index there is nothing to serve, so hurry
+        scheduler.request("startup", urgent=not have_index)
+        return GLib.SOURCE_REMOVE
+
+    def on_idle_check():
+        if not idle.expired(busy=scheduler.busy):
+            return GLib.SOURCE_CONTINUE
+        logger.info("No client for %d seconds, exiting", idle_timeout)
+        loop.quit()
+        return GLib.SOURCE_REMOVE
 
     # Set up signal handlers for graceful shutdown
-    shutdown_requested = [False]
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        GLib.unix_signal_add(GLib.PRIORITY_DEFAULT, signum, on_shutdown_signal)
+
+    GLib.idle_add(on_startup)
+    GLib.timeout_add_seconds(SCAN_INTERVAL, on_scan_interval)
+    if idle_timeout > 0:
+        GLib.timeout_add_seconds(min(IDLE_CHECK_INTERVAL, idle_timeout), on_idle_check)
+    logger.info("Launcher daemon started. Scanning every %d seconds.", SCAN_INTERVAL)
+
+    try:
+        loop.run()
+    except KeyboardInterrupt:
+        logger.info("Service manually interrupted.")
+    finally:
+        # Clean up
+        if dbus_service:
+            dbus_service.stop()
+        logger.info("Daemon stopped (scan stats: %s)", scheduler.stats())
+
+    return 0
+
+
+def run_without_main_loop(scheduler: ScanScheduler) -> int:
+    """Run the scan schedule without GLib, and thus without D-Bus.
+
+    Args:
+        scheduler: Scheduler running the scans
+
+    Returns:
+        Exit code
+    """
+    shutdown_requested = threading.Event()
 
     def signal_handler(signum, frame):
         logger.info(f"Received signal {signum}, shutting down...")
-        shutdown_requested[0] = True
+        shutdown_requested.set()
 
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
 
-    # Initial cache update
     logger.info("Launcher daemon started. Scanning every %d seconds.", SCAN_INTERVAL)
-    update_cache(service, dbus_service)
-
-    # Main loop
     try:
-        while not shutdown_requested[0]:
-            time.sleep(SCAN_INTERVAL)
-            if not shutdown_requested[0]:
-                update_cache(service, dbus_service)
+        while not shutdown_requested.is_set():
+            scheduler.request("interval")
+            shutdown_requested.wait(SCAN_INTERVAL)
     except KeyboardInterrupt:
         logger.info("Service manually interrupted.")
     finally:
-        # Clean up
-        if dbus_service:
-            dbus_service.stop()
         logger.info("Daemon stopped")
 
     return 0
 
 
+def print_stats() -> int:
+    """Print the statistics of the running daemon as JSON.
+
+    Returns:
+        Exit code
+    """
+    setup_logging()
+    try:
+        from cloud.ivanbotty.Launcher.services.daemon_client import LauncherDaemonClient
+
+        client = LauncherDaemonClient()
+    except ImportError as e:
+        logger.error(f"Cannot query the daemon: {e}")
+        return 1
+
+    stats = client.get_stats() if client.connect() else None
+    if stats is None:
+        logger.error("Launcher daemon is not running or did not answer")
+        return 1
+    print(json.dumps(stats, indent=2))
+    return 0
+
+
+def build_index_command(root: str, output: str) -> int:
+    """Build a pre-seeded index of a filesystem root.
+
+    Args:
+        root: Root of the filesystem image to index
+        output: Directory receiving the index files
+
+    Returns:
+        Exit code
+    """
+    setup_logging()
+    from cloud.ivanbotty.Launcherd.index_builder import build_index
+
+    try:
+        counts = build_index(root, output)
+    except OSError as e:
+        logger.error(f"Could not build the index: {e}")
+        return 1
+    print(json.dumps(counts, indent=2))
+    return 0
+
+
 def main() -> int:
     """Main entry point for the daemon.
 
@@ -190,8 +415,88 @@ def main() -> int:
         help="Run as a background daemon"
     )
 
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="Print the statistics of the running daemon and exit"
+    )
+    parser.add_argument(
+        "--metrics-file",
+        metavar="PATH",
+        help="Write statistics in the Prometheus text format to PATH after each scan"
+    )
+    parser.add_argument(
+        "--idle-timeout",
+        type=int,
+        default=0,
+        metavar="SECONDS",
+        help="Exit after SECONDS without D-Bus calls, 0 to stay resident (default: 0)"
+    )
+
+    parser.add_argument(
+        "--cpu-budget",
+        type=float,
+        default=DEFAULT_CPU_BUDGET,
+        metavar="FRACTION",
+        help="Share of one CPU background scans may use, 1 for no limit "
+        f"(default: {DEFAULT_CPU_BUDGET})"
+    )
+    parser.add_argument(
+        "--load-threshold",
+        type=float,
+        default=DEFAULT_LOAD_THRESHOLD,
+        metavar="LOAD",
+        help="Postpone periodic scans while the load average per CPU exceeds LOAD "
+        f"(default: {DEFAULT_LOAD_THRESHOLD})"
+    )
+    parser.add_argument(
+        "--zygote",
+        action="store_true",
+        help="Preload the launcher and fork it on request instead of indexing, see Launcherd.zygote"
+    )
+    parser.add_argument(
+        "--zygote-socket",
+        metavar="PATH",
+        help="Socket the zygote listens on "
+        "(default: $XDG_RUNTIME_DIR/cloud.ivanbotty.Launcher/zygote.sock)"
+    )
+    parser.add_argument(
+        "--build-index",
+        action="store_true",
+        help="Write a pre-seeded index of the applications under --root to --output and exit"
+    )
+    parser.add_argument(
+        "--root",
+        default="/",
+        metavar="PREFIX",
+        help="Filesystem root indexed by --build-index (default: /)"
+    )
+    parser.add_argument(
+        "--output",
+        metavar="DIR",
+        help="Directory receiving the files written by --build-index"
+    )
+
     args = parser.parse_args()
-    return run_daemon(debug=args.debug, daemonize=args.daemonize)
+    if args.build_index:
+        if not args.output:
+            parser.error("--build-index requires --output")
+        return build_index_command(args.root, args.output)
+    if args.stats:
+        return print_stats()
+    if args.zygote:
+        from cloud.ivanbotty.Launcherd.zygote import ZYGOTE_SOCKET, serve
+
+        setup_logging(args.debug)
+        return serve(args.zygote_socket or ZYGOTE_SOCKET)
+    return run_daemon(
+        debug=args.debug,
+        daemonize=args.daemonize,
+        metrics_file=args.metrics_file,
+        idle_timeout=args.idle_timeout,
+        cpu_budget=args.cpu_budget,
+        load_threshold=args.load_threshold,
+    )
 
 
 if __name__ == "__main__":
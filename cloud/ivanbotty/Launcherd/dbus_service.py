@@ -4,10 +4,13 @@ This module provides a D-Bus service that allows the Launcher UI to communicate
 with the background daemon for cache status updates and indexing progress.
 """
 
+from __future__ import annotations
+
 import logging
 import os
+import threading
 import time
-from typing import Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 
 try:
     from gi.repository import GLib, Gio
@@ -17,6 +20,8 @@ except ImportError:
     GLib = None
     Gio = None
 
+from cloud.ivanbotty.utils.shared_index import create_sealed_memfd
+
 logger = logging.getLogger(__name__)
 
 # D-Bus interface definition
@@ -36,6 +41,16 @@ DBUS_INTERFACE_XML = """
       <arg direction="out" type="i" name="apps_count"/>
     </method>
     <method name="ForceUpdate"/>
+    <method name="GetStats">
+      <arg direction="out" type="s" name="stats_json"/>
+    </method>
+    <method name="SetUiVisible">
+      <arg direction="in" type="b" name="visible"/>
+    </method>
+    <method name="GetIndexFd">
+      <arg direction="out" type="h" name="index"/>
+      <arg direction="out" type="x" name="last_updated"/>
+    </method>
     <signal name="CacheUpdated">
       <arg type="i" name="apps_count"/>
       <arg type="x" name="timestamp"/>
@@ -43,12 +58,19 @@ DBUS_INTERFACE_XML = """
     <signal name="IndexingProgress">
       <arg type="d" name="progress"/>
       <arg type="i" name="apps_count"/>
+      <arg type="s" name="stage"/>
+    </signal>
+    <signal name="ApplicationsChanged">
+      <arg type="a(ssssss)" name="added"/>
+      <arg type="as" name="removed"/>
+      <arg type="a(ssssss)" name="changed"/>
     </signal>
     <property name="Version" type="s" access="read"/>
   </interface>
 </node>
 """
 
+
 class LauncherdDBusService:
     """D-Bus service for the Launcher daemon.
 
@@ -60,19 +82,42 @@ class LauncherdDBusService:
     OBJECT_PATH = "/cloud/ivanbotty/Launcherd"
     VERSION = "0.0.1"
 
-    def __init__(self, cache_path: str):
+    def __init__(
+        self,
+        cache_path: str,
+        on_force_update: Optional[Callable[[], None]] = None,
+        stats=None,
+        on_activity: Optional[Callable[[], None]] = None,
+        on_ui_visible: Optional[Callable[[bool, str], None]] = None,
+    ):
         """Initialize the D-Bus service.
 
         Args:
             cache_path: Path to the applications cache file
+            on_force_update: Called from the main loop when ForceUpdate is received
+            stats: Optional DaemonStats served by GetStats
+            on_activity: Called from the main loop on every method call
+            on_ui_visible: Called from the main loop with the visibility and
+                the bus name of a client whose UI is shown or hidden, or
+                leaves the bus while shown
         """
         if not DBUS_AVAILABLE:
             raise ImportError("D-Bus support requires PyGObject with GLib/Gio")
 
         self.cache_path = cache_path
+        self.on_force_update = on_force_update
+        self.stats = stats
+        self.on_activity = on_activity
+        self.on_ui_visible = on_ui_visible
+        # Watches of the clients whose UI is shown, by bus name
+        self._ui_watch_ids: Dict[str, int] = {}
+        self._index_fd: Optional[int] = None
+        self._index_updated = 0
+        self._index_lock = threading.Lock()
         self.is_indexing = False
         self.progress = 0.0
         self.apps_count = 0
+        self.stage = ""
         self.connection: Optional[Gio.DBusConnection] = None
         self.registration_id: Optional[int] = None
         self.name_owner_id: Optional[int] = None
@@ -81,15 +126,18 @@ class LauncherdDBusService:
         self.node_info = Gio.DBusNodeInfo.new_for_xml(DBUS_INTERFACE_XML)
         self.interface_info = self.node_info.lookup_interface(self.BUS_NAME)
 
-    def start(self) -> bool:
+    def start(self, connection: Optional[Gio.DBusConnection] = None) -> bool:
         """Start the D-Bus service.
 
+        Args:
+            connection: Bus connection to use, the session bus by default
+
         Returns:
             True if service started successfully, False otherwise
         """
         try:
             # Get session bus
-            self.connection = Gio.bus_get_sync(Gio.BusType.SESSION, None)
+            self.connection = connection or Gio.bus_get_sync(Gio.BusType.SESSION, None)
 
             # Register object on the bus
             self.registration_id = self.connection.register_object(
@@ -118,6 +166,10 @@ class LauncherdDBusService:
 
     def stop(self) -> None:
         """Stop the D-Bus service."""
+        for watch_id in self._ui_watch_ids.values():
+            Gio.bus_unwatch_name(watch_id)
+        self._ui_watch_ids.clear()
+
         if self.registration_id and self.connection:
             self.connection.unregister_object(self.registration_id)
             self.registration_id = None
@@ -127,6 +179,7 @@ class LauncherdDBusService:
             self.name_owner_id = None
 
         self.connection = None
+        self.publish_index(None)
         logger.info("D-Bus service stopped")
 
     def _handle_method_call(
@@ -140,6 +193,8 @@ class LauncherdDBusService:
         invocation: Gio.DBusMethodInvocation
     ) -> None:
         """Handle D-Bus method calls."""
+        if self.on_activity:
+            self.on_activity()
         try:
             if method_name == "GetCacheStatus":
                 result = self._get_cache_status()
@@ -150,10 +205,23 @@ class LauncherdDBusService:
                 invocation.return_value(GLib.Variant("(bdi)", result))
 
             elif method_name == "ForceUpdate":
-                # Signal that a force update was requested
-                # The main loop should handle this
+                # Only queue the scan, it runs on the scheduler's worker
+                if self.on_force_update:
+                    self.on_force_update()
+                invocation.return_value(None)
+
+            elif method_name == "SetUiVisible":
+                (visible,) = parameters.unpack()
+                self._set_ui_visible(visible, sender or "")
                 invocation.return_value(None)
 
+            elif method_name == "GetIndexFd":
+                self._return_index_fd(invocation)
+
+            elif method_name == "GetStats":
+                stats_json = self.stats.to_json() if self.stats else "{}"
+                invocation.return_value(GLib.Variant("(s)", (stats_json,)))
+
             else:
                 invocation.return_dbus_error(
                     "org.freedesktop.DBus.Error.UnknownMethod",
@@ -167,6 +235,58 @@ class LauncherdDBusService:
                 str(e)
             )
 
+    def _set_ui_visible(self, visible: bool, sender: str) -> None:
+        """Forward the UI visibility of a client.
+
+        Clients showing their UI are watched, so one leaving the bus while
+        shown does not pause scans forever.
+        """
+        watch_id = self._ui_watch_ids.pop(sender, None)
+        if watch_id is not None:
+            Gio.bus_unwatch_name(watch_id)
+        if visible and sender and self.connection:
+            self._ui_watch_ids[sender] = Gio.bus_watch_name_on_connection(
+                self.connection,
+                sender,
+                Gio.BusNameWatcherFlags.NONE,
+                None,
+                lambda connection, name: self._set_ui_visible(False, name),
+            )
+        if self.on_ui_visible:
+            self.on_ui_visible(visible, sender)
+
+    def _return_index_fd(self, invocation: Gio.DBusMethodInvocation) -> None:
+        """Answer GetIndexFd with a duplicate of the sealed index memfd."""
+        with self._index_lock:
+            fd = os.dup(self._index_fd) if self._index_fd is not None else None
+            last_updated = self._index_updated
+        if fd is None:
+            invocation.return_dbus_error(
+                "org.freedesktop.DBus.Error.Failed", "No index published yet"
+            )
+            return
+        # The fd list takes ownership of the duplicate
+        fd_list = Gio.UnixFDList.new_from_array([fd])
+        invocation.return_value_with_unix_fd_list(
+            GLib.Variant("(hx)", (0, last_updated)), fd_list
+        )
+
+    def publish_index(self, payload: Optional[bytes]) -> None:
+        """Replace the index served by GetIndexFd.
+
+        Clients holding the previous memfd keep a valid, unchanging copy.
+
+        Args:
+            payload: Serialized index, the cache file content, or None to
+                stop serving an index
+        """
+        fd = create_sealed_memfd(payload) if payload else None
+        with self._index_lock:
+            old_fd, self._index_fd = self._index_fd, fd
+            self._index_updated = int(time.time())
+        if old_fd is not None:
+            os.close(old_fd)
+
     def _handle_get_property(
         self,
         connection: Gio.DBusConnection,
@@ -205,17 +325,21 @@ class LauncherdDBusService:
         """
         return (self.is_indexing, self.progress, self.apps_count)
 
-    def update_indexing_progress(self, progress: float, apps_count: int) -> None:
+    def update_indexing_progress(self, progress: float, apps_count: int, stage: str = "") -> None:
         """Update indexing progress and emit signal.
 
+        Callers are expected to rate-limit updates, see helper.progress.
+
         Args:
             progress: Progress from 0.0 to 1.0
-            apps_count: Number of applications indexed so far
+            apps_count: Number of items of the current stage done so far
+            stage: Current indexing stage, one of helper.progress.STAGES
         """
         self.progress = max(0.0, min(1.0, progress))
         self.apps_count = apps_count
+        self.stage = stage
 
-        # Emit IndexingProgress signal
+        # Emit IndexingProgress signal, (dis) since the stage was added, (di) before
         if self.connection:
             try:
                 self.connection.emit_signal(
@@ -223,7 +347,7 @@ class LauncherdDBusService:
                     self.OBJECT_PATH,
                     self.BUS_NAME,
                     "IndexingProgress",
-                    GLib.Variant("(di)", (self.progress, self.apps_count))
+                    GLib.Variant("(dis)", (self.progress, self.apps_count, self.stage))
                 )
             except Exception as e:
                 logger.debug(f"Error emitting IndexingProgress signal: {e}")
@@ -249,6 +373,32 @@ class LauncherdDBusService:
             except Exception as e:
                 logger.error(f"Error emitting CacheUpdated signal: {e}")
 
+    def emit_applications_changed(
+        self, added: List[Tuple], removed: List[str], changed: List[Tuple]
+    ) -> None:
+        """Emit ApplicationsChanged signal.
+
+        Args:
+            added: Records of new applications, see helper.app_delta
+            removed: Desktop IDs of removed applications
+            changed: Records of applications whose fields changed
+        """
+        if self.connection:
+            try:
+                self.connection.emit_signal(
+                    None,  # destination (broadcast to all)
+                    self.OBJECT_PATH,
+                    self.BUS_NAME,
+                    "ApplicationsChanged",
+                    GLib.Variant("(a(ssssss)asa(ssssss))", (added, removed, changed))
+                )
+                logger.info(
+                    f"Applications changed signal emitted: {len(added)} added, "
+                    f"{len(removed)} removed, {len(changed)} changed"
+                )
+            except Exception as e:
+                logger.error(f"Error emitting ApplicationsChanged signal: {e}")
+
     def set_indexing_state(self, is_indexing: bool) -> None:
         """Set the indexing state.
 
@@ -0,0 +1,101 @@
+"""Offline builder of pre-seeded application indexes.
+
+Image builders run "launcherd --build-index --root <prefix> --output <dir>"
+against the filesystem of an OS or Flatpak image. The applications cache
+and the daemon state (parse cache and icon index) are written to the output
+directory with every path relative to the image root, so they are valid on
+the deployed system. Installed under $XDG_DATA_DIRS/cloud.ivanbotty.Launcher/index
+or copied to ~/.cache/cloud.ivanbotty.Launcher through /etc/skel, they let
+the very first launch skip the cold scan.
+"""
+
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Dict
+
+from cloud.ivanbotty.Launcher.config.config import ALL_APP_DIRS, ICON_DIRS
+from cloud.ivanbotty.Launcher.helper.app_cache import (
+    CACHE_FILENAME,
+    build_cache,
+    directory_fingerprints,
+    encode_cache,
+    portable_path,
+)
+from cloud.ivanbotty.Launcher.services.applications_service import ApplicationsService
+from cloud.ivanbotty.Launcherd.state import STATE_PATH, write_state
+
+logger = logging.getLogger(__name__)
+
+
+def under_root(path, root: str) -> Path:
+    """Return where path of the deployed system lives under root."""
+    return Path(root) / str(path).lstrip(os.sep)
+
+
+def relocate(path: str, root: str) -> str:
+    """Return path as seen on the deployed system, if it lies under root."""
+    if root != os.sep and path.startswith(root + os.sep):
+        return path[len(root):]
+    return path
+
+
+def _system_dirs(dirs) -> list:
+    """Drop directories of the home directory, which an image does not have."""
+    return [d for d in dirs if not portable_path(d).startswith("~")]
+
+
+def build_index(root: str, output: str) -> Dict[str, int]:
+    """Scan the applications of a filesystem root and write a seed index.
+
+    Args:
+        root: Root of the filesystem image to index
+        output: Directory receiving the applications cache and daemon state
+
+    Returns:
+        Counts of the written applications, parse cache entries and icons
+    """
+    start = time.monotonic()
+    root = os.path.abspath(root)
+    service = ApplicationsService(
+        app_dirs=[under_root(d, root) for d in _system_dirs(ALL_APP_DIRS)],
+        icon_dirs=[under_root(d, root) for d in _system_dirs(ICON_DIRS)],
+    )
+    # Fingerprint first, so an image changing during the scan does not validate it
+    fingerprints = directory_fingerprints(ALL_APP_DIRS, root=root)
+    store = service.load_applications(save_cache=False)
+
+    apps = []
+    for model in store:
+        app = model.to_dict()
+        if app["icon"]:
+            app["icon"] = relocate(app["icon"], root)
+        apps.append(app)
+
+    caches = service.export_caches()
+    caches["desktop_entries"] = {
+        relocate(path, root): entry for path, entry in caches["desktop_entries"].items()
+    }
+    caches["icons"] = {name: relocate(path, root) for name, path in caches["icons"].items()}
+
+    os.makedirs(output, exist_ok=True)
+    cache_path = os.path.join(output, CACHE_FILENAME)
+    tmp_path = f"{cache_path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(encode_cache(build_cache(apps, fingerprints, generation=1)))
+    os.replace(tmp_path, cache_path)
+
+    state_path = os.path.join(output, os.path.basename(STATE_PATH))
+    if not write_state(caches, state_path):
+        raise OSError(f"Could not write {state_path}")
+
+    counts = {
+        "applications": len(apps),
+        "desktop_entries": len(caches["desktop_entries"]),
+        "icons": len(caches["icons"]),
+    }
+    logger.info(
+        f"Built index of {root} in {(time.monotonic() - start) * 1000:.0f} ms: {counts}"
+    )
+    return counts
@@ -0,0 +1,161 @@
+"""Coalescing scan scheduler for the Launcher daemon.
+
+Scans run off the main loop so it stays free to answer D-Bus calls. Each
+scan runs on a thread of its own, started by a worker thread that never
+scans itself: a scan may lower the priority of its thread, which must not
+carry over to the next scan, nor to the threads started after it. Any
+number of scan requests made while a scan is queued collapse into that
+scan; a request made while a scan runs queues exactly one more, since the
+running scan may already have missed the change behind the request.
+
+IdleMonitor lets an activated daemon exit once no client has used it for a
+while; the next D-Bus call activates it again.
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ScanScheduler:
+    """Run scans one at a time off the main loop, coalescing concurrent requests.
+
+    Attributes:
+        counters: Number of scan requests, scans run and requests coalesced
+        current_urgent: Whether the running scan was requested urgently
+    """
+
+    def __init__(self, scan: Callable[[], object]) -> None:
+        """Initialize the scheduler.
+
+        Args:
+            scan: Function performing one scan, called on a new thread each time
+        """
+        self._scan = scan
+        self._lock = threading.Lock()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._pending = False
+        self._pending_urgent = False
+        self._running = False
+        self.current_urgent = False
+        self.counters: Dict[str, int] = {"requests": 0, "scans": 0, "coalesced": 0}
+
+    @property
+    def busy(self) -> bool:
+        """True while a scan is queued or running."""
+        return not self._idle.is_set()
+
+    def request(self, reason: str = "", urgent: bool = False) -> bool:
+        """Queue a scan unless one is already queued.
+
+        Args:
+            reason: Why the scan was requested, for logging
+            urgent: True if a client waits for the scan; a queued scan
+                becomes urgent if any request merged into it is
+
+        Returns:
+            True if a scan was queued, False if the request was coalesced
+        """
+        with self._lock:
+            self.counters["requests"] += 1
+            self._pending_urgent = self._pending_urgent or urgent
+            if self._pending:
+                self.counters["coalesced"] += 1
+                logger.debug(f"Scan request coalesced ({reason})")
+                return False
+            self._pending = True
+            self._idle.clear()
+            start_worker = not self._running
+            self._running = True
+
+        logger.debug(f"Scan queued ({reason})")
+        if start_worker:
+            threading.Thread(target=self._worker, name="launcherd-scheduler", daemon=True).start()
+        return True
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Block until no scan is queued or running.
+
+        Args:
+            timeout: Maximum seconds to wait, None to wait forever
+
+        Returns:
+            True if the scheduler is idle
+        """
+        return self._idle.wait(timeout)
+
+    def stats(self) -> Dict[str, int]:
+        """Return a snapshot of the counters."""
+        with self._lock:
+            return dict(self.counters)
+
+    def _worker(self) -> None:
+        """Run queued scans until none is left, each on a fresh thread."""
+        while True:
+            with self._lock:
+                if not self._pending:
+                    self._running = False
+                    self._idle.set()
+                    return
+                self._pending = False
+                self.current_urgent = self._pending_urgent
+                self._pending_urgent = False
+                self.counters["scans"] += 1
+
+            start = time.monotonic()
+            thread = threading.Thread(target=self._run_scan, name="launcherd-scan", daemon=True)
+            thread.start()
+            thread.join()
+            logger.debug(f"Scan finished in {(time.monotonic() - start) * 1000:.1f} ms")
+
+    def _run_scan(self) -> None:
+        """Run one scan, logging its failure."""
+        try:
+            self._scan()
+        except Exception as e:
+            logger.exception(f"Scan failed: {e}")
+
+
+class IdleMonitor:
+    """Track client activity to let an activated daemon exit when unused.
+
+    Attributes:
+        timeout: Seconds without activity after which the daemon is idle,
+            0 to never become idle
+    """
+
+    def __init__(self, timeout: float, clock: Callable[[], float] = time.monotonic) -> None:
+        """Initialize the monitor, counting its creation as activity.
+
+        Args:
+            timeout: Seconds without activity after which the daemon is idle
+            clock: Monotonic clock in seconds, replaceable for tests
+        """
+        self.timeout = timeout
+        self._clock = clock
+        self._last_activity = clock()
+
+    def touch(self) -> None:
+        """Record activity, such as a D-Bus method call."""
+        self._last_activity = self._clock()
+
+    def idle_for(self) -> float:
+        """Return the seconds elapsed since the last activity."""
+        return self._clock() - self._last_activity
+
+    def expired(self, busy: bool = False) -> bool:
+        """Check whether the daemon has been idle long enough to exit.
+
+        Args:
+            busy: True while work is in progress, which defers the exit
+
+        Returns:
+            True if the daemon should exit
+        """
+        if busy:
+            return False
+        return self.timeout > 0 and self.idle_for() >= self.timeout
@@ -0,0 +1,92 @@
+"""Warm state of the Launcher daemon, persisted across restarts.
+
+An activated daemon lives only as long as it is used, so the parse cache and
+the icon index are saved after each scan and restored at startup. A
+restarted daemon then only parses the .desktop files that changed while it
+was not running instead of the whole catalogue.
+"""
+
+import json
+import logging
+import os
+import time
+from typing import Dict, Optional
+
+from cloud.ivanbotty.Launcher.helper.app_cache import find_index_file
+from cloud.ivanbotty.Launcher.services.applications_service import ApplicationsService
+
+STATE_PATH = os.path.expanduser("~/.cache/cloud.ivanbotty.Launcher/daemon_state.json")
+STATE_VERSION = 1
+
+logger = logging.getLogger(__name__)
+
+
+def load_state(service: ApplicationsService, path: Optional[str] = None) -> int:
+    """Restore the caches of service from the state file.
+
+    Args:
+        service: ApplicationsService whose caches are restored
+        path: Path of the state file (default: the user's state, or a
+            pre-seeded one if the user has none yet)
+
+    Returns:
+        Number of cache entries restored, 0 if the state is missing or stale
+    """
+    start = time.monotonic()
+    path = path or find_index_file(STATE_PATH)
+    if path is None:
+        return 0
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        return 0
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable daemon state {path}: {e}")
+        return 0
+
+    if not isinstance(state, dict) or state.get("version") != STATE_VERSION:
+        logger.info(f"Ignoring daemon state with another version: {path}")
+        return 0
+
+    restored = service.import_caches(state.get("caches", {}))
+    logger.info(
+        f"Restored {restored} cache entries in {(time.monotonic() - start) * 1000:.1f} ms"
+    )
+    return restored
+
+
+def save_state(service: ApplicationsService, path: str = STATE_PATH) -> bool:
+    """Atomically save the caches of service to the state file.
+
+    Args:
+        service: ApplicationsService whose caches are saved
+        path: Path of the state file
+
+    Returns:
+        True if the state was saved, False otherwise
+    """
+    return write_state(service.export_caches(), path)
+
+
+def write_state(caches: Dict, path: str) -> bool:
+    """Atomically write exported caches to a state file.
+
+    Args:
+        caches: Dictionary returned by ApplicationsService.export_caches()
+        path: Path of the state file
+
+    Returns:
+        True if the state was saved, False otherwise
+    """
+    state = {"version": STATE_VERSION, "caches": caches}
+    tmp_path = f"{path}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        return True
+    except (OSError, TypeError, ValueError) as e:
+        logger.warning(f"Could not save daemon state {path}: {e}")
+        return False
@@ -0,0 +1,225 @@
+"""Performance statistics of the Launcher daemon.
+
+The daemon records how long scans take, how many files they parse or skip,
+how well the parse and icon caches perform and what writing the cache costs.
+Statistics are served as JSON by the GetStats D-Bus method and can be written
+to a metrics file in the Prometheus text format after each scan.
+"""
+
+import json
+import os
+import resource
+import threading
+import time
+from typing import Dict, List, Optional
+
+# Upper bounds of the scan duration histogram buckets, in milliseconds
+SCAN_DURATION_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+def resident_memory_bytes() -> int:
+    """Return the resident set size of the current process in bytes.
+
+    Reads /proc/self/statm where available, falling back to the peak
+    resident size reported by getrusage.
+    """
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class Histogram:
+    """Cumulative histogram with fixed bucket bounds.
+
+    Attributes:
+        bounds: Upper bounds of the buckets
+        counts: Number of observations per bucket, the last one unbounded
+        total: Sum of all observations
+        count: Number of observations
+    """
+
+    def __init__(self, bounds=SCAN_DURATION_BUCKETS_MS) -> None:
+        """Initialize an empty histogram.
+
+        Args:
+            bounds: Increasing upper bounds of the buckets
+        """
+        self.bounds = tuple(bounds)
+        self.counts: List[int] = [0] * (len(self.bounds) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """Record an observation."""
+        for i, bound in enumerate(self.bounds):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.total += value
+        self.count += 1
+
+    def to_dict(self) -> Dict:
+        """Return the histogram with cumulative "le" buckets, as Prometheus does."""
+        buckets = {}
+        cumulative = 0
+        for bound, count in zip(self.bounds + ("+Inf",), self.counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        return {"buckets": buckets, "sum": round(self.total, 3), "count": self.count}
+
+
+class DaemonStats:
+    """Thread-safe collection of daemon performance statistics."""
+
+    def __init__(self) -> None:
+        """Initialize empty statistics."""
+        self._lock = threading.Lock()
+        self._started_at = time.time()
+        self.scan_duration_ms = Histogram()
+        self.counters: Dict[str, int] = {
+            "scans": 0,
+            "scan_errors": 0,
+            "files_found": 0,
+            "files_parsed": 0,
+            "files_skipped": 0,
+            "duplicates": 0,
+            "parse_cache_hits": 0,
+            "parse_cache_misses": 0,
+            "icon_cache_hits": 0,
+            "icon_cache_misses": 0,
+        }
+        self.last_scan: Dict = {}
+        self.last_cache_write: Dict = {}
+        self.last_error: Optional[Dict] = None
+
+    def record_scan(self, duration_ms: float, apps_count: int, load_stats: Dict[str, int]) -> None:
+        """Record a completed scan.
+
+        Args:
+            duration_ms: Duration of the scan in milliseconds
+            apps_count: Number of applications found
+            load_stats: Counters of ApplicationsService.load_stats
+        """
+        with self._lock:
+            self.scan_duration_ms.observe(duration_ms)
+            self.counters["scans"] += 1
+            for name, value in load_stats.items():
+                if name in self.counters:
+                    self.counters[name] += value
+            self.last_scan = {
+                "timestamp": int(time.time()),
+                "duration_ms": round(duration_ms, 3),
+                "apps_count": apps_count,
+                **load_stats,
+            }
+
+    def record_cache_write(self, size_bytes: int, duration_ms: float) -> None:
+        """Record a cache write.
+
+        Args:
+            size_bytes: Size of the written cache file
+            duration_ms: Time spent writing it, in milliseconds
+        """
+        with self._lock:
+            self.last_cache_write = {
+                "timestamp": int(time.time()),
+                "size_bytes": size_bytes,
+                "duration_ms": round(duration_ms, 3),
+            }
+
+    def record_error(self, error: Exception) -> None:
+        """Record a failed scan.
+
+        Args:
+            error: The exception that made the scan fail
+        """
+        with self._lock:
+            self.counters["scan_errors"] += 1
+            self.last_error = {
+                "timestamp": int(time.time()),
+                "type": type(error).__name__,
+                "message": str(error),
+            }
+
+    def to_dict(self) -> Dict:
+        """Return a snapshot of the statistics.
+
+        Returns:
+            Dictionary suitable for JSON serialization
+        """
+        with self._lock:
+            counters = dict(self.counters)
+            snapshot = {
+                "uptime_s": round(time.time() - self._started_at, 3),
+                "resident_memory_bytes": resident_memory_bytes(),
+                "scan_duration_ms": self.scan_duration_ms.to_dict(),
+                "counters": counters,
+                "parse_cache_hit_rate": _rate(
+                    counters["parse_cache_hits"], counters["parse_cache_misses"]
+                ),
+                "icon_cache_hit_rate": _rate(
+                    counters["icon_cache_hits"], counters["icon_cache_misses"]
+                ),
+                "last_scan": dict(self.last_scan),
+                "last_cache_write": dict(self.last_cache_write),
+                "last_error": dict(self.last_error) if self.last_error else None,
+            }
+        return snapshot
+
+    def to_json(self) -> str:
+        """Return a snapshot of the statistics as a JSON string."""
+        return json.dumps(self.to_dict())
+
+    def to_prometheus(self) -> str:
+        """Return a snapshot of the statistics in the Prometheus text format."""
+        snapshot = self.to_dict()
+        lines = [
+            "# TYPE launcherd_scan_duration_ms histogram",
+        ]
+        histogram = snapshot["scan_duration_ms"]
+        for bound, count in histogram["buckets"].items():
+            lines.append(f'launcherd_scan_duration_ms_bucket{{le="{bound}"}} {count}')
+        lines.append(f"launcherd_scan_duration_ms_sum {histogram['sum']}")
+        lines.append(f"launcherd_scan_duration_ms_count {histogram['count']}")
+
+        for name, value in snapshot["counters"].items():
+            lines.append(f"# TYPE launcherd_{name}_total counter")
+            lines.append(f"launcherd_{name}_total {value}")
+
+        gauges = {
+            "resident_memory_bytes": snapshot["resident_memory_bytes"],
+            "parse_cache_hit_rate": snapshot["parse_cache_hit_rate"],
+            "icon_cache_hit_rate": snapshot["icon_cache_hit_rate"],
+            "cache_write_size_bytes": snapshot["last_cache_write"].get("size_bytes", 0),
+            "cache_write_duration_ms": snapshot["last_cache_write"].get("duration_ms", 0),
+            "last_scan_timestamp_seconds": snapshot["last_scan"].get("timestamp", 0),
+            "last_error_timestamp_seconds": (snapshot["last_error"] or {}).get("timestamp", 0),
+        }
+        for name, value in gauges.items():
+            lines.append(f"# TYPE launcherd_{name} gauge")
+            lines.append(f"launcherd_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write_metrics_file(self, path: str) -> None:
+        """Atomically write the statistics to a file in the Prometheus text format.
+
+        Args:
+            path: Path of the metrics file
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+
+
+def _rate(hits: int, misses: int) -> float:
+    """Return the hit rate, 0.0 without any lookup."""
+    total = hits + misses
+    return round(hits / total, 4) if total else 0.0
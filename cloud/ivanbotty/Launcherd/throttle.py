@@ -0,0 +1,284 @@
+"""Background-friendly pacing of daemon scans.
+
+Scans must not compete with the application the user just launched. The
+thread of a non-urgent scan therefore runs with idle I/O priority and a
+raised nice value, and spends at most a share of the CPU: work is cut into
+time slices, each followed by a sleep long enough to respect the budget.
+Non-urgent scans also pause while any launcher UI is visible and are
+postponed while the system is busy, judged by the load average per CPU.
+Urgent scans, such as ForceUpdate, run at normal priority and are neither
+paced, paused nor postponed.
+
+Priorities are lowered per thread and an unprivileged process cannot lower
+its nice value again, so each scan runs on a thread of its own, see
+ScanScheduler. Hurrying a running scan restores its I/O priority, and its
+nice value where permitted.
+"""
+
+import ctypes
+import ctypes.util
+import logging
+import os
+import platform
+import threading
+import time
+from typing import Callable, Dict, Set
+
+logger = logging.getLogger(__name__)
+
+# Default pacing of non-urgent scans
+DEFAULT_CPU_BUDGET = 0.25  # Share of one CPU a scan may use
+DEFAULT_SLICE_MS = 50  # CPU time spent between two sleeps
+DEFAULT_LOAD_THRESHOLD = 0.8  # Load average per CPU above which scans are postponed
+DEFAULT_MAX_POSTPONEMENTS = 10  # Consecutive postponements before a scan runs anyway
+DEFAULT_MAX_PAUSE_S = 300  # Longest pause while the UI is visible
+SCAN_NICENESS = 10
+
+# ioprio_set(2) is not exposed by the os module
+_IOPRIO_SET_SYSCALLS = {
+    "x86_64": 251,
+    "i386": 289,
+    "i686": 289,
+    "aarch64": 30,
+    "riscv64": 30,
+    "armv7l": 314,
+    "ppc64le": 273,
+}
+_IOPRIO_WHO_PROCESS = 1
+_IOPRIO_CLASS_BE = 2
+_IOPRIO_CLASS_IDLE = 3
+_IOPRIO_CLASS_SHIFT = 13
+_IOPRIO_BE_NORMAL = 4
+
+
+def _set_io_priority(tid: int, ioprio: int) -> bool:
+    """Set the I/O priority of a thread with ioprio_set(2).
+
+    Returns:
+        True if the priority was set
+    """
+    syscall_number = _IOPRIO_SET_SYSCALLS.get(platform.machine())
+    libc_name = ctypes.util.find_library("c")
+    if syscall_number is None or libc_name is None:
+        return False
+    libc = ctypes.CDLL(libc_name, use_errno=True)
+    if libc.syscall(syscall_number, _IOPRIO_WHO_PROCESS, tid, ioprio) != 0:
+        logger.debug(f"Could not set I/O priority: errno {ctypes.get_errno()}")
+        return False
+    return True
+
+
+def lower_thread_priority(niceness: int = SCAN_NICENESS) -> bool:
+    """Give the calling thread idle I/O priority and a raised nice value.
+
+    On Linux both apply to a single thread. Failures are logged and ignored,
+    the scan then just runs at normal priority.
+
+    Args:
+        niceness: Nice value of the thread
+
+    Returns:
+        True if both priorities were lowered
+    """
+    tid = threading.get_native_id()
+    lowered = True
+    try:
+        current = os.getpriority(os.PRIO_PROCESS, tid)
+        if current < niceness:
+            os.setpriority(os.PRIO_PROCESS, tid, niceness)
+    except (AttributeError, OSError) as e:
+        logger.debug(f"Could not lower CPU priority: {e}")
+        lowered = False
+
+    if not _set_io_priority(tid, _IOPRIO_CLASS_IDLE << _IOPRIO_CLASS_SHIFT):
+        lowered = False
+    return lowered
+
+
+def restore_thread_priority(tid: int, niceness: int) -> bool:
+    """Give a thread lowered by lower_thread_priority() its priorities back.
+
+    Leaving the idle I/O class is permitted to unprivileged processes, which
+    may not lower their nice value, though, without CAP_SYS_NICE or a
+    matching RLIMIT_NICE.
+
+    Args:
+        tid: Native ID of the thread
+        niceness: Nice value the thread had before
+
+    Returns:
+        True if both priorities were restored
+    """
+    restored = _set_io_priority(tid, (_IOPRIO_CLASS_BE << _IOPRIO_CLASS_SHIFT) | _IOPRIO_BE_NORMAL)
+    try:
+        os.setpriority(os.PRIO_PROCESS, tid, niceness)
+    except (AttributeError, OSError) as e:
+        logger.debug(f"Could not restore CPU priority: {e}")
+        restored = False
+    return restored
+
+
+class ScanThrottle:
+    """Pace scans within a CPU budget, pausing and postponing them when needed.
+
+    The scan calls checkpoint() between items of work; checkpoints sleep
+    whenever the current slice is used up or the UI is visible.
+
+    Attributes:
+        cpu_budget: Share of one CPU a non-urgent scan may use, 1.0 for no limit
+        slice_ms: CPU time spent between two sleeps
+        load_threshold: Load average per CPU above which scans are postponed
+        max_postponements: Consecutive postponements before a scan runs anyway
+        counters: Time spent throttled and paused, and scans postponed
+    """
+
+    def __init__(
+        self,
+        cpu_budget: float = DEFAULT_CPU_BUDGET,
+        slice_ms: int = DEFAULT_SLICE_MS,
+        load_threshold: float = DEFAULT_LOAD_THRESHOLD,
+        max_postponements: int = DEFAULT_MAX_POSTPONEMENTS,
+        max_pause_s: float = DEFAULT_MAX_PAUSE_S,
+        thread_clock: Callable[[], float] = time.thread_time,
+        loadavg: Callable[[], tuple] = os.getloadavg,
+    ) -> None:
+        """Initialize the throttle.
+
+        Args:
+            cpu_budget: Share of one CPU a non-urgent scan may use, 1.0 for no limit
+            slice_ms: CPU time spent between two sleeps
+            load_threshold: Load average per CPU above which scans are postponed
+            max_postponements: Consecutive postponements before a scan runs anyway
+            max_pause_s: Longest pause while the UI is visible
+            thread_clock: CPU time of the calling thread, replaceable for tests
+            loadavg: Returns the system load averages, replaceable for tests
+        """
+        self.cpu_budget = min(1.0, max(0.01, cpu_budget))
+        self.slice_ms = slice_ms
+        self.load_threshold = load_threshold
+        self.max_postponements = max_postponements
+        self.max_pause_s = max_pause_s
+        self.counters: Dict[str, float] = {"throttled_ms": 0.0, "paused_ms": 0.0, "postponed": 0}
+        self._thread_clock = thread_clock
+        self._loadavg = loadavg
+        # Clients whose launcher UI is shown
+        self._visible_clients: Set[str] = set()
+        self._urgent = False
+        # Set whenever a paused scan may resume: every UI hidden or scan hurried
+        self._resume = threading.Event()
+        self._resume.set()
+        self._slice_start = 0.0
+        self._postponements = 0
+        # Thread whose priorities begin() lowered, and its previous nice value
+        self._lowered = None
+        self._lock = threading.Lock()
+
+    @property
+    def ui_visible(self) -> bool:
+        """True while the UI of any client is visible."""
+        return bool(self._visible_clients)
+
+    def set_ui_visible(self, visible: bool, client: str = "") -> None:
+        """Record whether the UI of a client is visible.
+
+        Paused scans resume once the UI of every client is hidden.
+
+        Args:
+            visible: True if the client shows its UI
+            client: Unique bus name of the client
+        """
+        with self._lock:
+            if visible:
+                self._visible_clients.add(client)
+            else:
+                self._visible_clients.discard(client)
+            visible = bool(self._visible_clients)
+        if visible and not self._urgent:
+            self._resume.clear()
+        else:
+            self._resume.set()
+
+    def hurry(self) -> None:
+        """Stop pacing the running scan, as a client now waits for it.
+
+        The scan thread gets its I/O priority back, and its nice value where
+        permitted.
+        """
+        self._urgent = True
+        self._resume.set()
+        with self._lock:
+            lowered, self._lowered = self._lowered, None
+        if lowered is not None:
+            restore_thread_priority(*lowered)
+
+    def should_postpone(self) -> bool:
+        """Check whether a non-urgent scan should wait for a quieter system.
+
+        Returns:
+            True if the load per CPU exceeds the threshold, at most
+            max_postponements times in a row
+        """
+        try:
+            load = self._loadavg()[0] / (os.cpu_count() or 1)
+        except OSError:
+            return False
+        if load <= self.load_threshold or self._postponements >= self.max_postponements:
+            self._postponements = 0
+            return False
+        self._postponements += 1
+        self.counters["postponed"] += 1
+        logger.debug(f"Scan postponed, load per CPU {load:.2f} ({self._postponements} in a row)")
+        return True
+
+    def begin(self, urgent: bool = False) -> None:
+        """Prepare the calling thread for a scan.
+
+        Non-urgent scans get a lowered priority. The calling thread must
+        run this scan only, as its priority is not restored afterwards.
+
+        Args:
+            urgent: True for scans a client waits for, which keep their
+                priority and are not paced
+        """
+        self._urgent = urgent
+        if urgent or not self.ui_visible:
+            self._resume.set()
+        else:
+            self._resume.clear()
+        with self._lock:
+            self._lowered = None
+        if not urgent:
+            tid = threading.get_native_id()
+            try:
+                niceness = os.getpriority(os.PRIO_PROCESS, tid)
+            except (AttributeError, OSError):
+                niceness = 0
+            lower_thread_priority()
+            with self._lock:
+                self._lowered = (tid, niceness)
+        self._slice_start = self._thread_clock()
+
+    def checkpoint(self) -> None:
+        """Sleep as needed to keep the scan within its budget.
+
+        Called by the scan thread between items of work.
+        """
+        if self._urgent:
+            return
+        if not self._resume.is_set():
+            start = time.monotonic()
+            if not self._resume.wait(self.max_pause_s):
+                # Paused long enough, finish this scan despite the UI
+                self._resume.set()
+            self.counters["paused_ms"] += (time.monotonic() - start) * 1000
+            self._slice_start = self._thread_clock()
+        if self._urgent or self.cpu_budget >= 1.0:
+            return
+        used = self._thread_clock() - self._slice_start
+        if used * 1000 < self.slice_ms:
+            return
+        # Sleep so that work / (work + sleep) stays within the budget
+        pause = used * (1.0 - self.cpu_budget) / self.cpu_budget
+        time.sleep(pause)
+        self.counters["throttled_ms"] += pause * 1000
+        self._slice_start = self._thread_clock()
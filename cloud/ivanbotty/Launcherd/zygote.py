@@ -0,0 +1,498 @@
+"""Pre-forked zygote for near-instant launcher startup.
+
+Each hotkey press used to start a new interpreter which imports GObject
+introspection, the GTK libraries and the launcher package before anything
+is shown. The zygote does that work once and forks a child per launch:
+
+    launcherd --zygote             serve launches on ZYGOTE_SOCKET
+    python -m cloud.ivanbotty.Launcherd.zygote [ARGS...]
+                                   launch the launcher with ARGS through the
+                                   zygote, or start it cold without one
+    python -m cloud.ivanbotty.Launcherd.zygote --serve PATH
+                                   serve launches on PATH, without the daemon
+    python -m cloud.ivanbotty.Launcherd.zygote --benchmark [RUNS]
+                                   compare both paths
+
+Protocol, over a Unix stream socket accepting connections of the same user
+only: the client sends one byte carrying its stdin, stdout and stderr as
+SCM_RIGHTS, then one JSON line {"argv", "cwd", "env", "started"}. The child
+answers {"pid": ...} once forked and {"exit": ...} when the launcher exits;
+a connection closed without exit status means the child crashed.
+
+GTK's Python overrides initialize GTK, which connects to the display, when
+Gtk is imported. A connection cannot be shared with forked children, so the
+zygote loads the GTK and libadwaita libraries and typelibs without the
+overrides, imports every launcher module that does not need them and
+parses the applications index. Children import the widget modules.
+
+This module only imports the standard library at the top, so the client
+starts quickly.
+"""
+
+import importlib
+import json
+import logging
+import os
+import signal
+import socket
+import struct
+import sys
+import time
+from typing import Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+ZYGOTE_SOCKET = os.path.join(
+    os.environ.get("XDG_RUNTIME_DIR") or f"/tmp/cloud.ivanbotty.Launcher-{os.getuid()}",
+    "cloud.ivanbotty.Launcher",
+    "zygote.sock",
+)
+# Environment variable overriding the socket the client connects to
+SOCKET_ENV = "LAUNCHER_ZYGOTE_SOCKET"
+
+# Launcher modules imported by the zygote; none of them imports Gtk
+PRELOAD_MODULES = (
+    "cloud.ivanbotty.Launcher.__main__",
+    "cloud.ivanbotty.Launcher.helper.app_cache",
+    "cloud.ivanbotty.Launcher.helper.debounce",
+    "cloud.ivanbotty.Launcher.helper.extension_registry",
+    "cloud.ivanbotty.Launcher.helper.input_buffer",
+    "cloud.ivanbotty.Launcher.helper.latency",
+    "cloud.ivanbotty.Launcher.helper.session_profile",
+    "cloud.ivanbotty.Launcher.services.applications_service",
+    "cloud.ivanbotty.Launcher.services.extensions_service",
+    "cloud.ivanbotty.Launcher.services.math_service",
+    "cloud.ivanbotty.Launcher.services.ai_service",
+    "cloud.ivanbotty.Launcher.handlers.math_handler",
+    "cloud.ivanbotty.Launcher.handlers.applications_handler",
+)
+
+# GI libraries loaded by the zygote, with a type whose registration loads
+# the shared library without initializing it
+PRELOAD_TYPELIBS = (
+    ("Gtk", "4.0", "Widget"),
+    ("Gdk", "4.0", "Texture"),
+    ("Gsk", "4.0", "RenderNode"),
+    ("Pango", "1.0", "Layout"),
+    ("Adw", "1", "Application"),
+)
+
+MAX_REQUEST_SIZE = 1 << 20
+_PEERCRED = struct.Struct("3i")
+
+
+def preload() -> None:
+    """Import everything a launch needs before building its window."""
+    for name in PRELOAD_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            logger.warning(f"Cannot preload {name}: {e}")
+    _preload_typelibs()
+    _refresh_index()
+
+
+def _preload_typelibs() -> None:
+    """Load the GI libraries of the widgets, without their Python overrides."""
+    try:
+        import gi
+    except ImportError:
+        return
+    repository = gi.Repository.get_default()
+    for namespace, version, type_name in PRELOAD_TYPELIBS:
+        try:
+            gi.require_version(namespace, version)
+            repository.require(namespace, version)
+            repository.find_by_name(namespace, type_name).get_g_type()
+        except Exception as e:
+            logger.debug(f"Cannot preload {namespace} {version}: {e}")
+
+
+def _refresh_index() -> None:
+    """Parse the applications index again if it changed."""
+    from cloud.ivanbotty.Launcher.helper.app_cache import (
+        CACHE_PATH,
+        find_index_file,
+        preload_cache_file,
+    )
+
+    path = find_index_file(CACHE_PATH)
+    if path is not None:
+        preload_cache_file(path)
+
+
+def _peer_uid(conn: socket.socket) -> int:
+    """Return the user id of the process at the other end of conn."""
+    creds = conn.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, _PEERCRED.size)
+    return _PEERCRED.unpack(creds)[1]
+
+
+def _receive_request(conn: socket.socket):
+    """Receive the standard streams and the request of a client.
+
+    Returns:
+        Tuple of (request, fds)
+
+    Raises:
+        OSError: If the connection failed
+        ValueError: If the request is invalid
+    """
+    if _peer_uid(conn) != os.getuid():
+        raise ValueError("connection from another user")
+    _, fds, _, _ = socket.recv_fds(conn, 1, 3)
+    try:
+        if len(fds) != 3:
+            raise ValueError("expected stdin, stdout and stderr")
+        with conn.makefile("rb") as reader:
+            request = json.loads(reader.readline(MAX_REQUEST_SIZE))
+        if not (
+            isinstance(request, dict)
+            and isinstance(request.get("argv"), list)
+            and isinstance(request.get("cwd"), str)
+            and isinstance(request.get("env"), dict)
+        ):
+            raise ValueError("malformed request")
+    except (OSError, ValueError):
+        for fd in fds:
+            os.close(fd)
+        raise
+    return request, fds
+
+
+def _send(conn: socket.socket, message: Dict) -> None:
+    """Send one JSON line."""
+    conn.sendall(json.dumps(message).encode("utf-8") + b"\n")
+
+
+def _reap_children(signum, frame) -> None:
+    """Collect the exit status of finished children."""
+    while True:
+        try:
+            pid, _ = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            return
+        if pid == 0:
+            return
+
+
+def _exit_on_signal(signum, frame) -> None:
+    """Leave the accept loop, removing the socket."""
+    raise SystemExit(0)
+
+
+def _listen(path: str) -> Optional[socket.socket]:
+    """Bind the zygote socket, None if another zygote is serving it."""
+    os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+    if os.path.exists(path):
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(path)
+            return None
+        except OSError:
+            # Left behind by a zygote that did not exit cleanly
+            os.unlink(path)
+        finally:
+            probe.close()
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(path)
+    os.chmod(path, 0o600)
+    listener.listen(16)
+    return listener
+
+
+def _run_entry(request: Dict) -> int:
+    """Run the launcher in a forked child."""
+    if request.get("probe"):
+        # Used by benchmark(): stops where the launcher would build its window
+        print(os.getcwd(), flush=True)
+        return 0
+    from cloud.ivanbotty.Launcher import __main__ as entry
+
+    sys.argv = [entry.__file__, *request["argv"]]
+    return entry.main(started=request.get("started"))
+
+
+def _run_child(conn: socket.socket, request: Dict, fds: List[int]) -> int:
+    """Turn a forked child into the client's launcher and run it.
+
+    Returns:
+        Exit code of the launcher
+    """
+    signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    os.setsid()
+    for target, fd in enumerate(fds):
+        os.dup2(fd, target)
+        os.close(fd)
+    try:
+        os.chdir(request["cwd"])
+    except OSError as e:
+        logger.warning(f"Cannot enter {request['cwd']}: {e}")
+    os.environ.clear()
+    os.environ.update(request["env"])
+    # Let the launcher configure logging as if it started on its own
+    for handler in logging.root.handlers[:]:
+        logging.root.removeHandler(handler)
+
+    code = 1
+    try:
+        _send(conn, {"pid": os.getpid()})
+        code = _run_entry(request)
+    except SystemExit as e:
+        code = e.code if isinstance(e.code, int) else int(e.code is not None)
+    except Exception as e:
+        logger.error(f"Launch failed: {e}")
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        try:
+            _send(conn, {"exit": code})
+        except OSError:
+            pass
+    return code
+
+
+def _handle(conn: socket.socket, listener: socket.socket) -> Optional[int]:
+    """Fork a child for one client.
+
+    Returns:
+        None in the zygote, the exit code of the launcher in the child
+    """
+    try:
+        request, fds = _receive_request(conn)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Rejected zygote request: {e}")
+        return None
+    _refresh_index()
+    sys.stdout.flush()
+    sys.stderr.flush()
+    pid = os.fork()
+    if pid == 0:
+        listener.close()
+        return _run_child(conn, request, fds)
+    for fd in fds:
+        os.close(fd)
+    logger.debug(f"Forked launcher {pid} for {request['argv']}")
+    return None
+
+
+def serve(path: str = ZYGOTE_SOCKET) -> int:
+    """Preload the launcher and fork a child for each client.
+
+    Forked children return from this function with the exit code of their
+    launcher, the zygote itself only on SIGTERM.
+
+    Args:
+        path: Socket to listen on
+
+    Returns:
+        Exit code
+    """
+    started = time.perf_counter()
+    preload()
+    # Objects of the zygote live as long as its children: keep the
+    # collector from touching, and so copying, their pages
+    from cloud.ivanbotty.utils.heap import freeze_heap
+
+    freeze_heap("preloading the launcher")
+    listener = _listen(path)
+    if listener is None:
+        logger.error(f"A zygote is already listening on {path}")
+        return 1
+    zygote_pid = os.getpid()
+    signal.signal(signal.SIGCHLD, _reap_children)
+    signal.signal(signal.SIGTERM, _exit_on_signal)
+    logger.info(f"Zygote ready on {path} after {(time.perf_counter() - started) * 1000:.0f} ms")
+    try:
+        while True:
+            conn, _ = listener.accept()
+            with conn:
+                code = _handle(conn, listener)
+            if os.getpid() != zygote_pid:
+                return code
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        if os.getpid() == zygote_pid:
+            listener.close()
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+
+def _forward_signals(pid: int) -> Dict:
+    """Forward termination signals to the launcher, returning the previous handlers."""
+
+    def forward(signum, frame):
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
+
+    return {
+        signum: signal.signal(signum, forward)
+        for signum in (signal.SIGINT, signal.SIGTERM, signal.SIGHUP)
+    }
+
+
+def launch(
+    argv: Sequence[str],
+    path: Optional[str] = None,
+    probe: bool = False,
+    fds: Sequence[int] = (0, 1, 2),
+) -> Optional[int]:
+    """Run the launcher in a child of the zygote and wait for it.
+
+    Args:
+        argv: Command-line arguments of the launcher
+        path: Socket of the zygote (default: $LAUNCHER_ZYGOTE_SOCKET or ZYGOTE_SOCKET)
+        probe: Stop the child where the launcher would build its window
+        fds: Standard streams of the launcher
+
+    Returns:
+        Exit code of the launcher, None if no zygote launched it
+    """
+    started = time.perf_counter()
+    path = path or os.environ.get(SOCKET_ENV) or ZYGOTE_SOCKET
+    request = {
+        "argv": list(argv),
+        "cwd": os.getcwd(),
+        "env": dict(os.environ),
+        "started": started,
+        "probe": probe,
+    }
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+        socket.send_fds(sock, [b"\0"], list(fds))
+        sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+    except OSError:
+        sock.close()
+        return None
+
+    pid = None
+    handlers = {}
+    try:
+        with sock, sock.makefile("rb") as replies:
+            for line in replies:
+                reply = json.loads(line)
+                if "pid" in reply and pid is None:
+                    pid = reply["pid"]
+                    handlers = _forward_signals(pid)
+                elif "exit" in reply:
+                    return reply["exit"]
+    except (OSError, ValueError) as e:
+        logger.warning(f"Lost the launcher started by the zygote: {e}")
+    finally:
+        for signum, handler in handlers.items():
+            signal.signal(signum, handler)
+    return None if pid is None else 1
+
+
+def wait_for_socket(path: str, timeout: float = 30.0, process=None) -> bool:
+    """Wait until a zygote accepts connections on path.
+
+    Args:
+        path: Socket of the zygote
+        timeout: Seconds to wait at most
+        process: subprocess.Popen of the zygote, to stop waiting if it exits
+
+    Returns:
+        True once the zygote accepts connections
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            return False
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+            try:
+                probe.connect(path)
+                return True
+            except OSError:
+                pass
+        time.sleep(0.02)
+    return False
+
+
+def benchmark(runs: int = 10) -> Dict[str, float]:
+    """Time launches up to the window, cold and through a zygote.
+
+    Both paths run the client command, a new interpreter each time, which
+    either preloads the launcher itself or has a zygote fork a child.
+
+    Args:
+        runs: Launches timed per path
+
+    Returns:
+        Median milliseconds per launch, keyed "cold_ms" and "zygote_ms"
+    """
+    import statistics
+    import subprocess
+    import tempfile
+
+    command = [sys.executable, "-m", "cloud.ivanbotty.Launcherd.zygote", "--probe"]
+
+    def median_ms(env: Dict[str, str]) -> float:
+        durations = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            subprocess.run(command, env=env, stdout=subprocess.DEVNULL, check=True)
+            durations.append((time.perf_counter() - start) * 1000)
+        return statistics.median(durations)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "zygote.sock")
+        env = {**os.environ, SOCKET_ENV: path}
+        cold_ms = median_ms(env)
+        zygote = subprocess.Popen(
+            [sys.executable, "-m", "cloud.ivanbotty.Launcherd.zygote", "--serve", path],
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            if not wait_for_socket(path, process=zygote):
+                raise RuntimeError("zygote did not start")
+            zygote_ms = median_ms(env)
+        finally:
+            zygote.terminate()
+            zygote.wait()
+    return {"cold_ms": cold_ms, "zygote_ms": zygote_ms}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Launch the launcher through the zygote, or cold without one.
+
+    Args:
+        argv: Arguments of the launcher (default: sys.argv[1:]); a leading
+            --benchmark [RUNS] compares both paths instead, a leading
+            --serve PATH runs a zygote
+
+    Returns:
+        Exit code
+    """
+    args = sys.argv[1:] if argv is None else argv
+    if args[:1] == ["--benchmark"]:
+        result = benchmark(int(args[1]) if len(args) > 1 else 10)
+        print(
+            f"cold: {result['cold_ms']:.1f} ms, zygote: {result['zygote_ms']:.1f} ms "
+            f"({result['cold_ms'] / result['zygote_ms']:.1f}x)"
+        )
+        return 0
+    if args[:1] == ["--serve"] and len(args) == 2:
+        logging.basicConfig(level=logging.INFO)
+        return serve(args[1])
+    probe = args[:1] == ["--probe"]
+    if probe:
+        args = args[1:]
+
+    code = launch(args, probe=probe)
+    if code is not None:
+        return code
+    if probe:
+        preload()
+        return _run_entry({"probe": True})
+    os.execv(sys.executable, [sys.executable, "-m", "cloud.ivanbotty.Launcher", *args])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
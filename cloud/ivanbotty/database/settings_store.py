@@ -0,0 +1,460 @@
+"""Settings store with an in-memory snapshot and write-behind commits.
+
+The store owns a single SQLite connection, used only by its own database
+thread. The database is journaled in WAL mode, so readers in other
+processes are never blocked by a writer. At startup the ``preferences``
+and ``extensions`` tables are loaded into memory with one query; reads are
+then answered from memory without touching the database. Writes update the
+snapshot immediately and are committed in batches shortly after.
+
+Changes committed by other processes (the daemon, the wizard, another UI
+instance) are detected with ``PRAGMA data_version``, which changes whenever
+another connection commits. Reads check it at most once per check interval,
+in the background, and reload the snapshot when it changed.
+
+Observers registered with connect() are told about every changed key, local
+or not. They run on the thread that made or detected the change, which is
+the database thread for changes of other processes.
+"""
+
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+WRITE_BEHIND_DELAY = 0.2  # Seconds writes are batched before being committed
+DATA_VERSION_CHECK_INTERVAL = 1.0  # Seconds between checks for changes of other processes
+
+SCHEMA = (
+    # Table for user preferences
+    """
+    CREATE TABLE IF NOT EXISTS preferences (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    )
+    """,
+    # Table for installed extensions
+    """
+    CREATE TABLE IF NOT EXISTS extensions (
+        id TEXT PRIMARY KEY,
+        enabled BOOLEAN
+    )
+    """,
+    # Table for API keys of external services
+    """
+    CREATE TABLE IF NOT EXISTS api_keys (
+        service TEXT PRIMARY KEY,
+        key TEXT
+    )
+    """,
+    # Table for cached AI responses
+    """
+    CREATE TABLE IF NOT EXISTS ai_responses (
+        key TEXT PRIMARY KEY,
+        model TEXT,
+        response TEXT,
+        created_at INTEGER,
+        last_used INTEGER
+    )
+    """,
+    # Table for search latency histograms, one row per stage
+    """
+    CREATE TABLE IF NOT EXISTS latency_histograms (
+        stage TEXT PRIMARY KEY,
+        bounds TEXT,
+        counts TEXT
+    )
+    """,
+    # Table for the slowest recent search queries
+    """
+    CREATE TABLE IF NOT EXISTS slow_queries (
+        query TEXT,
+        total_ms REAL,
+        stages TEXT,
+        recorded_at INTEGER
+    )
+    """,
+)
+
+_SNAPSHOT_QUERY = (
+    "SELECT 'preferences', key, value FROM preferences "
+    "UNION ALL SELECT 'extensions', id, enabled FROM extensions"
+)
+
+
+def _changed_keys(old: Dict, new: Dict) -> List[str]:
+    """Return the keys added, removed or changed between two snapshots."""
+    return [key for key in old.keys() | new.keys() if old.get(key) != new.get(key)]
+
+
+class SettingsStore:
+    """Settings database with a single owning thread and an in-memory snapshot.
+
+    Attributes:
+        path: Path of the database file
+        flush_delay: Seconds writes are batched before being committed
+        check_interval: Seconds between checks for changes of other processes
+    """
+
+    def __init__(
+        self,
+        path: str,
+        flush_delay: float = WRITE_BEHIND_DELAY,
+        check_interval: float = DATA_VERSION_CHECK_INTERVAL,
+    ) -> None:
+        """Open the database and load the snapshot.
+
+        Args:
+            path: Path of the database file, created if missing
+            flush_delay: Seconds writes are batched before being committed
+            check_interval: Seconds between checks for changes of other processes
+
+        Raises:
+            sqlite3.Error: If the database cannot be opened
+        """
+        self.path = path
+        self.flush_delay = flush_delay
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._preferences: Dict[str, str] = {}
+        self._extensions: Dict[str, bool] = {}
+        self._pending_preferences: Dict[str, str] = {}
+        self._pending_extensions: Dict[str, bool] = {}
+        self._flush_timer: Optional[threading.Timer] = None
+        self._observers: Dict[int, Callable[[str, str], Any]] = {}
+        self._next_observer_id = 1
+        self._last_check = time.monotonic()
+        self._check_pending = False
+        self._closed = False
+        # The connection and data version are only used on the database thread
+        self._conn: Optional[sqlite3.Connection] = None
+        self._data_version: Optional[int] = None
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="settings-db", daemon=True)
+        self._thread.start()
+        self._submit(self._open).result()
+
+    # ----- Database thread -----
+    def _run(self) -> None:
+        """Run submitted calls on the database thread until closed."""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            future, fn, args = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args))
+            except BaseException as e:
+                future.set_exception(e)
+
+    def _submit(self, fn: Callable, *args: Any) -> Future:
+        """Run fn on the database thread.
+
+        Args:
+            fn: Function to call
+            *args: Arguments of fn
+
+        Returns:
+            Future of the result of fn
+        """
+        future: Future = Future()
+        if threading.current_thread() is self._thread:
+            try:
+                future.set_result(fn(*args))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        if self._closed and fn != self._close_connection:
+            future.set_exception(sqlite3.ProgrammingError("Settings store is closed"))
+            return future
+        self._queue.put((future, fn, args))
+        return future
+
+    def _open(self) -> None:
+        """Open the connection, create the tables and load the snapshot."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # Durable at checkpoints, which is enough for settings
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            for statement in SCHEMA:
+                self._conn.execute(statement)
+        self._load_snapshot()
+
+    def _load_snapshot(self) -> List[Tuple[str, str]]:
+        """Load both cached tables with a single query.
+
+        Returns:
+            (table, key) of every entry that differs from the previous snapshot
+        """
+        preferences: Dict[str, str] = {}
+        extensions: Dict[str, bool] = {}
+        for table, key, value in self._conn.execute(_SNAPSHOT_QUERY):
+            if table == "preferences":
+                preferences[key] = value
+            else:
+                extensions[key] = value == 1
+        self._data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        with self._lock:
+            # Writes not committed yet win over what was read
+            preferences.update(self._pending_preferences)
+            extensions.update(self._pending_extensions)
+            changed = [
+                ("preferences", key)
+                for key in _changed_keys(self._preferences, preferences)
+            ] + [
+                ("extensions", key)
+                for key in _changed_keys(self._extensions, extensions)
+            ]
+            self._preferences = preferences
+            self._extensions = extensions
+        return changed
+
+    def _check_data_version(self) -> bool:
+        """Reload the snapshot if another connection committed since the last load."""
+        try:
+            version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            if version == self._data_version:
+                return False
+            changed = self._load_snapshot()
+            logger.debug(f"Settings changed by another process: {len(changed)} keys")
+            for table, key in changed:
+                self._notify(table, key)
+            return True
+        finally:
+            self._check_pending = False
+
+    def _flush(self) -> int:
+        """Commit the pending writes in one transaction.
+
+        Returns:
+            Number of rows written
+        """
+        with self._lock:
+            preferences = self._pending_preferences
+            extensions = self._pending_extensions
+            self._pending_preferences = {}
+            self._pending_extensions = {}
+        if not preferences and not extensions:
+            return 0
+        try:
+            with self._conn:
+                self._conn.executemany(
+                    "REPLACE INTO preferences (key, value) VALUES (?, ?)", preferences.items()
+                )
+                self._conn.executemany(
+                    "INSERT INTO extensions (id, enabled) VALUES (?, ?) "
+                    "ON CONFLICT(id) DO UPDATE SET enabled=excluded.enabled",
+                    [(ext_id, int(enabled)) for ext_id, enabled in extensions.items()],
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Could not save settings, will retry: {e}")
+            with self._lock:
+                # Keep newer writes made in the meantime
+                for key, value in preferences.items():
+                    self._pending_preferences.setdefault(key, value)
+                for ext_id, enabled in extensions.items():
+                    self._pending_extensions.setdefault(ext_id, enabled)
+            self._schedule_flush()
+            return 0
+        return len(preferences) + len(extensions)
+
+    def _close_connection(self) -> None:
+        """Close the connection and stop the database thread."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        self._queue.put(None)
+
+    # ----- Observers -----
+    def connect(self, callback: Callable[[str, str], Any]) -> int:
+        """Call callback(table, key) whenever a cached setting changes.
+
+        Args:
+            callback: Receives "preferences" or "extensions" and the changed key
+
+        Returns:
+            Handler ID for disconnect()
+        """
+        with self._lock:
+            handler_id = self._next_observer_id
+            self._next_observer_id += 1
+            self._observers[handler_id] = callback
+        return handler_id
+
+    def disconnect(self, handler_id: int) -> None:
+        """Remove an observer added with connect()."""
+        with self._lock:
+            self._observers.pop(handler_id, None)
+
+    def _notify(self, table: str, key: str) -> None:
+        """Call every observer, isolating their failures."""
+        with self._lock:
+            observers = list(self._observers.values())
+        for callback in observers:
+            try:
+                callback(table, key)
+            except Exception as e:
+                logger.error(f"Settings observer failed for {table}/{key}: {e}")
+
+    # ----- Write-behind -----
+    def _schedule_flush(self) -> None:
+        """Commit pending writes after the write-behind delay."""
+        with self._lock:
+            if self._flush_timer is not None or self._closed:
+                return
+            self._flush_timer = threading.Timer(self.flush_delay, self._submit_flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def _submit_flush(self) -> None:
+        """Hand the pending writes to the database thread."""
+        with self._lock:
+            self._flush_timer = None
+        self._submit(self._flush)
+
+    def _maybe_check(self) -> None:
+        """Check in the background for changes of other processes, if due."""
+        now = time.monotonic()
+        if self._check_pending or now - self._last_check < self.check_interval:
+            return
+        self._last_check = now
+        self._check_pending = True
+        self._submit(self._check_data_version)
+
+    # ----- Public API -----
+    def get_pref(self, key: str, default: Any = None) -> Any:
+        """Return the value of a preference from the snapshot.
+
+        Args:
+            key: The preference key
+            default: Default value if key not found
+
+        Returns:
+            The preference value as a string if found, otherwise default
+        """
+        self._maybe_check()
+        with self._lock:
+            return self._preferences.get(key, default)
+
+    def set_pref(self, key: str, value: Any) -> None:
+        """Set a preference, committing it in the background.
+
+        Args:
+            key: The preference key
+            value: The preference value (will be converted to string)
+        """
+        with self._lock:
+            changed = self._preferences.get(key) != str(value)
+            self._preferences[key] = str(value)
+            self._pending_preferences[key] = str(value)
+        self._schedule_flush()
+        if changed:
+            self._notify("preferences", key)
+
+    def get_extension(self, ext_id: str) -> Optional[bool]:
+        """Return the enabled state of an extension from the snapshot.
+
+        Args:
+            ext_id: The extension identifier
+
+        Returns:
+            True if enabled, False if disabled, None if not found
+        """
+        self._maybe_check()
+        with self._lock:
+            return self._extensions.get(ext_id)
+
+    def set_extension_enabled(self, ext_id: str, enabled: bool) -> None:
+        """Enable or disable an extension, committing it in the background.
+
+        Args:
+            ext_id: The extension identifier
+            enabled: True to enable, False to disable
+        """
+        with self._lock:
+            changed = self._extensions.get(ext_id) != bool(enabled)
+            self._extensions[ext_id] = bool(enabled)
+            self._pending_extensions[ext_id] = bool(enabled)
+        self._schedule_flush()
+        if changed:
+            self._notify("extensions", ext_id)
+
+    def get_extensions(self) -> Dict[str, bool]:
+        """Return a copy of the enabled state of every known extension."""
+        self._maybe_check()
+        with self._lock:
+            return dict(self._extensions)
+
+    def run(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Run fn with the connection inside a transaction, and wait for it.
+
+        Used for the tables that are not kept in memory.
+
+        Args:
+            fn: Function receiving the connection
+
+        Returns:
+            The result of fn
+        """
+
+        def transaction():
+            with self._conn:
+                return fn(self._conn)
+
+        return self._submit(transaction).result()
+
+    def execute(self, sql: str, params: tuple = ()) -> List[tuple]:
+        """Execute one statement in its own transaction.
+
+        Args:
+            sql: SQL statement
+            params: Parameters of the statement
+
+        Returns:
+            Rows returned by the statement
+        """
+        return self.run(lambda conn: conn.execute(sql, params).fetchall())
+
+    def refresh(self) -> bool:
+        """Check now for changes committed by other processes.
+
+        Returns:
+            True if the snapshot was reloaded
+        """
+        self._last_check = time.monotonic()
+        self._check_pending = True
+        return self._submit(self._check_data_version).result()
+
+    def flush(self) -> int:
+        """Commit pending writes now.
+
+        Returns:
+            Number of rows written
+        """
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+        return self._submit(self._flush).result()
+
+    def close(self) -> None:
+        """Commit pending writes and close the connection."""
+        if self._closed:
+            return
+        try:
+            self.flush()
+        finally:
+            with self._lock:
+                self._closed = True
+            self._submit(self._close_connection).result()
+            self._thread.join()
@@ -1,102 +1,90 @@
 """SQLite database management for Launcher application.
 
 This module provides functions for managing user preferences, extensions,
-and API keys using a SQLite database.
+API keys, cached AI responses and search latency statistics using a SQLite
+database. All access goes through a shared SettingsStore, which answers
+preference and extension reads from memory and commits writes in the
+background.
 """
 
+import atexit
+import json
 import os
 import sqlite3
-from typing import Any, Dict, Optional
-from contextlib import contextmanager
 import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from cloud.ivanbotty.database.settings_store import SettingsStore
 
 # Path to the SQLite database
 DB_PATH = os.path.expanduser("~/.config/cloud.ivanbotty.Launcher/settings.db")
 
-# Thread-local storage for connections
-_local = threading.local()
+# Shared store, see get_store()
+_store: Optional[SettingsStore] = None
+_store_lock = threading.Lock()
 
 
-def _get_connection() -> sqlite3.Connection:
-    """Get or create a thread-local database connection.
+def get_store() -> SettingsStore:
+    """Return the shared settings store, opening it on first use.
 
     Returns:
-        sqlite3.Connection: Thread-local database connection
+        SettingsStore of the database at DB_PATH
     """
-    if not hasattr(_local, 'connection') or _local.connection is None:
-        _local.connection = sqlite3.connect(DB_PATH, check_same_thread=False)
-    else:
-        # Check if connection is still valid
-        try:
-            _local.connection.execute("SELECT 1")
-        except sqlite3.ProgrammingError:
-            # Connection was closed, create a new one
-            _local.connection = sqlite3.connect(DB_PATH, check_same_thread=False)
-    return _local.connection
-
-
-@contextmanager
-def _db_cursor():
-    """Context manager for database operations with automatic commit.
-
-    Yields:
-        sqlite3.Cursor: Database cursor for operations
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SettingsStore(DB_PATH)
+        return _store
+
+
+def close_store() -> None:
+    """Commit pending writes and close the shared settings store."""
+    global _store
+    with _store_lock:
+        store, _store = _store, None
+    if store is not None:
+        store.close()
+
+
+atexit.register(close_store)
+
+
+def connect_settings_changed(callback: Callable[[str, str], Any]) -> int:
+    """Call callback(table, key) whenever a preference or extension changes.
+
+    Changes of other processes are reported from the database thread.
+
+    Args:
+        callback: Receives "preferences" or "extensions" and the changed key
+
+    Returns:
+        Handler ID for disconnect_settings_changed()
     """
-    conn = _get_connection()
-    cursor = conn.cursor()
-    try:
-        yield cursor
-        conn.commit()
-    except Exception:
-        conn.rollback()
-        raise
-    finally:
-        cursor.close()
+    return get_store().connect(callback)
+
+
+def disconnect_settings_changed(handler_id: int) -> None:
+    """Remove an observer added with connect_settings_changed()."""
+    get_store().disconnect(handler_id)
 
 
 def init_db() -> None:
     """Initialize the database and create tables if they do not exist."""
-    os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-    with _db_cursor() as c:
-        # Table for user preferences
-        c.execute(
-            """
-            CREATE TABLE IF NOT EXISTS preferences (
-                key TEXT PRIMARY KEY,
-                value TEXT
-            )
-        """
-        )
-        # Table for installed extensions
-        c.execute(
-            """
-            CREATE TABLE IF NOT EXISTS extensions (
-                id TEXT PRIMARY KEY,
-                enabled BOOLEAN
-            )
-        """
-        )
-        # Table for API keys of external services
-        c.execute(
-            """
-            CREATE TABLE IF NOT EXISTS api_keys (
-                service TEXT PRIMARY KEY,
-                key TEXT
-            )
-        """
-        )
+    get_store()
 
 
 # ----- Preferences -----
 def set_pref(key: str, value: Any) -> None:
     """Set a preference (key, value) in the database.
 
+    The value is visible to get_pref() at once and committed shortly after.
+
     Args:
         key: The preference key
         value: The preference value (will be converted to string)
     """
-    with _db_cursor() as c:
-        c.execute("REPLACE INTO preferences (key, value) VALUES (?, ?)", (key, str(value)))
+    get_store().set_pref(key, value)
 
 
 def get_pref(key: str, default: Any = None) -> Any:
@@ -109,10 +97,7 @@ def get_pref(key: str, default: Any = None) -> Any:
     Returns:
         The preference value if found, otherwise the default value
     """
-    with _db_cursor() as c:
-        c.execute("SELECT value FROM preferences WHERE key=?", (key,))
-        row = c.fetchone()
-        return row[0] if row else default
+    return get_store().get_pref(key, default)
 
 
 # ----- Extensions -----
@@ -125,10 +110,7 @@ def get_extension(ext_id: str) -> Optional[bool]:
     Returns:
         True if enabled, False if disabled, None if not found
     """
-    with _db_cursor() as c:
-        c.execute("SELECT enabled FROM extensions WHERE id=?", (ext_id,))
-        row = c.fetchone()
-        return row[0] == 1 if row else None
+    return get_store().get_extension(ext_id)
 
 
 def set_extension_enabled(ext_id: str, enabled: bool) -> None:
@@ -140,12 +122,7 @@ def set_extension_enabled(ext_id: str, enabled: bool) -> None:
         ext_id: The extension identifier
         enabled: True to enable, False to disable
     """
-    with _db_cursor() as c:
-        c.execute(
-            "INSERT INTO extensions (id, enabled) VALUES (?, ?) "
-            "ON CONFLICT(id) DO UPDATE SET enabled=excluded.enabled",
-            (ext_id, int(enabled)),
-        )
+    get_store().set_extension_enabled(ext_id, enabled)
 
 
 def get_extensions() -> Dict[str, bool]:
@@ -154,10 +131,7 @@ def get_extensions() -> Dict[str, bool]:
     Returns:
         Dictionary mapping extension IDs to their enabled state
     """
-    with _db_cursor() as c:
-        c.execute("SELECT id, enabled FROM extensions")
-        result = {row[0]: (row[1] == 1) for row in c.fetchall()}
-        return result
+    return get_store().get_extensions()
 
 
 # ----- API Keys -----
@@ -168,8 +142,7 @@ def set_api_key(service: str, key: str) -> None:
         service: The service name
         key: The API key
     """
-    with _db_cursor() as c:
-        c.execute("REPLACE INTO api_keys (service, key) VALUES (?, ?)", (service, key))
+    get_store().execute("REPLACE INTO api_keys (service, key) VALUES (?, ?)", (service, key))
 
 
 def get_api_key(service: str) -> Optional[str]:
@@ -181,7 +154,165 @@ def get_api_key(service: str) -> Optional[str]:
     Returns:
         The API key if found, None otherwise
     """
-    with _db_cursor() as c:
-        c.execute("SELECT key FROM api_keys WHERE service=?", (service,))
-        row = c.fetchone()
-        return row[0] if row else None
+    rows = get_store().execute("SELECT key FROM api_keys WHERE service=?", (service,))
+    return rows[0][0] if rows else None
+
+
+# ----- AI Responses -----
+def get_ai_response(key: str, max_age: int) -> Optional[Tuple[str, int]]:
+    """Retrieve a cached AI response if it has not expired.
+
+    Args:
+        key: The cache key of the response
+        max_age: Maximum age of the entry in seconds
+
+    Returns:
+        The cached response text and its creation time if found and fresh,
+        None otherwise
+    """
+    now = int(time.time())
+
+    def lookup(conn: sqlite3.Connection) -> Optional[Tuple[str, int]]:
+        row = conn.execute(
+            "SELECT response, created_at FROM ai_responses WHERE key=? AND created_at>=?",
+            (key, now - max_age),
+        ).fetchone()
+        if row:
+            conn.execute("UPDATE ai_responses SET last_used=? WHERE key=?", (now, key))
+        return (row[0], row[1]) if row else None
+
+    return get_store().run(lookup)
+
+
+def set_ai_response(key: str, model: str, response: str) -> None:
+    """Store an AI response in the cache.
+
+    Args:
+        key: The cache key of the response
+        model: The model that produced the response
+        response: The response text
+    """
+    now = int(time.time())
+    get_store().execute(
+        "REPLACE INTO ai_responses (key, model, response, created_at, last_used) "
+        "VALUES (?, ?, ?, ?, ?)",
+        (key, model, response, now, now),
+    )
+
+
+def prune_ai_responses(max_age: int, max_entries: int) -> int:
+    """Evict expired entries and keep only the most recently used ones.
+
+    Args:
+        max_age: Maximum age of an entry in seconds
+        max_entries: Maximum number of entries to keep
+
+    Returns:
+        Number of evicted entries
+    """
+    cutoff = int(time.time()) - max_age
+
+    def prune(conn: sqlite3.Connection) -> int:
+        evicted = conn.execute("DELETE FROM ai_responses WHERE created_at<?", (cutoff,)).rowcount
+        evicted += conn.execute(
+            "DELETE FROM ai_responses WHERE key NOT IN "
+            "(SELECT key FROM ai_responses ORDER BY last_used DESC LIMIT ?)",
+            (max_entries,),
+        ).rowcount
+        return evicted
+
+    return get_store().run(prune)
+
+
+def clear_ai_responses() -> None:
+    """Remove all cached AI responses."""
+    get_store().execute("DELETE FROM ai_responses")
+
+
+# ----- Search latency -----
+def get_latency_histograms() -> Dict[str, Tuple[List[float], List[int]]]:
+    """Return the saved latency histograms.
+
+    Returns:
+        Dictionary mapping stage names to their bucket bounds and counts
+    """
+    rows = get_store().execute("SELECT stage, bounds, counts FROM latency_histograms")
+    return {stage: (json.loads(bounds), json.loads(counts)) for stage, bounds, counts in rows}
+
+
+def get_slow_queries(limit: int) -> List[Dict[str, Any]]:
+    """Return the slowest saved queries, slowest first.
+
+    Args:
+        limit: Maximum number of queries returned
+
+    Returns:
+        List of dictionaries with query, total_ms, stages and recorded_at
+    """
+    rows = get_store().execute(
+        "SELECT query, total_ms, stages, recorded_at FROM slow_queries "
+        "ORDER BY total_ms DESC LIMIT ?",
+        (limit,),
+    )
+    return [
+        {
+            "query": query,
+            "total_ms": total_ms,
+            "stages": json.loads(stages),
+            "recorded_at": recorded_at,
+        }
+        for query, total_ms, stages, recorded_at in rows
+    ]
+
+
+def save_latency(
+    histograms: Dict[str, Tuple[List[float], List[int]]],
+    queries: List[Dict[str, Any]],
+    max_queries: int,
+) -> None:
+    """Save the latency histograms and add slow queries, in one transaction.
+
+    Args:
+        histograms: Stage names mapped to their bucket bounds and counts,
+            replacing the saved ones
+        queries: Slow queries to add, see get_slow_queries()
+        max_queries: Number of most recent queries kept
+    """
+
+    def save(conn: sqlite3.Connection) -> None:
+        conn.executemany(
+            "REPLACE INTO latency_histograms (stage, bounds, counts) VALUES (?, ?, ?)",
+            [
+                (stage, json.dumps(bounds), json.dumps(counts))
+                for stage, (bounds, counts) in histograms.items()
+            ],
+        )
+        conn.executemany(
+            "INSERT INTO slow_queries (query, total_ms, stages, recorded_at) VALUES (?, ?, ?, ?)",
+            [
+                (
+                    query["query"],
+                    query["total_ms"],
+                    json.dumps(query["stages"]),
+                    query["recorded_at"],
+                )
+                for query in queries
+            ],
+        )
+        conn.execute(
+            "DELETE FROM slow_queries WHERE rowid NOT IN "
+            "(SELECT rowid FROM slow_queries ORDER BY recorded_at DESC, rowid DESC LIMIT ?)",
+            (max_queries,),
+        )
+
+    get_store().run(save)
+
+
+def clear_latency() -> None:
+    """Remove the saved latency histograms and slow queries."""
+
+    def clear(conn: sqlite3.Connection) -> None:
+        conn.execute("DELETE FROM latency_histograms")
+        conn.execute("DELETE FROM slow_queries")
+
+    get_store().run(clear)
@@ -22,6 +22,8 @@ except (ValueError, ImportError):
 
 import cloud.ivanbotty.database.sqlite3 as db
 from cloud.ivanbotty.common import find_resource_file, RESOURCE_FILE
+from cloud.ivanbotty.utils.startup_profile import DEFAULT_TRACE_PATH, PROFILER
+
 
 def build_parser(version: Optional[str] = None) -> argparse.ArgumentParser:
     """Create and configure the argument parser for the Launcher application.
@@ -33,7 +35,8 @@ def build_parser(version: Optional[str] = None) -> argparse.ArgumentParser:
         Configured ArgumentParser instance.
     """
     parser = argparse.ArgumentParser(
-        description="Launcher App - flexible startup options for configuration, logging, and automation"
+        description="Launcher App - flexible startup options for configuration, logging, "
+        "and automation"
     )
     parser.add_argument(
         "--debug",
@@ -60,6 +63,19 @@ def build_parser(version: Optional[str] = None) -> argparse.ArgumentParser:
         type=str,
         help="Automatically perform a search with the provided query on startup"
     )
+    parser.add_argument(
+        "--profile-startup",
+        nargs="?",
+        const=DEFAULT_TRACE_PATH,
+        metavar="TRACE",
+        help="Record the duration of startup phases as a Chrome trace "
+        f"(default: {DEFAULT_TRACE_PATH})"
+    )
+    parser.add_argument(
+        "--trace-allocations",
+        action="store_true",
+        help="Log the memory allocated by each search query, traced with tracemalloc"
+    )
     parser.add_argument(
         "--version",
         action="version",
@@ -68,6 +84,7 @@ def build_parser(version: Optional[str] = None) -> argparse.ArgumentParser:
     )
     return parser
 
+
 def parse_args(args=None, version: Optional[str] = None) -> argparse.Namespace:
     """Parse command-line arguments and set derived values.
 
@@ -85,6 +102,7 @@ def parse_args(args=None, version: Optional[str] = None) -> argparse.Namespace:
     parsed.log_level = logging.DEBUG if parsed.debug else logging.INFO
     return parsed
 
+
 def configure_cli(version: Optional[str] = None) -> argparse.Namespace:
     """Parse CLI arguments and return the resulting namespace.
 
@@ -96,6 +114,7 @@ def configure_cli(version: Optional[str] = None) -> argparse.Namespace:
     """
     return parse_args(version=version)
 
+
 def setup_logging(
     level: int = logging.INFO,
     format_string: str = "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
@@ -175,12 +194,13 @@ def initialize_app(app_name: Optional[str] = None) -> bool:
     if app_name:
         logger.info(f"Initializing {app_name}")
 
-    if not load_resources():
-        return False
+    with PROFILER.span("resources"):
+        if not load_resources():
+            return False
 
-    if not initialize_database():
-        return False
+    with PROFILER.span("database"):
+        if not initialize_database():
+            return False
 
     logger.info("Application initialization completed successfully")
     return True
-
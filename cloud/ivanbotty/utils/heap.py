@@ -0,0 +1,170 @@
+"""Heap management of the long-lived index, and per-query allocation traces.
+
+Once the catalogue is loaded the processes hold tens of thousands of
+objects that live until the next scan: application models, parsed desktop
+entries, cached icon paths. Each full collection of the cyclic garbage
+collector traverses all of them, and with typing allocating steadily, full
+collections keep happening. freeze_heap() moves them to the permanent
+generation the collector ignores, once they are built. Long-running
+processes that replace their index unfreeze the previous one first, so
+reference cycles in it are still collected.
+
+With --trace-allocations, the launcher traces allocations with tracemalloc
+and reports the memory each query allocated, see QueryAllocationTracer.
+"""
+
+import collections
+import contextlib
+import gc
+import logging
+import time
+import tracemalloc
+from typing import Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Allocation sites listed per query
+TOP_SITES = 3
+# Queries whose report is kept
+MAX_REPORTS = 100
+
+
+def freeze_heap(reason: str, refreeze: bool = False) -> int:
+    """Move the objects alive now out of the collector's generations.
+
+    Garbage is collected first. Frozen objects are still freed by reference
+    counting once the index replaces them, but reference cycles among them
+    are not collected while they stay frozen.
+
+    By default objects frozen before, like those a zygote froze before
+    forking, stay frozen and are not traversed again, so their pages stay
+    shared. A process that freezes each new index, like the daemon, passes
+    refreeze so the objects of the replaced index are unfrozen and their
+    cycles collected first.
+
+    Args:
+        reason: What was just loaded, for the log
+        refreeze: Unfreeze the objects frozen before, then freeze again
+
+    Returns:
+        Number of frozen objects
+    """
+    start = time.perf_counter()
+    if refreeze:
+        gc.unfreeze()
+    collected = gc.collect()
+    gc.freeze()
+    frozen = gc.get_freeze_count()
+    logger.info(
+        f"Froze {frozen} objects after {reason} ({collected} collected) "
+        f"in {(time.perf_counter() - start) * 1000:.1f} ms"
+    )
+    return frozen
+
+
+class _QueryTrace:
+    """Context manager measuring the allocations of one query."""
+
+    def __init__(self, tracer: "QueryAllocationTracer", query: str) -> None:
+        self.tracer = tracer
+        self.query = query
+        self.before = None
+        self.start_size = 0
+
+    def __enter__(self) -> "_QueryTrace":
+        # Taken first, so the snapshot itself is not counted
+        self.before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        self.start_size = tracemalloc.get_traced_memory()[0]
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        size, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+        stats = after.compare_to(self.before, "lineno")
+        sites = [
+            {"site": str(stat.traceback), "bytes": stat.size_diff, "blocks": stat.count_diff}
+            for stat in stats[:TOP_SITES]
+            if stat.size_diff
+        ]
+        self.tracer.add(
+            {
+                "query": self.query,
+                "peak_bytes": max(0, peak - self.start_size),
+                "retained_bytes": size - self.start_size,
+                "retained_blocks": sum(stat.count_diff for stat in stats),
+                "top": sites,
+            }
+        )
+
+
+class QueryAllocationTracer:
+    """Reports the memory allocated by each search query.
+
+    Per query, the peak of traced memory above its start gives the transient
+    allocations and a snapshot difference the retained ones, with their top
+    allocation sites. Tracing slows allocations down; while disabled,
+    measure() returns a shared no-op context manager.
+
+    Attributes:
+        enabled: True while allocations are traced
+        reports: Reports of the last queries, oldest first
+    """
+
+    def __init__(self) -> None:
+        """Initialize a disabled tracer."""
+        self.enabled = False
+        self.reports: Deque[Dict] = collections.deque(maxlen=MAX_REPORTS)
+        self._null = contextlib.nullcontext()
+
+    def enable(self, frames: int = 1) -> None:
+        """Start tracing allocations.
+
+        Args:
+            frames: Frames stored per allocation traceback
+        """
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        self.enabled = True
+
+    def disable(self) -> None:
+        """Stop tracing allocations."""
+        self.enabled = False
+        tracemalloc.stop()
+
+    def measure(self, query: str):
+        """Return a context manager measuring the allocations of a query.
+
+        Args:
+            query: Text of the query, for the report
+        """
+        if not self.enabled:
+            return self._null
+        return _QueryTrace(self, query)
+
+    def add(self, report: Dict) -> None:
+        """Keep and log the report of a query."""
+        self.reports.append(report)
+        sites = ", ".join(
+            f"{site['site']} {site['bytes'] / 1024:+.1f} KiB" for site in report["top"]
+        )
+        logger.info(
+            f"Query {report['query']!r}: peak {report['peak_bytes'] / 1024:.1f} KiB, "
+            f"retained {report['retained_bytes'] / 1024:+.1f} KiB "
+            f"in {report['retained_blocks']:+d} blocks; {sites}"
+        )
+
+    def summary(self) -> Optional[Dict[str, float]]:
+        """Return the mean and maximum peak per query, None without reports."""
+        peaks: List[int] = [report["peak_bytes"] for report in self.reports]
+        if not peaks:
+            return None
+        return {
+            "queries": len(peaks),
+            "mean_peak_bytes": sum(peaks) / len(peaks),
+            "max_peak_bytes": max(peaks),
+        }
+
+
+# Tracer of the search queries
+TRACER = QueryAllocationTracer()
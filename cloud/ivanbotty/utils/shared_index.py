@@ -0,0 +1,90 @@
+"""Sealed shared-memory handoff of the application index.
+
+The daemon keeps its serialized index in a sealed memfd and hands a file
+descriptor to clients over D-Bus. Seals guarantee the content can no longer
+change, so a client can map it read-only and trust it without copying the
+file first. Requires Linux (memfd_create and file sealing).
+"""
+
+import fcntl
+import json
+import mmap
+import os
+from typing import Any
+
+# Seals making the memfd immutable: no resize, no writes, no seal changes
+REQUIRED_SEALS = fcntl.F_SEAL_SHRINK | fcntl.F_SEAL_GROW | fcntl.F_SEAL_WRITE | fcntl.F_SEAL_SEAL
+
+
+def create_sealed_memfd(data: bytes, name: str = "launcher-index") -> int:
+    """Create a sealed memfd holding data.
+
+    Args:
+        data: Content of the memfd
+        name: Name of the memfd, shown in /proc/<pid>/fd
+
+    Returns:
+        File descriptor of the sealed memfd, owned by the caller
+    """
+    fd = os.memfd_create(name, os.MFD_CLOEXEC | os.MFD_ALLOW_SEALING)
+    try:
+        view = memoryview(data)
+        while view:
+            written = os.write(fd, view)
+            view = view[written:]
+        fcntl.fcntl(fd, fcntl.F_ADD_SEALS, REQUIRED_SEALS)
+    except OSError:
+        os.close(fd)
+        raise
+    return fd
+
+
+def is_sealed(fd: int) -> bool:
+    """Check whether a file descriptor is a memfd carrying the required seals.
+
+    Args:
+        fd: File descriptor to check
+
+    Returns:
+        True if the content of fd can no longer change
+    """
+    try:
+        seals = fcntl.fcntl(fd, fcntl.F_GET_SEALS)
+    except OSError:
+        return False
+    return seals & REQUIRED_SEALS == REQUIRED_SEALS
+
+
+def map_index(fd: int) -> mmap.mmap:
+    """Map a sealed memfd read-only.
+
+    Args:
+        fd: File descriptor of a sealed memfd, left open
+
+    Returns:
+        Read-only memory map of the content
+
+    Raises:
+        ValueError: If fd is not sealed, as its content could change under us
+    """
+    if not is_sealed(fd):
+        raise ValueError("Index file descriptor is not sealed")
+    size = os.fstat(fd).st_size
+    if size == 0:
+        raise ValueError("Index file descriptor is empty")
+    return mmap.mmap(fd, size, prot=mmap.PROT_READ)
+
+
+def read_index(fd: int) -> Any:
+    """Decode the JSON index held by a sealed memfd.
+
+    The payload is decoded from the mapping; no file is opened or read.
+
+    Args:
+        fd: File descriptor of a sealed memfd, left open
+
+    Returns:
+        The decoded index
+    """
+    with map_index(fd) as mapped:
+        return json.loads(mapped[:])
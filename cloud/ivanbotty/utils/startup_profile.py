@@ -0,0 +1,148 @@
+"""Wall-clock profiling of application startup.
+
+Startup phases are recorded as spans when the application runs with
+--profile-startup and written in the Chrome trace event format, which
+chrome://tracing, Perfetto and speedscope open directly. While profiling is
+disabled, recording a span costs one attribute check.
+
+Times are relative to the start of the entry point, which reads the clock
+before its first import and passes it to enable().
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TRACE_PATH = os.path.expanduser("~/.cache/cloud.ivanbotty.Launcher/startup-trace.json")
+
+
+class StartupProfiler:
+    """Records startup spans and writes them as a Chrome trace.
+
+    Attributes:
+        enabled: True while spans are recorded
+        path: Where write() saves the trace
+    """
+
+    def __init__(self) -> None:
+        """Initialize a disabled profiler whose clock starts now."""
+        self.enabled = False
+        self.path: Optional[str] = None
+        self._origin = time.perf_counter()
+        self._events: List[Dict] = []
+        self._open: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def enable(self, path: str = DEFAULT_TRACE_PATH, origin: Optional[float] = None) -> None:
+        """Start recording spans.
+
+        Args:
+            path: Where write() saves the trace
+            origin: time.perf_counter() value of time zero (default: creation)
+        """
+        self.enabled = True
+        self.path = path
+        if origin is not None:
+            self._origin = origin
+
+    def _now_us(self) -> float:
+        """Return microseconds since the origin."""
+        return (time.perf_counter() - self._origin) * 1e6
+
+    def record(self, name: str, start: float, end: float, category: str = "startup") -> None:
+        """Record a span measured before profiling was enabled.
+
+        Args:
+            name: Name of the phase
+            start: time.perf_counter() value at the start of the phase
+            end: time.perf_counter() value at the end of the phase
+            category: Category of the phase in the trace
+        """
+        if self.enabled:
+            self._add(name, (start - self._origin) * 1e6, (end - self._origin) * 1e6, category)
+
+    def _add(self, name: str, start_us: float, end_us: float, category: str) -> None:
+        """Record a complete span."""
+        with self._lock:
+            self._events.append(
+                {
+                    "name": name,
+                    "cat": category,
+                    "ph": "X",
+                    "ts": round(start_us, 1),
+                    "dur": round(end_us - start_us, 1),
+                    "pid": os.getpid(),
+                    "tid": threading.get_native_id(),
+                }
+            )
+
+    @contextmanager
+    def span(self, name: str, category: str = "startup") -> Iterator[None]:
+        """Record the duration of a with block.
+
+        Args:
+            name: Name of the phase
+            category: Category of the phase in the trace
+        """
+        if not self.enabled:
+            yield
+            return
+        start = self._now_us()
+        try:
+            yield
+        finally:
+            self._add(name, start, self._now_us(), category)
+
+    def begin(self, name: str) -> None:
+        """Open a span that ends in another callback, see end()."""
+        if self.enabled:
+            self._open[name] = self._now_us()
+
+    def end(self, name: str, category: str = "startup") -> None:
+        """Close a span opened with begin()."""
+        start = self._open.pop(name, None)
+        if self.enabled and start is not None:
+            self._add(name, start, self._now_us(), category)
+
+    def summary(self) -> Dict[str, float]:
+        """Return the total milliseconds recorded per span name."""
+        totals: Dict[str, float] = {}
+        with self._lock:
+            for event in self._events:
+                totals[event["name"]] = totals.get(event["name"], 0.0) + event["dur"] / 1000
+        return totals
+
+    def write(self, path: Optional[str] = None) -> Optional[str]:
+        """Write the recorded spans as a Chrome trace.
+
+        Args:
+            path: Destination of the trace (default: the path given to enable())
+
+        Returns:
+            Path of the written trace, None if nothing was written
+        """
+        path = path or self.path
+        if not self.enabled or path is None:
+            return None
+        with self._lock:
+            trace = {"traceEvents": list(self._events), "displayTimeUnit": "ms"}
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(trace, f, indent=1)
+        except OSError as e:
+            logger.warning(f"Could not write startup trace {path}: {e}")
+            return None
+        phases = ", ".join(f"{name} {ms:.1f} ms" for name, ms in self.summary().items())
+        logger.info(f"Startup trace written to {path}: {phases}")
+        return path
+
+
+# Profiler shared by the entry points and the application
+PROFILER = StartupProfiler()
@@ -100,6 +100,511 @@ class TestDaemonServiceBasic(unittest.TestCase):
         service.update_indexing_progress(-0.5, 100)
         self.assertEqual(service.progress, 0.0)
 
+    @patch("cloud.ivanbotty.Launcherd.dbus_service.DBUS_AVAILABLE", True)
+    @patch("cloud.ivanbotty.Launcherd.dbus_service.GLib")
+    @patch("cloud.ivanbotty.Launcherd.dbus_service.Gio")
+    def test_force_update_queues_scan(self, mock_gio, mock_glib):
+        """Test that ForceUpdate invokes the callback and returns immediately."""
+        from cloud.ivanbotty.Launcherd.dbus_service import LauncherdDBusService
+
+        on_force_update = Mock()
+        service = LauncherdDBusService("/tmp/test_cache.json", on_force_update=on_force_update)
+        invocation = Mock()
+        service._handle_method_call(None, ":1.1", service.OBJECT_PATH, service.BUS_NAME,
+                                    "ForceUpdate", None, invocation)
+
+        on_force_update.assert_called_once()
+        invocation.return_value.assert_called_once_with(None)
+
+    @patch("cloud.ivanbotty.Launcherd.dbus_service.DBUS_AVAILABLE", True)
+    @patch("cloud.ivanbotty.Launcherd.dbus_service.GLib")
+    @patch("cloud.ivanbotty.Launcherd.dbus_service.Gio")
+    def test_emit_applications_changed(self, mock_gio, mock_glib):
+        """Test that ApplicationsChanged carries the delta."""
+        from cloud.ivanbotty.Launcherd.dbus_service import LauncherdDBusService
+
+        service = LauncherdDBusService("/tmp/test_cache.json")
+        service.connection = Mock()
+        added = [("d.desktop", "Application", "D", "d", "", "")]
+        service.emit_applications_changed(added, ["b.desktop"], [])
+
+        mock_glib.Variant.assert_called_once_with(
+            "(a(ssssss)asa(ssssss))", (added, ["b.desktop"], [])
+        )
+        args = service.connection.emit_signal.call_args[0]
+        self.assertEqual(args[3], "ApplicationsChanged")
+
+
+class TestScanScheduler(unittest.TestCase):
+    """Test cases for the coalescing scan scheduler."""
+
+    def test_requests_during_scan_are_coalesced(self):
+        """Test that many requests during a scan result in a single rescan."""
+        import threading
+        from cloud.ivanbotty.Launcherd.scheduler import ScanScheduler
+
+        started = threading.Event()
+        release = threading.Event()
+        scans = []
+
+        def scan():
+            scans.append(1)
+            started.set()
+            release.wait(5)
+
+        scheduler = ScanScheduler(scan)
+        self.assertTrue(scheduler.request("startup"))
+        self.assertTrue(started.wait(5))
+
+        # Requests return immediately while the worker is busy
+        self.assertTrue(scheduler.request("ForceUpdate"))
+        for _ in range(9):
+            self.assertFalse(scheduler.request("ForceUpdate"))
+        self.assertTrue(scheduler.busy)
+
+        release.set()
+        self.assertTrue(scheduler.wait_idle(5))
+        self.assertEqual(len(scans), 2)
+        self.assertEqual(scheduler.stats(), {"requests": 11, "scans": 2, "coalesced": 9})
+
+    def test_failed_scan_does_not_stop_scheduler(self):
+        """Test that an exception in a scan leaves the scheduler usable."""
+        from cloud.ivanbotty.Launcherd.scheduler import ScanScheduler
+
+        calls = []
+
+        def scan():
+            calls.append(1)
+            raise RuntimeError("boom")
+
+        scheduler = ScanScheduler(scan)
+        scheduler.request()
+        self.assertTrue(scheduler.wait_idle(5))
+        scheduler.request()
+        self.assertTrue(scheduler.wait_idle(5))
+        self.assertEqual(len(calls), 2)
+
+
+class TestScanThrottle(unittest.TestCase):
+    """Test cases for the pacing of background scans."""
+
+    @patch("cloud.ivanbotty.Launcherd.throttle.lower_thread_priority")
+    @patch("cloud.ivanbotty.Launcherd.throttle.time.sleep")
+    def test_cpu_budget_sleeps_after_each_slice(self, mock_sleep, mock_priority):
+        """Test that a 25% budget sleeps three times the CPU time used."""
+        from cloud.ivanbotty.Launcherd.throttle import ScanThrottle
+
+        cpu = [0.0]
+        throttle = ScanThrottle(cpu_budget=0.25, slice_ms=50, thread_clock=lambda: cpu[0])
+        throttle.begin()
+        cpu[0] += 0.01
+        throttle.checkpoint()
+        mock_sleep.assert_not_called()
+        cpu[0] += 0.05
+        throttle.checkpoint()
+        self.assertAlmostEqual(mock_sleep.call_args[0][0], 0.18)
+
+        mock_sleep.reset_mock()
+        throttle.begin(urgent=True)
+        cpu[0] += 1.0
+        throttle.checkpoint()
+        mock_sleep.assert_not_called()
+
+    @patch("cloud.ivanbotty.Launcherd.throttle.lower_thread_priority")
+    def test_scan_pauses_while_ui_visible_until_hurried(self, mock_priority):
+        """Test that a visible UI pauses the scan and ForceUpdate resumes it."""
+        import threading
+        from cloud.ivanbotty.Launcherd.throttle import ScanThrottle
+
+        throttle = ScanThrottle(cpu_budget=1.0)
+        throttle.set_ui_visible(True)
+        throttle.begin()
+        done = threading.Event()
+
+        def scan():
+            throttle.checkpoint()
+            done.set()
+
+        threading.Thread(target=scan, daemon=True).start()
+        self.assertFalse(done.wait(0.2))
+        throttle.hurry()
+        self.assertTrue(done.wait(5))
+        self.assertGreater(throttle.counters["paused_ms"], 0)
+
+    @patch("cloud.ivanbotty.Launcherd.throttle.lower_thread_priority")
+    def test_scan_pauses_until_every_ui_is_hidden(self, mock_priority):
+        """Test that one client hiding its UI does not resume scans another still shows."""
+        import threading
+        from cloud.ivanbotty.Launcherd.throttle import ScanThrottle
+
+        throttle = ScanThrottle(cpu_budget=1.0)
+        throttle.set_ui_visible(True, ":1.10")
+        throttle.set_ui_visible(True, ":1.11")
+        throttle.begin()
+        done = threading.Event()
+
+        def scan():
+            throttle.checkpoint()
+            done.set()
+
+        threading.Thread(target=scan, daemon=True).start()
+        throttle.set_ui_visible(False, ":1.10")
+        self.assertTrue(throttle.ui_visible)
+        self.assertFalse(done.wait(0.2))
+        throttle.set_ui_visible(False, ":1.11")
+        self.assertFalse(throttle.ui_visible)
+        self.assertTrue(done.wait(5))
+
+    @patch("cloud.ivanbotty.Launcherd.throttle.restore_thread_priority")
+    @patch("cloud.ivanbotty.Launcherd.throttle.lower_thread_priority")
+    def test_only_background_scans_lose_priority(self, mock_lower, mock_restore):
+        """Test that urgent scans keep their priority and hurry() restores it."""
+        import threading
+        from cloud.ivanbotty.Launcherd.throttle import ScanThrottle
+
+        throttle = ScanThrottle()
+        throttle.begin(urgent=True)
+        mock_lower.assert_not_called()
+        throttle.hurry()
+        mock_restore.assert_not_called()
+
+        throttle.begin()
+        mock_lower.assert_called_once_with()
+        throttle.hurry()
+        mock_restore.assert_called_once_with(
+            threading.get_native_id(), os.getpriority(os.PRIO_PROCESS, threading.get_native_id())
+        )
+        throttle.hurry()
+        mock_restore.assert_called_once()
+
+    @unittest.skipUnless(hasattr(os, "getpriority"), "Needs per-thread nice values")
+    def test_urgent_scan_after_background_scan_runs_at_normal_priority(self):
+        """Test that the priority lowered by a scan does not carry over."""
+        import threading
+        from cloud.ivanbotty.Launcherd.scheduler import ScanScheduler
+        from cloud.ivanbotty.Launcherd.throttle import SCAN_NICENESS, ScanThrottle
+
+        base = os.getpriority(os.PRIO_PROCESS, threading.get_native_id())
+        if base >= SCAN_NICENESS:
+            self.skipTest("Tests already run at scan priority")
+        throttle = ScanThrottle(cpu_budget=1.0)
+        started = threading.Event()
+        release = threading.Event()
+        seen = []
+        scheduler = None
+
+        def scan():
+            throttle.begin(urgent=scheduler.current_urgent)
+            seen.append(os.getpriority(os.PRIO_PROCESS, threading.get_native_id()))
+            started.set()
+            release.wait(5)
+
+        # The urgent scan is queued while the background scan runs
+        scheduler = ScanScheduler(scan)
+        scheduler.request("interval")
+        self.assertTrue(started.wait(5))
+        scheduler.request("ForceUpdate", urgent=True)
+        release.set()
+        self.assertTrue(scheduler.wait_idle(5))
+        self.assertEqual(seen, [SCAN_NICENESS, base])
+
+    def test_busy_system_postpones_a_bounded_number_of_times(self):
+        """Test that load postpones periodic scans, but not forever."""
+        from cloud.ivanbotty.Launcherd.throttle import ScanThrottle
+
+        load = [100.0 * (os.cpu_count() or 1)]
+        throttle = ScanThrottle(max_postponements=2, loadavg=lambda: (load[0], 0, 0))
+        self.assertEqual([throttle.should_postpone() for _ in range(3)], [True, True, False])
+        load[0] = 0.0
+        self.assertFalse(throttle.should_postpone())
+        self.assertEqual(throttle.counters["postponed"], 2)
+
+    def test_urgent_request_marks_merged_scan_urgent(self):
+        """Test that an urgent request makes the queued scan urgent."""
+        import threading
+        from cloud.ivanbotty.Launcherd.scheduler import ScanScheduler
+
+        release = threading.Event()
+        urgency = []
+        scheduler = None
+
+        def scan():
+            urgency.append(scheduler.current_urgent)
+            release.wait(5)
+
+        scheduler = ScanScheduler(scan)
+        scheduler.request("interval")
+        scheduler.request("interval")
+        scheduler.request("ForceUpdate", urgent=True)
+        release.set()
+        self.assertTrue(scheduler.wait_idle(5))
+        self.assertEqual(urgency, [False, True])
+
+
+class TestIdleMonitor(unittest.TestCase):
+    """Test cases for the idle exit of activated daemons."""
+
+    def test_expires_after_timeout_without_activity(self):
+        """Test that activity and running scans postpone the idle exit."""
+        from cloud.ivanbotty.Launcherd.scheduler import IdleMonitor
+
+        now = [100.0]
+        idle = IdleMonitor(300, clock=lambda: now[0])
+        now[0] += 299
+        self.assertFalse(idle.expired())
+        idle.touch()
+        now[0] += 300
+        self.assertFalse(idle.expired(busy=True))
+        self.assertTrue(idle.expired())
+
+    def test_zero_timeout_never_expires(self):
+        """Test that a timeout of 0 keeps the daemon resident."""
+        from cloud.ivanbotty.Launcherd.scheduler import IdleMonitor
+
+        now = [0.0]
+        idle = IdleMonitor(0, clock=lambda: now[0])
+        now[0] += 10**6
+        self.assertFalse(idle.expired())
+
+
+class TestDaemonState(unittest.TestCase):
+    """Test cases for the persisted parse cache and icon index."""
+
+    def setUp(self):
+        try:
+            from cloud.ivanbotty.Launcher.services.applications_service import (
+                ApplicationsService,
+            )
+        except ImportError as e:
+            self.skipTest(f"GLib not available: {e}")
+        import tempfile
+
+        self.ApplicationsService = ApplicationsService
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.desktop_path = os.path.join(self.tmpdir.name, "editor.desktop")
+        with open(self.desktop_path, "w") as f:
+            f.write("[Desktop Entry]\nType=Application\nName=Editor\nExec=editor\n")
+
+    def test_state_round_trip_skips_unchanged_files(self):
+        """Test that a restored parse cache is reused for unchanged files only."""
+        from cloud.ivanbotty.Launcherd.state import load_state, save_state
+
+        state_path = os.path.join(self.tmpdir.name, "daemon_state.json")
+        service = self.ApplicationsService()
+        self.assertEqual(service._parse_desktop_file(self.desktop_path)["name"], "Editor")
+        self.assertTrue(save_state(service, state_path))
+
+        restored = self.ApplicationsService()
+        self.assertEqual(load_state(restored, state_path), 1)
+        self.assertEqual(restored._parse_desktop_file(self.desktop_path)["name"], "Editor")
+        self.assertEqual(restored.load_stats["parse_cache_hits"], 1)
+
+        with open(self.desktop_path, "w") as f:
+            f.write("[Desktop Entry]\nType=Application\nName=Editor 2\nExec=editor\n")
+        self.assertEqual(restored._parse_desktop_file(self.desktop_path)["name"], "Editor 2")
+        self.assertEqual(restored.load_stats["parse_cache_misses"], 1)
+
+    def test_stale_state_version_is_ignored(self):
+        """Test that a state file of another version restores nothing."""
+        import json
+        from cloud.ivanbotty.Launcherd.state import load_state
+
+        state_path = os.path.join(self.tmpdir.name, "daemon_state.json")
+        with open(state_path, "w") as f:
+            json.dump({"version": 0, "caches": {"icons": {"x": self.desktop_path}}}, f)
+        self.assertEqual(load_state(self.ApplicationsService(), state_path), 0)
+
+
+class TestIndexBuilder(unittest.TestCase):
+    """Test cases for the offline seed index builder."""
+
+    def test_build_index_is_relocated_to_the_root(self):
+        """Test that a seed index only refers to paths of the deployed system."""
+        try:
+            from cloud.ivanbotty.Launcherd.index_builder import build_index
+        except ImportError as e:
+            self.skipTest(f"GLib not available: {e}")
+        import json
+        import tempfile
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = os.path.join(tmpdir, "image")
+            app_dir = os.path.join(root, "usr/share/applications")
+            icon_dir = os.path.join(root, "usr/share/icons/hicolor/48x48/apps")
+            os.makedirs(app_dir)
+            os.makedirs(icon_dir)
+            with open(os.path.join(app_dir, "editor.desktop"), "w") as f:
+                f.write(
+                    "[Desktop Entry]\nType=Application\nName=Editor\nExec=editor\nIcon=editor\n"
+                )
+            open(os.path.join(icon_dir, "editor.png"), "wb").close()
+            output = os.path.join(tmpdir, "seed")
+
+            counts = build_index(root, output)
+
+            self.assertEqual(counts["applications"], 1)
+            with open(os.path.join(output, "applications_cache.json")) as f:
+                cache = json.load(f)
+            with open(os.path.join(output, "daemon_state.json")) as f:
+                state = json.load(f)
+        self.assertEqual(
+            cache["applications"][0]["icon"], "/usr/share/icons/hicolor/48x48/apps/editor.png"
+        )
+        self.assertIn("/usr/share/applications", cache["directories"])
+        self.assertIn("/usr/share/applications/editor.desktop", state["caches"]["desktop_entries"])
+        self.assertNotIn(tmpdir, json.dumps(cache) + json.dumps(state))
+
+
+class TestDaemonStats(unittest.TestCase):
+    """Test cases for daemon performance statistics."""
+
+    def test_scan_statistics(self):
+        """Test histograms, counters and hit rates after recorded scans."""
+        from cloud.ivanbotty.Launcherd.stats import DaemonStats
+
+        stats = DaemonStats()
+        load_stats = {"files_found": 10, "files_parsed": 8, "files_skipped": 2,
+                      "parse_cache_hits": 3, "parse_cache_misses": 7,
+                      "icon_cache_hits": 6, "icon_cache_misses": 2}
+        stats.record_scan(80.0, 8, load_stats)
+        stats.record_scan(3000.0, 8, load_stats)
+        stats.record_cache_write(2048, 1.5)
+        stats.record_error(RuntimeError("disk full"))
+
+        snapshot = stats.to_dict()
+        histogram = snapshot["scan_duration_ms"]
+        self.assertEqual(histogram["count"], 2)
+        self.assertEqual(histogram["buckets"]["50"], 0)
+        self.assertEqual(histogram["buckets"]["100"], 1)
+        self.assertEqual(histogram["buckets"]["5000"], 2)
+        self.assertEqual(histogram["buckets"]["+Inf"], 2)
+        self.assertEqual(snapshot["counters"]["files_parsed"], 16)
+        self.assertEqual(snapshot["counters"]["files_skipped"], 4)
+        self.assertEqual(snapshot["parse_cache_hit_rate"], 0.3)
+        self.assertEqual(snapshot["icon_cache_hit_rate"], 0.75)
+        self.assertEqual(snapshot["last_cache_write"]["size_bytes"], 2048)
+        self.assertEqual(snapshot["last_error"]["message"], "disk full")
+        self.assertGreater(snapshot["resident_memory_bytes"], 0)
+
+    def test_metrics_file(self):
+        """Test that the metrics file uses the Prometheus text format."""
+        import tempfile
+        from cloud.ivanbotty.Launcherd.stats import DaemonStats
+
+        stats = DaemonStats()
+        stats.record_scan(120.0, 5, {"files_parsed": 5})
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "metrics", "launcherd.prom")
+            stats.write_metrics_file(path)
+            with open(path) as f:
+                text = f.read()
+
+        self.assertIn('launcherd_scan_duration_ms_bucket{le="250"} 1', text)
+        self.assertIn("launcherd_files_parsed_total 5", text)
+        self.assertIn("launcherd_resident_memory_bytes ", text)
+
+    @patch("cloud.ivanbotty.Launcherd.dbus_service.DBUS_AVAILABLE", True)
+    @patch("cloud.ivanbotty.Launcherd.dbus_service.GLib")
+    @patch("cloud.ivanbotty.Launcherd.dbus_service.Gio")
+    def test_get_stats_method(self, mock_gio, mock_glib):
+        """Test that GetStats returns the statistics as JSON."""
+        import json
+        from cloud.ivanbotty.Launcherd.dbus_service import LauncherdDBusService
+        from cloud.ivanbotty.Launcherd.stats import DaemonStats
+
+        stats = DaemonStats()
+        service = LauncherdDBusService("/tmp/test_cache.json", stats=stats)
+        service._handle_method_call(None, ":1.1", service.OBJECT_PATH, service.BUS_NAME,
+                                    "GetStats", None, Mock())
+
+        signature, (stats_json,) = mock_glib.Variant.call_args[0]
+        self.assertEqual(signature, "(s)")
+        self.assertEqual(json.loads(stats_json)["counters"]["scans"], 0)
+
+
+class TestIndexHandoffPrivateBus(unittest.TestCase):
+    """Round trip of the memfd index handoff over a private D-Bus daemon."""
+
+    def setUp(self):
+        import shutil
+        import subprocess
+
+        try:
+            from gi.repository import Gio  # noqa: F401
+        except ImportError as e:
+            self.skipTest(f"GLib not available: {e}")
+        if not shutil.which("dbus-daemon"):
+            self.skipTest("dbus-daemon not available")
+
+        self.bus = subprocess.Popen(
+            ["dbus-daemon", "--session", "--nofork", "--print-address"],
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        self.address = self.bus.stdout.readline().strip()
+
+    def tearDown(self):
+        self.bus.terminate()
+        self.bus.wait()
+
+    def _connect(self):
+        from gi.repository import Gio
+
+        return Gio.DBusConnection.new_for_address_sync(
+            self.address,
+            Gio.DBusConnectionFlags.AUTHENTICATION_CLIENT
+            | Gio.DBusConnectionFlags.MESSAGE_BUS_CONNECTION,
+            None,
+            None,
+        )
+
+    def test_get_index_fd_round_trip(self):
+        """Test that the client decodes the index published by the service."""
+        import json
+        import threading
+        import time
+        from gi.repository import GLib
+        from cloud.ivanbotty.Launcherd.dbus_service import LauncherdDBusService
+        from cloud.ivanbotty.Launcher.services.daemon_client import LauncherDaemonClient
+
+        apps = [{"name": "Firefox", "desktop_id": "firefox.desktop"}]
+        ready = threading.Event()
+        state = {}
+
+        # Serve from a separate thread, as call_sync blocks the caller's context
+        def serve():
+            context = GLib.MainContext.new()
+            context.push_thread_default()
+            service = LauncherdDBusService("/tmp/test_cache.json")
+            service.start(connection=self._connect())
+            service.publish_index(json.dumps(apps).encode("utf-8"))
+            state["loop"] = GLib.MainLoop.new(context, False)
+            state["service"] = service
+            ready.set()
+            state["loop"].run()
+            service.stop()
+            context.pop_thread_default()
+
+        server = threading.Thread(target=serve, daemon=True)
+        server.start()
+        self.assertTrue(ready.wait(5))
+
+        client = LauncherDaemonClient()
+        client.connection = self._connect()
+        try:
+            # The bus name is acquired asynchronously once the loop runs
+            deadline = time.monotonic() + 5
+            result = None
+            while result is None and time.monotonic() < deadline:
+                result = client.fetch_index(timeout_ms=1000)
+                if result is None:
+                    time.sleep(0.05)
+            self.assertEqual(result, apps)
+        finally:
+            state["loop"].quit()
+            server.join(5)
+
 
 class TestDaemonClientBasic(unittest.TestCase):
     """Test cases for daemon client basic functionality."""
@@ -156,6 +661,72 @@ class TestDaemonClientBasic(unittest.TestCase):
         result = client.get_indexing_status()
         self.assertIsNone(result)
 
+    @patch("cloud.ivanbotty.Launcher.services.daemon_client.DBUS_AVAILABLE", True)
+    @patch("cloud.ivanbotty.Launcher.services.daemon_client.GLib")
+    @patch("cloud.ivanbotty.Launcher.services.daemon_client.Gio")
+    def test_watch_reconnects_and_defers_subscriptions(self, mock_gio, mock_glib):
+        """Test that the client follows the daemon's bus name without blocking."""
+        from cloud.ivanbotty.Launcher.services.daemon_client import LauncherDaemonClient
+
+        connection = MagicMock()
+        proxy = MagicMock()
+        mock_gio.bus_get_finish.return_value = connection
+        mock_gio.DBusProxy.new_finish.return_value = proxy
+        availability = []
+
+        client = LauncherDaemonClient()
+        self.assertTrue(client.subscribe_to_cache_updated(lambda count, ts: None))
+        connection.signal_subscribe.assert_not_called()
+
+        client.watch(availability.append)
+        mock_gio.bus_get_sync.assert_not_called()
+        on_bus_ready = mock_gio.bus_get.call_args[0][2]
+        on_bus_ready(None, "result")
+        connection.signal_subscribe.assert_called_once()
+
+        _, _, _, on_appeared, on_vanished = mock_gio.bus_watch_name_on_connection.call_args[0]
+        on_appeared(connection, client.BUS_NAME, ":1.1")
+        on_proxy_ready = mock_gio.DBusProxy.new.call_args[0][-1]
+        on_proxy_ready(None, "result")
+        self.assertTrue(client.is_connected())
+
+        on_vanished(connection, client.BUS_NAME)
+        self.assertFalse(client.is_connected())
+        on_appeared(connection, client.BUS_NAME, ":1.2")
+        on_proxy_ready(None, "result")
+        self.assertEqual(availability, [True, False, True])
+        mock_gio.DBusProxy.new_sync.assert_not_called()
+
+    @patch("cloud.ivanbotty.Launcher.services.daemon_client.DBUS_AVAILABLE", True)
+    @patch("cloud.ivanbotty.Launcher.services.daemon_client.GLib")
+    @patch("cloud.ivanbotty.Launcher.services.daemon_client.Gio")
+    def test_status_is_refreshed_in_one_batch(self, mock_gio, mock_glib):
+        """Test that status queries are batched and answered from the local copy."""
+        from cloud.ivanbotty.Launcher.services.daemon_client import LauncherDaemonClient
+
+        client = LauncherDaemonClient()
+        client.proxy = MagicMock()
+        done = []
+
+        self.assertTrue(client.refresh_status(lambda: done.append(True)))
+        self.assertFalse(client.refresh_status())
+        self.assertEqual(client.proxy.call.call_count, 2)
+        client.proxy.call_sync.assert_not_called()
+
+        replies = {
+            "GetCacheStatus": (True, "/tmp/cache.json", 42),
+            "GetIndexingStatus": (False, 1.0, 7),
+        }
+        for call in client.proxy.call.call_args_list:
+            method_name = call[0][0]
+            result = MagicMock()
+            client.proxy.call_finish.return_value.unpack.return_value = replies[method_name]
+            call[0][5](client.proxy, result, method_name)
+
+        self.assertEqual(done, [True])
+        self.assertEqual(client.get_cache_status(), (True, "/tmp/cache.json", 42))
+        self.assertEqual(client.get_indexing_status(), (False, 1.0, 7))
+
 
 class TestDaemonMainModule(unittest.TestCase):
     """Test cases for daemon main module."""
@@ -4,6 +4,7 @@ These tests verify that helper modules can be imported and their
 basic functionality works as expected.
 """
 
+import json
 import sys
 import os
 import unittest
@@ -154,6 +155,855 @@ class TestMathService(unittest.TestCase):
         self.assertIsNotNone(error)
         self.assertIsNone(result)
 
+    def test_calculate_huge_power_is_rejected_quickly(self):
+        """Test that exponent towers fail fast instead of hanging."""
+        import time
+        from cloud.ivanbotty.Launcher.services.math_service import MathService
+
+        service = MathService()
+        start = time.monotonic()
+        for expression in ("9**9**9", "2**10**10", "(10**1000)*(10**1000)*(10**1000)"):
+            result, error = service.calculate(expression)
+            self.assertIsNone(result)
+            self.assertIn("too large", error)
+        self.assertLess(time.monotonic() - start, 0.5)
+
+    def test_calculate_functions_and_constants(self):
+        """Test that whitelisted math functions and constants are available."""
+        from cloud.ivanbotty.Launcher.services.math_service import MathService
+
+        service = MathService()
+        self.assertEqual(service.calculate("sqrt(16) + 2**10")[0], "1028.0")
+        self.assertEqual(service.calculate("round(pi, 2)")[0], "3.14")
+        self.assertEqual(service.calculate("7 / 2")[0], "3.5")
+        self.assertIsNotNone(service.calculate("factorial(100000)")[1])
+
+    def test_calculate_rejects_non_math_syntax(self):
+        """Test that attribute access, strings and lambdas are rejected."""
+        from cloud.ivanbotty.Launcher.services.math_service import MathService
+
+        service = MathService()
+        expressions = ("().__class__", "'a' * 10", "(lambda: 1)()", "exp.__name__", "1 if 1 else 2")
+        for expression in expressions:
+            result, error = service.calculate(expression)
+            self.assertIsNone(result, expression)
+            self.assertIsNotNone(error)
+
+    def test_compiled_expressions_are_cached(self):
+        """Test that repeated expressions reuse the compiled closure."""
+        from cloud.ivanbotty.Launcher.services.math_service import MathService, compile_expression
+
+        service = MathService()
+        service.calculate("3 * (4 + 5)")
+        hits = compile_expression.cache_info().hits
+        service.calculate("3 * (4 + 5)")
+        self.assertEqual(compile_expression.cache_info().hits, hits + 1)
+
+
+class TestRequestGate(unittest.TestCase):
+    """Test cases for the expensive provider request gate."""
+
+    def test_idle_policy_requires_min_length(self):
+        """Test that short idle queries are held back until Enter."""
+        from cloud.ivanbotty.Launcher.helper.request_gate import RequestGate
+
+        gate = RequestGate(activation="idle", min_query_length=8)
+        self.assertFalse(gate.allows("ask hi", explicit=False))
+        self.assertTrue(gate.allows("ask hi", explicit=True))
+        self.assertTrue(gate.allows("ask what is python", explicit=False))
+        self.assertEqual(gate.stats()["too_short"], 1)
+
+    def test_enter_policy(self):
+        """Test that enter-only activation never fires on idle."""
+        from cloud.ivanbotty.Launcher.helper.request_gate import RequestGate
+
+        gate = RequestGate(activation="enter")
+        self.assertFalse(gate.allows("ask what is python", explicit=False))
+        self.assertTrue(gate.allows("ask what is python", explicit=True))
+        self.assertEqual(gate.stats()["avoided"], 1)
+
+    def test_sends_when_idle(self):
+        """Test that the idle check follows the policy without counting."""
+        from cloud.ivanbotty.Launcher.helper.request_gate import RequestGate
+
+        gate = RequestGate(activation="idle", min_query_length=8)
+        self.assertFalse(gate.sends_when_idle("ask hi"))
+        self.assertTrue(gate.sends_when_idle("ask what is python"))
+        self.assertFalse(RequestGate(activation="enter").sends_when_idle("ask what is python"))
+        self.assertEqual(gate.stats()["avoided"], 0)
+
+    @unittest.skipUnless(
+        os.getenv("GTK_AVAILABLE") == "1",
+        "GTK4 not available in test environment"
+    )
+    def test_controller_sends_last_idle_query_once(self):
+        """Test that deferred queries share one debouncer and only the last is sent."""
+        import time
+        from cloud.ivanbotty.Launcher.controller.event_search_controller import (
+            EventSearchController,
+        )
+
+        handler = MagicMock(expensive=True)
+        handler.can_handle.return_value = True
+        controller = EventSearchController(MagicMock(), MagicMock(), MagicMock(), {}, [handler])
+        with patch.object(controller, "_request") as request:
+            controller.update_view("ask what is py")
+            controller.update_view("ask what is python")
+            handler.pending.assert_called_with("ask what is python", idle=True)
+            time.sleep(controller._idle_debouncer.delay + 0.3)
+        request.assert_called_once_with(handler, "ask what is python", explicit=False)
+        self.assertEqual(controller.request_gate.stats()["interrupted"], 1)
+
+    def test_single_flight_deduplication(self):
+        """Test that the same query is only in flight once."""
+        from cloud.ivanbotty.Launcher.helper.request_gate import RequestGate
+
+        gate = RequestGate()
+        token = gate.begin("ask question")
+        self.assertIsNotNone(token)
+        self.assertIsNone(gate.begin("ask question"))
+        self.assertTrue(gate.finish(token))
+        self.assertEqual(gate.stats()["deduplicated"], 1)
+        self.assertEqual(gate.stats()["started"], 1)
+
+    def test_newer_query_supersedes(self):
+        """Test that results of superseded requests are discarded."""
+        from cloud.ivanbotty.Launcher.helper.request_gate import RequestGate
+
+        gate = RequestGate()
+        old = gate.begin("ask what is py")
+        new = gate.begin("ask what is python")
+        self.assertFalse(gate.finish(old))
+        self.assertTrue(gate.finish(new))
+        self.assertEqual(gate.stats()["superseded"], 1)
+
+    def test_cancel_keeps_matching_query(self):
+        """Test that cancel() spares the request for the kept query."""
+        from cloud.ivanbotty.Launcher.helper.request_gate import RequestGate
+
+        gate = RequestGate()
+        token = gate.begin("ask question")
+        gate.cancel(keep="ask question")
+        self.assertTrue(gate.is_current(token))
+        gate.cancel()
+        self.assertFalse(gate.finish(token))
+
+    def test_superseded_request_is_aborted(self):
+        """Test that a newer query aborts the request it supersedes."""
+        from cloud.ivanbotty.Launcher.helper.request_gate import RequestGate
+
+        gate = RequestGate()
+        abort_old, abort_new = MagicMock(), MagicMock()
+        gate.begin("ask what is py", abort=abort_old)
+        self.assertIsNone(gate.begin("ask what is py", abort=MagicMock()))
+        abort_old.assert_not_called()
+        new = gate.begin("ask what is python", abort=abort_new)
+        abort_old.assert_called_once_with()
+        gate.cancel(keep="ask what is python")
+        abort_new.assert_not_called()
+        self.assertTrue(gate.finish(new))
+        gate.cancel()
+        abort_new.assert_not_called()
+
+
+class TestStartupInputBuffer(unittest.TestCase):
+    """Test cases for the input captured during startup."""
+
+    def test_typing_fire_and_enter_during_startup(self):
+        """Test that "fire⏎" typed before the index is ready launches once ready."""
+        from cloud.ivanbotty.Launcher.helper.input_buffer import StartupInputBuffer
+
+        buffer = StartupInputBuffer()
+        for text in ("f", "fi", "fir", "fire"):
+            buffer.text_changed(text)
+        self.assertFalse(buffer.activate("fire"))
+        self.assertEqual(buffer.pending, "fire")
+
+        # Queries re-run on partial indexes keep the held back Enter
+        buffer.text_changed("fire")
+        self.assertEqual(buffer.set_ready(), "fire")
+        self.assertIsNone(buffer.pending)
+        self.assertIsNone(buffer.set_ready())
+        self.assertEqual(buffer.keystrokes, 5)
+
+    def test_typing_after_enter_drops_it(self):
+        """Test that an early Enter is dropped when the query changes."""
+        from cloud.ivanbotty.Launcher.helper.input_buffer import StartupInputBuffer
+
+        buffer = StartupInputBuffer()
+        buffer.text_changed("fire")
+        self.assertFalse(buffer.activate("fire"))
+        buffer.text_changed("firef")
+        self.assertIsNone(buffer.set_ready())
+
+    def test_enter_after_startup_runs_at_once(self):
+        """Test that Enter is not held back once the index is ready."""
+        from cloud.ivanbotty.Launcher.helper.input_buffer import StartupInputBuffer
+
+        buffer = StartupInputBuffer()
+        buffer.set_ready()
+        self.assertTrue(buffer.activate("fire"))
+        self.assertIsNone(buffer.pending)
+
+    @unittest.skipUnless(
+        os.getenv("GTK_AVAILABLE") == "1",
+        "GTK4 not available in test environment"
+    )
+    def test_controller_replays_enter_on_full_index(self):
+        """Test that "fire⏎" during startup activates the top result once, when ready."""
+        import time
+        from cloud.ivanbotty.Launcher.controller.event_search_controller import (
+            DEBOUNCE_DELAY,
+            EventSearchController,
+        )
+
+        entry, view = MagicMock(), MagicMock()
+        view.get_selected_row.return_value = None
+        handler = MagicMock(expensive=False, acts_on_activation=False)
+        handler.can_handle.return_value = True
+        results = MagicMock()
+        handler.handle.return_value = results
+
+        controller = EventSearchController(MagicMock(), entry, view, {}, [handler])
+        with patch.object(controller, "activate_row") as activate_row:
+            for text in ("f", "fi", "fir", "fire"):
+                controller.on_text_changed(entry, text)
+            controller.on_activated(entry, "fire")
+            activate_row.assert_not_called()
+            handler.handle.assert_not_called()
+
+            controller.index_ready()
+            # The search still debounced is run at once, then cancelled
+            handler.handle.assert_called_once_with("fire", {})
+            view.bind_model.assert_called_once()
+            self.assertIs(view.bind_model.call_args[0][0], results)
+            activate_row.assert_called_once_with(view.get_row_at_index.return_value)
+            view.get_row_at_index.assert_called_with(0)
+
+            time.sleep(DEBOUNCE_DELAY * 2)
+            activate_row.assert_called_once()
+            handler.handle.assert_called_once()
+
+
+class TestExtensionRegistry(unittest.TestCase):
+    """Test cases for the compiled extension registry."""
+
+    YAML = """extensions:
+  - name: Application
+    service: "svc.Apps"
+    handler: "tests.missing_module.AppHandler"
+    enabled: true
+    dispatch:
+      fallback: true
+
+  - name: Math
+    service: "svc.Math"
+    handler: "tests.missing_module.MathHandler"
+    enabled: true
+    dispatch:
+      pattern: '^[\\d+\\-*/().\\s]+$'
+"""
+
+    def setUp(self):
+        import tempfile
+
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.yaml_path = os.path.join(self.tmpdir.name, "extensions.yaml")
+        self.cache_path = os.path.join(self.tmpdir.name, "cache", "extensions.registry.json")
+        with open(self.yaml_path, "w") as f:
+            f.write(self.YAML)
+        patcher = patch(
+            "cloud.ivanbotty.Launcher.helper.extension_registry.find_extensions_yaml",
+            return_value=self.yaml_path,
+        )
+        self.find_yaml = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_compile_and_load(self):
+        """Test that the registry is compiled once, then loaded without YAML."""
+        from cloud.ivanbotty.Launcher.helper import extension_registry
+
+        registry = extension_registry.load_registry(self.cache_path)
+        self.assertEqual([e["name"] for e in registry["extensions"]], ["Application", "Math"])
+        self.assertTrue(registry["extensions"][0]["dispatch"]["fallback"])
+        self.assertTrue(os.path.exists(self.cache_path))
+
+        with patch.object(extension_registry, "compile_registry") as compile_registry:
+            again = extension_registry.load_registry(self.cache_path)
+        compile_registry.assert_not_called()
+        self.find_yaml.assert_called_once()
+        self.assertEqual(again["extensions"], registry["extensions"])
+
+    def test_recompiled_when_yaml_changes(self):
+        """Test that editing the YAML invalidates the registry."""
+        from cloud.ivanbotty.Launcher.helper import extension_registry
+
+        extension_registry.load_registry(self.cache_path)
+        with open(self.yaml_path, "w") as f:
+            f.write(self.YAML.replace("enabled: true", "enabled: false"))
+        st = os.stat(self.yaml_path)
+        os.utime(self.yaml_path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+        registry = extension_registry.load_registry(self.cache_path)
+        self.assertFalse(any(e["enabled"] for e in registry["extensions"]))
+
+    def test_touched_yaml_keeps_registry(self):
+        """Test that a new mtime with unchanged content does not recompile."""
+        from cloud.ivanbotty.Launcher.helper import extension_registry
+
+        extension_registry.load_registry(self.cache_path)
+        st = os.stat(self.yaml_path)
+        os.utime(self.yaml_path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        with patch.object(extension_registry, "compile_registry") as compile_registry:
+            self.assertIsNotNone(extension_registry.load_registry(self.cache_path))
+        compile_registry.assert_not_called()
+
+    def test_build_command(self):
+        """Test the command compiling the registry at install time."""
+        from cloud.ivanbotty.Launcher.helper import extension_registry
+
+        output = os.path.join(self.tmpdir.name, "extensions.registry.json")
+        self.assertEqual(extension_registry.main([self.yaml_path, output]), 0)
+        self.assertIsNotNone(extension_registry.read_registry(output))
+        self.assertEqual(extension_registry.main([self.yaml_path]), 1)
+
+    def test_lazy_handler_routes_without_import(self):
+        """Test that dispatch metadata rejects queries before importing."""
+        from cloud.ivanbotty.Launcher.helper.extension_registry import LazyHandler
+
+        handler = LazyHandler("tests.missing_module.MathHandler", {"pattern": r"^[\d+]+$"})
+        self.assertFalse(handler.can_handle("firefox"))
+        self.assertFalse(handler.loaded)
+
+        real = MagicMock()
+        real.can_handle.return_value = True
+        with patch(
+            "cloud.ivanbotty.Launcher.helper.extension_registry.load_class_instance",
+            return_value=real,
+        ) as load:
+            self.assertTrue(handler.can_handle("1+1"))
+            self.assertTrue(handler.can_handle("2+2"))
+        load.assert_called_once_with("tests.missing_module.MathHandler")
+        self.assertTrue(handler.loaded)
+
+    def test_fallback_handlers_stay_last(self):
+        """Test that handlers taking any query do not shadow the others."""
+        from cloud.ivanbotty.Launcher.helper.extension_registry import LazyHandler, add_handler
+
+        apps = LazyHandler("a.AppHandler", {"fallback": True})
+        math = LazyHandler("a.MathHandler", {"pattern": r"^\d+$"})
+        ai = LazyHandler("a.AIHandler", {"prefixes": ["ask"]})
+        handlers = []
+        for handler in (apps, math, ai):
+            handlers = add_handler(handlers, handler)
+        self.assertEqual(handlers, [math, ai, apps])
+        self.assertTrue(ai.matches("ask why"))
+        self.assertFalse(ai.matches("firefox"))
+
+
+class TestSessionProfile(unittest.TestCase):
+    """Test cases for the profile-guided preloading."""
+
+    def setUp(self):
+        import tempfile
+
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.path = os.path.join(self.tmpdir.name, "session_profile.json")
+
+    def _session(self, *items):
+        from cloud.ivanbotty.Launcher.helper.session_profile import SessionProfile
+
+        profile = SessionProfile(self.path)
+        for kind, key in items:
+            profile.use(kind, key)
+        return profile
+
+    def test_items_of_most_sessions_are_preloaded(self):
+        """Test that items used in recent sessions become candidates."""
+        self._session(("provider", "ai"), ("icon", "firefox")).save()
+        self.assertEqual(self._session().candidates(), [])
+
+        self._session(("provider", "ai")).save()
+        self.assertEqual(self._session().candidates(), [("provider", "ai")])
+
+        for _ in range(3):
+            self._session().save()
+        self.assertEqual(self._session().candidates(), [])
+
+    def test_preload_stops_at_memory_budget(self):
+        """Test that preloading stops once the budget is spent."""
+        from cloud.ivanbotty.Launcher.helper.session_profile import SessionPreloader
+
+        for _ in range(2):
+            self._session(("icon", "a"), ("icon", "b"), ("icon", "c")).save()
+        profile = self._session()
+        rss = iter(range(0, 100 * 10**6, 10**6))
+        loaded = []
+
+        def load_icon(name):
+            next(rss)
+            loaded.append(name)
+            return name
+
+        preloader = SessionPreloader(
+            profile, {"icon": load_icon}, budget=2 * 10**6, memory=lambda: next(rss)
+        )
+        list(preloader.steps())
+        self.assertEqual(len(loaded), 1)
+        self.assertEqual(profile.stats()["bytes"], 2 * 10**6)
+
+    def test_hit_and_miss_statistics(self):
+        """Test hits, misses and unused preloads of a session."""
+        from cloud.ivanbotty.Launcher.helper.session_profile import SessionPreloader
+
+        for _ in range(2):
+            self._session(("provider", "ai"), ("provider", "math"), ("module", "json")).save()
+        profile = self._session(("icon", "early"))
+        preloader = SessionPreloader(
+            profile,
+            {"provider": lambda name: name, "module": lambda name: None},
+            memory=lambda: 0,
+        )
+        list(preloader.steps())
+        profile.use("provider", "ai")
+        profile.use("provider", "calendar")
+        profile.use("module", "json")
+
+        stats = profile.save()
+        self.assertEqual((stats["hits"], stats["misses"], stats["unused"]), (1, 1, 1))
+        with open(self.path) as f:
+            self.assertEqual(json.load(f)["totals"]["hits"], 1)
+
+    def test_lazy_handler_records_its_module(self):
+        """Test that importing a handler records its module for preloading."""
+        from cloud.ivanbotty.Launcher.helper.extension_registry import LazyHandler
+
+        profile = self._session()
+        with patch("cloud.ivanbotty.Launcher.helper.extension_registry.SESSION", profile):
+            LazyHandler("tests.missing_module.MathHandler").load()
+            handler = LazyHandler("collections.OrderedDict")
+            handler.load()
+            handler.load()
+        profile.save()
+        with open(self.path) as f:
+            self.assertEqual(list(json.load(f)["scores"]["module"]), ["collections"])
+
+
+class TestSearchLatency(unittest.TestCase):
+    """Test cases for the search latency histograms."""
+
+    def setUp(self):
+        """Point the database module at a temporary file."""
+        import tempfile
+        from cloud.ivanbotty.database import sqlite3 as db
+
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_patch = patch.object(db, "DB_PATH", os.path.join(self.tmpdir.name, "settings.db"))
+        db.close_store()
+        self.db_patch.start()
+
+    def tearDown(self):
+        """Close the temporary database."""
+        from cloud.ivanbotty.database import sqlite3 as db
+
+        db.close_store()
+        self.db_patch.stop()
+        self.tmpdir.cleanup()
+
+    def _search(self, recorder, text, debounce_ms, bind_ms):
+        """Record a search with given debounce wait and row time."""
+        import time
+
+        latency = recorder.begin(text, time.perf_counter() - debounce_ms / 1000)
+        latency.timed("bind", time.sleep)(bind_ms / 1000)
+        latency.end_search()
+        latency.finish(painted=True)
+        latency.finish(painted=True)
+        return latency
+
+    def test_percentiles(self):
+        """Test that percentiles are interpolated within their bucket."""
+        from cloud.ivanbotty.Launcher.helper.latency import LatencyHistogram
+
+        histogram = LatencyHistogram((10, 20, 40))
+        self.assertIsNone(histogram.percentile(50))
+        for ms in (5,) * 50 + (15,) * 40 + (30,) * 9 + (100,):
+            histogram.add(ms)
+        self.assertEqual(histogram.counts, [50, 40, 9, 1])
+        self.assertAlmostEqual(histogram.percentile(50), 10)
+        self.assertAlmostEqual(histogram.percentile(95), 20 + 20 * 5 / 9)
+        self.assertEqual(histogram.percentile(100), 40)
+
+    def test_stages(self):
+        """Test that a search is split into its stages and recorded once."""
+        from cloud.ivanbotty.Launcher.helper.latency import STAGES, LatencyRecorder
+
+        recorder = LatencyRecorder()
+        latency = self._search(recorder, "fire", debounce_ms=150, bind_ms=5)
+        self.assertEqual(set(latency.stages), set(STAGES) - {"model"})
+        self.assertAlmostEqual(latency.stages["debounce"], 150, delta=20)
+        self.assertGreaterEqual(latency.stages["total"], sum(
+            ms for stage, ms in latency.stages.items() if stage not in ("total", "frame")
+        ) - 1)
+
+        report = recorder.report()
+        self.assertEqual(report["stages"]["total"]["count"], 1)
+        self.assertEqual(report["stages"]["bind"]["count"], 1)
+        self.assertEqual([query["query"] for query in report["slowest"]], ["fire"])
+
+    def test_saved_across_sessions(self):
+        """Test that histograms and slow queries add up across sessions."""
+        from cloud.ivanbotty.Launcher.helper.latency import LatencyRecorder
+
+        first = LatencyRecorder()
+        self._search(first, "slow", debounce_ms=0, bind_ms=250)
+        self._search(first, "fast", debounce_ms=0, bind_ms=1)
+        self.assertEqual(first.save(), 2)
+        self.assertEqual(first.save(), 0)
+
+        second = LatencyRecorder()
+        self._search(second, "fire", debounce_ms=0, bind_ms=20)
+        report = second.report()
+        self.assertEqual(report["stages"]["total"]["count"], 3)
+        self.assertEqual([query["query"] for query in report["slowest"]], ["slow", "fire", "fast"])
+        self.assertGreaterEqual(report["stages"]["total"]["p99"], 200)
+
+        path = os.path.join(self.tmpdir.name, "latency.json")
+        second.export(path)
+        with open(path, encoding="utf-8") as f:
+            exported = json.load(f)
+        self.assertEqual(sum(exported["histograms"]["total"]), 3)
+        self.assertEqual(len(exported["bucket_bounds_ms"]) + 1, len(exported["histograms"]["bind"]))
+
+        second.reset()
+        report = LatencyRecorder().report()
+        self.assertEqual(report["stages"]["total"]["count"], 0)
+        self.assertEqual(report["slowest"], [])
+
+
+class TestDebouncer(unittest.TestCase):
+    """Test cases for the keystroke debouncer."""
+
+    def test_only_last_call_runs(self):
+        """Test that a burst of calls runs the last one, on one thread."""
+        import threading
+        import time
+
+        from cloud.ivanbotty.Launcher.helper.debounce import Debouncer
+
+        debouncer = Debouncer(0.05)
+        calls = []
+        done = threading.Event()
+        threads_before = threading.active_count()
+        for text in ("f", "fi", "fir", "fire"):
+            debouncer.call(lambda t: (calls.append(t), done.set()), text)
+        self.assertLessEqual(threading.active_count(), threads_before + 1)
+        self.assertTrue(done.wait(2))
+        time.sleep(0.1)
+        self.assertEqual(calls, ["fire"])
+        self.assertFalse(debouncer.pending)
+
+    def test_cancel(self):
+        """Test that a cancelled call does not run."""
+        import time
+
+        from cloud.ivanbotty.Launcher.helper.debounce import Debouncer
+
+        debouncer = Debouncer(0.05)
+        calls = []
+        debouncer.call(calls.append, "fire")
+        self.assertTrue(debouncer.cancel())
+        self.assertFalse(debouncer.cancel())
+        time.sleep(0.1)
+        self.assertEqual(calls, [])
+
+
+class TestExecutableIndex(unittest.TestCase):
+    """Test cases for the $PATH executable index."""
+
+    def setUp(self):
+        import tempfile
+
+        self.tmp = tempfile.mkdtemp()
+        self.bin_dir = os.path.join(self.tmp, "bin")
+        os.makedirs(self.bin_dir)
+        for name in ("firefox", "fish", "Files", "git"):
+            self._make_file(name, executable=True)
+        self._make_file("fonts.conf", executable=False)
+        self.cache_path = os.path.join(self.tmp, "cache", "executables.json")
+
+    def tearDown(self):
+        import shutil
+
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _make_file(self, name, executable):
+        path = os.path.join(self.bin_dir, name)
+        with open(path, "w") as f:
+            f.write("#!/bin/sh\n")
+        os.chmod(path, 0o755 if executable else 0o644)
+
+    def _index(self):
+        from cloud.ivanbotty.Launcher.helper.executable_index import ExecutableIndex
+
+        index = ExecutableIndex(self.cache_path, path_dirs=[self.bin_dir], host=False)
+        index.load()
+        return index
+
+    def test_prefix_search(self):
+        """Test case-insensitive prefix search over executables only."""
+        index = self._index()
+        self.assertEqual(index.search("fi"), ["Files", "firefox", "fish"])
+        self.assertEqual(index.search("FIR"), ["firefox"])
+        self.assertEqual(index.search("f", limit=1), ["Files"])
+        self.assertEqual(index.search("fonts"), [])
+        self.assertTrue(index.contains("git"))
+        self.assertFalse(index.contains("Git"))
+
+    def test_cache_reused_until_directory_changes(self):
+        """Test that the cache is only rebuilt when a PATH directory changes."""
+        self._index()
+        with patch(
+            "cloud.ivanbotty.Launcher.helper.executable_index.ExecutableIndex.rescan"
+        ) as rescan:
+            index = self._index()
+            rescan.assert_not_called()
+        self.assertIn("git", index.search("g"))
+
+        self._make_file("gitk", executable=True)
+        stat = os.stat(self.bin_dir)
+        os.utime(self.bin_dir, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        index._last_check = 0.0
+        self.assertTrue(index.refresh())
+        self.assertEqual(index.search("git"), ["git", "gitk"])
+
+    def test_parse_host_listing(self):
+        """Test parsing of the flatpak-spawn host listing."""
+        from cloud.ivanbotty.Launcher.helper.executable_index import parse_host_listing
+
+        dirs, names = parse_host_listing("/usr/bin\t1700000000\nls\ncat\n/bin\t17\n\nsh\n")
+        self.assertEqual(dirs, {"/usr/bin": 1700000000, "/bin": 17})
+        self.assertEqual(names, ["ls", "cat", "sh"])
+
+    def test_refresh_in_background(self):
+        """Test that a due check runs on a thread and publishes the new index."""
+        index = self._index()
+        self.assertIsNone(index.refresh_in_background())
+
+        self._make_file("gitk", executable=True)
+        stat = os.stat(self.bin_dir)
+        os.utime(self.bin_dir, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        index._last_check = 0.0
+        import threading
+
+        current_mtimes = index._current_mtimes
+        checked_on = []
+
+        def check():
+            checked_on.append(threading.current_thread())
+            return current_mtimes()
+
+        with patch.object(index, "_current_mtimes", side_effect=check):
+            thread = index.refresh_in_background()
+            self.assertIsNotNone(thread)
+            thread.join(5)
+        self.assertTrue(checked_on)
+        self.assertNotIn(threading.main_thread(), checked_on)
+        self.assertEqual(index.search("git"), ["git", "gitk"])
+        self.assertIsNone(index.refresh_in_background())
+
+    def test_load_in_background(self):
+        """Test that a load without cache scans off the calling thread."""
+        import threading
+
+        from cloud.ivanbotty.Launcher.helper.executable_index import ExecutableIndex
+
+        index = ExecutableIndex(self.cache_path, path_dirs=[self.bin_dir], host=False)
+        rescan = index.rescan
+        scanned_on = []
+
+        def scan():
+            scanned_on.append(threading.current_thread())
+            rescan()
+
+        with patch.object(index, "rescan", side_effect=scan):
+            thread = index.load_in_background()
+            self.assertIsNotNone(thread)
+            thread.join(5)
+        self.assertNotIn(threading.main_thread(), scanned_on)
+        self.assertEqual(index.search("fi"), ["Files", "firefox", "fish"])
+        self.assertTrue(os.path.exists(self.cache_path))
+
+    def test_failed_save_keeps_previous_cache(self):
+        """Test that the cache is replaced only once fully written."""
+        index = self._index()
+        with open(self.cache_path, encoding="utf-8") as f:
+            saved = f.read()
+        self._make_file("gitk", executable=True)
+        with patch(
+            "cloud.ivanbotty.Launcher.helper.executable_index.json.dump",
+            side_effect=OSError("disk full"),
+        ):
+            index.rescan()
+        with open(self.cache_path, encoding="utf-8") as f:
+            self.assertEqual(f.read(), saved)
+
+
+class TestAppCache(unittest.TestCase):
+    """Test cases for the fingerprinted applications cache."""
+
+    def setUp(self):
+        import tempfile
+
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.app_dir = os.path.join(self.tmpdir.name, "applications")
+        os.mkdir(self.app_dir)
+        self.missing_dir = os.path.join(self.tmpdir.name, "missing")
+        self.cache_path = os.path.join(self.tmpdir.name, "cache.json")
+
+    def _write_cache(self, apps, generation=1):
+        from cloud.ivanbotty.Launcher.helper.app_cache import (
+            build_cache,
+            directory_fingerprints,
+            encode_cache,
+        )
+
+        fingerprints = directory_fingerprints([self.app_dir, self.missing_dir])
+        with open(self.cache_path, "wb") as f:
+            f.write(encode_cache(build_cache(apps, fingerprints, generation)))
+
+    def test_cache_trusted_until_a_directory_changes(self):
+        """Test that age does not matter, only directory fingerprints do."""
+        from cloud.ivanbotty.Launcher.helper.app_cache import is_cache_current, read_cache_file
+
+        dirs = [self.app_dir, self.missing_dir]
+        self._write_cache([{"name": "Editor"}])
+        old = os.path.getmtime(self.cache_path) - 7 * 24 * 3600
+        os.utime(self.cache_path, (old, old))
+
+        header, apps = read_cache_file(self.cache_path)
+        self.assertEqual(apps, [{"name": "Editor"}])
+        self.assertTrue(is_cache_current(header, dirs))
+
+        os.mkdir(self.missing_dir)
+        self.assertFalse(is_cache_current(header, dirs))
+
+    def test_legacy_list_cache_is_never_trusted(self):
+        """Test that a cache without header is readable but not current."""
+        import json
+        from cloud.ivanbotty.Launcher.helper.app_cache import is_cache_current, read_cache_file
+
+        with open(self.cache_path, "w") as f:
+            json.dump([{"name": "Editor"}], f)
+        header, apps = read_cache_file(self.cache_path)
+        self.assertIsNone(header)
+        self.assertEqual(apps, [{"name": "Editor"}])
+        self.assertFalse(is_cache_current(header, [self.app_dir]))
+
+    def test_seeded_fingerprints_ignore_inodes(self):
+        """Test that a seed built under a root validates on the deployed system."""
+        from cloud.ivanbotty.Launcher.helper.app_cache import (
+            directory_fingerprints,
+            is_cache_current,
+        )
+
+        image_root = os.path.join(self.tmpdir.name, "image")
+        image_dir = os.path.join(image_root, self.app_dir.lstrip(os.sep))
+        os.makedirs(image_dir)
+        mtime_ns = os.stat(self.app_dir).st_mtime_ns
+        os.utime(image_dir, ns=(mtime_ns, mtime_ns))
+
+        seeded = directory_fingerprints([self.app_dir, self.missing_dir], root=image_root)
+        self.assertEqual(seeded[self.app_dir], [mtime_ns, None])
+        self.assertIsNone(seeded[self.missing_dir])
+        header = {"directories": seeded}
+        self.assertTrue(is_cache_current(header, [self.app_dir, self.missing_dir]))
+
+        with open(os.path.join(self.app_dir, "new.desktop"), "w"):
+            pass
+        self.assertFalse(is_cache_current(header, [self.app_dir, self.missing_dir]))
+
+    def test_generation_only_increases_on_change(self):
+        """Test that rewriting an unchanged catalogue keeps its generation."""
+        from cloud.ivanbotty.Launcher.helper.app_cache import next_generation
+
+        self.assertEqual(next_generation(None, False), 1)
+        self.assertEqual(next_generation({"generation": 4}, False), 4)
+        self.assertEqual(next_generation({"generation": 4}, True), 5)
+
+
+class TestAppDelta(unittest.TestCase):
+    """Test cases for application records and catalogue deltas."""
+
+    def _app(self, desktop_id, name, exec_cmd="run", icon=None):
+        return {"type": "Application", "name": name, "description": None,
+                "exec_cmd": exec_cmd, "desktop_id": desktop_id, "icon": icon}
+
+    def test_record_round_trip(self):
+        """Test conversion between dictionaries and D-Bus records."""
+        from cloud.ivanbotty.Launcher.helper.app_delta import record_to_dict, to_record
+
+        app = self._app("firefox.desktop", "Firefox")
+        record = to_record(app)
+        self.assertEqual(record, ("firefox.desktop", "Application", "Firefox", "run", "", ""))
+        self.assertEqual(record_to_dict(record), app)
+
+    def test_diff_applications(self):
+        """Test that only added, removed and changed applications are reported."""
+        from cloud.ivanbotty.Launcher.helper.app_delta import diff_applications, to_record
+
+        old = [
+            self._app("a.desktop", "A"), self._app("b.desktop", "B"), self._app("c.desktop", "C")
+        ]
+        new = [self._app("a.desktop", "A"), self._app("c.desktop", "C", icon="/c.png"),
+               self._app("d.desktop", "D")]
+
+        added, removed, changed = diff_applications(old, new)
+        self.assertEqual(added, [to_record(new[2])])
+        self.assertEqual(removed, ["b.desktop"])
+        self.assertEqual(changed, [to_record(new[1])])
+        self.assertEqual(diff_applications(new, new), ([], [], []))
+
+
+class TestProgressReporter(unittest.TestCase):
+    """Test cases for staged, rate-limited progress reporting."""
+
+    def test_stage_fractions(self):
+        """Test that stage progress maps onto the overall fraction."""
+        from cloud.ivanbotty.Launcher.helper.progress import ProgressReporter
+
+        reporter = ProgressReporter(lambda *args: None)
+        self.assertEqual(reporter.fraction("discover", 0, 0), 0.0)
+        self.assertAlmostEqual(reporter.fraction("parse", 0, 10), 0.05)
+        self.assertAlmostEqual(reporter.fraction("parse", 5, 10), 0.35)
+        self.assertAlmostEqual(reporter.fraction("icons", 10, 10), 0.95)
+        self.assertAlmostEqual(reporter.fraction("publish", 1, 1), 1.0)
+
+    def test_updates_are_rate_limited(self):
+        """Test that at most one update per interval is forwarded."""
+        from cloud.ivanbotty.Launcher.helper.progress import ProgressReporter
+
+        now = [0.0]
+        emitted = []
+        reporter = ProgressReporter(
+            lambda fraction, stage, done: emitted.append((stage, done)),
+            interval_ms=100,
+            clock=lambda: now[0],
+        )
+        for i in range(1, 1001):
+            now[0] = i * 0.001  # One file per millisecond
+            reporter("parse", i, 2000)
+        reporter("icons", 1, 10)  # Stage changes are always forwarded
+        reporter("publish", 1, 1)  # Completion is always forwarded
+
+        self.assertEqual(emitted[0], ("parse", 1))
+        self.assertLessEqual(len(emitted), 13)
+        self.assertEqual(emitted[-2:], [("icons", 1), ("publish", 1)])
+        self.assertEqual(reporter.counters["emitted"] + reporter.counters["dropped"], 1002)
+
 
 class TestBaseInputHandler(unittest.TestCase):
     """Test cases for the base input handler."""
@@ -103,5 +103,74 @@ class TestOnboardingConfig(unittest.TestCase):
             self.fail(f"reset_onboarding raised an exception: {e}")
 
 
+class TestLayoutSettings(unittest.TestCase):
+    """Test cases for the lazily resolved layout settings."""
+
+    def setUp(self):
+        """Point the database module at a temporary file."""
+        import tempfile
+        from cloud.ivanbotty.database import sqlite3 as db
+
+        self.tmpdir = tempfile.TemporaryDirectory()
+        db.close_store()
+        self.db_patch = patch.object(db, "DB_PATH", os.path.join(self.tmpdir.name, "settings.db"))
+        self.db_patch.start()
+
+    def tearDown(self):
+        """Close the temporary database."""
+        from cloud.ivanbotty.database import sqlite3 as db
+
+        db.close_store()
+        self.db_patch.stop()
+        self.tmpdir.cleanup()
+
+    def test_import_costs_no_disk_io(self):
+        """Test that importing the configuration does not open the database."""
+        import subprocess
+
+        code = (
+            "import cloud.ivanbotty.Launcher.config.config\n"
+            "import cloud.ivanbotty.database.sqlite3 as db\n"
+            "assert db._store is None\n"
+        )
+        env = dict(os.environ, HOME=self.tmpdir.name)
+        root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+        subprocess.run([sys.executable, "-c", code], cwd=root, env=env, check=True)
+        self.assertEqual(os.listdir(self.tmpdir.name), [])
+
+    def test_style_is_resolved_on_first_use(self):
+        """Test that the style comes from the database, invalid values falling back."""
+        from cloud.ivanbotty.database import sqlite3 as db
+        from cloud.ivanbotty.Launcher.config.config import UI_CONFS, LayoutSettings
+
+        db.set_pref("layout", "huge")
+        self.assertEqual(LayoutSettings().style, "default")
+        db.set_pref("layout", "compact")
+        layout = LayoutSettings()
+        self.assertEqual(layout.style, "compact")
+        self.assertIs(layout.conf, UI_CONFS["compact"])
+        self.assertEqual(layout["width"], UI_CONFS["compact"]["width"])
+
+    def test_listeners_follow_preference_changes(self):
+        """Test that listeners receive the new configuration once per change."""
+        from cloud.ivanbotty.database import sqlite3 as db
+        from cloud.ivanbotty.Launcher.config.config import UI_CONFS, LayoutSettings
+
+        layout = LayoutSettings()
+        self.assertEqual(layout.style, "default")
+        received = []
+        handler_id = layout.connect(received.append)
+
+        db.set_pref("layout", "compact")
+        db.set_pref("layout", "compact")
+        db.set_pref("other", "value")
+        self.assertEqual(received, [UI_CONFS["compact"]])
+
+        layout.disconnect(handler_id)
+        db.set_pref("layout", "default")
+        self.assertEqual(len(received), 1)
+        self.assertEqual(layout.style, "default")
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -6,6 +6,7 @@ and provide benchmarks for key operations.
 
 import sys
 import os
+import shutil
 import unittest
 import time
 from unittest.mock import MagicMock, patch
@@ -58,30 +59,276 @@ class TestApplicationsServicePerformance(unittest.TestCase):
         # We're just testing the cache exists
         self.assertIsInstance(service._desktop_cache, dict)
 
+    @unittest.skipUnless(
+        os.getenv("GTK_AVAILABLE") == "1",
+        "GTK4 not available in test environment"
+    )
+    def test_filter_narrows_previous_matches(self):
+        """Test that typing searches the previous matches, in name order."""
+        from cloud.ivanbotty.Launcher.models.applications_model import ApplicationModel
+        from cloud.ivanbotty.Launcher.services.applications_service import ApplicationsService
+
+        service = ApplicationsService()
+        apps = [
+            ApplicationModel(type="Application", name=name) for name in ("Firefox", "Files", "fish")
+        ]
+        service.store.splice(0, 0, apps)
+
+        def names(store):
+            return [app.name for app in store]
+
+        self.assertEqual(names(service.filter_applications("f")), ["Files", "Firefox", "fish"])
+        self.assertEqual(names(service.filter_applications("fi")), ["Files", "Firefox", "fish"])
+        # "fir" only searches the matches of "fi"
+        service._last_search[1].pop(1)
+        self.assertEqual(names(service.filter_applications("fir")), [])
+
+        # Changing the store rebuilds the index
+        service.store.append(ApplicationModel(type="Application", name="Fire Dragon"))
+        self.assertEqual(names(service.filter_applications("fir")), ["Fire Dragon", "Firefox"])
+
+
+class TestPaintFirstStartup(unittest.TestCase):
+    """Test that the window is built before extensions are loaded."""
+
+    @unittest.skipUnless(
+        os.getenv("GTK_AVAILABLE") == "1",
+        "GTK4 not available in test environment"
+    )
+    @patch("cloud.ivanbotty.Launcher.app.load_class_instance", return_value=None)
+    @patch("cloud.ivanbotty.Launcher.app.App._init_daemon_client")
+    def test_startup_builds_window_without_extensions(self, mock_daemon, mock_load):
+        """Test that do_startup builds the window and loads no extension."""
+        from cloud.ivanbotty.Launcher.app import App
+
+        app = App(app="cloud.ivanbotty.Launcher.Test")
+        app.register(None)
+
+        self.assertIsNotNone(app.win)
+        self.assertFalse(app.services_ready)
+        self.assertEqual(app.search_controller.services, {})
+        mock_load.assert_not_called()
+
+        # Extensions are then loaded one per main loop iteration
+        steps = app._load_extensions()
+        for _ in steps:
+            pass
+        self.assertTrue(app.services_ready)
+        self.assertIn("application", app.search_controller.services)
+
+    @unittest.skipUnless(
+        os.getenv("GTK_AVAILABLE") == "1",
+        "GTK4 not available in test environment"
+    )
+    @patch("cloud.ivanbotty.Launcher.app.App._init_daemon_client")
+    def test_ai_connection_warmed_without_history(self, mock_daemon):
+        """Test that an enabled AI service is warmed up even in a first session."""
+        from cloud.ivanbotty.Launcher.app import App
+
+        app = App(app="cloud.ivanbotty.Launcher.Test")
+        app.register(None)
+        ai_service, math_service = MagicMock(), MagicMock()
+        app.search_controller.services = {"ai": ai_service, "math": math_service}
+        with patch("cloud.ivanbotty.Launcher.app.SESSION.frequent", return_value=[]):
+            app._warm_up_services()
+        ai_service.warm_up.assert_called_once_with()
+        math_service.warm_up.assert_not_called()
+
+        with patch("cloud.ivanbotty.Launcher.app.SESSION.frequent", return_value=["math", "ai"]):
+            app._warm_up_services()
+        self.assertEqual(ai_service.warm_up.call_count, 2)
+        math_service.warm_up.assert_called_once_with()
+
+
+class TestZygoteStartup(unittest.TestCase):
+    """Test launches forked from the pre-loaded zygote."""
+
+    def setUp(self):
+        import subprocess
+        import tempfile
+
+        from cloud.ivanbotty.Launcherd.zygote import wait_for_socket
+
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.path = os.path.join(self.tmpdir.name, "zygote.sock")
+        root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+        self.zygote = subprocess.Popen(
+            [sys.executable, "-m", "cloud.ivanbotty.Launcherd.zygote", "--serve", self.path],
+            cwd=root,
+            stderr=subprocess.DEVNULL,
+        )
+        self.addCleanup(self.zygote.wait)
+        self.addCleanup(self.zygote.terminate)
+        self.assertTrue(wait_for_socket(self.path, process=self.zygote))
+
+    def test_child_gets_client_streams_and_cwd(self):
+        """Test that the forked child writes to the client's stdout, in its cwd."""
+        from cloud.ivanbotty.Launcherd.zygote import launch
+
+        read_fd, write_fd = os.pipe()
+        cwd = os.getcwd()
+        os.chdir(self.tmpdir.name)
+        try:
+            code = launch([], path=self.path, probe=True, fds=(0, write_fd, 2))
+        finally:
+            os.chdir(cwd)
+            os.close(write_fd)
+        with os.fdopen(read_fd) as output:
+            self.assertEqual(output.read().strip(), os.path.realpath(self.tmpdir.name))
+        self.assertEqual(code, 0)
+
+    def test_without_zygote_nothing_is_launched(self):
+        """Test that the client falls back when no zygote listens."""
+        from cloud.ivanbotty.Launcherd.zygote import launch
+
+        self.assertIsNone(launch([], path=self.path + ".missing", probe=True))
+
+    @unittest.skipUnless(
+        os.getenv("BENCHMARKS") == "1",
+        "Wall-clock benchmark, see python -m cloud.ivanbotty.Launcherd.zygote --benchmark"
+    )
+    def test_zygote_beats_cold_start(self):
+        """Benchmark time-to-window through the zygote against the cold path."""
+        from cloud.ivanbotty.Launcherd.zygote import benchmark
+
+        result = benchmark(runs=3)
+        self.assertLess(result["zygote_ms"], result["cold_ms"])
+
+    def test_index_parsed_ahead_of_time(self):
+        """Test that a preloaded index is reused until the file changes."""
+        from cloud.ivanbotty.Launcher.helper import app_cache
+
+        path = os.path.join(self.tmpdir.name, "cache.json")
+        with open(path, "w") as f:
+            f.write(
+                '{"version": %d, "generation": 1, "applications": []}'
+                % app_cache.CACHE_FORMAT_VERSION
+            )
+        self.addCleanup(app_cache._preloaded.pop, path, None)
+        self.assertTrue(app_cache.preload_cache_file(path))
+        with patch("builtins.open", side_effect=AssertionError("cache file read again")):
+            header, _ = app_cache.read_cache_file(path)
+        self.assertEqual(header["generation"], 1)
+
+        with open(path, "w") as f:
+            f.write(
+                '{"version": %d, "generation": 22, "applications": []}'
+                % app_cache.CACHE_FORMAT_VERSION
+            )
+        header, _ = app_cache.read_cache_file(path)
+        self.assertEqual(header["generation"], 22)
+
 
 class TestDatabasePerformance(unittest.TestCase):
     """Test performance improvements in database module."""
 
-    @patch("cloud.ivanbotty.database.sqlite3._get_connection")
-    def test_connection_reuse(self, mock_get_conn):
-        """Test that database connections are reused."""
-        from cloud.ivanbotty.database import sqlite3 as db
+    def setUp(self):
+        """Create a settings store in a temporary directory."""
+        import tempfile
+        from cloud.ivanbotty.database.settings_store import SettingsStore
 
-        # Mock the connection
-        mock_conn = MagicMock()
-        mock_cursor = MagicMock()
-        mock_cursor.fetchone.return_value = None
-        mock_conn.cursor.return_value = mock_cursor
-        mock_get_conn.return_value = mock_conn
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "settings.db")
+        self.store = SettingsStore(self.path, flush_delay=60, check_interval=3600)
 
-        # Make multiple calls
-        db.get_pref("test_key1", "default1")
-        db.get_pref("test_key2", "default2")
-        db.get_pref("test_key3", "default3")
+    def tearDown(self):
+        """Close the store and remove the temporary directory."""
+        self.store.close()
+        self.tmpdir.cleanup()
 
-        # Connection should be requested multiple times (once per call)
-        # but the same connection object should be returned
-        self.assertGreaterEqual(mock_get_conn.call_count, 3)
+    def _trace(self, store):
+        """Record the SQL statements store runs from now on."""
+        statements = []
+        store.run(lambda conn: conn.set_trace_callback(statements.append))
+        return statements
+
+    def test_database_uses_wal(self):
+        """Test that the database is journaled in WAL mode."""
+        self.assertEqual(self.store.execute("PRAGMA journal_mode"), [("wal",)])
+
+    def test_reads_are_served_from_memory(self):
+        """Test that preference and extension reads run no SQL."""
+        self.store.set_pref("layout", "compact")
+        self.store.set_extension_enabled("ai", False)
+        statements = self._trace(self.store)
+
+        for _ in range(100):
+            self.assertEqual(self.store.get_pref("layout"), "compact")
+            self.assertEqual(self.store.get_pref("missing", "default"), "default")
+            self.assertFalse(self.store.get_extension("ai"))
+
+        self.assertEqual(statements, [])
+
+    def test_writes_are_committed_in_one_batch(self):
+        """Test that a burst of writes is committed in a single transaction."""
+        from cloud.ivanbotty.database.settings_store import SettingsStore
+
+        statements = self._trace(self.store)
+        for i in range(20):
+            self.store.set_pref(f"key{i}", i)
+            self.store.set_extension_enabled(f"ext{i}", i % 2 == 0)
+        self.assertEqual(self.store.flush(), 40)
+
+        self.assertEqual(sum(1 for s in statements if s.startswith("BEGIN")), 1)
+        other = SettingsStore(self.path)
+        try:
+            self.assertEqual(other.get_pref("key19"), "19")
+            self.assertTrue(other.get_extension("ext0"))
+            self.assertFalse(other.get_extension("ext1"))
+        finally:
+            other.close()
+
+    def test_data_version_detects_other_writers(self):
+        """Test that commits of another connection reload the snapshot."""
+        from cloud.ivanbotty.database.settings_store import SettingsStore
+
+        other = SettingsStore(self.path)
+        try:
+            self.assertFalse(self.store.refresh())
+            other.set_pref("layout", "compact")
+            other.flush()
+            self.assertTrue(self.store.refresh())
+            self.assertEqual(self.store.get_pref("layout"), "compact")
+        finally:
+            other.close()
+
+    def test_observers_see_local_and_external_changes(self):
+        """Test that observers are told about every changed key."""
+        from cloud.ivanbotty.database.settings_store import SettingsStore
+
+        changes = []
+        self.store.connect(lambda table, key: changes.append((table, key)))
+        self.store.set_pref("layout", "compact")
+        self.store.set_pref("layout", "compact")
+        self.assertEqual(changes, [("preferences", "layout")])
+
+        other = SettingsStore(self.path)
+        try:
+            other.set_extension_enabled("ai", False)
+            other.flush()
+        finally:
+            other.close()
+        self.store.refresh()
+        self.assertEqual(changes, [("preferences", "layout"), ("extensions", "ai")])
+
+    def test_pending_writes_survive_reload_and_close(self):
+        """Test that unflushed writes win over a reload and are saved on close."""
+        from cloud.ivanbotty.database.settings_store import SettingsStore
+
+        other = SettingsStore(self.path)
+        try:
+            self.store.set_pref("layout", "default")
+            other.set_pref("layout", "compact")
+            other.flush()
+            self.store.refresh()
+            self.assertEqual(self.store.get_pref("layout"), "default")
+        finally:
+            other.close()
+
+        self.store.close()
+        self.store = SettingsStore(self.path)
+        self.assertEqual(self.store.get_pref("layout"), "default")
 
 
 class TestMathServicePerformance(unittest.TestCase):
@@ -168,6 +415,310 @@ class TestLoadClassInstancePerformance(unittest.TestCase):
         self.assertIs(instance1, instance2)
 
 
+class TestAIResponseCache(unittest.TestCase):
+    """Test the persistent AI response cache."""
+
+    def setUp(self):
+        """Point the database module at a temporary file."""
+        import tempfile
+        from cloud.ivanbotty.database import sqlite3 as db
+
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_patch = patch.object(db, "DB_PATH", os.path.join(self.tmpdir.name, "settings.db"))
+        db.close_store()
+        self.db_patch.start()
+        db.init_db()
+
+    def tearDown(self):
+        """Close the temporary database."""
+        from cloud.ivanbotty.database import sqlite3 as db
+
+        db.close_store()
+        self.db_patch.stop()
+        self.tmpdir.cleanup()
+
+    def test_key_normalizes_question(self):
+        """Test that trivially different questions share a key."""
+        from cloud.ivanbotty.Launcher.helper.response_cache import make_key
+
+        key1 = make_key("model", "ask  What is   Python?", "prompt")
+        key2 = make_key("model", "ask what is python", "prompt")
+        self.assertEqual(key1, key2)
+        self.assertNotEqual(key1, make_key("other-model", "ask what is python", "prompt"))
+        self.assertNotEqual(key1, make_key("model", "ask what is python", "new prompt"))
+
+    def test_hit_after_put(self):
+        """Test that stored answers are returned from memory and database."""
+        from cloud.ivanbotty.Launcher.helper.response_cache import AIResponseCache
+
+        cache = AIResponseCache()
+        self.assertIsNone(cache.get("model", "ask capital of France", "prompt"))
+        cache.put("model", "ask capital of France", "prompt", "Paris")
+        self.assertEqual(cache.get("model", "ask capital of France?", "prompt"), "Paris")
+
+        # A fresh instance has an empty memory level but shares the database
+        self.assertEqual(AIResponseCache().get("model", "ask capital of France", "prompt"), "Paris")
+
+    def test_size_eviction(self):
+        """Test that only the configured number of entries is kept."""
+        from cloud.ivanbotty.Launcher.helper.response_cache import AIResponseCache
+
+        cache = AIResponseCache(max_entries=2, memory_entries=1)
+        for i in range(4):
+            cache.put("model", f"ask question {i}", "prompt", f"answer {i}")
+        self.assertEqual(len(cache._memory), 1)
+
+        fresh = AIResponseCache()
+        hits = [fresh.get("model", f"ask question {i}", "prompt") for i in range(4)]
+        self.assertEqual(sum(hit is not None for hit in hits), 2)
+
+    def test_ttl_expiry(self):
+        """Test that expired entries are not returned."""
+        from cloud.ivanbotty.Launcher.helper.response_cache import AIResponseCache
+
+        AIResponseCache().put("model", "ask old question", "prompt", "old answer")
+        with patch("time.time", return_value=time.time() + 3600):
+            self.assertIsNone(AIResponseCache(ttl=60).get("model", "ask old question", "prompt"))
+
+    def test_ttl_expiry_in_memory(self):
+        """Test that expired entries are not served from memory either."""
+        from cloud.ivanbotty.Launcher.helper.response_cache import AIResponseCache
+
+        cache = AIResponseCache(ttl=60)
+        cache.put("model", "ask old question", "prompt", "old answer")
+        self.assertEqual(cache.get("model", "ask old question", "prompt"), "old answer")
+        with patch("time.time", return_value=time.time() + 3600):
+            self.assertIsNone(cache.get("model", "ask old question", "prompt"))
+        self.assertEqual(len(cache._memory), 0)
+
+    def test_clear(self):
+        """Test that clearing removes entries from both levels."""
+        from cloud.ivanbotty.Launcher.helper.response_cache import AIResponseCache
+
+        cache = AIResponseCache()
+        cache.put("model", "ask question", "prompt", "answer")
+        cache.clear()
+        self.assertIsNone(cache.get("model", "ask question", "prompt"))
+
+
+@unittest.skipUnless(shutil.which("openssl"), "openssl is required to create a test certificate")
+class TestConnectionWarmUp(unittest.TestCase):
+    """Test AI connection warm-up against a local TLS stub server."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Start an HTTPS server answering like the Gemini API."""
+        import ssl
+        import subprocess
+        import tempfile
+        import threading
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        cls.tmpdir = tempfile.TemporaryDirectory()
+        cert = os.path.join(cls.tmpdir.name, "cert.pem")
+        key = os.path.join(cls.tmpdir.name, "key.pem")
+        subprocess.run(
+            ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+             "-subj", "/CN=localhost", "-addext", "subjectAltName=DNS:localhost",
+             "-keyout", key, "-out", cert],
+            check=True, capture_output=True,
+        )
+
+        class StubHandler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers["Content-Length"]))
+                if "slow" in self.path:
+                    time.sleep(2)
+                if "gateway" in self.path:
+                    body = b"<html><body>502 Bad Gateway</body></html>"
+                    self.send_response(502)
+                    self.send_header("Content-Type", "text/html")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                    return
+                body = b'{"candidates": [{"content": {"parts": [{"text": "Paris"}]}}]}'
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                # Close the connection without announcing it, like an idle
+                # timeout on the server side
+                if "close" in self.path:
+                    self.close_connection = True
+
+            def log_message(self, *args):
+                pass
+
+        class CountingServer(ThreadingHTTPServer):
+            connections = 0
+
+            def get_request(self):
+                CountingServer.connections += 1
+                return super().get_request()
+
+        server_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        server_context.load_cert_chain(cert, key)
+        cls.server = CountingServer(("localhost", 0), StubHandler)
+        cls.server.socket = server_context.wrap_socket(cls.server.socket, server_side=True)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+        cls.endpoint = f"https://localhost:{cls.server.server_address[1]}"
+        cls.client_context = ssl.create_default_context(cafile=cert)
+
+    @classmethod
+    def tearDownClass(cls):
+        """Stop the stub server."""
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.tmpdir.cleanup()
+
+    def _post(self, pool):
+        """Send a request and check that it succeeded."""
+        status, _ = pool.request("POST", "/v1beta/models/m:generateContent", body=b"{}")
+        self.assertEqual(status, 200)
+
+    def test_warm_pool_skips_handshake(self):
+        """Test that the first request reuses the warmed-up connection."""
+        from cloud.ivanbotty.Launcher.helper.https_pool import KeepAliveHTTPSPool
+
+        cold_pool = KeepAliveHTTPSPool(self.endpoint, ssl_context=self.client_context)
+        self.assertEqual(cold_pool.handshakes, 0)
+        self._post(cold_pool)
+        self.assertEqual(cold_pool.handshakes, 1)
+
+        warm_pool = KeepAliveHTTPSPool(self.endpoint, ssl_context=self.client_context)
+        warm_pool.warm().join()
+        self.assertEqual(warm_pool.idle_connections(), 1)
+        connections = type(self.server).connections
+        self._post(warm_pool)
+        self._post(warm_pool)
+
+        # Both requests went over the single warmed-up connection
+        self.assertEqual(warm_pool.handshakes, 1)
+        self.assertEqual(type(self.server).connections, connections)
+        cold_pool.close()
+        warm_pool.close()
+
+    def test_idle_timeout_drops_connection(self):
+        """Test that warmed connections are not kept past the idle timeout."""
+        from cloud.ivanbotty.Launcher.helper.https_pool import KeepAliveHTTPSPool
+
+        pool = KeepAliveHTTPSPool(self.endpoint, idle_timeout=0.05, ssl_context=self.client_context)
+        pool.warm().join()
+        time.sleep(0.1)
+        self.assertEqual(pool.idle_connections(), 0)
+        self._post(pool)
+        self.assertEqual(pool.handshakes, 2)
+
+    def test_closed_idle_connection_is_not_reused(self):
+        """Test that a connection closed by the server is dropped before use."""
+        from cloud.ivanbotty.Launcher.helper.https_pool import KeepAliveHTTPSPool
+
+        pool = KeepAliveHTTPSPool(self.endpoint, ssl_context=self.client_context)
+        status, _ = pool.request("POST", "/v1beta/models/close:generateContent", body=b"{}")
+        self.assertEqual(status, 200)
+        self.assertEqual(pool.idle_connections(), 1)
+        time.sleep(0.1)
+
+        self._post(pool)
+        self.assertEqual(pool.handshakes, 2)
+        pool.close()
+
+    def test_written_request_is_not_sent_again(self):
+        """Test that only a request failing before being written is retried."""
+        import http.client
+
+        from cloud.ivanbotty.Launcher.helper.https_pool import KeepAliveHTTPSPool
+
+        pool = KeepAliveHTTPSPool(self.endpoint, ssl_context=self.client_context)
+        for written, sends in ((True, 1), (False, 2)):
+            conn = MagicMock(written=written)
+            pool._idle = [(conn, time.monotonic())]
+            with patch(
+                "cloud.ivanbotty.Launcher.helper.https_pool._is_stale", return_value=False
+            ), patch.object(pool, "_new_connection"), patch.object(
+                pool, "_send", side_effect=[http.client.RemoteDisconnected(), (200, b"{}")]
+            ) as send:
+                if written:
+                    with self.assertRaises(http.client.RemoteDisconnected):
+                        pool.request("POST", "/v1beta/models/m:generateContent", body=b"{}")
+                else:
+                    pool.request("POST", "/v1beta/models/m:generateContent", body=b"{}")
+            self.assertEqual(send.call_count, sends)
+
+    def test_cancel_aborts_request(self):
+        """Test that cancelling a scope aborts its request in progress."""
+        import threading
+        from cloud.ivanbotty.Launcher.helper.https_pool import (
+            CancelScope,
+            KeepAliveHTTPSPool,
+            RequestCancelled,
+        )
+
+        pool = KeepAliveHTTPSPool(self.endpoint, ssl_context=self.client_context)
+        scope = CancelScope()
+        errors = []
+
+        def ask():
+            with scope:
+                try:
+                    pool.request("POST", "/v1beta/models/slow:generateContent", body=b"{}")
+                except RequestCancelled as e:
+                    errors.append(e)
+
+        start = time.perf_counter()
+        thread = threading.Thread(target=ask)
+        thread.start()
+        time.sleep(0.2)
+        scope.cancel()
+        thread.join(5)
+
+        self.assertEqual(len(errors), 1)
+        self.assertLess(time.perf_counter() - start, 1.5)
+        self.assertIsNone(CancelScope.current())
+        self.assertEqual(pool.idle_connections(), 0)
+        # Later requests of the scope fail without being sent
+        with scope, self.assertRaises(RequestCancelled):
+            pool.request("POST", "/v1beta/models/m:generateContent", body=b"{}")
+        self.assertEqual(pool.handshakes, 1)
+
+    @patch("cloud.ivanbotty.database.sqlite3.get_api_key", return_value="test-key")
+    def test_ai_service_uses_warm_connection(self, mock_get_api_key):
+        """Test that the AI service answers over the warmed-up connection."""
+        from cloud.ivanbotty.Launcher.services.ai_service import AIService
+
+        service = AIService(endpoint=self.endpoint, ssl_context=self.client_context)
+        service.cache = MagicMock()
+        service.cache.get.return_value = None
+        service.pool.warm().join()
+
+        connections = type(self.server).connections
+        self.assertEqual(service.ask("ask capital of France"), "Paris")
+        self.assertEqual(type(self.server).connections, connections)
+        self.assertEqual(service.pool.handshakes, 1)
+        service.cache.put.assert_called_once()
+        service.pool.close()
+
+    @patch("cloud.ivanbotty.database.sqlite3.get_api_key", return_value="test-key")
+    def test_ai_service_reports_html_error_page(self, mock_get_api_key):
+        """Test that an HTML error page fails with the HTTP status."""
+        from cloud.ivanbotty.Launcher.services.ai_service import AIService
+
+        service = AIService(endpoint=self.endpoint, ssl_context=self.client_context)
+        service.cache = MagicMock()
+        service.cache.get.return_value = None
+        service.model = "gateway"
+
+        with self.assertRaisesRegex(RuntimeError, "AI request failed: HTTP 502"):
+            service.ask("ask capital of France")
+        service.cache.put.assert_not_called()
+        service.pool.close()
+
+
 class TestRowWidgetPerformance(unittest.TestCase):
     """Test performance improvements in Row widget."""
 
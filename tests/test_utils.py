@@ -4,6 +4,7 @@ These tests verify that the basic utility functions can be imported
 and executed without errors.
 """
 
+import json
 import sys
 import os
 import unittest
@@ -119,6 +120,177 @@ class TestCommonUtils(unittest.TestCase):
         self.assertIsNotNone(RESOURCE_FILE)
 
 
+class TestSharedIndex(unittest.TestCase):
+    """Test cases for the sealed memfd index handoff."""
+
+    def test_sealed_memfd_round_trip(self):
+        """Test that a sealed memfd is immutable and decodes to the index."""
+        from cloud.ivanbotty.utils.shared_index import create_sealed_memfd, is_sealed, read_index
+
+        apps = [{"name": "Firefox", "desktop_id": "firefox.desktop"}]
+        fd = create_sealed_memfd(json.dumps(apps).encode("utf-8"))
+        try:
+            self.assertTrue(is_sealed(fd))
+            self.assertEqual(read_index(fd), apps)
+            with self.assertRaises(OSError):
+                os.pwrite(fd, b"x", 0)
+            with self.assertRaises(OSError):
+                os.ftruncate(fd, 0)
+        finally:
+            os.close(fd)
+
+    def test_unsealed_descriptor_is_rejected(self):
+        """Test that mutable files are not mapped as an index."""
+        import tempfile
+        from cloud.ivanbotty.utils.shared_index import map_index
+
+        with tempfile.TemporaryFile() as f:
+            f.write(b"[]")
+            f.flush()
+            with self.assertRaises(ValueError):
+                map_index(f.fileno())
+
+
+class TestStartupProfile(unittest.TestCase):
+    """Test cases for the startup profiler and the startup import budget."""
+
+    # Seconds importing the entry point may add to a bare interpreter start
+    IMPORT_BUDGET = 0.5
+
+    def test_trace_records_spans_only_when_enabled(self):
+        """Test that spans are written in the Chrome trace format."""
+        import tempfile
+        import time
+        from cloud.ivanbotty.utils.startup_profile import StartupProfiler
+
+        profiler = StartupProfiler()
+        with profiler.span("ignored"):
+            pass
+        self.assertIsNone(profiler.write())
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "trace.json")
+            start = time.perf_counter()
+            profiler.enable(path, origin=start)
+            profiler.record("import entry point", start, start + 0.002)
+            with profiler.span("database"):
+                pass
+            profiler.begin("first frame")
+            profiler.end("first frame")
+            self.assertEqual(profiler.write(), path)
+            with open(path) as f:
+                events = json.load(f)["traceEvents"]
+
+        self.assertEqual(
+            [e["name"] for e in events], ["import entry point", "database", "first frame"]
+        )
+        self.assertTrue(all(e["ph"] == "X" and e["dur"] >= 0 for e in events))
+        self.assertAlmostEqual(events[0]["dur"], 2000, delta=1)
+
+    def test_profile_startup_option(self):
+        """Test that --profile-startup takes an optional trace path."""
+        from cloud.ivanbotty.utils.app_init import parse_args
+        from cloud.ivanbotty.utils.startup_profile import DEFAULT_TRACE_PATH
+
+        self.assertIsNone(parse_args([]).profile_startup)
+        self.assertEqual(parse_args(["--profile-startup"]).profile_startup, DEFAULT_TRACE_PATH)
+        self.assertEqual(
+            parse_args(["--profile-startup", "/tmp/t.json"]).profile_startup, "/tmp/t.json"
+        )
+
+    def test_entry_point_import_budget(self):
+        """Test that the entry point imports only what the first frame needs, quickly."""
+        import subprocess
+        import time
+
+        root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+        code = (
+            "import sys\n"
+            "import cloud.ivanbotty.Launcher.__main__\n"
+            "deferred = ['yaml', 'cloud.ivanbotty.Launcher.app', 'cloud.ivanbotty.Wizard.app']\n"
+            "print([m for m in deferred if m in sys.modules])\n"
+        )
+
+        def run(source):
+            start = time.perf_counter()
+            result = subprocess.run(
+                [sys.executable, "-c", source], cwd=root, capture_output=True, text=True, check=True
+            )
+            return time.perf_counter() - start, result.stdout.strip()
+
+        baseline = min(run("pass")[0] for _ in range(3))
+        elapsed, loaded = min(run(code) for _ in range(3))
+        self.assertEqual(loaded, "[]")
+        self.assertLess(
+            elapsed - baseline,
+            self.IMPORT_BUDGET,
+            f"Importing the entry point took {elapsed - baseline:.3f}s",
+        )
+
+
+class TestHeap(unittest.TestCase):
+    """Test cases for heap freezing and per-query allocation traces."""
+
+    def test_freeze_heap(self):
+        """Test that live objects are moved out of the collected generations."""
+        import gc
+
+        from cloud.ivanbotty.utils.heap import freeze_heap
+
+        self.addCleanup(gc.unfreeze)
+        index = [{"name": f"app {i}"} for i in range(1000)]
+        self.assertGreaterEqual(freeze_heap("test"), len(index))
+
+    def test_refreeze_collects_cycles_of_replaced_index(self):
+        """Test that refreezing frees reference cycles frozen with an old index."""
+        import gc
+        import weakref
+
+        from cloud.ivanbotty.utils.heap import freeze_heap
+
+        class Node:
+            pass
+
+        self.addCleanup(gc.unfreeze)
+        node = Node()
+        node.cycle = node
+        ref = weakref.ref(node)
+        freeze_heap("old index")
+        del node
+        freeze_heap("new index")
+        self.assertIsNotNone(ref())
+        freeze_heap("new index", refreeze=True)
+        self.assertIsNone(ref())
+
+    def test_query_allocation_report(self):
+        """Test that a query reports its transient and retained allocations."""
+        from cloud.ivanbotty.utils.heap import QueryAllocationTracer
+
+        tracer = QueryAllocationTracer()
+        self.assertIs(tracer.measure("a"), tracer.measure("b"))
+        tracer.enable()
+        self.addCleanup(tracer.disable)
+        kept = []
+        with tracer.measure("fire"):
+            transient = [str(i) for i in range(10000)]
+            del transient
+            kept.append(bytearray(100000))
+
+        report = tracer.reports[-1]
+        self.assertEqual(report["query"], "fire")
+        self.assertGreater(report["peak_bytes"], 100000 + 10000 * 40)
+        self.assertGreaterEqual(report["retained_bytes"], 100000)
+        self.assertIn("test_utils.py", report["top"][0]["site"])
+        self.assertEqual(tracer.summary()["queries"], 1)
+
+    def test_trace_allocations_option(self):
+        """Test that the launcher accepts --trace-allocations."""
+        from cloud.ivanbotty.utils.app_init import parse_args
+
+        self.assertTrue(parse_args(["--trace-allocations"]).trace_allocations)
+        self.assertFalse(parse_args([]).trace_allocations)
+
+
 class TestDatabaseModule(unittest.TestCase):
     """Test cases for database module."""
 